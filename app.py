@@ -1,13 +1,30 @@
+import base64
 import csv
+import gzip
+import hashlib
+import json
 import os
+import shutil
+import sqlite3
 import threading
 import time
 import traceback
 import subprocess
-from typing import Dict, List, Optional, Set, Tuple
+from array import array
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows 로컬 실행: 프로세스 하나라고 보고 잠금 없이 리더가 된다.
+    fcntl = None
 
 import requests
-from flask import Flask, abort, send_file
+from flask import Flask, Response, abort, request, send_file, stream_with_context
+
+from candle_archive import CandleArchive
+from resilience import CircuitOpenError, ResilientEndpoint, RetryPolicy, SingleFlight, TransientError, check_http_status
 
 app = Flask(__name__)
 
@@ -32,13 +49,21 @@ LAST_CANDIDATE_CANDLE_TS = 0
 
 SIGNAL_INTERVAL = 120
 ONCHAIN_INTERVAL = 300
+ONCHAIN_RUN_TIMEOUT = 240  # 엔진 1회 실행을 강제 종료하는 시간(초)
+# 엔진이 스스로 수집/추적을 멈추고 결과를 쓰는 시간(초). 강제 종료 전에 CSV/DB 쓰기를 끝낼 여유를 남긴다.
+ONCHAIN_RUN_DEADLINE = 180
 CANDIDATE_ALERT_COOLDOWN = 7200
 ONCHAIN_CHART_COOLDOWN = 1800
 ONCHAIN_DETAIL_CSV = "seed_outflows_hub_candidates.csv"
 ONCHAIN_FLOW_CSV = "flow_exchange_hub_candidates.csv"
+ONCHAIN_DB_PATH = "repeat_wallets.db"
+# 예: "1,56:seed_addresses_bsc.txt:address_book_bsc.json". 체인이 둘 이상이면 엔진을 멀티 체인 모드로 띄운다.
+ONCHAIN_CHAINS = os.environ.get("ONCHAIN_CHAINS", "1")
 ONCHAIN_FOCUS_TTL = 2 * 60 * 60  # 온체인 거래소 유입 후 2시간 집중 감시
 ONCHAIN_FOCUS_MAX_AGE = 12 * 60 * 60  # CSV에서 최근 12시간 이내 flow만 등록
 ONCHAIN_FOCUS_SYMBOLS: Dict[str, dict] = {}
+ONCHAIN_FOCUS_LOCK = threading.RLock()
+ONCHAIN_RESULT_KEEP = 500  # 결과 채널이 기억하는 최근 flow 이벤트 수
 SYMBOL_REFRESH_INTERVAL = 900
 TOP_SYMBOL_COUNT = 20
 VOLUME_POOL_COUNT = 50  # 거래량 상위 50개 중 변동성 높은 20개를 최종 감시
@@ -90,22 +115,271 @@ MAX_RECENT12_TREND_ABS = 3.5
 ENV_1H_RANGE_MAX = 9.0
 ENV_1H_LAST3_MOVE_MAX = 6.0
 ENV_1H_COMPRESSION_MAX = 1.25
+MAX_ABOVE_SUPPORT = 2.8
+
+# 온체인 거래소 유입이 확인된 코인(relaxed=True)에만 쓰는 완화 조건
+RELAXED_MIN_RANGE_12C = 0.05
+RELAXED_RANGE_12C_MAX = 5.5
+RELAXED_MAX_RECENT12_TREND_ABS = 6.0
+RELAXED_MAX_RECENT_6C_SURGE = 8.0
+RELAXED_MAX_LAST2_MOVE = 2.4
+RELAXED_MAX_SINGLE_CANDLE_RANGE = 5.5
+RELAXED_MIN_SUPPORT_TOUCHES = 2
+RELAXED_VOLUME_ALIVE_MIN = 0.45
+RELAXED_VOLUME_ALIVE_MAX = 3.20
+RELAXED_MAX_BASIS_ABS = 0.80
+RELAXED_MAX_ABOVE_SUPPORT = 5.0
+RELAXED_CANDIDATE_MIN_SCORE = 4
 
 # 온체인 실전형 필터
 ONCHAIN_MIN_SHARED = 3
 ONCHAIN_MIN_SCORE = 18
 ALLOWED_PROTOCOL_SWAP_ACTIONS = {"BUY", "SELL", "SWAP"}
 
+# /api/onchain/<name> : onchain_results 테이블 조회
+API_RESULT_KINDS = {"outflows": "outflow", "flows": "flow"}
+API_SORT_COLUMNS = {"time": "timestamp", "amount": "amount_float", "hops": "hop_count"}
+API_DEFAULT_LIMIT = 100
+API_MAX_LIMIT = 1000
+API_GZIP_MIN_BYTES = 1024
+
+# /download, /view 용 gzip 사본. 리더가 엔진 실행 뒤에 만들어 두고, 요청 경로에서는 압축하지 않는다.
+FILE_GZIP_CACHE_DIR = os.environ.get("FILE_GZIP_CACHE_DIR", ".gzip_cache")
+FILE_GZIP_MIN_BYTES = 1024
+FILE_GZIP_EXTENSIONS = (".csv", ".json", ".db")
+FILE_GZIP_LOCK = threading.Lock()
+
+# /download/repeat_wallets.db 는 라이브 DB 대신 online backup API로 뜬 스냅샷을 보낸다.
+DB_SNAPSHOT_PATH = os.environ.get("DB_SNAPSHOT_PATH", "repeat_wallets_snapshot.db")
+DB_SNAPSHOT_PAGES_PER_STEP = 256
+DB_SNAPSHOT_LOCK = threading.Lock()
+
 DOWNLOADABLE_ONCHAIN_FILES = {
     "hub_candidates.csv": "전체 허브 후보 랭킹",
     "seed_outflows_hub_candidates.csv": "시드 출금 상세",
     "flow_exchange_hub_candidates.csv": "flow 거래소 도착 결과",
     "active_hubs_hub_candidates.csv": "현재 활성 허브 목록",
     "active_hub_events_hub_candidates.csv": "활성 허브 이벤트",
+    "flow_event_log_hub_candidates.csv": "flow 거래소 도착 누적 로그",
+    "active_hub_event_log_hub_candidates.csv": "활성 허브 이벤트 누적 로그",
     "repeat_wallets.db": "SQLite 원본 DB",
     "address_book.json": "수동 거래소 주소록",
     "auto_seeds.json": "자동 임시 시드 목록",
+    "run_profile_hub_candidates.json": "온체인 실행 단계별 소요 시간 프로파일",
+}
+ONCHAIN_PROFILE_JSON = "run_profile_hub_candidates.json"
+
+# 마감 캔들 로컬 아카이브 (백테스트/스윕 재생용). CANDLE_ARCHIVE_DIR을 비우면 끈다.
+CANDLE_ARCHIVE_DIR = os.environ.get("CANDLE_ARCHIVE_DIR", "candle_archive")
+CANDLE_ARCHIVE: Optional[CandleArchive] = CandleArchive(CANDLE_ARCHIVE_DIR) if CANDLE_ARCHIVE_DIR else None
+
+# 재시작 후 웜스타트용 시세 루프 상태 스냅샷
+STATE_SNAPSHOT_PATH = os.environ.get("SIGNAL_STATE_SNAPSHOT", "signal_state_snapshot.json")
+STATE_SNAPSHOT_INTERVAL = 60
+STATE_SNAPSHOT_LOCK = threading.Lock()
+
+# gunicorn 워커 여러 개 중 flock을 잡은 한 프로세스만 시세/온체인 루프를 돌린다.
+LEADER_LOCK_PATH = os.environ.get("BACKGROUND_LEADER_LOCK", "background_loops.lock")
+LEADER_RETRY_SECONDS = 15
+LEADER_STATE = {"is_leader": False, "handle": None, "since": 0.0}
+
+# /metrics (Prometheus text format). 외부 라이브러리 없이 프로세스 메모리에 누적한다.
+# 루프는 리더 워커에서만 돌기 때문에 리더가 자기 레지스트리를 스냅샷 파일로 내보내고,
+# 다른 워커는 스크랩 때 그 파일을 자기 값과 합쳐서 응답한다.
+METRICS_SNAPSHOT_PATH = os.environ.get("METRICS_SNAPSHOT_PATH", "metrics_snapshot.json")
+METRICS_SNAPSHOT_INTERVAL = 15
+METRICS_SNAPSHOT_MAX_AGE = 120
+METRIC_DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 240.0, 600.0)
+METRIC_DEFS: Dict[str, Tuple[str, str]] = {
+    "signal_loop_duration_seconds": ("histogram", "signal_loop 1회 소요 시간"),
+    "signal_symbols_scanned_total": ("counter", "후보 판정한 종목 수"),
+    "signal_candidates_total": ("counter", "눌림 확인까지 통과한 후보 수"),
+    "signal_cooldown_skips_total": ("counter", "쿨다운으로 건너뛴 후보 수"),
+    "signal_loop_errors_total": ("counter", "signal_loop 예외 수"),
+    "kline_request_duration_seconds": ("histogram", "MEXC kline 요청 지연"),
+    "kline_request_errors_total": ("counter", "MEXC kline 요청 실패 수"),
+    "upstream_retry_events_total": ("counter", "외부 API 재시도/한도/서킷 이벤트 수"),
+    "upstream_circuit_open": ("gauge", "외부 API 서킷이 열려 있으면 1"),
+    "kline_fetch_dedup_total": ("counter", "같은 kline 요청을 합치거나 재사용해 아낀 호출 수"),
+    "onchain_run_duration_seconds": ("histogram", "온체인 엔진 1회 실행 시간"),
+    "onchain_run_timeouts_total": ("counter", "온체인 엔진 timeout 수"),
+    "onchain_run_failures_total": ("counter", "온체인 엔진 비정상 종료/예외 수"),
+    "onchain_rows_ingested_total": ("counter", "온체인 엔진이 새로 저장한 전송 수"),
+    "onchain_etherscan_calls_total": ("counter", "온체인 엔진 Etherscan 호출 수"),
+    "onchain_result_events_total": ("counter", "온체인 엔진 결과 채널로 받은 이벤트 수"),
+    "stream_events_published_total": ("counter", "/stream 으로 발행한 이벤트 수"),
+    "stream_clients_connected_total": ("counter", "/stream 누적 접속 수"),
+    "alerts_sent_total": ("counter", "텔레그램 알림 전송 성공 수"),
+    "telegram_failures_total": ("counter", "텔레그램 전송 실패 수"),
+    "last_success_age_seconds": ("gauge", "루프 마지막 정상 주기 이후 경과 시간"),
+    "signal_candle_lag_seconds": ("gauge", "마지막 처리 5분봉 마감 이후 경과 시간"),
+    "background_loops_leader": ("gauge", "이 프로세스가 백그라운드 루프 리더면 1"),
+    "metrics_snapshot_age_seconds": ("gauge", "팔로워 워커가 합친 리더 메트릭 스냅샷의 나이"),
 }
+METRICS_LOCK = threading.Lock()
+METRIC_VALUES: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+METRIC_HISTOGRAMS: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], dict] = {}
+LAST_LOOP_SUCCESS_AT: Dict[str, float] = {}
+
+
+def metric_inc(name: str, value: float = 1.0, **labels: str) -> None:
+    key = (name, tuple(sorted(labels.items())))
+    with METRICS_LOCK:
+        METRIC_VALUES[key] = METRIC_VALUES.get(key, 0.0) + value
+
+
+def metric_observe(name: str, value: float, **labels: str) -> None:
+    key = (name, tuple(sorted(labels.items())))
+    with METRICS_LOCK:
+        hist = METRIC_HISTOGRAMS.get(key)
+        if hist is None:
+            hist = {"buckets": [0] * len(METRIC_DEFAULT_BUCKETS), "sum": 0.0, "count": 0}
+            METRIC_HISTOGRAMS[key] = hist
+        for idx, bound in enumerate(METRIC_DEFAULT_BUCKETS):
+            if value <= bound:
+                hist["buckets"][idx] += 1
+        hist["sum"] += value
+        hist["count"] += 1
+
+
+def mark_loop_success(loop: str) -> None:
+    LAST_LOOP_SUCCESS_AT[loop] = time.time()
+
+
+def format_metric_labels(labels: Tuple[Tuple[str, str], ...], extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+    inner = ",".join(f'{k}="{str(v)}"' for k, v in items)
+    return "{" + inner + "}"
+
+
+def collect_metric_state() -> dict:
+    """이 프로세스의 원시 메트릭 값. 파생 게이지는 렌더링 시점에 계산한다."""
+    with METRICS_LOCK:
+        values = dict(METRIC_VALUES)
+        histograms = {k: {"buckets": list(v["buckets"]), "sum": v["sum"], "count": v["count"]} for k, v in METRIC_HISTOGRAMS.items()}
+    return {
+        "values": values,
+        "histograms": histograms,
+        "loop_success_at": dict(LAST_LOOP_SUCCESS_AT),
+        "candle_ts": LAST_CANDIDATE_CANDLE_TS,
+        "circuit_open": {name: endpoint.breaker.is_open for name, endpoint in list(MEXC_ENDPOINTS.items())},
+    }
+
+
+def write_metrics_snapshot(path: str = METRICS_SNAPSHOT_PATH) -> None:
+    """리더 레지스트리를 임시 파일에 쓴 뒤 os.replace로 바꿔 끼운다."""
+    state = collect_metric_state()
+    payload = {
+        "pid": os.getpid(),
+        "written_at": time.time(),
+        "values": [[name, list(labels), value] for (name, labels), value in state["values"].items()],
+        "histograms": [[name, list(labels), hist] for (name, labels), hist in state["histograms"].items()],
+        "loop_success_at": state["loop_success_at"],
+        "candle_ts": state["candle_ts"],
+        "circuit_open": state["circuit_open"],
+    }
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def load_metrics_snapshot(path: str = METRICS_SNAPSHOT_PATH, max_age: float = METRICS_SNAPSHOT_MAX_AGE) -> Optional[dict]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"[METRICS] 스냅샷 읽기 실패: {e}", flush=True)
+        return None
+    # 리더가 죽은 뒤 남은 스냅샷은 합치지 않는다. 새 리더가 곧 다시 쓴다.
+    if time.time() - float(payload.get("written_at") or 0) > max_age:
+        return None
+    return payload
+
+
+def merge_metrics_snapshot(state: dict, snapshot: dict) -> None:
+    """카운터/히스토그램은 더하고, 리더만 아는 게이지 원천값은 리더 것을 쓴다."""
+    values = state["values"]
+    for name, labels, value in snapshot.get("values") or []:
+        key = (name, tuple(tuple(item) for item in labels))
+        if METRIC_DEFS.get(name, ("",))[0] == "gauge":
+            values[key] = float(value)
+        else:
+            values[key] = values.get(key, 0.0) + float(value)
+    histograms = state["histograms"]
+    for name, labels, hist in snapshot.get("histograms") or []:
+        key = (name, tuple(tuple(item) for item in labels))
+        mine = histograms.get(key)
+        if mine is None:
+            histograms[key] = {"buckets": list(hist["buckets"]), "sum": float(hist["sum"]), "count": int(hist["count"])}
+            continue
+        mine["buckets"] = [a + b for a, b in zip(mine["buckets"], hist["buckets"])]
+        mine["sum"] += float(hist["sum"])
+        mine["count"] += int(hist["count"])
+    for loop, ts in (snapshot.get("loop_success_at") or {}).items():
+        state["loop_success_at"][loop] = max(float(ts), state["loop_success_at"].get(loop, 0.0))
+    state["candle_ts"] = max(state["candle_ts"] or 0, snapshot.get("candle_ts") or 0)
+    state["circuit_open"] = dict(snapshot.get("circuit_open") or {})
+    values[("background_loops_leader", (("pid", str(snapshot.get("pid"))),))] = 1.0
+
+
+def render_metrics(snapshot_path: str = METRICS_SNAPSHOT_PATH) -> str:
+    now = time.time()
+    state = collect_metric_state()
+    values = state["values"]
+    histograms = state["histograms"]
+    if not LEADER_STATE["is_leader"]:
+        snapshot = load_metrics_snapshot(snapshot_path)
+        if snapshot is not None:
+            merge_metrics_snapshot(state, snapshot)
+            values[("metrics_snapshot_age_seconds", ())] = now - float(snapshot["written_at"])
+
+    for loop, ts in state["loop_success_at"].items():
+        values[("last_success_age_seconds", (("loop", loop),))] = now - ts
+    if state["candle_ts"]:
+        # kline ts는 5분봉 시작 시각(ms). 마감 시각 = 시작 + 5분
+        values[("signal_candle_lag_seconds", ())] = now - (state["candle_ts"] / 1000.0 + 300)
+
+    values[("background_loops_leader", (("pid", str(os.getpid())),))] = 1.0 if LEADER_STATE["is_leader"] else 0.0
+    for endpoint_name, is_open in state["circuit_open"].items():
+        values[("upstream_circuit_open", (("endpoint", endpoint_name),))] = 1.0 if is_open else 0.0
+
+    lines: List[str] = []
+    for name, (kind, help_text) in METRIC_DEFS.items():
+        series = sorted(k for k in values if k[0] == name)
+        hist_series = sorted(k for k in histograms if k[0] == name)
+        if not series and not hist_series:
+            continue
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for key in series:
+            lines.append(f"{name}{format_metric_labels(key[1])} {values[key]:.6g}")
+        for key in hist_series:
+            hist = histograms[key]
+            for bound, count in zip(METRIC_DEFAULT_BUCKETS, hist["buckets"]):
+                lines.append(f"{name}_bucket{format_metric_labels(key[1], ('le', f'{bound:g}'))} {count}")
+            lines.append(f"{name}_bucket{format_metric_labels(key[1], ('le', '+Inf'))} {hist['count']}")
+            lines.append(f"{name}_sum{format_metric_labels(key[1])} {hist['sum']:.6g}")
+            lines.append(f"{name}_count{format_metric_labels(key[1])} {hist['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def record_onchain_profile_metrics(path: str = ONCHAIN_PROFILE_JSON) -> None:
+    """온체인 서브프로세스가 남긴 run profile JSON에서 이번 실행 카운터를 가져온다."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            counters = (json.load(f) or {}).get("counters") or {}
+    except Exception as e:
+        print(f"[METRICS] 온체인 프로파일 읽기 실패: {e}", flush=True)
+        return
+    metric_inc("onchain_rows_ingested_total", float(counters.get("rows_written.transfers", 0)))
+    metric_inc("onchain_etherscan_calls_total", float(counters.get("etherscan.calls", 0)))
+    metric_inc("alerts_sent_total", float(counters.get("telegram.sent", 0)), source="onchain")
+    metric_inc("telegram_failures_total", float(counters.get("telegram.failures", 0)), source="onchain")
 
 
 def get_file_size_text(path: str) -> str:
@@ -175,10 +449,10 @@ def build_onchain_files_html() -> str:
     """
 
 
-def send_telegram(msg: str) -> None:
+def send_telegram(msg: str) -> bool:
     if not TOKEN or not CHAT_ID:
         print("텔레그램 환경변수 없음", flush=True)
-        return
+        return False
 
     url = f"https://api.telegram.org/bot{TOKEN}/sendMessage"
 
@@ -187,11 +461,57 @@ def send_telegram(msg: str) -> None:
         print(f"텔레그램 전송: {r.status_code}", flush=True)
     except Exception as e:
         print(f"텔레그램 오류: {e}", flush=True)
+        metric_inc("telegram_failures_total", source="signal")
+        return False
+    if r.status_code != 200:
+        metric_inc("telegram_failures_total", source="signal")
+        return False
+    metric_inc("alerts_sent_total", source="signal")
+    return True
+
+
+def count_upstream_event(endpoint: str, kind: str) -> None:
+    metric_inc("upstream_retry_events_total", endpoint=endpoint, kind=kind)
+
+
+MEXC_ENDPOINTS: Dict[str, ResilientEndpoint] = {}
+MEXC_ENDPOINTS_LOCK = threading.Lock()
+MEXC_REQUEST_TIMEOUT = 10
+
+
+def mexc_endpoint(name: str) -> ResilientEndpoint:
+    """MEXC API 경로별 재시도 정책/서킷. 한 경로가 죽어도 다른 경로 호출은 막지 않는다."""
+    with MEXC_ENDPOINTS_LOCK:
+        endpoint = MEXC_ENDPOINTS.get(name)
+        if endpoint is None:
+            endpoint = ResilientEndpoint(
+                name,
+                policy=RetryPolicy(attempts=3, base_delay=0.3, max_delay=2.0, rate_limit_attempts=3, rate_limit_delay=1.0),
+                on_event=count_upstream_event,
+            )
+            MEXC_ENDPOINTS[name] = endpoint
+        return endpoint
+
+
+def mexc_get_json(name: str, url: str, timeout: int = MEXC_REQUEST_TIMEOUT):
+    """MEXC GET 한 번을 재시도/서킷 아래에서 보낸다. 서킷이 열려 있으면 바로 CircuitOpenError."""
+    def once():
+        try:
+            resp = requests.get(url, timeout=timeout)
+        except requests.exceptions.Timeout as e:
+            raise TransientError(f"MEXC {name} timeout after {timeout}s") from e
+        check_http_status(resp, f"MEXC {name}")
+        try:
+            return resp.json()
+        except ValueError as e:
+            raise TransientError(f"MEXC {name} 응답 JSON 파싱 실패") from e
+
+    return mexc_endpoint(name).call(once)
 
 
 def get_spot_symbols() -> Dict[str, str]:
     url = "https://api.mexc.com/api/v3/exchangeInfo"
-    data = requests.get(url, timeout=10).json()
+    data = mexc_get_json("mexc_exchange_info", url)
 
     spot_map: Dict[str, str] = {}
     for s in data.get("symbols", []):
@@ -210,7 +530,7 @@ def get_spot_symbols() -> Dict[str, str]:
 
 def get_futures_bases() -> Set[str]:
     url = "https://contract.mexc.com/api/v1/contract/detail"
-    data = requests.get(url, timeout=10).json()
+    data = mexc_get_json("mexc_contract_detail", url)
 
     futures: Set[str] = set()
     for c in data.get("data", []):
@@ -227,7 +547,7 @@ def get_top_symbols(n: int = 20) -> List[str]:
     그 안에서 24h 변동성 높은 순으로 최종 20개를 선별한다.
     """
     url = "https://api.mexc.com/api/v3/ticker/24hr"
-    data = requests.get(url, timeout=10).json()
+    data = mexc_get_json("mexc_ticker_24hr", url)
 
     usdt_data = []
     for x in data:
@@ -305,9 +625,46 @@ def update_symbols_if_needed(force: bool = False) -> List[str]:
     return CURRENT_SYMBOLS
 
 
-def get_kline(symbol: str, interval: str = "5m", limit: int = 40):
+# 시세 루프와 온체인 차트 분석이 같은 종목 kline을 거의 같은 때 부르므로, 동시 요청은 합치고 몇 초간 재사용한다.
+KLINE_MEMO_SECONDS = 5.0
+
+
+def count_kline_flight(kind: str) -> None:
+    if kind in ("hit", "coalesced"):
+        metric_inc("kline_fetch_dedup_total", kind=kind)
+
+
+KLINE_FLIGHTS = SingleFlight(ttl=KLINE_MEMO_SECONDS, max_entries=512, on_event=count_kline_flight)
+
+
+def fetch_kline(symbol: str, interval: str, limit: int):
     url = f"https://api.mexc.com/api/v3/klines?symbol={symbol}&interval={interval}&limit={limit}"
-    return requests.get(url, timeout=10).json()
+    t0 = time.time()
+    try:
+        data = mexc_get_json("mexc_klines", url)
+        archive_closed_klines(symbol, interval, data)
+        return data
+    except Exception:
+        metric_inc("kline_request_errors_total", interval=interval)
+        raise
+    finally:
+        metric_observe("kline_request_duration_seconds", time.time() - t0, interval=interval)
+
+
+def get_kline(symbol: str, interval: str = "5m", limit: int = 40):
+    """돌려주는 리스트는 다른 호출자와 공유될 수 있으니 고치지 말고 읽기만 한다."""
+    symbol = str(symbol or "").strip().upper()
+    return KLINE_FLIGHTS.do((symbol, interval, int(limit)), lambda: fetch_kline(symbol, interval, int(limit)))
+
+
+def archive_closed_klines(symbol: str, interval: str, data) -> None:
+    """마지막(진행 중) 봉을 뺀 마감봉을 캔들 아카이브에 붙인다. 실패해도 시세 루프는 계속 돈다."""
+    if CANDLE_ARCHIVE is None or not isinstance(data, list) or len(data) < 2:
+        return
+    try:
+        CANDLE_ARCHIVE.append_rows(symbol, interval, data[:-1])
+    except Exception as e:
+        print(f"[ARCHIVE] {symbol} {interval} 저장 실패: {e}", flush=True)
 
 
 def refresh_futures_ticker_cache_if_needed(force: bool = False) -> Dict[str, dict]:
@@ -317,7 +674,7 @@ def refresh_futures_ticker_cache_if_needed(force: bool = False) -> Dict[str, dic
         return FUTURES_TICKER_CACHE
 
     url = "https://contract.mexc.com/api/v1/contract/ticker"
-    data = requests.get(url, timeout=10).json()
+    data = mexc_get_json("mexc_contract_ticker", url)
     ticker_map: Dict[str, dict] = {}
 
     for item in data.get("data", []):
@@ -449,11 +806,141 @@ def has_liquidity_test(candles: List[dict]) -> bool:
     for c in candles:
         upper_ratio = c["upper_wick"] / c["range"] if c["range"] else 0.0
         lower_ratio = c["lower_wick"] / c["range"] if c["range"] else 0.0
-        if c["body_ratio"] <= WICK_TEST_MAX_BODY and max(upper_ratio, lower_ratio) >= WICK_TEST_MIN_RATIO:
+        if is_liquidity_test_candle(c["body_ratio"], max(upper_ratio, lower_ratio)):
             return True
     return False
 
 
+# 후보 판정 게이트. evaluate_candidate / is_pullback_confirmed / is_clear_downtrend(dict 경로)와
+# screen_candle_block / is_pullback_possible(CandleBlock 경로)이 같은 함수로 판정하도록 지표 계산과 분리해 둔다.
+# 상수는 호출할 때마다 읽으므로 스윕이 setattr로 바꾼 값도 두 경로에 똑같이 반영된다.
+
+class CandidateLimits(NamedTuple):
+    min_range: float
+    max_range: float
+    max_trend: float
+    max_surge: float
+    max_last2: float
+    max_single: float
+    min_support: int
+    vol_min: float
+    vol_max: float
+    max_basis: float
+    max_above_support: float
+    min_score: int
+
+
+def candidate_limits(relaxed: bool) -> CandidateLimits:
+    """제거 조건 한도. relaxed=True는 온체인 거래소 유입이 확인된 코인만 쓴다."""
+    if relaxed:
+        return CandidateLimits(
+            RELAXED_MIN_RANGE_12C, RELAXED_RANGE_12C_MAX, RELAXED_MAX_RECENT12_TREND_ABS, RELAXED_MAX_RECENT_6C_SURGE,
+            RELAXED_MAX_LAST2_MOVE, RELAXED_MAX_SINGLE_CANDLE_RANGE, RELAXED_MIN_SUPPORT_TOUCHES, RELAXED_VOLUME_ALIVE_MIN,
+            RELAXED_VOLUME_ALIVE_MAX, RELAXED_MAX_BASIS_ABS, RELAXED_MAX_ABOVE_SUPPORT, RELAXED_CANDIDATE_MIN_SCORE,
+        )
+    return CandidateLimits(
+        MIN_RANGE_12C, RANGE_12C_MAX, MAX_RECENT12_TREND_ABS, MAX_RECENT_6C_SURGE,
+        MAX_LAST2_MOVE, MAX_SINGLE_CANDLE_RANGE, MIN_SUPPORT_TOUCHES, VOLUME_ALIVE_MIN,
+        VOLUME_ALIVE_MAX, MAX_BASIS_ABS, MAX_ABOVE_SUPPORT, CANDIDATE_MIN_SCORE,
+    )
+
+
+def chart_gate(
+    limits: CandidateLimits,
+    recent12_range: float,
+    recent12_move: float,
+    recent6_surge: float,
+    last2_move: float,
+    max_single_range: float,
+    support_touches: int,
+    volume_ratio: float,
+    price_above_support: float,
+) -> bool:
+    """OHLCV만으로 정해지는 제거 조건을 모두 통과하면 True."""
+    return (
+        limits.min_range <= recent12_range <= limits.max_range
+        and recent12_move <= limits.max_trend
+        and recent6_surge <= limits.max_surge
+        and last2_move <= limits.max_last2
+        and max_single_range <= limits.max_single
+        and support_touches >= limits.min_support
+        and limits.vol_min <= volume_ratio <= limits.vol_max
+        and price_above_support <= limits.max_above_support
+    )
+
+
+def chart_score_flags(
+    recent12_range: float,
+    recent12_move: float,
+    recent6_surge: float,
+    last2_move: float,
+    compression_ratio: float,
+    volume_ratio: float,
+    support_touches: int,
+    liquidity_test: bool,
+) -> Tuple[bool, ...]:
+    """점수 항목 중 OHLCV로 정해지는 9개. 순서는 evaluate_candidate의 reasons 순서와 같다."""
+    return (
+        recent12_range <= RANGE_12C_MAX,
+        recent12_range <= RANGE_12C_BEST,
+        recent12_move <= MAX_RECENT12_TREND_ABS,
+        recent6_surge <= MAX_RECENT_6C_SURGE,
+        last2_move <= MAX_LAST2_MOVE,
+        compression_ratio <= COMPRESSION_RATIO_MAX,
+        VOLUME_ALIVE_MIN <= volume_ratio <= VOLUME_ALIVE_MAX,
+        support_touches >= MIN_SUPPORT_TOUCHES,
+        liquidity_test,
+    )
+
+
+def env_1h_gate(env_range: float, env_last3_move: float, env_compression: float) -> bool:
+    return env_range <= ENV_1H_RANGE_MAX and env_last3_move <= ENV_1H_LAST3_MOVE_MAX and env_compression <= ENV_1H_COMPRESSION_MAX
+
+
+def is_liquidity_test_candle(body_ratio: float, wick_ratio: float) -> bool:
+    return body_ratio <= WICK_TEST_MAX_BODY and wick_ratio >= WICK_TEST_MIN_RATIO
+
+
+def downtrend_checks(prev_high: float, prev_low: float, recent_high: float, recent_low: float, last4_high: float, last_close: float) -> dict:
+    """앞/뒤 반쪽 고저점으로 하락 추세 조건을 판정한다."""
+    high_drop = (prev_high - recent_high) / prev_high * 100.0 if prev_high > 0 else 0.0
+    low_drop = (prev_low - recent_low) / prev_low * 100.0 if prev_low > 0 else 0.0
+    mid_price = (prev_high + prev_low) / 2.0 if prev_high > 0 and prev_low > 0 else last_close
+    close_vs_mid = (last_close - mid_price) / mid_price * 100.0 if mid_price > 0 else 0.0
+    lower_high = high_drop >= DOWNTREND_HIGH_DROP_MIN
+    lower_low = low_drop >= DOWNTREND_LOW_DROP_MIN
+    weak_close = close_vs_mid < -0.10
+    # 최근 4봉의 고점도 계속 약한지 확인
+    last4_high_weak = last4_high < prev_high * (1 - DOWNTREND_HIGH_DROP_MIN / 200.0)
+    return {
+        "is_down": lower_high and (lower_low or weak_close) and last4_high_weak,
+        "lower_high": lower_high,
+        "lower_low": lower_low,
+        "weak_close": weak_close,
+        "last4_high_weak": last4_high_weak,
+        "high_drop": high_drop,
+        "low_drop": low_drop,
+        "close_vs_mid": close_vs_mid,
+    }
+
+
+def pullback_price_checks(box_high: float, breakout_high: float, last_open: float, last_low: float, last_close: float, prev_close: float) -> Tuple[bool, bool, bool, bool]:
+    """(돌파 흔적, 박스상단 눌림, 추격 아님, 재상승)."""
+    breakout_seen = breakout_high > box_high * (1 + PULLBACK_BREAKOUT_BUFFER)
+    pullback_to_support = last_low <= box_high * (1 + PULLBACK_SUPPORT_BAND) and last_close >= box_high * (1 - PULLBACK_SUPPORT_BAND)
+    not_chasing = last_close <= box_high * (1 + PULLBACK_MAX_FROM_BOX_HIGH)
+    reclaimed = last_close > box_high or (last_close > prev_close and last_close > last_open)
+    return breakout_seen, pullback_to_support, not_chasing, reclaimed
+
+
+def pullback_momentum_ok(volume_ratio: float, recent6_surge: float, last2_move: float) -> Tuple[bool, bool]:
+    """(거래량 유지, 과열 제한)."""
+    return (
+        volume_ratio >= PULLBACK_MIN_VOLUME_RATIO,
+        recent6_surge <= PULLBACK_MAX_RECENT_6C_SURGE and last2_move <= PULLBACK_MAX_LAST2_MOVE,
+    )
+
+
 def is_1h_environment_ok(candles_1h: List[dict]) -> Tuple[bool, str, dict]:
     if len(candles_1h) < 5:
         return False, "1시간봉 부족", {}
@@ -467,11 +954,7 @@ def is_1h_environment_ok(candles_1h: List[dict]) -> Tuple[bool, str, dict]:
     prev2_avg_range = avg([c["range_pct"] for c in prev2])
     env_compression = (recent3_avg_range / prev2_avg_range) if prev2_avg_range > 0 else 99.0
 
-    ok = (
-        env_range <= ENV_1H_RANGE_MAX
-        and env_last3_move <= ENV_1H_LAST3_MOVE_MAX
-        and env_compression <= ENV_1H_COMPRESSION_MAX
-    )
+    ok = env_1h_gate(env_range, env_last3_move, env_compression)
     reason = f"1h범위={env_range:.2f}% / 1h최근3이동={env_last3_move:.2f}% / 1h압축={env_compression:.2f}"
     return ok, reason, {
         "env_range_1h": env_range,
@@ -480,10 +963,28 @@ def is_1h_environment_ok(candles_1h: List[dict]) -> Tuple[bool, str, dict]:
     }
 
 
+def fetch_candidate_klines(symbol: str) -> tuple:
+    return (
+        get_kline(symbol, interval=SIGNAL_INTERVAL_5M, limit=50),
+        get_kline(symbol, interval=TREND_INTERVAL_15M, limit=20),
+        get_kline(symbol, interval=ENV_INTERVAL_1H, limit=10),
+    )
+
+
 def detect_candidate(symbol: str, ticker_map: Optional[Dict[str, dict]] = None, relaxed: bool = False) -> Optional[dict]:
-    data_5m = get_kline(symbol, interval=SIGNAL_INTERVAL_5M, limit=50)
-    data_15m = get_kline(symbol, interval=TREND_INTERVAL_15M, limit=20)
-    data_1h = get_kline(symbol, interval=ENV_INTERVAL_1H, limit=10)
+    data_5m, data_15m, data_1h = fetch_candidate_klines(symbol)
+    return evaluate_candidate(symbol, data_5m, data_15m, data_1h, ticker_map=ticker_map, relaxed=relaxed)
+
+
+def evaluate_candidate(
+    symbol: str,
+    data_5m,
+    data_15m,
+    data_1h,
+    ticker_map: Optional[Dict[str, dict]] = None,
+    relaxed: bool = False,
+) -> Optional[dict]:
+    """MEXC kline 원본 행(마지막은 진행 중 봉)으로 후보를 판정한다. 백테스트도 이 함수를 그대로 쓴다."""
     if not isinstance(data_5m, list) or len(data_5m) < 26:
         return None
     if not isinstance(data_15m, list) or len(data_15m) < 6:
@@ -537,33 +1038,22 @@ def detect_candidate(symbol: str, ticker_map: Optional[Dict[str, dict]] = None,
     score = 0
     reasons: List[str] = []
 
-    if recent12_range <= RANGE_12C_MAX:
-        score += 1
-        reasons.append(f"12봉 횡보({recent12_range:.2f}%)")
-    if recent12_range <= RANGE_12C_BEST:
-        score += 1
-        reasons.append(f"12봉 강한 횡보({recent12_range:.2f}%)")
-    if recent12_move <= MAX_RECENT12_TREND_ABS:
-        score += 1
-        reasons.append(f"12봉 방향 과함 아님({recent12_move:.2f}%)")
-    if recent6_surge <= MAX_RECENT_6C_SURGE:
-        score += 1
-        reasons.append(f"최근 6봉 과열 아님({recent6_surge:.2f}%)")
-    if last2_move <= MAX_LAST2_MOVE:
-        score += 1
-        reasons.append(f"직전 2봉 급등 추격 아님({last2_move:.2f}%)")
-    if compression_ratio <= COMPRESSION_RATIO_MAX:
-        score += 1
-        reasons.append(f"변동성 압축({compression_ratio:.2f})")
-    if VOLUME_ALIVE_MIN <= volume_ratio <= VOLUME_ALIVE_MAX:
-        score += 1
-        reasons.append(f"거래량 생존({volume_ratio:.2f}x)")
-    if support_touches >= MIN_SUPPORT_TOUCHES:
-        score += 1
-        reasons.append(f"지지 재확인 {support_touches}회")
-    if liquidity_test:
-        score += 1
-        reasons.append("유동성 테스트 흔적")
+    flags = chart_score_flags(recent12_range, recent12_move, recent6_surge, last2_move, compression_ratio, volume_ratio, support_touches, liquidity_test)
+    flag_reasons = (
+        f"12봉 횡보({recent12_range:.2f}%)",
+        f"12봉 강한 횡보({recent12_range:.2f}%)",
+        f"12봉 방향 과함 아님({recent12_move:.2f}%)",
+        f"최근 6봉 과열 아님({recent6_surge:.2f}%)",
+        f"직전 2봉 급등 추격 아님({last2_move:.2f}%)",
+        f"변동성 압축({compression_ratio:.2f})",
+        f"거래량 생존({volume_ratio:.2f}x)",
+        f"지지 재확인 {support_touches}회",
+        "유동성 테스트 흔적",
+    )
+    for ok, text in zip(flags, flag_reasons):
+        if ok:
+            score += 1
+            reasons.append(text)
     if basis_pct is None or abs(basis_pct) <= MAX_BASIS_ABS:
         score += 1
         reasons.append(f"괴리 안정({basis_pct:.3f}%)" if basis_pct is not None else "괴리 정보 없음")
@@ -574,42 +1064,14 @@ def detect_candidate(symbol: str, ticker_map: Optional[Dict[str, dict]] = None,
     # 제거 조건
     # relaxed=True는 온체인 거래소 유입이 확인된 코인만 적용한다.
     # 온체인을 AND 조건으로 더하는 게 아니라, 해당 코인의 차트 조건을 약간 완화해 관찰 빈도를 높인다.
-    min_range = 0.05 if relaxed else MIN_RANGE_12C
-    max_range = 5.5 if relaxed else RANGE_12C_MAX
-    max_trend = 6.0 if relaxed else MAX_RECENT12_TREND_ABS
-    max_surge = 8.0 if relaxed else MAX_RECENT_6C_SURGE
-    max_last2 = 2.4 if relaxed else MAX_LAST2_MOVE
-    max_single = 5.5 if relaxed else MAX_SINGLE_CANDLE_RANGE
-    min_support = 2 if relaxed else MIN_SUPPORT_TOUCHES
-    vol_min = 0.45 if relaxed else VOLUME_ALIVE_MIN
-    vol_max = 3.20 if relaxed else VOLUME_ALIVE_MAX
-    max_basis = 0.80 if relaxed else MAX_BASIS_ABS
-    max_above_support = 5.0 if relaxed else 2.8
-    min_score = 4 if relaxed else CANDIDATE_MIN_SCORE
-
-    if recent12_range < min_range:
-        return None
-    if recent12_range > max_range:
-        return None
-    if recent12_move > max_trend:
-        return None
-    if recent6_surge > max_surge:
-        return None
-    if last2_move > max_last2:
-        return None
-    if max_single_range > max_single:
-        return None
-    if support_touches < min_support:
-        return None
-    if volume_ratio < vol_min or volume_ratio > vol_max:
+    limits = candidate_limits(relaxed)
+    if not chart_gate(limits, recent12_range, recent12_move, recent6_surge, last2_move, max_single_range, support_touches, volume_ratio, price_above_support):
         return None
-    if basis_pct is not None and abs(basis_pct) > max_basis:
-        return None
-    if price_above_support > max_above_support:
+    if basis_pct is not None and abs(basis_pct) > limits.max_basis:
         return None
     if not relaxed and not env_ok:
         return None
-    if score < min_score:
+    if score < limits.min_score:
         return None
 
     return {
@@ -643,6 +1105,177 @@ def detect_candidate(symbol: str, ticker_map: Optional[Dict[str, dict]] = None,
     }
 
 
+SCREEN_FIELDS = 5  # open, high, low, close, volume
+SCREEN_1H_CANDLES = 5
+
+
+class CandleBlock:
+    """심볼 × 캔들 × (open, high, low, close, volume)을 한 평탄 배열에 담은 스크리닝 입력.
+
+    5m은 마감봉 마지막 candles개, 1h는 마감봉 마지막 5개만 담는다.
+    원본 행 중 파싱할 수 없거나 개수가 모자란 심볼은 fallback으로 빼서 기존 evaluate_candidate로 판정한다.
+    """
+
+    def __init__(self, candles: int):
+        self.candles = candles
+        self.symbols: List[str] = []
+        self.fallback: List[str] = []
+        self.values_5m = array("d")
+        self.values_1h = array("d")
+
+    def add(self, symbol: str, data_5m, data_15m, data_1h) -> None:
+        if (
+            not isinstance(data_5m, list) or len(data_5m) < 26
+            or not isinstance(data_15m, list) or len(data_15m) < 6
+            or not isinstance(data_1h, list) or len(data_1h) < 6
+        ):
+            self.fallback.append(symbol)
+            return
+        try:
+            closed_5m = [parse_ohlcv(row) for row in data_5m[:-1]]
+            closed_1h = [parse_ohlcv(row) for row in data_1h[:-1]]
+        except (TypeError, ValueError, IndexError):
+            self.fallback.append(symbol)
+            return
+        if (
+            len(closed_5m) < max(18, self.candles) or len(closed_1h) < SCREEN_1H_CANDLES
+            or min(min(row[:4]) for row in closed_5m) <= 0
+            or min(min(row[:4]) for row in closed_1h) <= 0
+        ):
+            self.fallback.append(symbol)
+            return
+        self.symbols.append(symbol)
+        for row in closed_5m[-self.candles:]:
+            self.values_5m.extend(row)
+        for row in closed_1h[-SCREEN_1H_CANDLES:]:
+            self.values_1h.extend(row)
+
+    def columns_5m(self, index: int) -> Tuple[array, array, array, array, array]:
+        width = self.candles * SCREEN_FIELDS
+        block = self.values_5m[index * width:(index + 1) * width]
+        return block[0::5], block[1::5], block[2::5], block[3::5], block[4::5]
+
+    def columns_1h(self, index: int) -> Tuple[array, array, array, array, array]:
+        width = SCREEN_1H_CANDLES * SCREEN_FIELDS
+        block = self.values_1h[index * width:(index + 1) * width]
+        return block[0::5], block[1::5], block[2::5], block[3::5], block[4::5]
+
+
+def parse_ohlcv(row: list) -> Tuple[float, float, float, float, float]:
+    int(row[0])
+    return float(row[1]), float(row[2]), float(row[3]), float(row[4]), float(row[5])
+
+
+def build_candle_block(klines: Dict[str, tuple]) -> CandleBlock:
+    """{symbol: (data_5m, data_15m, data_1h)} 원본 kline으로 CandleBlock을 만든다."""
+    block = CandleBlock(candles=max(12, PULLBACK_LOOKBACK_CANDLES + 1))
+    for symbol, (data_5m, data_15m, data_1h) in klines.items():
+        block.add(symbol, data_5m, data_15m, data_1h)
+    return block
+
+
+def screen_candle_block(block: CandleBlock, relaxed_symbols: Optional[Set[str]] = None, require_pullback: bool = False) -> Set[str]:
+    """evaluate_candidate의 차트 제거 조건을 심볼별 dict 없이 한 번에 적용하고 살아남은 심볼을 돌려준다.
+
+    지표는 평탄 배열에서 직접 계산하지만 한도 판정은 evaluate_candidate / is_pullback_confirmed와 같은
+    게이트 함수(chart_gate, chart_score_flags, env_1h_gate, pullback_price_checks, downtrend_checks)를 쓰므로
+    여기서 떨어진 심볼은 기존 경로에서도 반드시 None(또는 눌림 미확인)이다. tests/test_candle_screen.py가 이를 확인한다. 괴리율·15분 추세처럼 OHLCV 밖의 조건은
+    생존 심볼에 대해 evaluate_candidate가 그대로 판정한다.
+    """
+    relaxed_symbols = relaxed_symbols or set()
+    survivors: Set[str] = set(block.fallback)
+    lookback = PULLBACK_LOOKBACK_CANDLES
+    limits_by_mode = {False: candidate_limits(False), True: candidate_limits(True)}
+
+    for index, symbol in enumerate(block.symbols):
+        relaxed = symbol in relaxed_symbols
+        o, h, l, c, v = block.columns_5m(index)
+        change = [(c[i] - o[i]) / o[i] * 100 for i in range(-6, 0)]
+        range_pct = [(h[i] - l[i]) / l[i] * 100 for i in range(-12, 0)]
+
+        support_low = min(l[-12:])
+        recent12_range = (max(h[-12:]) - support_low) / support_low * 100.0
+        recent12_move = abs((c[-1] - o[-12]) / o[-12] * 100.0)
+        recent6_surge = sum(abs(x) for x in change)
+        last2_move = abs(change[-1] + change[-2])
+        max_single_range = max(range_pct[-6:])
+        threshold = support_low * (1 + SUPPORT_BAND_PCT / 100.0)
+        support_touches = sum(1 for x in l[-12:] if x <= threshold)
+        prev6_vol = avg(v[-12:-6])
+        volume_ratio = (avg(v[-3:]) / prev6_vol) if prev6_vol > 0 else 0.0
+        price_above_support = (c[-1] - support_low) / support_low * 100.0
+
+        limits = limits_by_mode[relaxed]
+        if not chart_gate(limits, recent12_range, recent12_move, recent6_surge, last2_move, max_single_range, support_touches, volume_ratio, price_above_support):
+            continue
+
+        o1, h1, l1, c1, _ = block.columns_1h(index)
+        env_low = min(l1)
+        env_range = (max(h1) - env_low) / env_low * 100.0
+        env_last3_move = abs((c1[-1] - o1[-3]) / o1[-3] * 100.0)
+        range_1h = [(h1[i] - l1[i]) / l1[i] * 100 for i in range(5)]
+        prev2_range = avg(range_1h[:2])
+        env_compression = (avg(range_1h[2:]) / prev2_range) if prev2_range > 0 else 99.0
+        env_ok = env_1h_gate(env_range, env_last3_move, env_compression)
+        if not relaxed and not env_ok:
+            continue
+
+        # 점수 상한: 괴리율은 통과로 가정한다.
+        prev6_range = avg(range_pct[-12:-6])
+        compression_ratio = (avg(range_pct[-3:]) / prev6_range) if prev6_range > 0 else 99.0
+        liquidity_test = False
+        for i in range(-4, 0):
+            candle_range = max(h[i] - l[i], 1e-12)
+            body_ratio = abs(c[i] - o[i]) / candle_range
+            wick = max(max(h[i] - max(o[i], c[i]), 0.0), max(min(o[i], c[i]) - l[i], 0.0)) / candle_range
+            if is_liquidity_test_candle(body_ratio, wick):
+                liquidity_test = True
+                break
+        flags = chart_score_flags(recent12_range, recent12_move, recent6_surge, last2_move, compression_ratio, volume_ratio, support_touches, liquidity_test)
+        score_max = 2 + sum(flags) - (0 if env_ok else 1)
+        if score_max < limits.min_score:
+            continue
+
+        if require_pullback and PULLBACK_CONFIRM_ENABLED and not is_pullback_possible(o, h, l, c, lookback, volume_ratio, recent6_surge, last2_move):
+            continue
+        survivors.add(symbol)
+    return survivors
+
+
+def is_pullback_possible(o: array, h: array, l: array, c: array, lookback: int, volume_ratio: float, recent6_surge: float, last2_move: float) -> bool:
+    """is_pullback_confirmed 중 OHLCV만으로 정해지는 조건. False면 눌림 확인도 반드시 실패한다."""
+    recent = slice(-(lookback + 1), None)
+    highs = h[recent]
+    box_end = len(highs) - 3 if len(highs) >= 6 else len(highs) - 1
+    if box_end < 6:
+        return False
+    box_high = max(highs[:box_end])
+    last_close = c[-1]
+    candle_range = max(h[-1] - l[-1], 1e-12)
+
+    breakout_seen, pullback_to_support, not_chasing, reclaimed = pullback_price_checks(box_high, max(highs[-4:-1]), o[-1], l[-1], last_close, c[-2])
+    if not (breakout_seen and pullback_to_support and not_chasing and reclaimed):
+        return False
+    if (c[-1] - l[-1]) / candle_range < PULLBACK_MIN_REBOUND_CLOSE_POS:
+        return False
+    if max(h[-1] - max(o[-1], c[-1]), 0.0) / candle_range > PULLBACK_MAX_UPPER_WICK_RATIO:
+        return False
+    if not all(pullback_momentum_ok(volume_ratio, recent6_surge, last2_move)):
+        return False
+    if PULLBACK_REQUIRE_HIGHER_LOW:
+        lows = l[-4:]
+        if not (lows[-1] > min(lows[:2]) and lows[-2] >= min(lows[:2]) * 0.998):
+            return False
+    if DOWNTREND_FILTER_ENABLED and 8 <= DOWNTREND_LOOKBACK_CANDLES <= 12:
+        recent_h = h[-DOWNTREND_LOOKBACK_CANDLES:]
+        recent_l = l[-DOWNTREND_LOOKBACK_CANDLES:]
+        half = DOWNTREND_LOOKBACK_CANDLES // 2
+        checks = downtrend_checks(max(recent_h[:half]), min(recent_l[:half]), max(recent_h[half:]), min(recent_l[half:]), max(recent_h[-4:]), last_close)
+        if checks["is_down"]:
+            return False
+    return True
+
+
 def format_basis_lines(candidate: dict) -> str:
     basis = candidate.get("basis_info")
     if not basis:
@@ -689,58 +1322,382 @@ def parse_utc_ts(text: str) -> int:
         return 0
 
 
+# /stream (SSE) 설정. 이벤트는 리더 워커에서 생기므로 파일 로그를 거쳐 다른 워커로도 퍼진다.
+STREAM_EVENT_LOG = os.environ.get("STREAM_EVENT_LOG", "stream_events.jsonl")
+STREAM_EVENT_LOG_MAX_BYTES = 5 * 1024 * 1024
+STREAM_CLIENT_BUFFER = 200  # 클라이언트별로 쌓아 둘 최대 이벤트 수. 넘치면 오래된 것부터 버린다.
+STREAM_HISTORY = 500  # 재접속(Last-Event-ID) 때 다시 보내 줄 최근 이벤트 수
+STREAM_HEARTBEAT_SECONDS = 15
+STREAM_TAIL_INTERVAL = 0.25
+# 연결 하나의 최대 수명(초). 기본 sync 워커는 요청 하나가 워커 전체를 잡고 gunicorn timeout(기본 30초)을 넘기면
+# 워커째 죽으므로(리더라면 시세/온체인 루프도 같이) 그 전에 응답을 끝내고, 클라이언트는 retry 뒤 Last-Event-ID로 이어 받는다.
+# gevent 같은 async 워커(-k gevent)로 띄울 때만 0(제한 없음)으로 둔다.
+STREAM_MAX_SECONDS = float(os.environ.get("STREAM_MAX_SECONDS", "25"))
+
+
+class StreamClient:
+    def __init__(self, kinds: Optional[Set[str]]):
+        self.kinds = kinds
+        self.queue: deque = deque(maxlen=STREAM_CLIENT_BUFFER)
+        self.dropped = 0
+
+    def offer(self, record: dict) -> None:
+        if self.kinds and record["kind"] not in self.kinds:
+            return
+        if len(self.queue) == self.queue.maxlen:
+            self.dropped += 1
+        self.queue.append(record)
+
+
+class StreamBroker:
+    """프로세스 안의 SSE 구독자들에게 이벤트를 나눠 준다.
+
+    구독자마다 길이 제한 deque를 두어 느린 클라이언트가 메모리를 키우거나 다른 구독자를 막지 않는다.
+    대기는 Condition.wait(timeout)이라 gevent 같은 async 워커에서도 monkey patch된 채로 그대로 동작한다.
+    """
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.clients: Set[StreamClient] = set()
+        self.history: deque = deque(maxlen=STREAM_HISTORY)
+        self.last_id = 0
+        self.tailer_started = False
+
+    def publish(self, kind: str, data: dict, event_id: Optional[int] = None) -> Optional[dict]:
+        with self.cond:
+            if event_id is None:
+                event_id = max(self.last_id + 1, time.time_ns() // 1000)
+            elif event_id <= self.last_id:
+                # 리더가 직접 올린 이벤트를 파일 로그에서 다시 읽은 경우
+                return None
+            self.last_id = event_id
+            record = {"id": event_id, "kind": kind, "data": data}
+            self.history.append(record)
+            for client in self.clients:
+                client.offer(record)
+            self.cond.notify_all()
+        return record
+
+    def subscribe(self, kinds: Optional[Set[str]], last_event_id: int = 0) -> StreamClient:
+        client = StreamClient(kinds)
+        with self.cond:
+            if last_event_id:
+                for record in self.history:
+                    if record["id"] > last_event_id:
+                        client.offer(record)
+            self.clients.add(client)
+        metric_inc("stream_clients_connected_total")
+        return client
+
+    def unsubscribe(self, client: StreamClient) -> None:
+        with self.cond:
+            self.clients.discard(client)
+
+    def wait(self, client: StreamClient, timeout: float) -> Tuple[List[dict], int]:
+        with self.cond:
+            if not client.queue:
+                self.cond.wait(timeout)
+            records = list(client.queue)
+            client.queue.clear()
+            dropped, client.dropped = client.dropped, 0
+        return records, dropped
+
+
+STREAM_BROKER = StreamBroker()
+STREAM_LOG_LOCK = threading.Lock()
+
+
+def publish_stream_event(kind: str, data: dict) -> None:
+    """이 프로세스 구독자에게 바로 보내고, 다른 워커용으로 파일 로그에도 한 줄 남긴다."""
+    record = STREAM_BROKER.publish(kind, data)
+    if record is None:
+        return
+    metric_inc("stream_events_published_total", kind=kind)
+    line = json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=str) + "\n"
+    try:
+        with STREAM_LOG_LOCK:
+            if os.path.exists(STREAM_EVENT_LOG) and os.path.getsize(STREAM_EVENT_LOG) >= STREAM_EVENT_LOG_MAX_BYTES:
+                # 새 inode로 바꿔 끼우면 tail 중인 워커들이 알아채고 처음부터 다시 읽는다.
+                open(f"{STREAM_EVENT_LOG}.tmp", "w").close()
+                os.replace(f"{STREAM_EVENT_LOG}.tmp", STREAM_EVENT_LOG)
+            with open(STREAM_EVENT_LOG, "a", encoding="utf-8") as f:
+                f.write(line)
+    except OSError as e:
+        print(f"[STREAM] 이벤트 로그 쓰기 실패: {e}", flush=True)
+
+
+def stream_log_tailer() -> None:
+    """리더가 아닌 워커에서도 /stream이 이벤트를 받도록 파일 로그를 따라 읽는다."""
+    handle = None
+    inode = None
+    pending = ""
+    first_open = True
+    while True:
+        try:
+            if handle is None:
+                if os.path.exists(STREAM_EVENT_LOG):
+                    handle = open(STREAM_EVENT_LOG, "r", encoding="utf-8")
+                    inode = os.fstat(handle.fileno()).st_ino
+                    if first_open:
+                        # 접속 전 지난 이벤트는 건너뛴다. 나중에 생긴 파일은 처음부터 읽는다.
+                        handle.seek(0, os.SEEK_END)
+                    pending = ""
+                first_open = False
+            else:
+                chunk = handle.read()
+                if chunk:
+                    pending += chunk
+                    *lines, pending = pending.split("\n")
+                    for line in lines:
+                        try:
+                            record = json.loads(line)
+                            STREAM_BROKER.publish(record["kind"], record["data"], event_id=int(record["id"]))
+                        except (ValueError, KeyError, TypeError):
+                            continue
+                elif not os.path.exists(STREAM_EVENT_LOG) or os.stat(STREAM_EVENT_LOG).st_ino != inode:
+                    handle.close()
+                    handle = None
+                    if os.path.exists(STREAM_EVENT_LOG):
+                        # 회전된 새 파일은 처음부터 읽어야 한다.
+                        handle = open(STREAM_EVENT_LOG, "r", encoding="utf-8")
+                        inode = os.fstat(handle.fileno()).st_ino
+                        pending = ""
+        except OSError as e:
+            print(f"[STREAM] 이벤트 로그 읽기 실패: {e}", flush=True)
+            handle = None
+        time.sleep(STREAM_TAIL_INTERVAL)
+
+
+def ensure_stream_tailer() -> None:
+    with STREAM_BROKER.cond:
+        if STREAM_BROKER.tailer_started:
+            return
+        STREAM_BROKER.tailer_started = True
+    threading.Thread(target=stream_log_tailer, daemon=True).start()
+
+
+class RecentKeys:
+    """최근 본 키 maxlen개만 기억한다. 매 실행 다시 계산되는 온체인 결과에서 새 이벤트만 골라낼 때 쓴다."""
+
+    def __init__(self, maxlen: int):
+        self.maxlen = maxlen
+        self.keys: Dict[str, None] = {}
+        self.lock = threading.Lock()
+
+    def add(self, key: str) -> bool:
+        with self.lock:
+            if key in self.keys:
+                return False
+            self.keys[key] = None
+            if len(self.keys) > self.maxlen:
+                self.keys.pop(next(iter(self.keys)))
+            return True
+
+
+def to_int(value, default: int = 0) -> int:
+    try:
+        return int(float(str(value).strip()))
+    except (TypeError, ValueError):
+        return default
+
+
+@dataclass(frozen=True)
+class OnchainFlowEvent:
+    """seed -> ... -> 거래소 도착 경로 1건. 문자열 변환은 채널에 들어올 때 한 번만 한다."""
+
+    token_symbol: str
+    exchange: str
+    end_time_utc: str
+    end_ts: int
+    path: str
+    seed: str
+    hop_count: int
+
+    @classmethod
+    def from_row(cls, row: dict) -> "OnchainFlowEvent":
+        end_time_utc = (row.get("end_time_utc") or row.get("start_time_utc") or "").strip()
+        return cls(
+            token_symbol=(row.get("token_symbol") or "").strip().upper(),
+            exchange=(row.get("exchange") or "-").strip() or "-",
+            end_time_utc=end_time_utc or "-",
+            end_ts=parse_utc_ts(end_time_utc),
+            path=row.get("path_addresses") or row.get("path") or "-",
+            seed=row.get("seed") or "-",
+            hop_count=to_int(row.get("hop_count")),
+        )
+
+
+@dataclass(frozen=True)
+class OnchainOutflowEvent:
+    """시드 출금 상세 1건 (seed_outflows CSV 한 줄과 같은 내용)."""
+
+    chainid: str
+    timestamp: int
+    token_symbol: str
+    token_name: str
+    seed: str
+    to_addr: str
+    amount: str
+    target_kind: str
+    target_label: str
+    swap_action: str
+    swap_token: str
+    exchange_hits: str
+    is_hub: bool
+    hub_shared_seed_count: int
+    hub_score: int
+
+    @classmethod
+    def from_row(cls, row: dict, chainid: str = "1") -> "OnchainOutflowEvent":
+        token_symbol = (row.get("token_symbol") or "").strip().upper()
+        return cls(
+            chainid=str(chainid),
+            timestamp=to_int(row.get("timestamp")),
+            token_symbol=token_symbol,
+            token_name=row.get("token_name") or token_symbol,
+            seed=row.get("seed") or "-",
+            to_addr=(row.get("to_addr") or "").strip(),
+            amount=str(row.get("amount") or "-"),
+            target_kind=(row.get("target_kind") or "").strip().lower(),
+            target_label=(row.get("target_label") or "-").strip() or "-",
+            swap_action=(row.get("swap_action") or "").strip().upper(),
+            swap_token=(row.get("swap_token") or "-").strip() or "-",
+            exchange_hits=(row.get("hub_exchange_hits") or "").strip(),
+            is_hub=(row.get("is_hub_candidate") or "") == "Y",
+            hub_shared_seed_count=to_int(row.get("hub_shared_seed_count")),
+            hub_score=to_int(row.get("hub_score")),
+        )
+
+
+class OnchainResultChannel:
+    """온체인 엔진 결과를 signal 쪽으로 넘기는 스레드 안전 저장소.
+
+    run_onchain의 파이프 리더 스레드가 publish하고, 구독자(집중 감시 등록)는 같은 스레드에서
+    바로 호출된다. 시드 출금 상세는 실행마다 전체가 다시 계산되므로 체인별로 마지막 묶음만 들고 있고,
+    읽을 때 모든 체인 묶음을 시각 역순으로 합친다.
+    """
+
+    def __init__(self, keep: int = ONCHAIN_RESULT_KEEP):
+        self.lock = threading.Lock()
+        self.flows: deque = deque(maxlen=keep)
+        self.outflows: Dict[str, List[OnchainOutflowEvent]] = {}
+        self.outflows_at = 0.0
+        self.flow_subscribers: List[Callable[[OnchainFlowEvent], None]] = []
+
+    def subscribe_flow(self, callback: Callable[[OnchainFlowEvent], None]) -> None:
+        self.flow_subscribers.append(callback)
+
+    def publish_flows(self, events: List[OnchainFlowEvent]) -> None:
+        with self.lock:
+            self.flows.extend(events)
+        metric_inc("onchain_result_events_total", float(len(events)), kind="flow")
+        for event in events:
+            for callback in self.flow_subscribers:
+                try:
+                    callback(event)
+                except Exception as e:
+                    print(f"[ONCHAIN-RESULT] flow 구독자 오류: {e}", flush=True)
+
+    def publish_outflows(self, events: List[OnchainOutflowEvent], chainid: str = "1") -> None:
+        with self.lock:
+            self.outflows[str(chainid)] = list(events)
+            self.outflows_at = time.time()
+        metric_inc("onchain_result_events_total", float(len(events)), kind="outflow")
+
+    def recent_outflows(self, limit: int) -> List[OnchainOutflowEvent]:
+        with self.lock:
+            batches = list(self.outflows.values())
+        if len(batches) == 1:
+            return batches[0][:limit]
+        merged = [event for batch in batches for event in batch]
+        merged.sort(key=lambda e: e.timestamp, reverse=True)
+        return merged[:limit]
+
+
+ONCHAIN_RESULTS = OnchainResultChannel()
+
+
 def cleanup_onchain_focus_symbols() -> None:
     now = time.time()
-    expired = [sym for sym, info in ONCHAIN_FOCUS_SYMBOLS.items() if float(info.get("expires_at", 0)) <= now]
+    with ONCHAIN_FOCUS_LOCK:
+        expired = [sym for sym, info in ONCHAIN_FOCUS_SYMBOLS.items() if float(info.get("expires_at", 0)) <= now]
+        for sym in expired:
+            ONCHAIN_FOCUS_SYMBOLS.pop(sym, None)
     for sym in expired:
-        ONCHAIN_FOCUS_SYMBOLS.pop(sym, None)
+        publish_stream_event("focus", {"action": "expire", "symbol": sym})
 
 
-def register_onchain_focus_symbol(symbol: str, source: dict) -> None:
+def register_onchain_focus_symbol(symbol: str, event: OnchainFlowEvent) -> None:
     symbol = (symbol or "").strip().upper()
     if not symbol.endswith("USDT"):
         return
     now = time.time()
-    prev = ONCHAIN_FOCUS_SYMBOLS.get(symbol, {})
-    ONCHAIN_FOCUS_SYMBOLS[symbol] = {
-        "expires_at": max(float(prev.get("expires_at", 0)), now + ONCHAIN_FOCUS_TTL),
-        "token": source.get("token_symbol", symbol.replace("USDT", "")),
-        "exchange": source.get("exchange", "-"),
-        "end_time_utc": source.get("end_time_utc", "-"),
-        "path": source.get("path_addresses") or source.get("path") or "-",
-    }
-    print(f"[ONCHAIN-FOCUS] 등록/연장: {symbol} until={time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ONCHAIN_FOCUS_SYMBOLS[symbol]['expires_at']))}", flush=True)
+    with ONCHAIN_FOCUS_LOCK:
+        prev = ONCHAIN_FOCUS_SYMBOLS.get(symbol, {})
+        expires_at = max(float(prev.get("expires_at", 0)), now + ONCHAIN_FOCUS_TTL)
+        ONCHAIN_FOCUS_SYMBOLS[symbol] = {
+            "expires_at": expires_at,
+            "token": event.token_symbol or symbol.replace("USDT", ""),
+            "exchange": event.exchange,
+            "end_time_utc": event.end_time_utc,
+            "path": event.path,
+        }
+    publish_stream_event("focus", {"action": "register" if not prev else "extend", "symbol": symbol, **ONCHAIN_FOCUS_SYMBOLS.get(symbol, {})})
+    print(f"[ONCHAIN-FOCUS] 등록/연장: {symbol} until={time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(expires_at))}", flush=True)
+
+
+def focus_on_flow_event(event: OnchainFlowEvent, spot_map: Optional[Dict[str, str]] = None) -> bool:
+    """거래소 도착 flow 1건을 집중 감시 종목으로 등록한다. 등록했으면 True."""
+    token = event.token_symbol
+    if not token or token in STABLE_EXCLUDED or token.startswith("V"):
+        return False
+    if event.end_ts and time.time() - event.end_ts > ONCHAIN_FOCUS_MAX_AGE:
+        return False
+    symbol = token_to_symbol(token, spot_map if spot_map is not None else get_spot_symbols())
+    if not symbol:
+        return False
+    register_onchain_focus_symbol(symbol, event)
+    return True
 
 
 def update_onchain_focus_from_flow_csv(path: str = ONCHAIN_FLOW_CSV) -> None:
+    """결과 채널을 못 쓴 실행(구버전 엔진, fd 미지원 환경)이나 수동 실행 뒤에만 쓰는 CSV 경로."""
     cleanup_onchain_focus_symbols()
     if not os.path.exists(path):
         print(f"[ONCHAIN-FOCUS] flow CSV 없음: {path}", flush=True)
         return
     try:
         spot_map = get_spot_symbols()
-        now = time.time()
         added = 0
         with open(path, "r", encoding="utf-8-sig", newline="") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                token = (row.get("token_symbol") or "").strip().upper()
-                if not token or token in STABLE_EXCLUDED or token.startswith("V"):
-                    continue
-                end_ts = parse_utc_ts(row.get("end_time_utc") or row.get("start_time_utc") or "")
-                if end_ts and now - end_ts > ONCHAIN_FOCUS_MAX_AGE:
-                    continue
-                symbol = token_to_symbol(token, spot_map)
-                if not symbol:
-                    continue
-                register_onchain_focus_symbol(symbol, row)
-                added += 1
+            for row in csv.DictReader(f):
+                if focus_on_flow_event(OnchainFlowEvent.from_row(row), spot_map):
+                    added += 1
         print(f"[ONCHAIN-FOCUS] flow CSV 반영 완료: {added}건 / 현재 {len(ONCHAIN_FOCUS_SYMBOLS)}개", flush=True)
     except Exception as e:
         print(f"[ONCHAIN-FOCUS] CSV 반영 오류: {e}", flush=True)
         traceback.print_exc()
 
 
+ONCHAIN_RESULTS.subscribe_flow(focus_on_flow_event)
+STREAM_SEEN_ONCHAIN = RecentKeys(5000)
+
+
+def stream_flow_event(event: OnchainFlowEvent) -> None:
+    if STREAM_SEEN_ONCHAIN.add(f"flow|{event.seed}|{event.path}|{event.end_time_utc}|{event.token_symbol}"):
+        publish_stream_event("onchain_flow", asdict(event))
+
+
+def stream_active_hub_rows(rows: List[dict]) -> None:
+    for row in rows:
+        key = f"hub|{row.get('hub')}|{row.get('tx_hash')}|{row.get('to_addr')}|{row.get('token_symbol')}"
+        if STREAM_SEEN_ONCHAIN.add(key):
+            publish_stream_event("active_hub", {k: row.get(k) for k in ("level", "hub", "time_utc", "token_symbol", "amount", "to_addr", "to_label", "score", "shared_seed_count", "tx_hash")})
+
+
+ONCHAIN_RESULTS.subscribe_flow(stream_flow_event)
+
+
 def get_scan_symbols_with_focus(symbols: List[str]) -> List[str]:
     """
     일반 Top 감시 종목 + 온체인 거래소 유입 감지 종목을 합친다.
@@ -749,7 +1706,8 @@ def get_scan_symbols_with_focus(symbols: List[str]) -> List[str]:
     cleanup_onchain_focus_symbols()
 
     base_symbols = [str(sym).strip().upper() for sym in symbols if str(sym).strip()]
-    focus_symbols = [str(sym).strip().upper() for sym in ONCHAIN_FOCUS_SYMBOLS.keys() if str(sym).strip()]
+    with ONCHAIN_FOCUS_LOCK:
+        focus_symbols = [str(sym).strip().upper() for sym in ONCHAIN_FOCUS_SYMBOLS.keys() if str(sym).strip()]
 
     merged = list(dict.fromkeys(base_symbols + focus_symbols))
 
@@ -821,43 +1779,31 @@ def is_clear_downtrend(candles: List[dict]) -> Tuple[bool, List[str], dict]:
     first_half = recent[:len(recent)//2]
     second_half = recent[len(recent)//2:]
 
-    prev_high = max(c["high"] for c in first_half)
-    recent_high = max(c["high"] for c in second_half)
-    prev_low = min(c["low"] for c in first_half)
-    recent_low = min(c["low"] for c in second_half)
-    last_close = recent[-1]["close"]
-
-    high_drop = (prev_high - recent_high) / prev_high * 100.0 if prev_high > 0 else 0.0
-    low_drop = (prev_low - recent_low) / prev_low * 100.0 if prev_low > 0 else 0.0
-    mid_price = (prev_high + prev_low) / 2.0 if prev_high > 0 and prev_low > 0 else last_close
-    close_vs_mid = (last_close - mid_price) / mid_price * 100.0 if mid_price > 0 else 0.0
+    checks = downtrend_checks(
+        prev_high=max(c["high"] for c in first_half),
+        prev_low=min(c["low"] for c in first_half),
+        recent_high=max(c["high"] for c in second_half),
+        recent_low=min(c["low"] for c in second_half),
+        last4_high=max(c["high"] for c in recent[-4:]),
+        last_close=recent[-1]["close"],
+    )
 
     stats.update({
-        "downtrend_high_drop": high_drop,
-        "downtrend_low_drop": low_drop,
-        "downtrend_close_vs_mid": close_vs_mid,
+        "downtrend_high_drop": checks["high_drop"],
+        "downtrend_low_drop": checks["low_drop"],
+        "downtrend_close_vs_mid": checks["close_vs_mid"],
     })
 
-    lower_high = high_drop >= DOWNTREND_HIGH_DROP_MIN
-    lower_low = low_drop >= DOWNTREND_LOW_DROP_MIN
-    weak_close = close_vs_mid < -0.10
-
-    # 최근 4봉의 고점도 계속 약한지 확인
-    last4 = recent[-4:]
-    last4_high_weak = max(c["high"] for c in last4) < prev_high * (1 - DOWNTREND_HIGH_DROP_MIN / 200.0)
-
-    is_down = lower_high and (lower_low or weak_close) and last4_high_weak
-
-    if lower_high:
-        reasons.append(f"고점 하락({high_drop:.2f}%)")
-    if lower_low:
-        reasons.append(f"저점 하락({low_drop:.2f}%)")
-    if weak_close:
-        reasons.append(f"종가 약세({close_vs_mid:.2f}%)")
-    if last4_high_weak:
+    if checks["lower_high"]:
+        reasons.append(f"고점 하락({checks['high_drop']:.2f}%)")
+    if checks["lower_low"]:
+        reasons.append(f"저점 하락({checks['low_drop']:.2f}%)")
+    if checks["weak_close"]:
+        reasons.append(f"종가 약세({checks['close_vs_mid']:.2f}%)")
+    if checks["last4_high_weak"]:
         reasons.append("최근4봉 고점 회복 실패")
 
-    return is_down, reasons, stats
+    return checks["is_down"], reasons, stats
 
 
 def get_upper_wick_ratio(candle: dict) -> float:
@@ -895,10 +1841,9 @@ def is_pullback_confirmed(candidate: dict) -> Tuple[bool, List[str]]:
     if box_high <= 0 or box_low <= 0 or last_close <= 0:
         return False, ["가격 데이터 오류"]
 
-    breakout_seen = max(c["high"] for c in recent[-4:-1]) > box_high * (1 + PULLBACK_BREAKOUT_BUFFER)
-    pullback_to_support = last_low <= box_high * (1 + PULLBACK_SUPPORT_BAND) and last_close >= box_high * (1 - PULLBACK_SUPPORT_BAND)
-    not_chasing = last_close <= box_high * (1 + PULLBACK_MAX_FROM_BOX_HIGH)
-    reclaimed = last_close > box_high or (last_close > prev_close and last_close > last["open"])
+    breakout_seen, pullback_to_support, not_chasing, reclaimed = pullback_price_checks(
+        box_high, max(c["high"] for c in recent[-4:-1]), last["open"], last_low, last_close, prev_close,
+    )
     rebound_close_pos = float(last.get("close_pos") or 0)
     upper_wick_ratio = get_upper_wick_ratio(last)
 
@@ -941,13 +1886,14 @@ def is_pullback_confirmed(candidate: dict) -> Tuple[bool, List[str]]:
         ok = False
         reasons.append(f"윗꼬리 과다({upper_wick_ratio:.2f})")
 
-    if volume_ratio >= PULLBACK_MIN_VOLUME_RATIO:
+    volume_ok, not_overheated = pullback_momentum_ok(volume_ratio, recent6_surge, last2_move)
+    if volume_ok:
         reasons.append(f"거래량 유지({volume_ratio:.2f}x)")
     else:
         ok = False
         reasons.append(f"거래량 부족({volume_ratio:.2f}x)")
 
-    if recent6_surge <= PULLBACK_MAX_RECENT_6C_SURGE and last2_move <= PULLBACK_MAX_LAST2_MOVE:
+    if not_overheated:
         reasons.append(f"과열 제한(6봉={recent6_surge:.2f}%, 2봉={last2_move:.2f}%)")
     else:
         ok = False
@@ -1081,16 +2027,36 @@ def calculate_selection_score(candidate: dict) -> float:
 
 def scan_candidates(symbols: List[str], ticker_map: Optional[Dict[str, dict]] = None) -> List[dict]:
     candidates: List[dict] = []
+    klines: Dict[str, tuple] = {}
     for symbol in symbols:
         try:
-            is_focus = symbol in ONCHAIN_FOCUS_SYMBOLS
-            candidate = detect_candidate(symbol, ticker_map=ticker_map, relaxed=is_focus)
+            klines[symbol] = fetch_candidate_klines(symbol)
+        except CircuitOpenError as e:
+            # kline 엔드포인트가 죽어 있으면 남은 종목도 똑같이 실패하므로 이번 주기는 여기서 접는다.
+            print(f"[CANDIDATE] {symbol}부터 kline 건너뜀: {e}", flush=True)
+            break
+        except Exception as e:
+            print(f"[CANDIDATE] {symbol} 오류: {e}", flush=True)
+            traceback.print_exc()
+    with ONCHAIN_FOCUS_LOCK:
+        focus_snapshot = dict(ONCHAIN_FOCUS_SYMBOLS)
+    survivors = screen_candle_block(build_candle_block(klines), relaxed_symbols=set(focus_snapshot))
+
+    for symbol in symbols:
+        metric_inc("signal_symbols_scanned_total")
+        if symbol not in klines:
+            continue
+        try:
+            is_focus = symbol in focus_snapshot
+            candidate = None
+            if symbol in survivors:
+                candidate = evaluate_candidate(symbol, *klines[symbol], ticker_map=ticker_map, relaxed=is_focus)
             if not candidate:
                 label = "온체인집중 제외" if is_focus else "제외"
                 print(f"[CANDIDATE] {symbol} | {label}", flush=True)
                 continue
             if is_focus:
-                candidate["onchain_focus"] = ONCHAIN_FOCUS_SYMBOLS.get(symbol, {})
+                candidate["onchain_focus"] = focus_snapshot.get(symbol, {})
 
             candidate["select_score"] = calculate_selection_score(candidate)
             pullback_ok, pullback_reasons = is_pullback_confirmed(candidate)
@@ -1111,9 +2077,10 @@ def scan_candidates(symbols: List[str], ticker_map: Optional[Dict[str, dict]] =
             last_time = last_alert_time.get(key, 0.0)
             if time.time() - last_time < CANDIDATE_ALERT_COOLDOWN:
                 print(f"[CANDIDATE] {symbol} | 쿨다운", flush=True)
+                metric_inc("signal_cooldown_skips_total")
                 continue
 
-            focus_tag = "[ONCHAIN-FOCUS] " if symbol in ONCHAIN_FOCUS_SYMBOLS else ""
+            focus_tag = "[ONCHAIN-FOCUS] " if is_focus else ""
             print(
                 f"[CANDIDATE] {focus_tag}{symbol} | select={candidate['select_score']} | score={candidate['score']} | 1h={candidate['env_direction_1h']} | trend={candidate['trend_direction']} | "
                 f"12봉범위={candidate['recent12_range']:.2f}% | box={candidate.get('box_position', 0):.2f} | "
@@ -1122,25 +2089,27 @@ def scan_candidates(symbols: List[str], ticker_map: Optional[Dict[str, dict]] =
                 f"지지={candidate['support_touches']}회 | 눌림확인=Y | 하락추세=N",
                 flush=True,
             )
+            metric_inc("signal_candidates_total")
             candidates.append(candidate)
         except Exception as e:
             print(f"[CANDIDATE] {symbol} 오류: {e}", flush=True)
             traceback.print_exc()
 
-    candidates.sort(
-        key=lambda x: (
-            x.get("select_score", 0),
-            x["score"],
-            -x["recent12_range"],
-            -x["support_touches"],
-            -x["compression_ratio"],
-            -(abs(x["basis_pct"]) if x["basis_pct"] is not None else 0.0),
-        ),
-        reverse=True,
-    )
+    candidates.sort(key=candidate_sort_key, reverse=True)
     return candidates
 
 
+def candidate_sort_key(x: dict) -> tuple:
+    return (
+        x.get("select_score", 0),
+        x["score"],
+        -x["recent12_range"],
+        -x["support_touches"],
+        -x["compression_ratio"],
+        -(abs(x["basis_pct"]) if x["basis_pct"] is not None else 0.0),
+    )
+
+
 def get_latest_closed_5m_candle_ts(symbol: str) -> int:
     data = get_kline(symbol, interval=SIGNAL_INTERVAL_5M, limit=3)
     if not isinstance(data, list) or len(data) < 2:
@@ -1172,46 +2141,65 @@ def read_recent_onchain_rows(path: str, top_n: int = 30) -> List[dict]:
         return []
 
 
-def should_watch_onchain_row(row: dict) -> bool:
-    to_addr = (row.get("to_addr") or "").lower()
-    if to_addr == "0x0000000000000000000000000000000000000000":
+def should_watch_onchain_event(event: OnchainOutflowEvent) -> bool:
+    if event.to_addr.lower() == "0x0000000000000000000000000000000000000000":
         return False
 
-    token_symbol = (row.get("token_symbol") or "").upper()
+    token_symbol = event.token_symbol
     if not token_symbol or token_symbol.startswith("V") or token_symbol in STABLE_EXCLUDED:
         return False
 
-    exchange_hits = (row.get("hub_exchange_hits") or "").strip()
-    is_hub = (row.get("is_hub_candidate") or "") == "Y"
-    shared = int(str(row.get("hub_shared_seed_count") or "0") or 0)
-    score = int(str(row.get("hub_score") or "0") or 0)
-    target_kind = (row.get("target_kind") or "").strip().lower()
-    swap_action = (row.get("swap_action") or "").strip().upper()
-
-    if exchange_hits:
+    strong_hub = event.is_hub and event.hub_shared_seed_count >= ONCHAIN_MIN_SHARED and event.hub_score >= ONCHAIN_MIN_SCORE
+    if event.exchange_hits:
         return True
-    if target_kind == "protocol" and swap_action in ALLOWED_PROTOCOL_SWAP_ACTIONS and is_hub and shared >= ONCHAIN_MIN_SHARED and score >= ONCHAIN_MIN_SCORE:
+    if event.target_kind == "protocol" and event.swap_action in ALLOWED_PROTOCOL_SWAP_ACTIONS and strong_hub:
         return True
-    if is_hub and shared >= ONCHAIN_MIN_SHARED and score >= ONCHAIN_MIN_SCORE:
+    if strong_hub:
         return True
     return False
 
 
+def onchain_chain_ids() -> List[str]:
+    """ONCHAIN_CHAINS("1,56:seeds_bsc.txt:...")의 chainid 목록. 첫 체인이 기본 파일명을 쓴다."""
+    ids = [part.split(":")[0].strip() for part in ONCHAIN_CHAINS.split(",")]
+    return [x for x in ids if x] or ["1"]
+
+
+def onchain_chain_csv(path: str, chainid: str, primary: bool) -> str:
+    """엔진의 make_chain_args와 같은 규칙: 첫 체인이 아니면 hub_candidates.csv 앞에 chain<id>_를 붙인다."""
+    if primary:
+        return path
+    base = "hub_candidates.csv"
+    return path[: -len(base)] + f"chain{chainid}_{base}" if path.endswith(base) else path
+
+
+def recent_onchain_outflow_events(top_n: int = 100) -> List[OnchainOutflowEvent]:
+    """결과 채널의 마지막 묶음. 재시작 직후처럼 채널이 비어 있으면 체인별 CSV에서 한 번 읽어 채운다."""
+    events = ONCHAIN_RESULTS.recent_outflows(top_n)
+    if events:
+        return events
+    for idx, chainid in enumerate(onchain_chain_ids()):
+        rows = read_recent_onchain_rows(onchain_chain_csv(ONCHAIN_DETAIL_CSV, chainid, primary=idx == 0), top_n=top_n)
+        if rows:
+            ONCHAIN_RESULTS.publish_outflows([OnchainOutflowEvent.from_row(row, chainid) for row in rows], chainid)
+    return ONCHAIN_RESULTS.recent_outflows(top_n)
+
+
 def analyze_onchain_chart_candidates() -> None:
     try:
-        rows = read_recent_onchain_rows(ONCHAIN_DETAIL_CSV, top_n=100)
-        if not rows:
+        events = recent_onchain_outflow_events(top_n=100)
+        if not events:
             return
 
         spot_map = get_spot_symbols()
         ticker_map = refresh_futures_ticker_cache_if_needed(force=True)
         watched_symbols: Set[str] = set()
 
-        for row in rows:
-            if not should_watch_onchain_row(row):
+        for event in events:
+            if not should_watch_onchain_event(event):
                 continue
 
-            token_symbol = (row.get("token_symbol") or "").upper()
+            token_symbol = event.token_symbol
             symbol = token_to_symbol(token_symbol, spot_map)
             if not symbol or symbol in watched_symbols:
                 continue
@@ -1232,18 +2220,18 @@ def analyze_onchain_chart_candidates() -> None:
                 continue
             last_alert_time[key] = now
 
-            exchange_hits = (row.get("hub_exchange_hits") or "-").strip() or "-"
-            is_hub = (row.get("is_hub_candidate") or "") == "Y"
-            shared = row.get("hub_shared_seed_count") or "-"
-            hub_score = row.get("hub_score") or "-"
-            amount = row.get("amount") or "-"
-            seed = row.get("seed") or "-"
-            to_addr = row.get("to_addr") or "-"
-            token_name = row.get("token_name") or token_symbol
-            target_kind = (row.get("target_kind") or "-").strip() or "-"
-            target_label = (row.get("target_label") or "-").strip() or "-"
-            swap_action = (row.get("swap_action") or "-").strip() or "-"
-            swap_token = (row.get("swap_token") or "-").strip() or "-"
+            exchange_hits = event.exchange_hits or "-"
+            is_hub = event.is_hub
+            shared = event.hub_shared_seed_count or "-"
+            hub_score = event.hub_score or "-"
+            amount = event.amount
+            seed = event.seed
+            to_addr = event.to_addr or "-"
+            token_name = event.token_name
+            target_kind = event.target_kind or "-"
+            target_label = event.target_label
+            swap_action = event.swap_action or "-"
+            swap_token = event.swap_token
 
             if exchange_hits != "-":
                 trigger = "거래소 이동 + 후보"
@@ -1277,6 +2265,63 @@ def analyze_onchain_chart_candidates() -> None:
         traceback.print_exc()
 
 
+def consume_onchain_results(stream) -> int:
+    """엔진이 --result-fd로 보내는 JSON 줄을 읽어 결과 채널에 넣는다. 받은 줄 수를 돌려준다."""
+    received = 0
+    for line in stream:
+        try:
+            message = json.loads(line)
+        except ValueError:
+            continue
+        kind = message.get("kind")
+        chainid = str(message.get("chainid") or "1")
+        rows = message.get("rows") or []
+        if kind == "flow":
+            cleanup_onchain_focus_symbols()
+            ONCHAIN_RESULTS.publish_flows([OnchainFlowEvent.from_row(row) for row in rows])
+        elif kind == "outflow":
+            ONCHAIN_RESULTS.publish_outflows([OnchainOutflowEvent.from_row(row, chainid) for row in rows], chainid)
+        elif kind == "active_hub":
+            stream_active_hub_rows(rows)
+        else:
+            continue
+        received += 1
+        print(f"[ONCHAIN-RESULT] {kind} chainid={chainid} {len(rows)}건 수신", flush=True)
+    return received
+
+
+def run_onchain_engine(cmd: List[str], timeout: float) -> Tuple[int, int]:
+    """엔진을 띄우고 결과 파이프를 읽는다. (종료 코드, 결과 채널로 받은 묶음 수)를 돌려준다."""
+    if os.name != "posix":
+        return subprocess.run(cmd, timeout=timeout).returncode, 0
+
+    read_fd, write_fd = os.pipe()
+    try:
+        proc = subprocess.Popen(cmd + ["--result-fd", str(write_fd)], pass_fds=(write_fd,))
+    finally:
+        os.close(write_fd)
+    received = [0]
+
+    def reader() -> None:
+        with os.fdopen(read_fd, "r", encoding="utf-8") as stream:
+            try:
+                received[0] = consume_onchain_results(stream)
+            except Exception as e:
+                print(f"[ONCHAIN-RESULT] 결과 읽기 오류: {e}", flush=True)
+
+    reader_thread = threading.Thread(target=reader, daemon=True)
+    reader_thread.start()
+    try:
+        returncode = proc.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+        raise
+    finally:
+        reader_thread.join(timeout=5)
+    return returncode, received[0]
+
+
 def run_onchain() -> None:
     print("[ONCHAIN] 시작", flush=True)
     try:
@@ -1298,34 +2343,48 @@ def run_onchain() -> None:
             "--flow-max-track-addrs", "5",
             "--flow-alert-max-age-hours", "3",
             "--flow-max-alerts-per-run", "3",
-            # 활성 허브도 핵심 5개만 얕게 감시
+            # 활성 허브는 넓게 추적하되, 감시 시각이 된 허브만 1회 5페이지 예산 안에서 얕게 수집
             "--enable-active-hubs",
-            "--active-hub-max-track", "5",
+            "--active-hub-max-track", "40",
             "--active-hub-scan-max-pages", "1",
+            "--active-hub-poll-budget-pages", "5",
+            "--deadline-seconds", str(ONCHAIN_RUN_DEADLINE),
         ]
 
+        if "," in ONCHAIN_CHAINS or ":" in ONCHAIN_CHAINS:
+            cmd += ["--chains", ONCHAIN_CHAINS]
+
         print(f"[ONCHAIN] 실행 명령: {' '.join(cmd)}", flush=True)
         print("[ONCHAIN] 자동 거래소 주소 확장 OFF: address_book.json 수동 주소만 사용", flush=True)
 
-        eth = subprocess.run(
-            cmd,
-            timeout=240,
-        )
-
-        print(f"[ONCHAIN][ETH] code={eth.returncode}", flush=True)
-
-        if eth.returncode == 0:
-            update_onchain_focus_from_flow_csv(ONCHAIN_FLOW_CSV)
+        t0 = time.time()
+        try:
+            returncode, streamed = run_onchain_engine(cmd, timeout=ONCHAIN_RUN_TIMEOUT)
+        finally:
+            metric_observe("onchain_run_duration_seconds", time.time() - t0)
+
+        print(f"[ONCHAIN][ETH] code={returncode} 결과 채널 수신={streamed}건", flush=True)
+
+        if returncode == 0:
+            record_onchain_profile_metrics(ONCHAIN_PROFILE_JSON)
+            refresh_download_cache()
+            if not streamed:
+                for idx, chainid in enumerate(onchain_chain_ids()):
+                    update_onchain_focus_from_flow_csv(onchain_chain_csv(ONCHAIN_FLOW_CSV, chainid, primary=idx == 0))
             print("[ONCHAIN-FOCUS] 온체인 거래소 유입 코인은 signal_loop에서 완화 조건으로 집중 감시", flush=True)
+            mark_loop_success("onchain")
         else:
+            metric_inc("onchain_run_failures_total")
             print("[ONCHAIN] eth_repeat_wallet_mvp.py 비정상 종료", flush=True)
 
         print("[ONCHAIN] 종료", flush=True)
 
     except subprocess.TimeoutExpired:
-        print("[ONCHAIN] TIMEOUT: 240초 초과로 강제 종료", flush=True)
+        metric_inc("onchain_run_timeouts_total")
+        print(f"[ONCHAIN] TIMEOUT: {ONCHAIN_RUN_TIMEOUT}초 초과로 강제 종료", flush=True)
         traceback.print_exc()
     except Exception as e:
+        metric_inc("onchain_run_failures_total")
         print(f"[ONCHAIN] 오류: {e}", flush=True)
         traceback.print_exc()
 
@@ -1354,6 +2413,7 @@ def signal_loop() -> None:
             if latest_candle_ts == 0 or latest_candle_ts == LAST_CANDIDATE_CANDLE_TS:
                 elapsed = time.time() - loop_start
                 wait_sec = max(0, SIGNAL_INTERVAL - elapsed)
+                mark_loop_success("signal")
                 print(f"[SIGNAL LOOP END] 새 5분 마감봉 없음 -> {wait_sec:.1f}초 대기", flush=True)
                 time.sleep(wait_sec)
                 continue
@@ -1363,23 +2423,39 @@ def signal_loop() -> None:
             picked = candidates[:CANDIDATE_MAX_PER_ALERT]
             if picked:
                 send_candidate_alert(picked, latest_candle_ts)
+                for c in picked:
+                    publish_stream_event("candidate", {
+                        "symbol": c["symbol"],
+                        "candle_ts": latest_candle_ts,
+                        "select_score": c.get("select_score"),
+                        "score": c.get("score"),
+                        "onchain_focus": bool(c.get("onchain_focus")),
+                        "reasons": c.get("reasons", [])[:5],
+                    })
                 now = time.time()
                 for c in picked:
                     prefix = "onchain_focus" if c.get("onchain_focus") else "candidate"
                     last_alert_time[get_cooldown_key(c["symbol"], prefix=prefix)] = now
+                # 재시작 직후 같은 알림이 다시 나가지 않도록 쿨다운은 바로 저장한다.
+                save_signal_state()
             else:
                 print("[CANDIDATE] 이번 5분봉 후보 없음", flush=True)
 
             elapsed = time.time() - loop_start
             wait_sec = max(0, SIGNAL_INTERVAL - elapsed)
+            metric_observe("signal_loop_duration_seconds", elapsed)
+            mark_loop_success("signal")
             print(f"[SIGNAL LOOP END] elapsed={elapsed:.1f}s -> {wait_sec:.1f}초 대기", flush=True)
         except Exception as e:
+            metric_inc("signal_loop_errors_total")
             print(f"signal_loop 오류: {e}", flush=True)
             traceback.print_exc()
         time.sleep(wait_sec)
 
 
 def onchain_loop() -> None:
+    # 재시작 직후에도 첫 엔진 실행(최대 ONCHAIN_RUN_TIMEOUT초)을 기다리지 않고 내려받을 수 있게 한 번 만들어 둔다.
+    refresh_download_cache()
     while True:
         loop_start = time.time()
         wait_sec = ONCHAIN_INTERVAL
@@ -1401,7 +2477,10 @@ def home():
     return (
         "bot is running<br>"
         "onchain files: <a href='/files'>/files</a><br>"
-        "health: <a href='/health'>/health</a>"
+        "health: <a href='/health'>/health</a><br>"
+        "metrics: <a href='/metrics'>/metrics</a><br>"
+        "api: <a href='/api/onchain/flows'>/api/onchain/flows</a>, <a href='/api/onchain/outflows'>/api/onchain/outflows</a><br>"
+        "live: <a href='/stream'>/stream</a> (SSE)"
     ), 200
 
 
@@ -1410,13 +2489,122 @@ def files_page():
     return build_onchain_files_html(), 200
 
 
+def get_gzip_variant(path: str, build: bool = False) -> Optional[str]:
+    """path의 gzip 사본 경로. 사본 mtime을 원본 mtime과 맞춰 두고, 다르면 build=True일 때만 다시 압축한다.
+
+    요청 경로는 build=False로 부른다. 사본이 없거나 낡았으면 None이라 원본을 그대로 보낸다.
+    """
+    if not path.endswith(FILE_GZIP_EXTENSIONS):
+        return None
+    stat = os.stat(path)
+    if stat.st_size < FILE_GZIP_MIN_BYTES:
+        return None
+    gz_path = os.path.join(FILE_GZIP_CACHE_DIR, os.path.basename(path) + ".gz")
+    if os.path.exists(gz_path) and os.stat(gz_path).st_mtime_ns == stat.st_mtime_ns:
+        return gz_path
+    if not build:
+        return None
+    with FILE_GZIP_LOCK:
+        if os.path.exists(gz_path) and os.stat(gz_path).st_mtime_ns == stat.st_mtime_ns:
+            return gz_path
+        os.makedirs(FILE_GZIP_CACHE_DIR, exist_ok=True)
+        tmp_path = f"{gz_path}.{os.getpid()}.tmp"
+        with open(path, "rb") as src, gzip.open(tmp_path, "wb", compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        # Last-Modified가 원본과 같게 나가도록 사본 mtime을 원본에 맞춘다.
+        os.utime(tmp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        os.replace(tmp_path, gz_path)
+        print(f"[FILES] gzip 사본 갱신: {os.path.basename(path)} {stat.st_size:,} -> {os.path.getsize(gz_path):,} bytes", flush=True)
+        return gz_path
+
+
+def get_db_source_mtime_ns(path: str = ONCHAIN_DB_PATH) -> int:
+    """DB에 마지막으로 쓴 시각. WAL 모드면 커밋이 -wal 파일에만 남으므로 둘 중 늦은 쪽을 본다."""
+    mtimes = [os.stat(p).st_mtime_ns for p in (path, f"{path}-wal") if os.path.exists(p)]
+    return max(mtimes) if mtimes else 0
+
+
+def refresh_db_snapshot(path: str = ONCHAIN_DB_PATH, snapshot_path: str = DB_SNAPSHOT_PATH) -> Optional[str]:
+    """원본이 마지막 스냅샷 이후 바뀌었을 때만 backup API로 일관된 사본을 새로 뜬다.
+
+    페이지를 DB_SNAPSHOT_PAGES_PER_STEP개씩 나눠 복사하므로 읽기 잠금을 오래 쥐지 않고,
+    복사 중에 엔진이 커밋하면 sqlite가 알아서 처음부터 다시 복사한다.
+    스냅샷 mtime은 원본 mtime으로 맞춰 두어 다음 비교와 Last-Modified에 그대로 쓴다.
+    """
+    if not os.path.exists(path):
+        return None
+    with DB_SNAPSHOT_LOCK:
+        source_mtime_ns = get_db_source_mtime_ns(path)
+        if os.path.exists(snapshot_path) and os.stat(snapshot_path).st_mtime_ns == source_mtime_ns:
+            return snapshot_path
+        tmp_path = f"{snapshot_path}.{os.getpid()}.tmp"
+        t0 = time.time()
+        src = sqlite3.connect(f"file:{os.path.abspath(path)}?mode=ro", uri=True, timeout=30)
+        dst = sqlite3.connect(tmp_path)
+        try:
+            src.backup(dst, pages=DB_SNAPSHOT_PAGES_PER_STEP, sleep=0.005)
+            dst.execute("PRAGMA journal_mode=DELETE")
+        finally:
+            dst.close()
+            src.close()
+        os.utime(tmp_path, ns=(time.time_ns(), source_mtime_ns))
+        os.replace(tmp_path, snapshot_path)
+        print(f"[DB-SNAPSHOT] 갱신 {os.path.getsize(snapshot_path):,} bytes elapsed={time.time() - t0:.2f}s", flush=True)
+        return snapshot_path
+
+
+def refresh_download_cache() -> None:
+    """리더가 엔진 실행 뒤에 부른다. DB 스냅샷을 새로 뜨고 /download, /view 대상 gzip 사본을 미리 만든다."""
+    t0 = time.time()
+    try:
+        refresh_db_snapshot()
+    except Exception as e:
+        print(f"[DB-SNAPSHOT] 갱신 실패: {e}", flush=True)
+    for filename in DOWNLOADABLE_ONCHAIN_FILES:
+        path = DB_SNAPSHOT_PATH if filename == ONCHAIN_DB_PATH else filename
+        if not os.path.exists(path):
+            continue
+        try:
+            get_gzip_variant(os.path.abspath(path), build=True)
+        except Exception as e:
+            print(f"[FILES] gzip 사본 갱신 실패 {filename}: {e}", flush=True)
+    print(f"[FILES] 다운로드 캐시 갱신 elapsed={time.time() - t0:.2f}s", flush=True)
+
+
+def client_accepts_gzip() -> bool:
+    """Accept-Encoding의 gzip q값으로 판단한다. "gzip;q=0"은 거절, "*"는 허용이다."""
+    return request.accept_encodings["gzip"] > 0
+
+
+def send_onchain_file(filename: str, path: Optional[str] = None, **kwargs) -> Response:
+    """ETag/Last-Modified 304, Range(206) 응답은 send_file(conditional=True)에 맡긴다.
+
+    Range 요청이 아니고 클라이언트가 gzip을 받으면 캐시해 둔 gzip 사본을 보낸다.
+    사본은 파일이 달라서 ETag도 원본과 따로 나온다.
+    """
+    path = os.path.abspath(path or filename)
+    gz_path = get_gzip_variant(path) if client_accepts_gzip() and not request.headers.get("Range") else None
+    if gz_path is None:
+        response = send_file(path, conditional=True, max_age=0, **kwargs)
+    else:
+        response = send_file(gz_path, conditional=True, max_age=0, **kwargs)
+        response.headers["Content-Encoding"] = "gzip"
+    response.headers["Vary"] = "Accept-Encoding"
+    return response
+
+
 @app.route("/download/<path:filename>")
 def download_onchain_file(filename: str):
     if filename not in DOWNLOADABLE_ONCHAIN_FILES:
         abort(404)
     if not os.path.exists(filename):
         abort(404)
-    return send_file(os.path.abspath(filename), as_attachment=True, download_name=filename)
+    if filename == ONCHAIN_DB_PATH:
+        # 쓰는 중인 라이브 파일 대신 리더가 마지막으로 완성한 스냅샷. 요청 경로에서는 새로 뜨지 않는다.
+        if not os.path.exists(DB_SNAPSHOT_PATH):
+            abort(503)
+        return send_onchain_file(filename, path=DB_SNAPSHOT_PATH, as_attachment=True, download_name=filename)
+    return send_onchain_file(filename, as_attachment=True, download_name=filename)
 
 
 @app.route("/view/<path:filename>")
@@ -1427,7 +2615,176 @@ def view_onchain_file(filename: str):
         abort(404)
     if filename.endswith(".db"):
         abort(400)
-    return send_file(os.path.abspath(filename), mimetype="text/plain; charset=utf-8")
+    return send_onchain_file(filename, mimetype="text/plain; charset=utf-8")
+
+
+def encode_api_cursor(sort_value, row_id: int) -> str:
+    raw = json.dumps([sort_value, row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_api_cursor(text: str) -> Tuple[object, int]:
+    try:
+        raw = base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+        sort_value, row_id = json.loads(raw)
+        row_id = int(row_id)
+    except Exception:
+        abort(400)
+    # 커서 값은 그대로 SQL 파라미터가 되므로 sqlite가 받는 스칼라만 통과시킨다(목록/객체면 500이 난다).
+    if isinstance(sort_value, bool) or not isinstance(sort_value, (int, float, str, type(None))):
+        abort(400)
+    return sort_value, row_id
+
+
+def open_onchain_db_readonly() -> Optional[sqlite3.Connection]:
+    if not os.path.exists(ONCHAIN_DB_PATH):
+        return None
+    conn = sqlite3.connect(f"file:{os.path.abspath(ONCHAIN_DB_PATH)}?mode=ro", uri=True, timeout=5)
+    return conn
+
+
+def get_result_version(conn: sqlite3.Connection, kind: str) -> int:
+    try:
+        row = conn.execute("SELECT version FROM result_versions WHERE kind = ?", (kind,)).fetchone()
+    except sqlite3.OperationalError:
+        # 엔진이 아직 결과 테이블을 만들기 전의 DB
+        return 0
+    return int(row[0]) if row else 0
+
+
+def query_onchain_results(conn: sqlite3.Connection, kind: str, params: dict) -> dict:
+    """필터 + keyset 커서 페이지 하나. 정렬 컬럼과 id를 묶어 커서로 쓰므로 깊은 페이지도 OFFSET 없이 색인만 탄다."""
+    sort = str(params.get("sort") or "-time")
+    descending = sort.startswith("-")
+    column = API_SORT_COLUMNS.get(sort.lstrip("-"))
+    if column is None:
+        abort(400)
+    try:
+        limit = min(API_MAX_LIMIT, max(1, int(params.get("limit") or API_DEFAULT_LIMIT)))
+        since = int(params["since"]) if params.get("since") else None
+        until = int(params["until"]) if params.get("until") else None
+    except ValueError:
+        abort(400)
+
+    where = ["kind = ?"]
+    args: List[object] = [kind]
+    if params.get("seed"):
+        where.append("seed = ?")
+        args.append(str(params["seed"]).strip().lower())
+    if params.get("token"):
+        where.append("token_symbol = ?")
+        args.append(str(params["token"]).strip().upper())
+    if params.get("chainid"):
+        where.append("chainid = ?")
+        args.append(str(params["chainid"]).strip())
+    if params.get("exchange"):
+        # 거래소 이름은 엔진이 행-거래소 쌍으로 따로 저장해 두므로 부분 문자열 대신 같음으로 찾는다.
+        where.append("id IN (SELECT result_id FROM onchain_result_exchanges WHERE exchange = ? AND kind = ?)")
+        args.extend([str(params["exchange"]).strip().upper(), kind])
+    if since is not None:
+        where.append("timestamp >= ?")
+        args.append(since)
+    if until is not None:
+        where.append("timestamp < ?")
+        args.append(until)
+    if params.get("cursor"):
+        sort_value, row_id = decode_api_cursor(str(params["cursor"]))
+        op = "<" if descending else ">"
+        where.append(f"({column} {op} ? OR ({column} = ? AND id {op} ?))")
+        args.extend([sort_value, sort_value, row_id])
+
+    direction = "DESC" if descending else "ASC"
+    rows = conn.execute(
+        f"SELECT id, {column}, row_json FROM onchain_results WHERE {' AND '.join(where)} "
+        f"ORDER BY {column} {direction}, id {direction} LIMIT ?",
+        (*args, limit + 1),
+    ).fetchall()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "kind": kind,
+        "items": [json.loads(row_json) for _, _, row_json in rows],
+        "next_cursor": encode_api_cursor(rows[-1][1], rows[-1][0]) if has_more else None,
+    }
+
+
+def compact_json_response(payload: dict, etag: str) -> Response:
+    """짧은 구분자 JSON + ETag. 클라이언트가 gzip을 받으면 일정 크기 이상은 압축해서 보낸다."""
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if len(body) >= API_GZIP_MIN_BYTES and client_accepts_gzip():
+        body = gzip.compress(body, compresslevel=5)
+        headers["Content-Encoding"] = "gzip"
+    return Response(body, status=200, mimetype="application/json", headers=headers)
+
+
+@app.route("/api/onchain/<name>")
+def api_onchain_results(name: str):
+    kind = API_RESULT_KINDS.get(name)
+    if kind is None:
+        abort(404)
+    conn = open_onchain_db_readonly()
+    if conn is None:
+        abort(404)
+    try:
+        version = get_result_version(conn, kind)
+        params = {k: request.args.get(k) for k in ("chainid", "seed", "token", "exchange", "since", "until", "sort", "limit", "cursor")}
+        query_hash = hashlib.sha1(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+        etag = f'"{kind}-{version}-{query_hash}"'
+        # 엔진이 결과를 바꾸지 않았으면 쿼리도 돌리지 않고 304로 끝낸다.
+        if etag in (request.headers.get("If-None-Match") or ""):
+            return Response(b"", status=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+        payload = query_onchain_results(conn, kind, params) if version else {"kind": kind, "items": [], "next_cursor": None}
+        payload["version"] = version
+        return compact_json_response(payload, etag)
+    finally:
+        conn.close()
+
+
+@app.route("/stream")
+def stream_events():
+    """SSE. ?kinds=candidate,onchain_flow,active_hub,focus 로 종류를 고를 수 있다.
+
+    STREAM_MAX_SECONDS가 지나면 응답을 닫는다. EventSource는 retry(3초) 뒤 Last-Event-ID를 붙여
+    다시 붙고, 그 사이 이벤트는 history에서 다시 받는다.
+    """
+    kinds = {k.strip() for k in str(request.args.get("kinds") or "").split(",") if k.strip()} or None
+    try:
+        last_event_id = int(request.headers.get("Last-Event-ID") or request.args.get("last_id") or 0)
+    except ValueError:
+        last_event_id = 0
+    ensure_stream_tailer()
+    client = STREAM_BROKER.subscribe(kinds, last_event_id)
+
+    def generate():
+        ends_at = time.monotonic() + STREAM_MAX_SECONDS if STREAM_MAX_SECONDS > 0 else None
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                wait_sec = STREAM_HEARTBEAT_SECONDS
+                if ends_at is not None:
+                    remaining = ends_at - time.monotonic()
+                    if remaining <= 0:
+                        return
+                    wait_sec = min(wait_sec, remaining)
+                records, dropped = STREAM_BROKER.wait(client, wait_sec)
+                if dropped:
+                    yield f"event: dropped\ndata: {dropped}\n\n"
+                if not records:
+                    if ends_at is None or time.monotonic() < ends_at:
+                        yield ": keepalive\n\n"
+                    continue
+                for record in records:
+                    data = json.dumps(record["data"], ensure_ascii=False, separators=(",", ":"), default=str)
+                    yield f"id: {record['id']}\nevent: {record['kind']}\ndata: {data}\n\n"
+        finally:
+            STREAM_BROKER.unsubscribe(client)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.route("/health")
@@ -1435,17 +2792,152 @@ def health():
     return "ok", 200
 
 
+@app.route("/metrics")
+def metrics():
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4; charset=utf-8")
+
+
+def save_signal_state(path: str = STATE_SNAPSHOT_PATH) -> None:
+    """시세 루프 전역 상태를 임시 파일에 쓴 뒤 os.replace로 바꿔 끼운다."""
+    with ONCHAIN_FOCUS_LOCK:
+        focus_snapshot = dict(ONCHAIN_FOCUS_SYMBOLS)
+    payload = {
+        "saved_at": time.time(),
+        "current_symbols": list(CURRENT_SYMBOLS),
+        "last_symbol_update_time": LAST_SYMBOL_UPDATE_TIME,
+        "futures_ticker_cache": dict(FUTURES_TICKER_CACHE),
+        "last_futures_ticker_time": LAST_FUTURES_TICKER_TIME,
+        "onchain_focus_symbols": focus_snapshot,
+        "last_alert_time": dict(last_alert_time),
+        "last_candidate_candle_ts": LAST_CANDIDATE_CANDLE_TS,
+    }
+    tmp_path = f"{path}.tmp"
+    with STATE_SNAPSHOT_LOCK:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+def restore_signal_state(path: str = STATE_SNAPSHOT_PATH) -> bool:
+    """스냅샷이 있으면 전역 상태를 되살린다. 만료된 쿨다운/집중 감시는 버린다."""
+    global CURRENT_SYMBOLS, LAST_SYMBOL_UPDATE_TIME, FUTURES_TICKER_CACHE, LAST_FUTURES_TICKER_TIME, LAST_CANDIDATE_CANDLE_TS
+    if not os.path.exists(path):
+        return False
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+    except Exception as e:
+        print(f"[STATE] 스냅샷 읽기 실패: {e}", flush=True)
+        return False
+
+    now = time.time()
+    alert_ttl = max(CANDIDATE_ALERT_COOLDOWN, ONCHAIN_CHART_COOLDOWN)
+    CURRENT_SYMBOLS = [str(x) for x in payload.get("current_symbols") or []]
+    LAST_SYMBOL_UPDATE_TIME = float(payload.get("last_symbol_update_time") or 0.0)
+    FUTURES_TICKER_CACHE = dict(payload.get("futures_ticker_cache") or {})
+    LAST_FUTURES_TICKER_TIME = float(payload.get("last_futures_ticker_time") or 0.0)
+    LAST_CANDIDATE_CANDLE_TS = int(payload.get("last_candidate_candle_ts") or 0)
+    ONCHAIN_FOCUS_SYMBOLS.update(dict(payload.get("onchain_focus_symbols") or {}))
+    cleanup_onchain_focus_symbols()
+    last_alert_time.update({
+        str(key): float(ts)
+        for key, ts in dict(payload.get("last_alert_time") or {}).items()
+        if now - float(ts) < alert_ttl
+    })
+    print(
+        f"[STATE] 스냅샷 복원 | age={now - float(payload.get('saved_at') or now):.0f}s | "
+        f"symbols={len(CURRENT_SYMBOLS)} | focus={len(ONCHAIN_FOCUS_SYMBOLS)} | cooldowns={len(last_alert_time)}",
+        flush=True,
+    )
+    return bool(CURRENT_SYMBOLS)
+
+
+def state_snapshot_loop() -> None:
+    while True:
+        time.sleep(STATE_SNAPSHOT_INTERVAL)
+        try:
+            save_signal_state()
+        except Exception as e:
+            print(f"[STATE] 스냅샷 저장 실패: {e}", flush=True)
+
+
+def metrics_snapshot_loop() -> None:
+    while True:
+        try:
+            write_metrics_snapshot()
+        except Exception as e:
+            print(f"[METRICS] 스냅샷 저장 실패: {e}", flush=True)
+        time.sleep(METRICS_SNAPSHOT_INTERVAL)
+
+
+def write_leader_heartbeat() -> None:
+    handle = LEADER_STATE["handle"]
+    if handle is None:
+        return
+    handle.seek(0)
+    handle.truncate()
+    handle.write(json.dumps({"pid": os.getpid(), "since": LEADER_STATE["since"], "heartbeat_at": time.time()}))
+    handle.flush()
+
+
+def try_become_leader(path: str = LEADER_LOCK_PATH) -> bool:
+    """리더 잠금을 비차단으로 시도한다. 잠금은 파일을 연 채로 들고 있고, 프로세스가 죽으면 OS가 풀어 준다."""
+    if LEADER_STATE["is_leader"]:
+        return True
+    if fcntl is None:
+        LEADER_STATE.update(is_leader=True, since=time.time())
+        return True
+    handle = open(path, "a+")
+    try:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return False
+    LEADER_STATE.update(is_leader=True, handle=handle, since=time.time())
+    write_leader_heartbeat()
+    return True
+
+
+def leader_election_loop() -> None:
+    """리더는 heartbeat를 남기고, 나머지는 리더가 죽어 잠금이 풀리면 이어받는다."""
+    while True:
+        time.sleep(LEADER_RETRY_SECONDS)
+        try:
+            if LEADER_STATE["is_leader"]:
+                write_leader_heartbeat()
+            elif try_become_leader():
+                print(f"[LEADER] pid={os.getpid()} 리더 승계 -> 백그라운드 루프 시작", flush=True)
+                launch_background_loops()
+        except Exception as e:
+            print(f"[LEADER] 리더 확인 실패: {e}", flush=True)
+
+
 def start_background_loops() -> None:
+    """리더가 된 워커만 루프를 띄운다. 나머지 워커는 /files, /download, /view만 서빙한다."""
+    if try_become_leader():
+        print(f"[LEADER] pid={os.getpid()} 리더 -> 백그라운드 루프 시작", flush=True)
+        launch_background_loops()
+    else:
+        print(f"[LEADER] pid={os.getpid()} 팔로워 -> 웹 요청만 처리", flush=True)
+    threading.Thread(target=leader_election_loop, daemon=True).start()
+
+
+def launch_background_loops() -> None:
     global spot_loop_started, onchain_loop_started
+    restored = restore_signal_state()
     try:
-        update_symbols_if_needed(force=True)
-        refresh_futures_ticker_cache_if_needed(force=True)
+        # 복원된 감시 종목이 아직 유효하면 강제 재선정 없이 바로 첫 스캔에 들어간다.
+        update_symbols_if_needed(force=not restored)
+        if not restored:
+            refresh_futures_ticker_cache_if_needed(force=True)
     except Exception as e:
         print(f"초기 로딩 실패: {e}", flush=True)
 
     if not spot_loop_started:
         spot_loop_started = True
         threading.Thread(target=signal_loop, daemon=True).start()
+        threading.Thread(target=state_snapshot_loop, daemon=True).start()
+        threading.Thread(target=metrics_snapshot_loop, daemon=True).start()
         print("시세 루프 시작 완료", flush=True)
     if not onchain_loop_started:
         onchain_loop_started = True
@@ -1453,7 +2945,9 @@ def start_background_loops() -> None:
         print("온체인 루프 시작 완료", flush=True)
 
 
-start_background_loops()
+# 백테스트/벤치마크 스크립트가 app을 import할 때는 실서비스 루프를 띄우지 않는다.
+if os.environ.get("APP_DISABLE_BACKGROUND_LOOPS") != "1":
+    start_background_loops()
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 10000))
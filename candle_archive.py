@@ -0,0 +1,217 @@
+"""(symbol, interval)별 append-only 캔들 아카이브.
+
+레코드는 고정폭 48바이트 little-endian `<qddddd` (open_time_ms, open, high, low, close, volume)이고
+파일 하나에 open_time 오름차순으로만 붙인다. 읽기는 mmap 위의 memoryview라 복사가 없고,
+시각 범위 조회는 레코드 배열에서 이진 탐색한다.
+
+app.get_kline 이 마감봉을 채우고, signal_backtest / signal_sweep 가 재생용으로 읽는다.
+"""
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import threading
+from collections.abc import Sequence
+from typing import Dict, Iterator, List, Optional, Tuple
+
+RECORD = struct.Struct("<qddddd")
+RECORD_SIZE = RECORD.size
+
+
+class CandleRows(Sequence):
+    """view() 구간을 감싼 읽기 전용 행 시퀀스. 행은 인덱싱할 때만 [ts, o, h, l, c, v] 리스트로 꺼낸다.
+
+    구간 전체를 리스트로 펼치지 않으므로 재생은 필요한 창만 읽는다. 슬라이스는 창을 이어 붙일 수 있게
+    리스트로 돌려준다. view를 들고 있는 동안은 CandleSeries.close()가 와도 mmap이 살아 있다.
+    """
+
+    __slots__ = ("view", "count")
+
+    def __init__(self, view: memoryview):
+        self.view = view
+        self.count = len(view) // RECORD_SIZE
+
+    def __len__(self) -> int:
+        return self.count
+
+    def row(self, i: int) -> list:
+        return list(RECORD.unpack_from(self.view, i * RECORD_SIZE))
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self.row(i) for i in range(*key.indices(self.count))]
+        if key < 0:
+            key += self.count
+        if not 0 <= key < self.count:
+            raise IndexError(key)
+        return self.row(key)
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self.row(i)
+
+
+class CandleSeries:
+    """파일 하나(심볼 하나, 인터벌 하나)의 mmap 읽기 창."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._mmap: Optional[mmap.mmap] = None
+        self.count = 0
+        self.reopen()
+
+    def reopen(self) -> None:
+        self.close()
+        if not os.path.exists(self.path) or os.path.getsize(self.path) < RECORD_SIZE:
+            self.count = 0
+            return
+        self._file = open(self.path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.count = len(self._mmap) // RECORD_SIZE
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # 아직 view를 들고 있는 호출자가 있으면 참조만 놓고 GC에 맡긴다.
+                pass
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def ts_at(self, index: int) -> int:
+        return RECORD.unpack_from(self._mmap, index * RECORD_SIZE)[0]
+
+    def last_ts(self) -> Optional[int]:
+        return self.ts_at(self.count - 1) if self.count else None
+
+    def bisect_ts(self, ts: int) -> int:
+        """ts 이상인 첫 레코드 위치."""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.ts_at(mid) < ts:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def span(self, start_ts: Optional[int] = None, end_ts: Optional[int] = None) -> Tuple[int, int]:
+        """[start_ts, end_ts) 범위의 레코드 위치 (begin, end)."""
+        begin = self.bisect_ts(start_ts) if start_ts is not None else 0
+        end = self.bisect_ts(end_ts) if end_ts is not None else self.count
+        return begin, max(begin, end)
+
+    def view(self, start_ts: Optional[int] = None, end_ts: Optional[int] = None) -> memoryview:
+        """범위의 원시 바이트를 복사 없이 돌려준다. 호출자는 다 쓰면 release() 해야 한다."""
+        begin, end = self.span(start_ts, end_ts)
+        if self._mmap is None:
+            return memoryview(b"")
+        return memoryview(self._mmap)[begin * RECORD_SIZE:end * RECORD_SIZE]
+
+    def iter_rows(self, start_ts: Optional[int] = None, end_ts: Optional[int] = None) -> Iterator[Tuple[int, float, float, float, float, float]]:
+        begin, end = self.span(start_ts, end_ts)
+        for index in range(begin, end):
+            yield RECORD.unpack_from(self._mmap, index * RECORD_SIZE)
+
+    def rows(self, start_ts: Optional[int] = None, end_ts: Optional[int] = None) -> List[list]:
+        """MEXC kline 행과 같은 모양 [ts, o, h, l, c, v] 리스트."""
+        return [list(row) for row in self.iter_rows(start_ts, end_ts)]
+
+    def lazy_rows(self, start_ts: Optional[int] = None, end_ts: Optional[int] = None) -> CandleRows:
+        """rows()와 같은 행을 복사 없이 읽는 시퀀스."""
+        return CandleRows(self.view(start_ts, end_ts))
+
+    def tail(self, n: int) -> List[list]:
+        begin = max(0, self.count - n)
+        return [list(RECORD.unpack_from(self._mmap, i * RECORD_SIZE)) for i in range(begin, self.count)]
+
+
+class CandleArchive:
+    """디렉터리 하나에 (symbol, interval)별 .bin 파일을 두는 아카이브. 디렉터리는 첫 append 때 만든다."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.lock = threading.Lock()
+        self._last_ts: Dict[Tuple[str, str], Optional[int]] = {}
+        self._series: Dict[Tuple[str, str], CandleSeries] = {}
+        self._root_ready = False
+
+    def path_for(self, symbol: str, interval: str) -> str:
+        return os.path.join(self.root, f"{symbol.upper()}_{interval}.bin")
+
+    def _load_last_ts(self, symbol: str, interval: str) -> Optional[int]:
+        key = (symbol.upper(), interval)
+        if key in self._last_ts:
+            return self._last_ts[key]
+        path = self.path_for(symbol, interval)
+        last_ts = None
+        if os.path.exists(path):
+            size = os.path.getsize(path)
+            whole = size - size % RECORD_SIZE
+            if whole != size:
+                # 쓰다 끊긴 마지막 레코드는 잘라낸다.
+                with open(path, "r+b") as f:
+                    f.truncate(whole)
+            if whole:
+                with open(path, "rb") as f:
+                    f.seek(whole - RECORD_SIZE)
+                    last_ts = RECORD.unpack(f.read(RECORD_SIZE))[0]
+        self._last_ts[key] = last_ts
+        return last_ts
+
+    def append_rows(self, symbol: str, interval: str, rows: List[list]) -> int:
+        """마감봉 원본 행을 붙인다. 이미 있는 시각 이전/같은 행은 건너뛴다. 붙인 개수를 돌려준다."""
+        if not rows:
+            return 0
+        with self.lock:
+            last_ts = self._load_last_ts(symbol, interval)
+            packed = bytearray()
+            for row in rows:
+                try:
+                    ts = int(row[0])
+                    values = (float(row[1]), float(row[2]), float(row[3]), float(row[4]), float(row[5]))
+                except (TypeError, ValueError, IndexError):
+                    continue
+                if last_ts is not None and ts <= last_ts:
+                    continue
+                packed += RECORD.pack(ts, *values)
+                last_ts = ts
+            if not packed:
+                return 0
+            if not self._root_ready:
+                os.makedirs(self.root, exist_ok=True)
+                self._root_ready = True
+            with open(self.path_for(symbol, interval), "ab") as f:
+                f.write(packed)
+            self._last_ts[(symbol.upper(), interval)] = last_ts
+            return len(packed) // RECORD_SIZE
+
+    def series(self, symbol: str, interval: str) -> CandleSeries:
+        """읽기용 mmap 창. 마지막으로 연 뒤 파일이 자랐으면 다시 연다."""
+        key = (symbol.upper(), interval)
+        path = self.path_for(*key)
+        with self.lock:
+            series = self._series.get(key)
+            if series is None:
+                series = CandleSeries(path)
+                self._series[key] = series
+            elif os.path.exists(path) and os.path.getsize(path) // RECORD_SIZE != series.count:
+                series.reopen()
+            return series
+
+    def symbols(self, interval: str) -> List[str]:
+        suffix = f"_{interval}.bin"
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name[: -len(suffix)] for name in os.listdir(self.root) if name.endswith(suffix))
+
+    def close(self) -> None:
+        with self.lock:
+            for series in self._series.values():
+                series.close()
+            self._series.clear()
@@ -2,22 +2,34 @@
 from __future__ import annotations
 
 import argparse
+import codecs
 import collections
+import contextlib
 import csv
+import functools
 import hashlib
 import os
 import json
+import math
+import queue
+import signal
 import sqlite3
+import sys
+import threading
 import time
 import io
-from dataclasses import dataclass
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
-from typing import Dict, Iterable, List, Optional, Set, Tuple
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
 
 import requests
 
-API_URL = "https://api.etherscan.io/v2/api"
-METADATA_API_V1_URL = "https://api-metadata.etherscan.io/v1/api.ashx"
+from resilience import CircuitOpenError, RateLimitError, ResilientEndpoint, RetryBudget, RetryPolicy, SingleFlight, TransientError, check_http_status
+
+# 로컬 stub 서버(etherscan_stub_server.py)로 돌릴 때는 환경변수로 주소를 바꾼다.
+API_URL = os.getenv("ETHERSCAN_API_URL", "https://api.etherscan.io/v2/api")
+METADATA_API_V1_URL = os.getenv("ETHERSCAN_METADATA_API_URL", "https://api-metadata.etherscan.io/v1/api.ashx")
 DB_PATH = "repeat_wallets.db"
 AUTO_SEEDS_PATH_DEFAULT = "auto_seeds.json"
 AUTO_SEEDS_MAX_DEFAULT = 20
@@ -89,6 +101,7 @@ TELEGRAM_CHAT_ID = os.environ.get("TELEGRAM_CHAT_ID")
 
 DEBUG_ONCHAIN = os.getenv("ONCHAIN_DEBUG", "1") != "0"
 REQUEST_TIMEOUT_SECONDS = int(os.getenv("ONCHAIN_REQUEST_TIMEOUT", "15"))
+ETHERSCAN_MAX_CALLS_PER_SEC = float(os.getenv("ONCHAIN_ETHERSCAN_RPS", "4"))
 
 CONTRACT_KIND_CACHE: Dict[str, bool] = {}
 CONTRACT_CHECK_ENABLED = os.getenv("ONCHAIN_CONTRACT_CHECK", "0") != "0"  # 기본 OFF: getsourcecode 폭주 방지
@@ -125,14 +138,427 @@ FLOW_MAX_ALERTS_PER_RUN_DEFAULT = 5
 ACTIVE_HUB_MIN_SHARED = 2
 ACTIVE_HUB_MIN_SCORE = 12
 ACTIVE_HUB_TTL_HOURS = 168  # 7일
-ACTIVE_HUB_MAX_TRACK = 40
+ACTIVE_HUB_MAX_TRACK = 200
 ACTIVE_HUB_SCAN_MAX_PAGES = 3
 ACTIVE_HUB_MIN_OUTGOING_COUNT_FOR_B = 2
 ACTIVE_HUB_BURST_WINDOW_HOURS = 12
+ACTIVE_HUB_POLL_BUDGET_PAGES = 40  # 1회 감시당 활성 허브 수집에 쓸 최대 API 페이지 수
+ACTIVE_HUB_POLL_MIN_SECONDS = 120
+ACTIVE_HUB_POLL_MAX_SECONDS = 6 * 3600
+
+# daemon 모드 기본 주기(초)
+DAEMON_SEED_INTERVAL_DEFAULT = 300
+DAEMON_HUB_INTERVAL_DEFAULT = 300
+DAEMON_FLOW_INTERVAL_DEFAULT = 600
+DAEMON_ACTIVE_HUB_INTERVAL_DEFAULT = 120
+DAEMON_ENRICH_INTERVAL_DEFAULT = 1800
+DAEMON_JOB_DEADLINE_DEFAULT = 180
+
+# 이벤트 로그(append-only) 회전 기준
+EVENT_LOG_MAX_BYTES_DEFAULT = 20 * 1024 * 1024
+EVENT_LOG_BACKUPS_DEFAULT = 5
+EVENT_LOG_SEEN_MAX = 50000
+FLOW_EVENT_KEY_FIELDS = ("seed", "first_tx_hash", "last_tx_hash", "contract_address", "exchange")
+RESULT_RETENTION_DAYS_DEFAULT = 14  # onchain_results 보관 기간
+# 같은 Etherscan 요청(시드/flow 확장/활성 허브가 같은 주소를 다시 부르는 경우)을 기억해 두는 시간.
+# 데몬의 가장 짧은 주기(활성 허브 120초)보다 짧아야 다음 주기에 새 전송을 놓치지 않는다.
+RESPONSE_MEMO_SECONDS_DEFAULT = float(os.getenv("ONCHAIN_RESPONSE_MEMO_SECONDS", "60"))
+RESPONSE_MEMO_MAX_ENTRIES = 4096
+RESPONSE_MEMO_MAX_ROWS = int(os.getenv("ONCHAIN_RESPONSE_MEMO_MAX_ROWS", "20000"))  # 기억한 응답의 result 행 수 합 상한
+ACTIVE_HUB_EVENT_KEY_FIELDS = ("hub", "tx_hash", "to_addr", "token_symbol", "amount")
+
+
+class RateLimiter:
+    """초당 호출 수를 제한하는 토큰 버킷. 스레드 간 공유해도 안전하다."""
+
+    def __init__(self, calls_per_sec: float, burst: Optional[float] = None):
+        self.rate = max(float(calls_per_sec), 0.0)
+        self.capacity = max(float(burst if burst is not None else self.rate), 1.0)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def try_acquire(self) -> float:
+        """토큰을 얻으면 0, 아니면 다음 토큰까지 기다려야 할 초를 돌려준다. 기다리지는 않는다."""
+        if self.rate <= 0:
+            return 0.0
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            if self.tokens >= 1.0:
+                self.tokens -= 1.0
+                return 0.0
+            return (1.0 - self.tokens) / self.rate
+
+    def acquire(self) -> float:
+        waited = 0.0
+        while True:
+            wait = self.try_acquire()
+            if wait <= 0:
+                return waited
+            time.sleep(wait)
+            waited += wait
+
+
+# 키 플랜별 (초당 호출, 하루 호출, 메타데이터 API 허용). 초당 한도는 공식 값보다 1 낮게 잡는다.
+ETHERSCAN_KEY_TIERS = {
+    "free": (ETHERSCAN_MAX_CALLS_PER_SEC, 100_000, False),
+    "standard": (9.0, 200_000, False),
+    "advanced": (19.0, 500_000, False),
+    "professional": (29.0, 1_000_000, False),
+    "proplus": (29.0, 1_500_000, True),
+}
+ETHERSCAN_KEY_USAGE_PATH = os.getenv("ETHERSCAN_KEY_USAGE_PATH", "etherscan_key_usage.json")
+ETHERSCAN_KEY_COOLDOWN_SECONDS = 1.0
+ETHERSCAN_KEY_COOLDOWN_MAX_SECONDS = 30.0
+# rate limit 응답으로 줄인 초당 한도는 연속 성공이 이만큼 쌓일 때마다 10%씩 설정값까지 되돌린다.
+ETHERSCAN_KEY_RECOVER_STREAK = 100
+# 사용량 파일은 실행 끝뿐 아니라 호출 N번 또는 N초마다 저장한다 (중간에 죽어도 일일 한도 계산이 맞게).
+ETHERSCAN_KEY_USAGE_SAVE_EVERY = 50
+ETHERSCAN_KEY_USAGE_SAVE_SECONDS = 30.0
+
+
+def utc_day() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+
+def seconds_until_utc_midnight() -> float:
+    now = time.time()
+    return 86400 - now % 86400
+
+
+def classify_etherscan_key_error(text: str) -> str:
+    """키 문제로 볼 응답이면 'daily' / 'rate' / 'invalid', 아니면 ''."""
+    lowered = str(text or "").lower()
+    if "rate limit" in lowered or "max calls per" in lowered:
+        return "daily" if "daily" in lowered else "rate"
+    if "invalid api key" in lowered or "missing/invalid api key" in lowered:
+        return "invalid"
+    return ""
 
 
 @dataclass
-class Transfer:
+class EtherscanKey:
+    key: str
+    tier: str
+    limiter: RateLimiter
+    daily_limit: int
+    metadata: bool
+    day: str = ""
+    used_today: int = 0
+    cooldown_until: float = 0.0
+    strikes: int = 0
+    disabled: bool = False
+    configured_rps: float = 0.0
+    success_streak: int = 0
+
+    def __post_init__(self):
+        if not self.configured_rps:
+            self.configured_rps = self.limiter.rate
+
+    @property
+    def key_id(self) -> str:
+        # 사용량 파일/프로파일에는 원문 대신 해시 앞자리만 남긴다.
+        return hashlib.sha256(self.key.encode("utf-8")).hexdigest()[:12]
+
+    def roll_day(self, today: str) -> None:
+        if self.day != today:
+            self.day = today
+            self.used_today = 0
+
+
+class EtherscanKeyPool:
+    """API 키 여러 개를 돌려 쓰는 풀. 키마다 초당/일일 한도와 쿨다운을 따로 센다.
+
+    ETHERSCAN_API_KEYS="KEY1,KEY2:proplus,KEY3:standard:8:150000" 처럼 `키[:플랜[:초당[:일일]]]` 목록을 받고,
+    없으면 ETHERSCAN_API_KEY 하나를 free 플랜으로 쓴다.
+    메타데이터 호출(getaddresstag, exportaddresstags)은 허용 플랜 키가 있으면 그 키로만 보낸다.
+    """
+
+    def __init__(self, keys: List[EtherscanKey], usage_path: str = ETHERSCAN_KEY_USAGE_PATH):
+        self.keys = keys
+        self.usage_path = usage_path
+        self.lock = threading.Lock()
+        self.usage_loaded = False
+        self.calls_since_save = 0
+        self.saved_at = time.monotonic()
+
+    @classmethod
+    def from_env(cls) -> "EtherscanKeyPool":
+        specs = [x.strip() for x in os.getenv("ETHERSCAN_API_KEYS", "").split(",") if x.strip()]
+        if not specs and os.getenv("ETHERSCAN_API_KEY"):
+            specs = [f"{os.getenv('ETHERSCAN_API_KEY')}:{os.getenv('ETHERSCAN_API_TIER', 'free')}"]
+        keys: List[EtherscanKey] = []
+        seen: Set[str] = set()
+        for spec in specs:
+            parts = spec.split(":")
+            key = parts[0].strip()
+            tier = (parts[1].strip().lower() if len(parts) > 1 and parts[1].strip() else "free")
+            if not key or key in seen:
+                continue
+            if tier not in ETHERSCAN_KEY_TIERS:
+                print(f"[KEYPOOL] 알 수 없는 플랜 {tier!r} -> free로 취급", flush=True)
+                tier = "free"
+            rps, daily, metadata = ETHERSCAN_KEY_TIERS[tier]
+            if len(parts) > 2 and parts[2].strip():
+                rps = float(parts[2])
+            if len(parts) > 3 and parts[3].strip():
+                daily = int(parts[3])
+            seen.add(key)
+            keys.append(EtherscanKey(key=key, tier=tier, limiter=RateLimiter(rps), daily_limit=daily, metadata=metadata))
+        return cls(keys)
+
+    def load_usage(self) -> None:
+        try:
+            with open(self.usage_path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        except Exception:
+            saved = {}
+        today = utc_day()
+        for k in self.keys:
+            k.roll_day(today)
+            entry = saved.get(k.key_id) or {}
+            if entry.get("day") == today:
+                k.used_today = max(k.used_today, int(entry.get("calls", 0) or 0))
+        self.usage_loaded = True
+
+    def save_usage(self) -> None:
+        if not self.keys:
+            return
+        try:
+            with open(self.usage_path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        except Exception:
+            saved = {}
+        with self.lock:
+            self.calls_since_save = 0
+            self.saved_at = time.monotonic()
+            for k in self.keys:
+                entry = saved.get(k.key_id) or {}
+                calls = k.used_today
+                if entry.get("day") == k.day:
+                    # 다른 프로세스가 먼저 저장한 값보다 작아지지 않게 한다.
+                    calls = max(calls, int(entry.get("calls", 0) or 0))
+                saved[k.key_id] = {"day": k.day, "calls": calls, "tier": k.tier}
+        tmp = f"{self.usage_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(saved, f, ensure_ascii=False, indent=2)
+            os.replace(tmp, self.usage_path)
+        except Exception as e:
+            print(f"[KEYPOOL] 사용량 저장 실패: {e}", flush=True)
+
+    def candidates(self, metadata: bool) -> List[EtherscanKey]:
+        usable = [k for k in self.keys if not k.disabled and k.used_today < k.daily_limit]
+        if metadata and any(k.metadata for k in self.keys):
+            return [k for k in usable if k.metadata]
+        return usable
+
+    def acquire(self, metadata: bool = False) -> Tuple[EtherscanKey, float]:
+        """쓸 수 있는 키 하나와 기다린 초를 돌려준다. 토큰이 많이 남고 오늘 덜 쓴 키가 먼저다."""
+        if not self.keys:
+            raise RuntimeError("환경변수 ETHERSCAN_API_KEYS / ETHERSCAN_API_KEY가 없습니다.")
+        waited = 0.0
+        while True:
+            with self.lock:
+                if not self.usage_loaded:
+                    self.load_usage()
+                today = utc_day()
+                for k in self.keys:
+                    k.roll_day(today)
+                pool = self.candidates(metadata)
+                if not pool:
+                    kind = "메타데이터 " if metadata else ""
+                    raise RuntimeError(f"사용 가능한 {kind}Etherscan 키가 없습니다 (일일 한도 소진/무효)")
+                now = time.monotonic()
+                ready = sorted((k for k in pool if k.cooldown_until <= now), key=lambda k: (-k.limiter.tokens, k.used_today))
+                wait = None
+                picked = None
+                for k in ready:
+                    need = k.limiter.try_acquire()
+                    if need <= 0:
+                        k.used_today += 1
+                        picked = k
+                        break
+                    wait = need if wait is None else min(wait, need)
+                if picked is not None:
+                    self.calls_since_save += 1
+                    save_due = self.calls_since_save >= ETHERSCAN_KEY_USAGE_SAVE_EVERY or now - self.saved_at >= ETHERSCAN_KEY_USAGE_SAVE_SECONDS
+                elif wait is None:
+                    wait = min(k.cooldown_until for k in pool) - now
+            if picked is not None:
+                if save_due:
+                    self.save_usage()
+                return picked, waited
+            wait = max(wait, 0.01)
+            time.sleep(wait)
+            waited += wait
+
+    def report_success(self, k: EtherscanKey) -> None:
+        if not k.strikes and k.limiter.rate >= k.configured_rps:
+            return
+        with self.lock:
+            k.strikes = 0
+            if k.limiter.rate >= k.configured_rps:
+                return
+            k.success_streak += 1
+            if k.success_streak < ETHERSCAN_KEY_RECOVER_STREAK:
+                return
+            k.success_streak = 0
+            with k.limiter.lock:
+                k.limiter.rate = min(k.configured_rps, k.limiter.rate * 1.1)
+                k.limiter.capacity = max(1.0, k.limiter.rate)
+            dbg(f"KEYPOOL 키 {k.key_id} 연속 성공 {ETHERSCAN_KEY_RECOVER_STREAK}회 -> 초당 {k.limiter.rate:.2f}로 복구")
+
+    def report_key_error(self, k: EtherscanKey, kind: str) -> None:
+        with self.lock:
+            if kind == "daily":
+                k.used_today = max(k.used_today, k.daily_limit)
+                k.cooldown_until = time.monotonic() + seconds_until_utc_midnight()
+                print(f"[KEYPOOL] 키 {k.key_id} 일일 한도 도달 -> 자정(UTC)까지 제외", flush=True)
+            elif kind == "invalid":
+                k.disabled = True
+                print(f"[KEYPOOL] 키 {k.key_id} 무효 응답 -> 이번 실행에서 제외", flush=True)
+            else:
+                k.strikes += 1
+                k.success_streak = 0
+                cooldown = min(ETHERSCAN_KEY_COOLDOWN_SECONDS * (2 ** (k.strikes - 1)), ETHERSCAN_KEY_COOLDOWN_MAX_SECONDS)
+                k.cooldown_until = max(k.cooldown_until, time.monotonic() + cooldown)
+                # 설정한 초당 한도가 실제 플랜보다 높아도 수렴하도록 속도를 20% 줄이고 버킷을 비운다.
+                with k.limiter.lock:
+                    k.limiter.rate = max(1.0, k.limiter.rate * 0.8)
+                    k.limiter.capacity = max(1.0, min(k.limiter.capacity, k.limiter.rate))
+                    k.limiter.tokens = 0.0
+                    k.limiter.updated_at = time.monotonic()
+                dbg(f"KEYPOOL 키 {k.key_id} rate limit 응답 -> {cooldown:.1f}s 쿨다운 (연속 {k.strikes}회)")
+        PROFILER.count(f"etherscan.key.{k.key_id}.{kind or 'error'}")
+
+    def snapshot(self) -> List[dict]:
+        now = time.monotonic()
+        with self.lock:
+            return [
+                {
+                    "key_id": k.key_id,
+                    "tier": k.tier,
+                    "rps": k.limiter.rate,
+                    "used_today": k.used_today,
+                    "daily_limit": k.daily_limit,
+                    "metadata": k.metadata,
+                    "cooling_sec": round(max(0.0, k.cooldown_until - now), 1),
+                    "disabled": k.disabled,
+                }
+                for k in self.keys
+            ]
+
+
+ETHERSCAN_KEY_POOL = EtherscanKeyPool.from_env()
+
+
+class RunProfiler:
+    """단계별 소요 시간(span)과 카운터를 모아 실행 프로파일 JSON으로 남긴다."""
+
+    MAX_SAMPLES_PER_SPAN = 4096
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started_at = time.time()
+        self.samples: Dict[str, collections.deque] = {}
+        self.totals: Dict[str, List[float]] = {}
+        self.counters: Dict[str, int] = collections.Counter()
+
+    def reset(self) -> None:
+        with self.lock:
+            self.started_at = time.time()
+            self.samples = {}
+            self.totals = {}
+            self.counters = collections.Counter()
+
+    def record(self, name: str, elapsed: float) -> None:
+        with self.lock:
+            if name not in self.samples:
+                self.samples[name] = collections.deque(maxlen=self.MAX_SAMPLES_PER_SPAN)
+                self.totals[name] = [0, 0.0]
+            self.samples[name].append(elapsed)
+            self.totals[name][0] += 1
+            self.totals[name][1] += elapsed
+
+    def count(self, name: str, n: int = 1) -> None:
+        with self.lock:
+            self.counters[name] += n
+
+    @contextlib.contextmanager
+    def span(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - t0)
+
+    @staticmethod
+    def percentile(sorted_values: List[float], pct: float) -> float:
+        if not sorted_values:
+            return 0.0
+        idx = min(len(sorted_values) - 1, max(0, math.ceil(pct / 100.0 * len(sorted_values)) - 1))
+        return sorted_values[idx]
+
+    def report(self) -> dict:
+        with self.lock:
+            spans = {}
+            for name, values in self.samples.items():
+                ordered = sorted(values)
+                count, total = self.totals[name]
+                spans[name] = {
+                    "count": count,
+                    "total_sec": round(total, 4),
+                    "p50_sec": round(self.percentile(ordered, 50), 4),
+                    "p95_sec": round(self.percentile(ordered, 95), 4),
+                    "max_sec": round(ordered[-1], 4) if ordered else 0.0,
+                }
+            counters = dict(sorted(self.counters.items()))
+
+        cache_hit_rates = {}
+        for key in sorted(counters):
+            if key.startswith("cache.") and key.endswith(".hit"):
+                base = key[: -len(".hit")]
+                hits = counters.get(key, 0)
+                misses = counters.get(f"{base}.miss", 0)
+                cache_hit_rates[base[len("cache."):]] = round(hits / (hits + misses), 4) if hits + misses else None
+        fmt = format_token_amount.cache_info()
+        cache_hit_rates["format_token_amount"] = round(fmt.hits / (fmt.hits + fmt.misses), 4) if fmt.hits + fmt.misses else None
+
+        return {
+            "started_at_utc": datetime.fromtimestamp(self.started_at, tz=timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+            "written_at_utc": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+            "wall_sec": round(time.time() - self.started_at, 3),
+            "spans": dict(sorted(spans.items())),
+            "counters": counters,
+            "cache_hit_rates": cache_hit_rates,
+            "etherscan_keys": ETHERSCAN_KEY_POOL.snapshot(),
+        }
+
+    def write_json(self, path: str) -> None:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+
+PROFILER = RunProfiler()
+
+
+def profiled(name: str):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with PROFILER.span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class Transfer(NamedTuple):
+    """transfers 테이블 한 행. 필드 순서가 INSERT 컬럼 순서와 같아 그대로 executemany에 넘긴다."""
     chainid: str
     wallet: str
     block_number: int
@@ -145,6 +571,7 @@ class Transfer:
     contract_address: str
     value_raw: str
     token_decimal: int
+    amount_scaled: float = 0.0
 
 
 def normalize(addr: str) -> str:
@@ -256,22 +683,32 @@ def shorten(addr: str, head: int = 6, tail: int = 4) -> str:
     return f"{addr[:head]}...{addr[-tail:]}"
 
 
+@functools.lru_cache(maxsize=65536)
 def format_token_amount(value_raw: str, token_decimal: int) -> str:
+    """value_raw를 float 변환 없이 정수 연산으로 표시용 문자열로 만든다.
+
+    18자리 토큰도 자릿수 손실 없이 반올림하며, (value_raw, decimals) 단위로 캐시한다.
+    """
     try:
         value_int = int(value_raw)
         decimals = max(int(token_decimal or 0), 0)
-        value = value_int / (10 ** decimals) if decimals else float(value_int)
-
-        if value == 0:
-            return "0"
-        if value >= 1:
-            return f"{value:,.4f}".rstrip("0").rstrip(".")
-        return f"{value:.8f}".rstrip("0").rstrip(".")
     except Exception:
         return value_raw
+    if value_int == 0:
+        return "0"
+
+    sign = "-" if value_int < 0 else ""
+    value_int = abs(value_int)
+    unit = 10 ** decimals
+    places = 4 if value_int >= unit else 8
+    scale = 10 ** places
+    scaled = (value_int * scale * 2 + unit) // (unit * 2)
+    whole, frac = divmod(scaled, scale)
+    return f"{sign}{whole:,}.{frac:0{places}d}".rstrip("0").rstrip(".")
 
 
 def amount_as_float(value_raw: str, token_decimal: int) -> float:
+    """수집 시 1회만 호출해 transfers.amount_scaled 컬럼에 저장하는 값."""
     try:
         value_int = int(value_raw)
         decimals = max(int(token_decimal or 0), 0)
@@ -280,6 +717,228 @@ def amount_as_float(value_raw: str, token_decimal: int) -> float:
         return 0.0
 
 
+@functools.lru_cache(maxsize=65536)
+def format_utc_ts(ts: int) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+@functools.lru_cache(maxsize=None)
+def record_field_keys(fields: Tuple[str, ...]):
+    # csv.DictWriter는 keys()에 집합 연산을 쓰므로 dict의 keys 뷰를 돌려준다.
+    return dict.fromkeys(fields).keys()
+
+
+class SlotRecord:
+    """__slots__ 기반 분석 결과 행의 공통 부분.
+
+    time_utc, amount, *_short 같은 표시용 문자열은 property라서 CSV/알림/결과 전달에서 읽을 때만 만든다.
+    row["x"], row.get("x"), row.keys()가 되므로 csv.DictWriter와 기존 dict 소비 코드에 그대로 넘기고,
+    JSON으로 보낼 때만 as_dict()로 FIELDS 순서의 dict를 만든다.
+    """
+
+    __slots__ = ()
+    FIELDS: Tuple[str, ...] = ()
+
+    def __getitem__(self, name: str) -> Any:
+        try:
+            return getattr(self, name)
+        except AttributeError:
+            raise KeyError(name) from None
+
+    def get(self, name: str, default: Any = None) -> Any:
+        return getattr(self, name, default)
+
+    def keys(self):
+        return record_field_keys(self.FIELDS)
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+
+class OutgoingTransfer(SlotRecord):
+    """get_recent_outgoing_transfers 한 행 (지갑에서 나간 전송 하나)."""
+
+    __slots__ = (
+        "timestamp", "tx_hash", "from_addr", "to_addr", "token_symbol", "token_name",
+        "contract_address", "value_raw", "token_decimal", "amount_float", "target_kind", "target_label",
+    )
+    FIELDS = (
+        "timestamp", "time_utc", "tx_hash", "from_addr", "to_addr", "token_symbol", "token_name", "contract_address",
+        "value_raw", "token_decimal", "amount_float", "amount", "target_kind", "target_label",
+    )
+
+    def __init__(self, timestamp: int, tx_hash: str, from_addr: str, to_addr: str, token_symbol: str, token_name: str,
+                 contract_address: str, value_raw: str, token_decimal: int, amount_float: float, target_kind: str, target_label: str):
+        self.timestamp = timestamp
+        self.tx_hash = tx_hash
+        self.from_addr = from_addr
+        self.to_addr = to_addr
+        self.token_symbol = token_symbol
+        self.token_name = token_name
+        self.contract_address = contract_address
+        self.value_raw = value_raw
+        self.token_decimal = token_decimal
+        self.amount_float = amount_float
+        self.target_kind = target_kind
+        self.target_label = target_label
+
+    @property
+    def time_utc(self) -> str:
+        return format_utc_ts(self.timestamp)
+
+    @property
+    def amount(self) -> str:
+        return format_token_amount(self.value_raw, self.token_decimal)
+
+
+class SeedOutflow(SlotRecord):
+    """get_seed_outflow_details 한 행. hub는 허브 후보 행(dict)을 복사 없이 참조한다."""
+
+    __slots__ = (
+        "timestamp", "seed", "to_addr", "token_symbol", "token_name", "value_raw", "token_decimal", "amount_float",
+        "contract_address", "tx_hash", "target_kind", "target_label", "swap_action", "swap_token", "hub",
+    )
+    FIELDS = (
+        "timestamp", "time_utc", "seed", "seed_short", "to_addr", "to_short", "token_symbol", "token_name", "amount",
+        "amount_float", "contract_address", "tx_hash", "target_kind", "target_label", "swap_action", "swap_token",
+        "is_hub_candidate", "hub_score", "hub_shared_seed_count", "hub_total_interactions", "hub_exchange_hits", "hub_label",
+    )
+
+    def __init__(self, timestamp: int, seed: str, to_addr: str, token_symbol: str, token_name: str, value_raw: str,
+                 token_decimal: int, amount_float: float, contract_address: str, tx_hash: str, target_kind: str,
+                 target_label: str, swap_action: str, swap_token: str, hub: Optional[dict]):
+        self.timestamp = timestamp
+        self.seed = seed
+        self.to_addr = to_addr
+        self.token_symbol = token_symbol
+        self.token_name = token_name
+        self.value_raw = value_raw
+        self.token_decimal = token_decimal
+        self.amount_float = amount_float
+        self.contract_address = contract_address
+        self.tx_hash = tx_hash
+        self.target_kind = target_kind
+        self.target_label = target_label
+        self.swap_action = swap_action
+        self.swap_token = swap_token
+        self.hub = hub
+
+    @property
+    def time_utc(self) -> str:
+        return format_utc_ts(self.timestamp)
+
+    @property
+    def seed_short(self) -> str:
+        return shorten(self.seed)
+
+    @property
+    def to_short(self) -> str:
+        return shorten(self.to_addr)
+
+    @property
+    def amount(self) -> str:
+        return format_token_amount(self.value_raw, self.token_decimal)
+
+    @property
+    def is_hub_candidate(self) -> str:
+        return "Y" if self.hub else ""
+
+    @property
+    def hub_score(self) -> Any:
+        return self.hub["score"] if self.hub else ""
+
+    @property
+    def hub_shared_seed_count(self) -> Any:
+        return self.hub["shared_seed_count"] if self.hub else ""
+
+    @property
+    def hub_total_interactions(self) -> Any:
+        return self.hub["total_interactions"] if self.hub else ""
+
+    @property
+    def hub_exchange_hits(self) -> Any:
+        return self.hub["exchange_hits"] if self.hub else ""
+
+    @property
+    def hub_label(self) -> Any:
+        return self.hub["label"] if self.hub else ""
+
+
+class FlowPath(SlotRecord):
+    """build_flow_paths 결과 한 건 (시드 -> ... -> 거래소).
+
+    edges는 경로의 OutgoingTransfer를 복사 없이 참조하고, hop_froms[i]는 edges[i]를 보낸 주소다.
+    """
+
+    __slots__ = ("seed", "edges", "hop_froms", "exchange")
+    FIELDS = (
+        "seed", "start_time_utc", "end_time_utc", "token_symbol", "token_name", "contract_address", "start_amount",
+        "end_amount", "hop_count", "exchange", "path", "path_addresses", "first_tx_hash", "last_tx_hash", "duration_min",
+    )
+
+    def __init__(self, seed: str, edges: Tuple[OutgoingTransfer, ...], hop_froms: Tuple[str, ...], exchange: str):
+        self.seed = seed
+        self.edges = edges
+        self.hop_froms = hop_froms
+        self.exchange = exchange
+
+    @property
+    def end_ts(self) -> int:
+        return self.edges[-1].timestamp
+
+    @property
+    def start_time_utc(self) -> str:
+        return self.edges[0].time_utc
+
+    @property
+    def end_time_utc(self) -> str:
+        return self.edges[-1].time_utc
+
+    @property
+    def token_symbol(self) -> str:
+        return self.edges[0].token_symbol
+
+    @property
+    def token_name(self) -> str:
+        return self.edges[0].token_name
+
+    @property
+    def contract_address(self) -> str:
+        return self.edges[0].contract_address
+
+    @property
+    def start_amount(self) -> str:
+        return self.edges[0].amount
+
+    @property
+    def end_amount(self) -> str:
+        return self.edges[-1].amount
+
+    @property
+    def hop_count(self) -> int:
+        return len(self.edges)
+
+    @property
+    def path(self) -> str:
+        return " -> ".join(shorten(addr) for addr in self.hop_froms) + f" -> {shorten(self.edges[-1].to_addr)}"
+
+    @property
+    def path_addresses(self) -> str:
+        return " -> ".join(self.hop_froms + (self.edges[-1].to_addr,))
+
+    @property
+    def first_tx_hash(self) -> str:
+        return self.edges[0].tx_hash
+
+    @property
+    def last_tx_hash(self) -> str:
+        return self.edges[-1].tx_hash
+
+    @property
+    def duration_min(self) -> int:
+        return max(0, int((self.edges[-1].timestamp - self.edges[0].timestamp) / 60))
+
+
 def is_contract_address(addr: str, chainid: str = "1") -> bool:
     """Etherscan getsourcecode로 스마트 컨트랙트 여부를 확인한다.
 
@@ -290,7 +949,9 @@ def is_contract_address(addr: str, chainid: str = "1") -> bool:
     if not CONTRACT_CHECK_ENABLED or not addr:
         return False
     if addr in CONTRACT_KIND_CACHE:
+        PROFILER.count("cache.contract_kind.hit")
         return CONTRACT_KIND_CACHE[addr]
+    PROFILER.count("cache.contract_kind.miss")
     try:
         data = etherscan_get({
             "chainid": chainid,
@@ -308,6 +969,10 @@ def is_contract_address(addr: str, chainid: str = "1") -> bool:
         if is_contract:
             dbg(f"CONTRACT 표시 address={addr} label={contract_name or 'CONTRACT'}")
         return is_contract
+    except (CircuitOpenError, TransientError) as e:
+        # 일시 장애 결과는 캐시하지 않고 다음에 다시 본다.
+        dbg(f"CONTRACT 판별 보류 address={addr} error={e}")
+        return False
     except Exception as e:
         dbg(f"CONTRACT 판별 실패 address={addr} error={e}")
         CONTRACT_KIND_CACHE[addr] = False
@@ -345,6 +1010,7 @@ def ensure_db(conn: sqlite3.Connection) -> None:
             contract_address TEXT,
             value_raw TEXT,
             token_decimal INTEGER,
+            amount_scaled REAL,
             UNIQUE(chainid, wallet, tx_hash, from_addr, to_addr, contract_address, value_raw)
         )
         '''
@@ -395,11 +1061,99 @@ def ensure_db(conn: sqlite3.Connection) -> None:
             status TEXT NOT NULL,
             last_checked_at INTEGER,
             last_outgoing_at INTEGER,
-            notes TEXT
+            notes TEXT,
+            next_poll_at INTEGER,
+            poll_interval_sec INTEGER
+        )
+        '''
+    )
+    # /api 조회용 결과 테이블. CSV와 같은 행을 row_json으로 들고, 필터/정렬 컬럼만 따로 뽑아 색인한다.
+    cur.execute(
+        '''
+        CREATE TABLE IF NOT EXISTS onchain_results (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            chainid TEXT NOT NULL,
+            result_key TEXT NOT NULL UNIQUE,
+            timestamp INTEGER NOT NULL,
+            seed TEXT NOT NULL,
+            token_symbol TEXT NOT NULL,
+            exchange TEXT NOT NULL,
+            amount_float REAL NOT NULL,
+            hop_count INTEGER NOT NULL,
+            row_json TEXT NOT NULL,
+            updated_at INTEGER NOT NULL
+        )
+        '''
+    )
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_onchain_results_time ON onchain_results(kind, timestamp, id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_onchain_results_seed ON onchain_results(kind, seed, timestamp)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_onchain_results_token ON onchain_results(kind, token_symbol, timestamp)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_onchain_results_amount ON onchain_results(kind, amount_float, id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_onchain_results_hops ON onchain_results(kind, hop_count, id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_onchain_results_chain ON onchain_results(kind, chainid, timestamp, id)")
+    # 출금 행의 exchange는 "BINANCE, OKX"처럼 여러 개일 수 있어서 거래소 필터는 행-거래소 쌍 테이블로 같음 비교한다.
+    cur.execute(
+        '''
+        CREATE TABLE IF NOT EXISTS onchain_result_exchanges (
+            exchange TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            result_id INTEGER NOT NULL,
+            PRIMARY KEY (exchange, kind, result_id)
+        ) WITHOUT ROWID
+        '''
+    )
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_onchain_result_exchanges_row ON onchain_result_exchanges(result_id)")
+    cur.execute(
+        '''
+        CREATE TABLE IF NOT EXISTS result_versions (
+            kind TEXT PRIMARY KEY,
+            version INTEGER NOT NULL,
+            updated_at INTEGER NOT NULL
         )
         '''
     )
     conn.commit()
+    ensure_column(conn, "active_hubs", "next_poll_at", "INTEGER")
+    ensure_column(conn, "active_hubs", "poll_interval_sec", "INTEGER")
+    ensure_transfer_amount_column(conn)
+    migrate_result_keys(conn)
+    migrate_result_exchanges(conn)
+
+
+def ensure_column(conn: sqlite3.Connection, table: str, column: str, decl: str) -> bool:
+    """이전 버전 DB에 없는 컬럼을 추가한다. 추가했으면 True."""
+    cur = conn.cursor()
+    columns = {row[1] for row in cur.execute(f"PRAGMA table_info({table})").fetchall()}
+    if column in columns:
+        return False
+    cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+    conn.commit()
+    return True
+
+
+def ensure_transfer_amount_column(conn: sqlite3.Connection, batch_size: int = 5000) -> int:
+    """기존 DB에 amount_scaled 컬럼을 추가하고 비어 있는 행을 한 번만 채운다."""
+    cur = conn.cursor()
+    ensure_column(conn, "transfers", "amount_scaled", "REAL")
+
+    filled = 0
+    while True:
+        rows = cur.execute(
+            "SELECT id, value_raw, token_decimal FROM transfers WHERE amount_scaled IS NULL LIMIT ?",
+            (batch_size,),
+        ).fetchall()
+        if not rows:
+            break
+        cur.executemany(
+            "UPDATE transfers SET amount_scaled = ? WHERE id = ?",
+            [(amount_as_float(value_raw or "0", int(token_decimal or 0)), row_id) for row_id, value_raw, token_decimal in rows],
+        )
+        conn.commit()
+        filled += len(rows)
+    if filled:
+        dbg(f"amount_scaled 백필 완료 rows={filled}")
+    return filled
 
 
 def seed_exchange_labels(conn: sqlite3.Connection) -> None:
@@ -547,35 +1301,183 @@ def update_auto_seeds_from_hubs(conn: sqlite3.Connection, hub_rows: List[dict],
     return added, updated
 
 
-def etherscan_get(params: Dict[str, str], timeout: int = 20) -> dict:
-    api_key = os.getenv("ETHERSCAN_API_KEY")
-    if not api_key:
-        raise RuntimeError("환경변수 ETHERSCAN_API_KEY가 없습니다.")
+def is_metadata_call(params: Dict[str, str]) -> bool:
+    return params.get("module") == "nametag"
+
+
+def count_resilience_event(endpoint: str, kind: str) -> None:
+    PROFILER.count(f"resilience.{endpoint}.{kind}")
+
+
+def make_etherscan_endpoint(name: str) -> ResilientEndpoint:
+    # 한도 응답은 키 풀이 다른 키로 돌리므로 키 수만큼은 더 보낸다.
+    policy = RetryPolicy(attempts=4, base_delay=1.0, max_delay=10.0, rate_limit_attempts=max(4, len(ETHERSCAN_KEY_POOL.keys) + 2))
+    return ResilientEndpoint(name, policy=policy, budget=RetryBudget(ratio=0.2, reserve=20.0), on_event=count_resilience_event)
+
+
+# Etherscan 서버 응답 중 다시 보내면 될 만한 것
+ETHERSCAN_TRANSIENT_MARKERS = ("query timeout", "unexpected error", "try again", "temporarily")
+
+
+ETHERSCAN_STREAM_CHUNK_BYTES = 64 * 1024
+ETHERSCAN_STREAM_BATCH_ROWS = 500  # 스트리밍 수집에서 writer로 한 번에 넘기는 Transfer 수
 
-    full_params = dict(params)
-    full_params["apikey"] = api_key
 
-    action = full_params.get("action", "-")
-    module = full_params.get("module", "-")
-    address = full_params.get("address", "-")
-    page = full_params.get("page", "-")
+class EtherscanStreamDecoder:
+    """Etherscan 응답 JSON을 청크 단위로 읽으면서 result 배열 원소를 하나씩 item_fn으로 바꾼다.
+
+    응답 전체 문자열이나 원소 dict 리스트를 한꺼번에 만들지 않는다. sink를 주면 바꾼 원소도 모으지 않고
+    하나씩 sink로 넘기고 result 자리에는 넘긴 개수만 남기므로, offset을 10000까지 올려도 버퍼는 청크 하나와
+    원소 하나 정도만 잡는다. result가 배열이 아니면(오류 문자열 등) 값을 그대로 둔다.
+    """
+
+    WHITESPACE = " \t\r\n"
+    NUMBER_CHARS = "0123456789.eE+-"
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self.chunks = iter(chunks)
+        self.text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self.json_decoder = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """다음 청크를 붙인다. 더 읽을 게 없으면 False."""
+        if self.eof:
+            return False
+        text = ""
+        for chunk in self.chunks:
+            text = self.text_decoder.decode(chunk)
+            if text:
+                break
+        else:
+            text = self.text_decoder.decode(b"", final=True)
+            self.eof = True
+        # 이미 읽은 앞부분은 청크를 붙일 때만 잘라내 원소마다 버퍼를 복사하지 않는다.
+        self.buf = self.buf[self.pos:] + text
+        self.pos = 0
+        return bool(text) or not self.eof
+
+    def peek(self) -> str:
+        while True:
+            buf, pos = self.buf, self.pos
+            while pos < len(buf) and buf[pos] in self.WHITESPACE:
+                pos += 1
+            self.pos = pos
+            if pos < len(buf):
+                return buf[pos]
+            if not self.fill():
+                raise ValueError("Etherscan 응답이 중간에 끊김")
+
+    def expect(self, chars: str) -> str:
+        c = self.peek()
+        if c not in chars:
+            raise ValueError(f"Etherscan 응답 JSON 형식 오류: {chars!r} 대신 {c!r}")
+        self.pos += 1
+        return c
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = self.json_decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+            # 숫자는 버퍼 끝에서 끝났거나 "12." / "1e-" 처럼 잘린 채 앞부분만 읽혔을 수 있어 다음 청크를 붙여 다시 읽는다.
+            tail = end
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                while tail < len(self.buf) and self.buf[tail] in self.NUMBER_CHARS:
+                    tail += 1
+            if tail < len(self.buf) or not self.fill():
+                self.pos = end
+                return value
+
+    def decode(self, item_fn: Callable[[dict], Any], sink: Optional[Callable[[Any], None]] = None) -> dict:
+        out: Dict[str, Any] = {}
+        self.expect("{")
+        if self.peek() == "}":
+            return out
+        while True:
+            key = self.value()
+            self.expect(":")
+            if key == "result" and self.peek() == "[":
+                self.pos += 1
+                items: List[Any] = []
+                count = 0
+                if self.peek() == "]":
+                    self.pos += 1
+                else:
+                    while True:
+                        item = item_fn(self.value())
+                        if sink is None:
+                            items.append(item)
+                        else:
+                            sink(item)
+                        count += 1
+                        if self.expect(",]") == "]":
+                            break
+                out[key] = items if sink is None else count
+            else:
+                out[key] = self.value()
+            if self.expect(",}") == "}":
+                return out
+
+
+def etherscan_get_once(
+    params: Dict[str, str],
+    timeout: int,
+    item_fn: Optional[Callable[[dict, Dict[str, str]], Any]] = None,
+    sink: Optional[Callable[[Any], None]] = None,
+) -> dict:
+    action = params.get("action", "-")
+    module = params.get("module", "-")
+    address = params.get("address", "-")
+    page = params.get("page", "-")
     effective_timeout = min(int(timeout or REQUEST_TIMEOUT_SECONDS), REQUEST_TIMEOUT_SECONDS)
 
-    dbg(f"ETHERSCAN 요청 시작 module={module} action={action} address={address} page={page} timeout={effective_timeout}s")
+    key, waited = ETHERSCAN_KEY_POOL.acquire(metadata=is_metadata_call(params))
+    if waited > 0:
+        dbg(f"ETHERSCAN rate limit 대기 {waited:.2f}s module={module} action={action}")
+    full_params = dict(params)
+    full_params["apikey"] = key.key
+    dbg(f"ETHERSCAN 요청 시작 module={module} action={action} address={address} page={page} key={key.key_id} timeout={effective_timeout}s")
+    PROFILER.count("etherscan.calls")
+    PROFILER.count(f"etherscan.calls.{module}.{action}")
+    PROFILER.count(f"etherscan.key.{key.key_id}.calls")
     t0 = time.time()
     try:
-        resp = requests.get(API_URL, params=full_params, timeout=effective_timeout)
+        with PROFILER.span(f"etherscan.{module}.{action}"):
+            if item_fn is None:
+                resp = requests.get(API_URL, params=full_params, timeout=effective_timeout)
+                check_http_status(resp, f"Etherscan {module}.{action}")
+                data = resp.json()
+            else:
+                # 큰 페이지는 받으면서 바로 원소 단위로 풀어 item_fn 결과만 남긴다.
+                resp = requests.get(API_URL, params=full_params, timeout=effective_timeout, stream=True)
+                try:
+                    check_http_status(resp, f"Etherscan {module}.{action}")
+                    decoder = EtherscanStreamDecoder(resp.iter_content(chunk_size=ETHERSCAN_STREAM_CHUNK_BYTES))
+                    data = decoder.decode(lambda item: item_fn(item, params), sink)
+                finally:
+                    resp.close()
         elapsed = time.time() - t0
         dbg(f"ETHERSCAN 응답 도착 status_code={resp.status_code} elapsed={elapsed:.1f}s module={module} action={action} address={address} page={page}")
-        resp.raise_for_status()
-        data = resp.json()
     except requests.exceptions.Timeout as e:
         elapsed = time.time() - t0
         dbg(f"ETHERSCAN TIMEOUT elapsed={elapsed:.1f}s module={module} action={action} address={address} page={page}")
-        raise RuntimeError(f"Etherscan timeout after {effective_timeout}s: module={module} action={action} address={address} page={page}") from e
+        PROFILER.count("etherscan.timeouts")
+        raise TransientError(f"Etherscan timeout after {effective_timeout}s: module={module} action={action} address={address} page={page}") from e
+    except ValueError as e:
+        # 게이트웨이가 HTML 오류 페이지를 돌려준 경우 등
+        PROFILER.count("etherscan.errors")
+        raise TransientError(f"Etherscan 응답 JSON 파싱 실패: module={module} action={action} address={address} page={page}") from e
     except Exception as e:
         elapsed = time.time() - t0
         dbg(f"ETHERSCAN 요청 실패 elapsed={elapsed:.1f}s module={module} action={action} address={address} page={page} error={e}")
+        PROFILER.count("etherscan.errors")
         raise
 
     status = str(data.get("status", ""))
@@ -585,12 +1487,65 @@ def etherscan_get(params: Dict[str, str], timeout: int = 20) -> dict:
 
     if status == "0":
         text = str(result)
-        if "No transactions found" in text:
+        # 실제 API는 message에, 일부 응답은 result에 이 문구를 넣는다.
+        if "No transactions found" in text or "No transactions found" in message:
+            ETHERSCAN_KEY_POOL.report_success(key)
             return {"status": "1", "message": "OK", "result": []}
+        key_error = classify_etherscan_key_error(text)
+        if key_error:
+            # 키 풀이 이 키를 쉬게 하고 다음 acquire에서 다른 키를 고르므로 바로 다시 보낸다.
+            ETHERSCAN_KEY_POOL.report_key_error(key, key_error)
+            PROFILER.count("etherscan.key_failovers")
+            raise RateLimitError(f"Etherscan key {key.key_id} {key_error}: {text}", retry_after=0.0)
+        PROFILER.count("etherscan.errors")
+        if any(marker in text.lower() for marker in ETHERSCAN_TRANSIENT_MARKERS):
+            raise TransientError(f"Etherscan error: message={message} result={result}")
         raise RuntimeError(f"Etherscan error: message={message} result={result}")
 
+    ETHERSCAN_KEY_POOL.report_success(key)
     return data
 
+
+def etherscan_request_key(params: Dict[str, str]) -> tuple:
+    return tuple(sorted((k, str(v).strip().lower() if k in ("address", "contractaddress") else str(v).strip()) for k, v in params.items()))
+
+
+def etherscan_get(
+    params: Dict[str, str],
+    timeout: int = 20,
+    item_fn: Optional[Callable[[dict, Dict[str, str]], Any]] = None,
+    sink: Optional[Callable[[Any], None]] = None,
+) -> dict:
+    """키 문제는 다른 키로, 타임아웃/5xx는 지터 백오프로 다시 보낸다. 서킷이 열려 있으면 CircuitOpenError.
+
+    같은 요청이 동시에 오면 한 번만 보내고, 성공 응답은 RESPONSE_MEMO_SECONDS 동안 재사용한다.
+    item_fn(item, params)을 주면 응답을 스트리밍으로 풀어 result를 item_fn 결과 리스트로 돌려준다.
+    sink까지 주면 item_fn 결과를 받는 대로 sink로 넘기고 result에는 개수만 남긴다. 이때는 응답이
+    남지 않으므로 합치기/메모를 거치지 않는다.
+    """
+    if sink is not None:
+        return ETHERSCAN_ENDPOINT.call(lambda: etherscan_get_once(params, timeout, item_fn, sink))
+    key = etherscan_request_key(params)
+    if item_fn is not None:
+        key += (("__item_fn__", item_fn.__name__),)
+    return ETHERSCAN_FLIGHTS.do(key, lambda: ETHERSCAN_ENDPOINT.call(lambda: etherscan_get_once(params, timeout, item_fn)))
+
+
+ETHERSCAN_ENDPOINT = make_etherscan_endpoint("etherscan")
+def etherscan_response_rows(data: Any) -> int:
+    # 메모 무게는 result 행 수로 센다. 행이 없는 응답(오류 문자열 등)도 한 칸은 차지한다.
+    result = data.get("result") if isinstance(data, dict) else None
+    return max(1, len(result)) if isinstance(result, list) else 1
+
+
+ETHERSCAN_FLIGHTS = SingleFlight(
+    ttl=RESPONSE_MEMO_SECONDS_DEFAULT,
+    max_entries=RESPONSE_MEMO_MAX_ENTRIES,
+    on_event=lambda kind: PROFILER.count(f"cache.etherscan_response.{kind}"),
+    weigh=etherscan_response_rows,
+    max_weight=RESPONSE_MEMO_MAX_ROWS,
+)
+
 def guess_exchange_label_from_metadata(nametag: str, labels: List[str]) -> str:
     joined = " | ".join([nametag or ""] + list(labels or [])).lower()
     if "exchange" not in joined and not any(k in joined for k in KNOWN_EXCHANGE_KEYWORDS):
@@ -658,7 +1613,9 @@ def add_exchange_address_to_books(conn: sqlite3.Connection, address: str, label:
 def get_address_nametag_metadata(conn: sqlite3.Connection, address: str, chainid: str, cache_hours: int) -> Optional[dict]:
     cached = get_cached_metadata(conn, address, chainid, cache_hours)
     if cached is not None:
+        PROFILER.count("cache.address_metadata.hit")
         return cached
+    PROFILER.count("cache.address_metadata.miss")
     data = etherscan_get({"chainid": chainid, "module": "nametag", "action": "getaddresstag", "address": normalize(address)}, timeout=20)
     items = data.get("result", []) or []
     if not items:
@@ -672,6 +1629,7 @@ def get_address_nametag_metadata(conn: sqlite3.Connection, address: str, chainid
     return {"source": "getaddresstag", "nametag": nametag, "labels": labels, "exchange_label": exchange_label, "fetched_at": utc_now_ts()}
 
 
+@profiled("collect_unknown_addresses_for_enrichment")
 def collect_unknown_addresses_for_enrichment(conn: sqlite3.Connection, chainid: str, days: int, limit: int) -> List[str]:
     cutoff = utc_now_ts() - days * 86400
     cur = conn.cursor()
@@ -697,6 +1655,7 @@ def collect_unknown_addresses_for_enrichment(conn: sqlite3.Connection, chainid:
     return out
 
 
+@profiled("auto_enrich_exchange_addresses")
 def auto_enrich_exchange_addresses(conn: sqlite3.Connection, chainid: str, days: int, address_book_path: str, max_addresses: int, cache_hours: int, sleep_sec: float) -> int:
     if max_addresses <= 0:
         return 0
@@ -721,27 +1680,43 @@ def auto_enrich_exchange_addresses(conn: sqlite3.Connection, chainid: str, days:
     return added
 
 
-def etherscan_metadata_v1_get(params: Dict[str, str], timeout: int = 30) -> str:
-    api_key = os.getenv("ETHERSCAN_API_KEY")
-    if not api_key:
-        raise RuntimeError("환경변수 ETHERSCAN_API_KEY가 없습니다.")
-    full_params = dict(params)
-    full_params["apikey"] = api_key
+def etherscan_metadata_v1_get_once(params: Dict[str, str], timeout: int) -> str:
     effective_timeout = min(int(timeout or REQUEST_TIMEOUT_SECONDS), REQUEST_TIMEOUT_SECONDS)
-    safe_params = {k: v for k, v in full_params.items() if k != "apikey"}
-    dbg(f"METADATA_V1 요청 시작 params={safe_params} timeout={effective_timeout}s")
+    key, _ = ETHERSCAN_KEY_POOL.acquire(metadata=True)
+    full_params = dict(params)
+    full_params["apikey"] = key.key
+    dbg(f"METADATA_V1 요청 시작 params={params} key={key.key_id} timeout={effective_timeout}s")
+    PROFILER.count("etherscan.calls")
+    PROFILER.count(f"etherscan.calls.metadata_v1.{full_params.get('action', '-')}")
+    PROFILER.count(f"etherscan.key.{key.key_id}.calls")
     t0 = time.time()
     try:
-        resp = requests.get(METADATA_API_V1_URL, params=full_params, timeout=effective_timeout)
+        with PROFILER.span(f"etherscan.metadata_v1.{full_params.get('action', '-')}"):
+            resp = requests.get(METADATA_API_V1_URL, params=full_params, timeout=effective_timeout)
         dbg(f"METADATA_V1 응답 도착 status_code={resp.status_code} elapsed={time.time()-t0:.1f}s")
-        resp.raise_for_status()
-        return resp.text
+        check_http_status(resp, "Etherscan metadata_v1")
+        text = resp.text
     except requests.exceptions.Timeout as e:
         dbg(f"METADATA_V1 TIMEOUT elapsed={time.time()-t0:.1f}s")
-        raise RuntimeError(f"Etherscan metadata timeout after {effective_timeout}s") from e
+        raise TransientError(f"Etherscan metadata timeout after {effective_timeout}s") from e
     except Exception as e:
         dbg(f"METADATA_V1 요청 실패 elapsed={time.time()-t0:.1f}s error={e}")
         raise
+    # CSV 대신 JSON 오류가 오면 키 문제인지 본다.
+    key_error = classify_etherscan_key_error(text[:512]) if text.lstrip().startswith("{") else ""
+    if key_error:
+        ETHERSCAN_KEY_POOL.report_key_error(key, key_error)
+        PROFILER.count("etherscan.key_failovers")
+        raise RateLimitError(f"Etherscan metadata key {key.key_id} {key_error}", retry_after=0.0)
+    ETHERSCAN_KEY_POOL.report_success(key)
+    return text
+
+
+def etherscan_metadata_v1_get(params: Dict[str, str], timeout: int = 30) -> str:
+    return ETHERSCAN_METADATA_ENDPOINT.call(lambda: etherscan_metadata_v1_get_once(params, timeout))
+
+
+ETHERSCAN_METADATA_ENDPOINT = make_etherscan_endpoint("etherscan_metadata_v1")
 
 def bootstrap_exchange_addresses_from_etherscan(conn: sqlite3.Connection, chainid: str, label_slugs: List[str], address_book_path: str) -> int:
     added = 0
@@ -775,7 +1750,9 @@ def fetch_erc20_transfers(
     startblock: int = 0,
     endblock: int = 99999999,
     sort: str = "desc",
+    sink: Optional[Callable[[Transfer], None]] = None,
 ) -> List[Transfer]:
+    """tokentx 한 페이지. sink를 주면 Transfer를 리스트로 모으지 않고 받는 대로 sink로 넘기고 빈 리스트를 돌려준다."""
     data = etherscan_get(
         {
             "chainid": chainid,
@@ -787,63 +1764,126 @@ def fetch_erc20_transfers(
             "startblock": str(startblock),
             "endblock": str(endblock),
             "sort": sort,
-        }
+        },
+        item_fn=transfer_from_tokentx_item,
+        sink=sink,
+    )
+    if sink is not None:
+        return []
+    return data.get("result") or []
+
+
+def transfer_from_tokentx_item(item: dict, params: Dict[str, str]) -> Transfer:
+    """tokentx 원소 dict를 바로 Transfer로 바꾼다. 토큰/컨트랙트 문자열은 intern해서 페이지 안 중복을 합친다."""
+    value_raw = item.get("value", "0")
+    token_decimal = int(item.get("tokenDecimal", 0) or 0)
+    return Transfer(
+        sys.intern(str(params.get("chainid", ""))),
+        sys.intern(normalize(params.get("address", ""))),
+        int(item.get("blockNumber", 0)),
+        int(item.get("timeStamp", 0)),
+        item.get("hash", ""),
+        normalize(item.get("from", "")),
+        normalize(item.get("to", "")),
+        sys.intern(item.get("tokenSymbol", "")),
+        sys.intern(item.get("tokenName", "")),
+        sys.intern(normalize(item.get("contractAddress", ""))),
+        value_raw,
+        token_decimal,
+        amount_as_float(value_raw, token_decimal),
     )
-
-    items = data.get("result", [])
-    out: List[Transfer] = []
-
-    for item in items:
-        out.append(
-            Transfer(
-                chainid=chainid,
-                wallet=normalize(address),
-                block_number=int(item.get("blockNumber", 0)),
-                timestamp=int(item.get("timeStamp", 0)),
-                tx_hash=item.get("hash", ""),
-                from_addr=normalize(item.get("from", "")),
-                to_addr=normalize(item.get("to", "")),
-                token_symbol=item.get("tokenSymbol", ""),
-                token_name=item.get("tokenName", ""),
-                contract_address=normalize(item.get("contractAddress", "")),
-                value_raw=item.get("value", "0"),
-                token_decimal=int(item.get("tokenDecimal", 0) or 0),
-            )
-        )
-    return out
 
 
 def save_transfers(conn: sqlite3.Connection, transfers: Iterable[Transfer]) -> int:
     cur = conn.cursor()
-    count = 0
-    for t in transfers:
-        cur.execute(
-            '''
-            INSERT OR IGNORE INTO transfers
-            (chainid, wallet, block_number, timestamp, tx_hash, from_addr, to_addr,
-             token_symbol, token_name, contract_address, value_raw, token_decimal)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''',
-            (
-                t.chainid,
-                t.wallet,
-                t.block_number,
-                t.timestamp,
-                t.tx_hash,
-                t.from_addr,
-                t.to_addr,
-                t.token_symbol,
-                t.token_name,
-                t.contract_address,
-                t.value_raw,
-                t.token_decimal,
-            ),
-        )
-        count += cur.rowcount
+    # Transfer는 컬럼 순서 그대로의 튜플이라 변환 없이 넘긴다.
+    cur.executemany(
+        '''
+        INSERT OR IGNORE INTO transfers
+        (chainid, wallet, block_number, timestamp, tx_hash, from_addr, to_addr,
+         token_symbol, token_name, contract_address, value_raw, token_decimal, amount_scaled)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''',
+        transfers,
+    )
+    count = max(cur.rowcount, 0)  # executemany는 행별 변경 수를 합쳐 준다
     conn.commit()
+    PROFILER.count("rows_written.transfers", count)
     return count
 
 
+class TransferWriter:
+    """여러 수집 스레드의 저장 요청을 전용 연결 하나로 순서대로 처리하는 단일 writer.
+
+    멀티 체인 수집에서 체인별 스레드가 같은 SQLite 파일에 동시에 쓰다 잠금 경합을 일으키지 않게 한다.
+    save()는 자기 묶음이 커밋될 때까지 기다렸다가 저장 건수를 돌려준다.
+    """
+
+    def __init__(self, db_path: str = DB_PATH):
+        self.db_path = db_path
+        self.queue: "queue.Queue[Optional[Tuple[List[Transfer], Future]]]" = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name="transfer-writer", daemon=True)
+        self.thread.start()
+
+    def _run(self) -> None:
+        conn = sqlite3.connect(self.db_path, timeout=60)
+        try:
+            while True:
+                item = self.queue.get()
+                if item is None:
+                    return
+                transfers, future = item
+                try:
+                    future.set_result(save_transfers(conn, transfers))
+                except Exception as e:
+                    future.set_exception(e)
+        finally:
+            conn.close()
+
+    def save(self, transfers: List[Transfer]) -> int:
+        future: Future = Future()
+        self.queue.put((transfers, future))
+        return future.result()
+
+    def close(self) -> None:
+        self.queue.put(None)
+        self.thread.join()
+
+
+class TransferPageSink:
+    """tokentx 한 페이지를 받는 대로 최근 전송만 batch_rows개씩 저장한다. 페이지 전체 리스트는 만들지 않는다.
+
+    재시도로 같은 페이지를 다시 받으면 앞 시도에서 넘긴 행이 다시 오지만 INSERT OR IGNORE라 저장 건수는 늘지 않는다.
+    """
+
+    def __init__(self, save: Callable[[List[Transfer]], int], cutoff: int, batch_rows: int = ETHERSCAN_STREAM_BATCH_ROWS):
+        self.save = save
+        self.cutoff = cutoff
+        self.batch_rows = max(1, batch_rows)
+        self.batch: List[Transfer] = []
+        self.received = 0
+        self.recent = 0
+        self.saved = 0
+        self.oldest_ts: Optional[int] = None
+
+    def __call__(self, transfer: Transfer) -> None:
+        self.received += 1
+        if self.oldest_ts is None or transfer.timestamp < self.oldest_ts:
+            self.oldest_ts = transfer.timestamp
+        if transfer.timestamp < self.cutoff:
+            return
+        self.recent += 1
+        self.batch.append(transfer)
+        if len(self.batch) >= self.batch_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.batch:
+            batch, self.batch = self.batch, []
+            self.saved += self.save(batch)
+
+
+@profiled("collect_for_address")
 def collect_for_address(
     conn: sqlite3.Connection,
     address: str,
@@ -852,39 +1892,57 @@ def collect_for_address(
     offset: int,
     max_pages: int,
     sleep_sec: float,
+    deadline: Optional[float] = None,
+    writer: Optional[TransferWriter] = None,
 ) -> int:
     cutoff = utc_now_ts() - days * 86400
     total_saved = 0
+    save = writer.save if writer is not None else (lambda rows: save_transfers(conn, rows))
     dbg(f"collect_for_address 시작 address={address} max_pages={max_pages} offset={offset}")
 
     for page in range(1, max_pages + 1):
+        if deadline is not None and time.monotonic() >= deadline:
+            dbg(f"주소 수집 종료: deadline 도달 address={address} page={page}")
+            break
         dbg(f"주소 수집 page 시작 address={address} page={page}/{max_pages}")
+        # 페이지를 받는 동안 최근 전송을 묶음 단위로 바로 writer에 넘긴다.
+        page_sink = TransferPageSink(save, cutoff)
         try:
-            transfers = fetch_erc20_transfers(
+            fetch_erc20_transfers(
                 address=address,
                 chainid=chainid,
                 page=page,
                 offset=offset,
                 sort="desc",
+                sink=page_sink,
             )
-            dbg(f"주소 수집 page 완료 address={address} page={page} transfers={len(transfers)}")
+            page_sink.flush()
+            dbg(f"주소 수집 page 완료 address={address} page={page} transfers={page_sink.received}")
+        except CircuitOpenError as e:
+            print(f"[WARN] fetch 중단 address={address} page={page}: {e}", flush=True)
+            break
+        except TransientError as e:
+            # 재시도까지 실패한 페이지만 건너뛰고 나머지 페이지는 계속 받는다.
+            print(f"[WARN] fetch 실패 address={address} page={page} (건너뜀): {e}", flush=True)
+            PROFILER.count("collect.pages_skipped")
+            continue
         except Exception as e:
             print(f"[WARN] fetch 실패 address={address} page={page}: {e}", flush=True)
             break
+        finally:
+            # 중간에 실패한 페이지도 이미 넘긴 묶음은 저장돼 있다.
+            total_saved += page_sink.saved
 
-        if not transfers:
+        if not page_sink.received:
             dbg(f"주소 수집 종료: 전송 없음 address={address} page={page}")
             break
 
-        recent = [t for t in transfers if t.timestamp >= cutoff]
-        dbg(f"최근 전송 필터 address={address} page={page} recent={len(recent)}/{len(transfers)}")
-        if recent:
-            saved = save_transfers(conn, recent)
-            total_saved += saved
-            dbg(f"DB 저장 완료 address={address} page={page} saved={saved} total_saved={total_saved}")
+        dbg(
+            f"DB 저장 완료 address={address} page={page} recent={page_sink.recent}/{page_sink.received} "
+            f"saved={page_sink.saved} total_saved={total_saved}"
+        )
 
-        oldest_ts = min(t.timestamp for t in transfers)
-        if oldest_ts < cutoff:
+        if page_sink.oldest_ts is not None and page_sink.oldest_ts < cutoff:
             dbg(f"주소 수집 종료: cutoff 도달 address={address} page={page}")
             break
 
@@ -901,8 +1959,10 @@ def collect_for_seed(
     offset: int,
     max_pages: int,
     sleep_sec: float,
+    deadline: Optional[float] = None,
+    writer: Optional[TransferWriter] = None,
 ) -> int:
-    return collect_for_address(conn, seed, chainid, days, offset, max_pages, sleep_sec)
+    return collect_for_address(conn, seed, chainid, days, offset, max_pages, sleep_sec, deadline=deadline, writer=writer)
 
 
 def find_exchange_hits(
@@ -910,12 +1970,16 @@ def find_exchange_hits(
     candidate_addresses: List[str],
     chainid: str,
     days: int,
+    deadline: Optional[float] = None,
 ) -> Dict[str, List[str]]:
     cutoff = utc_now_ts() - days * 86400
     cur = conn.cursor()
     hits: Dict[str, List[str]] = collections.defaultdict(list)
 
-    for addr in candidate_addresses:
+    for idx, addr in enumerate(candidate_addresses):
+        if deadline is not None and time.monotonic() >= deadline:
+            print(f"[HUB] deadline 도달: 거래소 도착 확인 {idx}/{len(candidate_addresses)}에서 중단", flush=True)
+            break
         rows = cur.execute(
             '''
             SELECT DISTINCT to_addr
@@ -935,12 +1999,15 @@ def find_exchange_hits(
     return hits
 
 
+@profiled("build_hub_scores")
 def build_hub_scores(
     conn: sqlite3.Connection,
     chainid: str,
     days: int,
     min_shared_seed_count: int = 2,
+    deadline: Optional[float] = None,
 ) -> List[dict]:
+    """deadline(time.monotonic() 기준)이 지나면 남은 후보의 거래소 도착 확인을 건너뛰고 그때까지의 점수로 돌려준다."""
     cutoff = utc_now_ts() - days * 86400
     cur = conn.cursor()
 
@@ -952,6 +2019,7 @@ def build_hub_scores(
         ''',
         (chainid, cutoff),
     ).fetchall()
+    PROFILER.count("rows_read.build_hub_scores", len(rows))
 
     per_counterparty_seed_count: Dict[str, collections.Counter] = collections.defaultdict(collections.Counter)
     direction_counts: Dict[str, collections.Counter] = collections.defaultdict(collections.Counter)
@@ -1026,7 +2094,7 @@ def build_hub_scores(
         )
 
     candidate_addresses = [r["address"] for r in results]
-    exchange_hits = find_exchange_hits(conn, candidate_addresses, chainid, days)
+    exchange_hits = find_exchange_hits(conn, candidate_addresses, chainid, days, deadline=deadline)
 
     for row in results:
         hits = exchange_hits.get(normalize(row["address"]), [])
@@ -1084,20 +2152,25 @@ def infer_swap_action(
     return "", ""
 
 
+@profiled("get_seed_outflow_details")
 def get_seed_outflow_details(
     conn: sqlite3.Connection,
     seeds: List[str],
     chainid: str,
     days: int,
     candidate_rows: List[dict],
-) -> List[dict]:
+    deadline: Optional[float] = None,
+) -> List[SeedOutflow]:
     cutoff = utc_now_ts() - days * 86400
     cur = conn.cursor()
 
     candidate_map = {normalize(r["address"]): r for r in candidate_rows}
-    outflows: List[dict] = []
+    outflows: List[SeedOutflow] = []
 
-    for seed in seeds:
+    for idx, seed in enumerate(seeds):
+        if deadline is not None and time.monotonic() >= deadline:
+            print(f"[HUB] deadline 도달: 시드 출금 상세 {idx}/{len(seeds)}에서 중단", flush=True)
+            break
         seed = normalize(seed)
         rows = cur.execute(
             '''
@@ -1110,7 +2183,8 @@ def get_seed_outflow_details(
                 token_name,
                 contract_address,
                 value_raw,
-                token_decimal
+                token_decimal,
+                amount_scaled
             FROM transfers
             WHERE chainid = ?
               AND timestamp >= ?
@@ -1120,6 +2194,7 @@ def get_seed_outflow_details(
             ''',
             (chainid, cutoff, seed, seed),
         ).fetchall()
+        PROFILER.count("rows_read.get_seed_outflow_details", len(rows))
 
         for (
             timestamp,
@@ -1131,6 +2206,7 @@ def get_seed_outflow_details(
             contract_address,
             value_raw,
             token_decimal,
+            amount_scaled,
         ) in rows:
             to_addr = normalize(to_addr)
             candidate = candidate_map.get(to_addr)
@@ -1138,33 +2214,26 @@ def get_seed_outflow_details(
             swap_action, swap_token = infer_swap_action(conn, chainid, seed, tx_hash)
 
             outflows.append(
-                {
-                    "timestamp": int(timestamp),
-                    "time_utc": datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
-                    "seed": seed,
-                    "seed_short": shorten(seed),
-                    "to_addr": to_addr,
-                    "to_short": shorten(to_addr),
-                    "token_symbol": token_symbol or "-",
-                    "token_name": token_name or "-",
-                    "amount": format_token_amount(value_raw, token_decimal),
-                    "amount_float": amount_as_float(value_raw, token_decimal),
-                    "contract_address": normalize(contract_address or ""),
-                    "tx_hash": tx_hash,
-                    "target_kind": target_kind,
-                    "target_label": target_label or "-",
-                    "swap_action": swap_action or "-",
-                    "swap_token": swap_token or "-",
-                    "is_hub_candidate": "Y" if candidate else "",
-                    "hub_score": candidate["score"] if candidate else "",
-                    "hub_shared_seed_count": candidate["shared_seed_count"] if candidate else "",
-                    "hub_total_interactions": candidate["total_interactions"] if candidate else "",
-                    "hub_exchange_hits": candidate["exchange_hits"] if candidate else "",
-                    "hub_label": candidate["label"] if candidate else "",
-                }
+                SeedOutflow(
+                    int(timestamp),
+                    seed,
+                    to_addr,
+                    token_symbol or "-",
+                    token_name or "-",
+                    value_raw or "0",
+                    int(token_decimal or 0),
+                    float(amount_scaled or 0.0),
+                    normalize(contract_address or ""),
+                    tx_hash,
+                    target_kind,
+                    target_label or "-",
+                    swap_action or "-",
+                    swap_token or "-",
+                    candidate,
+                )
             )
 
-    outflows.sort(key=lambda x: (x["timestamp"], x["seed"], x["to_addr"]), reverse=True)
+    outflows.sort(key=lambda x: (x.timestamp, x.seed, x.to_addr), reverse=True)
     return outflows
 
 
@@ -1186,18 +2255,354 @@ def print_seed_outflow_details(rows: List[dict], top: int = 20) -> None:
         )
 
 
-def export_csv(path: str, rows: List[dict]) -> None:
-    if not rows:
-        with open(path, "w", newline="", encoding="utf-8-sig") as f:
-            writer = csv.writer(f)
-            writer.writerow([])
-        return
+@profiled("export_csv")
+def export_csv(path: str, rows: Iterable[dict]) -> None:
+    """rows(리스트든 제너레이터든)를 임시 파일에 한 줄씩 쓰고 os.replace로 바꿔 끼운다.
+
+    app.py(/view, read_recent_onchain_rows 등)는 언제 읽어도 이전 파일 전체나 새 파일 전체만 본다.
+    """
+    rows_iter = iter(rows)
+    first = next(rows_iter, None)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    written = 0
+    try:
+        with open(tmp_path, "w", newline="", encoding="utf-8-sig") as f:
+            if first is None:
+                csv.writer(f).writerow([])
+            else:
+                writer = csv.DictWriter(f, fieldnames=list(first.keys()))
+                writer.writeheader()
+                writer.writerow(first)
+                written = 1
+                for row in rows_iter:
+                    writer.writerow(row)
+                    written += 1
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+    PROFILER.count("rows_written.csv", written)
+
+
+class ResultStream:
+    """app.py가 넘겨준 파이프 fd로 결과를 JSON 한 줄씩 바로 흘려보낸다.
+
+    부모(app.run_onchain)는 CSV가 다 쓰이거나 프로세스가 끝나기를 기다리지 않고
+    줄 단위로 받아서 signal_loop 쪽 집중 감시에 즉시 반영한다. fd가 없으면 아무것도 하지 않는다.
+    """
+
+    def __init__(self) -> None:
+        self._file = None
+        self.lock = threading.Lock()
+
+    def open(self, fd: int) -> None:
+        if fd < 0:
+            return
+        try:
+            self._file = os.fdopen(fd, "w", encoding="utf-8", buffering=1)
+        except OSError as e:
+            print(f"[RESULT] 결과 fd 열기 실패 fd={fd}: {e}", flush=True)
+
+    def emit(self, kind: str, rows: List[dict], chainid: str = "1") -> None:
+        """묶음 하나를 {"kind", "chainid", "rows"} 한 줄로 보낸다. 받는 쪽은 (kind, chainid)별로 교체한다."""
+        if self._file is None:
+            return
+        line = json.dumps({"kind": kind, "chainid": str(chainid), "rows": rows}, ensure_ascii=False, default=record_json_default)
+        with self.lock:
+            try:
+                self._file.write(line + "\n")
+            except (OSError, ValueError) as e:
+                # 부모가 먼저 닫았으면(타임아웃 등) 이후 결과는 CSV로만 남긴다.
+                print(f"[RESULT] 결과 전달 중단: {e}", flush=True)
+                self._file = None
+        PROFILER.count(f"result_stream.{kind}", len(rows))
+
+
+RESULT_STREAM = ResultStream()
+
+
+class CsvEventLog:
+    """flow / active hub 이벤트를 한 번씩만 덧붙이는 CSV 로그.
+
+    export_csv 스냅샷은 매 실행 전체를 다시 쓰지만, 이 로그는 처음 보는 이벤트만 뒤에 붙인다.
+    max_bytes를 넘으면 path -> path.1 -> ... -> path.<backups> 로 밀어내고 새 파일을 시작한다.
+    중복 판단용 키는 최근 seen_max개만 기억하므로 메모리는 로그 크기와 무관하게 일정하다.
+    키는 path.seen 에 한 줄씩 덧붙여 두고 시작할 때 그 파일만 읽는다. path.seen이 없거나
+    로그보다 오래됐으면(키를 남기기 전에 죽은 경우) 그때만 로그와 백업을 다시 읽는다.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        key_fields: Tuple[str, ...],
+        max_bytes: int = EVENT_LOG_MAX_BYTES_DEFAULT,
+        backups: int = EVENT_LOG_BACKUPS_DEFAULT,
+        seen_max: int = EVENT_LOG_SEEN_MAX,
+    ):
+        self.path = path
+        self.key_fields = key_fields
+        self.max_bytes = max(0, int(max_bytes))
+        self.backups = max(0, int(backups))
+        self.seen_max = max(1, int(seen_max))
+        self.seen: "collections.OrderedDict[str, None]" = collections.OrderedDict()
+        self.seen_path = f"{path}.seen"
+        self.seen_lines = 0
+        self.lock = threading.Lock()
+        self._load_seen()
+
+    def row_key(self, row: dict) -> str:
+        return "|".join(normalize(str(row.get(name) or "")) for name in self.key_fields)
+
+    def _remember(self, key: str) -> None:
+        self.seen[key] = None
+        self.seen.move_to_end(key)
+        while len(self.seen) > self.seen_max:
+            self.seen.popitem(last=False)
+
+    def _seen_file_fresh(self) -> bool:
+        if not os.path.exists(self.seen_path):
+            return False
+        if not os.path.exists(self.path):
+            return True
+        return os.stat(self.seen_path).st_mtime_ns >= os.stat(self.path).st_mtime_ns
+
+    def _load_seen(self) -> None:
+        if self._seen_file_fresh():
+            try:
+                with open(self.seen_path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        key = line.rstrip("\n")
+                        if key:
+                            self._remember(key)
+                            self.seen_lines += 1
+                return
+            except OSError as e:
+                print(f"[EVENT-LOG] 키 파일 읽기 실패 {self.seen_path}: {e}", flush=True)
+                self.seen.clear()
+        self._scan_logs()
+        if self.seen:
+            self._compact_seen_file()
+
+    def _compact_seen_file(self) -> None:
+        tmp_path = f"{self.seen_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for key in self.seen:
+                f.write(key + "\n")
+        os.replace(tmp_path, self.seen_path)
+        self.seen_lines = len(self.seen)
+
+    def _scan_logs(self) -> None:
+        # 오래된 백업부터 읽어야 최신 키가 OrderedDict 뒤쪽(오래 살아남는 쪽)에 남는다.
+        paths = [f"{self.path}.{i}" for i in range(self.backups, 0, -1)] + [self.path]
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            try:
+                with open(path, "r", newline="", encoding="utf-8-sig") as f:
+                    for row in csv.DictReader(f):
+                        self._remember(self.row_key(row))
+            except (OSError, csv.Error) as e:
+                print(f"[EVENT-LOG] 기존 로그 읽기 실패 {path}: {e}", flush=True)
+
+    def _rotate(self) -> None:
+        if self.backups <= 0:
+            os.remove(self.path)
+            return
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+    def append(self, rows: Iterable[dict]) -> int:
+        """처음 보는 이벤트만 붙이고 붙인 개수를 돌려준다."""
+        with self.lock:
+            # 새 이벤트가 없으면 회전도 하지 않는다. 중복만 든 실행이 가장 오래된 백업을 밀어내지 않게 한다.
+            new_rows: List[dict] = []
+            new_keys: List[str] = []
+            batch_keys = set()
+            for row in rows:
+                key = self.row_key(row)
+                if key in self.seen or key in batch_keys:
+                    continue
+                batch_keys.add(key)
+                new_rows.append(row)
+                new_keys.append(key)
+            appended = len(new_rows)
+            if new_rows:
+                if self.max_bytes and os.path.exists(self.path) and os.path.getsize(self.path) >= self.max_bytes:
+                    self._rotate()
+                fieldnames: Optional[List[str]] = None
+                if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+                    with open(self.path, "r", newline="", encoding="utf-8-sig") as f:
+                        fieldnames = next(csv.reader(f), None) or None
+                with open(self.path, "a", newline="", encoding="utf-8-sig") as f:
+                    writer = csv.DictWriter(f, fieldnames=fieldnames or list(new_rows[0].keys()), extrasaction="ignore")
+                    if fieldnames is None:
+                        writer.writeheader()
+                    writer.writerows(new_rows)
+                for key in new_keys:
+                    self._remember(key)
+            # 로그를 닫은 뒤에 키를 남겨야 키 파일 mtime이 로그보다 늦어 다음 시작에서 그대로 믿을 수 있다.
+            if new_keys:
+                with open(self.seen_path, "a", encoding="utf-8") as f:
+                    f.write("\n".join(new_keys) + "\n")
+                self.seen_lines += len(new_keys)
+                if self.seen_lines > 2 * self.seen_max:
+                    self._compact_seen_file()
+            PROFILER.count("rows_written.event_log", appended)
+            return appended
+
+
+def flow_row_end_ts(row: dict) -> int:
+    """flow 행의 도착 시각. FlowPath면 end_ts를 바로 쓰고, dict 행이면 end_time_utc를 파싱한다."""
+    end_ts = row.get("end_ts")
+    if end_ts is not None:
+        return int(end_ts)
+    end_time_utc = row.get("end_time_utc") or row.get("start_time_utc") or ""
+    try:
+        return int(datetime.strptime(end_time_utc, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc).timestamp())
+    except (TypeError, ValueError):
+        return 0
+
+
+def record_json_default(obj: Any) -> Any:
+    # 결과 행을 JSON으로 내보낼 때만 SlotRecord를 FIELDS 순서의 dict로 펼친다.
+    if isinstance(obj, SlotRecord):
+        return obj.as_dict()
+    return str(obj)
+
+
+def result_row_fields(kind: str, row: dict, chainid: str) -> Tuple[str, int, str, str, str, float, int]:
+    """(result_key, timestamp, seed, token_symbol, exchange, amount_float, hop_count)
+
+    result_key에는 chainid가 들어간다. 같은 시드/tx 해시 모양이 다른 체인에도 나올 수 있어서
+    빼면 멀티 체인 실행에서 뒤 체인 행이 앞 체인 행을 덮어쓴다.
+    """
+    if kind == "flow":
+        key = make_alert_key(kind, chainid, *(row.get(name) or "" for name in FLOW_EVENT_KEY_FIELDS))
+        timestamp = flow_row_end_ts(row)
+        exchange = row.get("exchange") or ""
+        try:
+            amount = float(str(row.get("end_amount") or "0").replace(",", ""))
+        except ValueError:
+            amount = 0.0
+        hop_count = int(row.get("hop_count") or 0)
+    else:
+        key = make_alert_key(kind, chainid, row.get("seed") or "", row.get("tx_hash") or "", row.get("to_addr") or "", row.get("contract_address") or "", row.get("amount") or "")
+        timestamp = int(row.get("timestamp") or 0)
+        exchange = row.get("target_label") if row.get("target_kind") == "exchange" else row.get("hub_exchange_hits")
+        amount = float(row.get("amount_float") or 0.0)
+        hop_count = 0
+    return key, timestamp, normalize(row.get("seed") or ""), str(row.get("token_symbol") or "").upper(), str(exchange or "").upper(), amount, hop_count
+
+
+RESULT_KEY_SCHEMA_VERSION = 1  # PRAGMA user_version. 1: result_key에 chainid 포함
+
+
+def migrate_result_keys(conn: sqlite3.Connection) -> int:
+    """chainid 없이 만든 예전 result_key를 row_json에서 다시 계산한다. 한 번만 돈다."""
+    cur = conn.cursor()
+    if int(cur.execute("PRAGMA user_version").fetchone()[0]) >= RESULT_KEY_SCHEMA_VERSION:
+        return 0
+    updates = []
+    for row_id, kind, chainid, row_json in cur.execute("SELECT id, kind, chainid, row_json FROM onchain_results").fetchall():
+        try:
+            row = json.loads(row_json)
+        except ValueError:
+            continue
+        updates.append((result_row_fields(kind, row, chainid)[0], row_id))
+    # UNIQUE 충돌 없이 바꾸도록 먼저 임시 키로 비운 뒤 새 키를 넣는다.
+    cur.executemany("UPDATE onchain_results SET result_key = 'migrating:' || id WHERE id = ?", [(row_id,) for _, row_id in updates])
+    cur.executemany("UPDATE OR IGNORE onchain_results SET result_key = ? WHERE id = ?", updates)
+    cur.execute("DELETE FROM onchain_results WHERE result_key LIKE 'migrating:%'")
+    cur.execute(f"PRAGMA user_version = {RESULT_KEY_SCHEMA_VERSION}")
+    conn.commit()
+    if updates:
+        dbg(f"onchain_results result_key 마이그레이션 rows={len(updates)}")
+    return len(updates)
+
+
+RESULT_EXCHANGE_SCHEMA_VERSION = 2  # 2: onchain_result_exchanges 채움
+
+
+def split_result_exchanges(exchange: str) -> List[str]:
+    """result_row_fields의 exchange 문자열("BINANCE, OKX")을 같음 비교용 이름 목록으로 나눈다."""
+    return sorted({name.strip().upper() for name in str(exchange or "").split(",") if name.strip() and name.strip() != "-"})
 
-    fieldnames = list(rows[0].keys())
-    with open(path, "w", newline="", encoding="utf-8-sig") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(rows)
+
+def migrate_result_exchanges(conn: sqlite3.Connection) -> int:
+    """onchain_result_exchanges 이전에 저장된 결과 행의 거래소 쌍을 채운다. 한 번만 돈다."""
+    cur = conn.cursor()
+    if int(cur.execute("PRAGMA user_version").fetchone()[0]) >= RESULT_EXCHANGE_SCHEMA_VERSION:
+        return 0
+    pairs = [
+        (name, kind, row_id)
+        for row_id, kind, exchange in cur.execute("SELECT id, kind, exchange FROM onchain_results WHERE exchange != ''").fetchall()
+        for name in split_result_exchanges(exchange)
+    ]
+    cur.executemany("INSERT OR IGNORE INTO onchain_result_exchanges (exchange, kind, result_id) VALUES (?, ?, ?)", pairs)
+    cur.execute(f"PRAGMA user_version = {RESULT_EXCHANGE_SCHEMA_VERSION}")
+    conn.commit()
+    if pairs:
+        dbg(f"onchain_result_exchanges 채움 rows={len(pairs)}")
+    return len(pairs)
+
+
+@profiled("store_results")
+def store_result_rows(conn: sqlite3.Connection, chainid: str, kind: str, rows: List[dict], retention_days: int = RESULT_RETENTION_DAYS_DEFAULT) -> int:
+    """flow / 시드 출금 결과를 onchain_results에 upsert하고 바뀐 게 있으면 result_versions를 올린다.
+
+    app.py의 /api/onchain/* 는 이 버전으로 ETag를 만들기 때문에, 내용이 그대로면 버전도 그대로 둔다.
+    """
+    now = utc_now_ts()
+    cur = conn.cursor()
+    fields = [result_row_fields(kind, row, chainid) for row in rows]
+    before = conn.total_changes
+    cur.executemany(
+        '''
+        INSERT INTO onchain_results (kind, chainid, result_key, timestamp, seed, token_symbol, exchange, amount_float, hop_count, row_json, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(result_key) DO UPDATE SET
+            exchange = excluded.exchange,
+            row_json = excluded.row_json,
+            updated_at = excluded.updated_at
+        WHERE onchain_results.row_json != excluded.row_json
+        ''',
+        [
+            (kind, chainid, *row_fields, json.dumps(row, ensure_ascii=False, separators=(",", ":"), default=record_json_default), now)
+            for row, row_fields in zip(rows, fields)
+        ],
+    )
+    changed = conn.total_changes - before
+    if changed:
+        # 바뀐 행이 있을 때만 거래소 쌍을 다시 맞춘다. 행별 exchange가 바뀔 수 있으므로 지우고 다시 넣는다.
+        cur.executemany(
+            "DELETE FROM onchain_result_exchanges WHERE result_id = (SELECT id FROM onchain_results WHERE result_key = ?)",
+            [(row_fields[0],) for row_fields in fields],
+        )
+        cur.executemany(
+            "INSERT OR IGNORE INTO onchain_result_exchanges (exchange, kind, result_id) SELECT ?, ?, id FROM onchain_results WHERE result_key = ?",
+            [(name, kind, row_fields[0]) for row_fields in fields for name in split_result_exchanges(row_fields[4])],
+        )
+    if retention_days > 0:
+        before_delete = conn.total_changes
+        cur.execute("DELETE FROM onchain_results WHERE kind = ? AND timestamp < ?", (kind, now - retention_days * 86400))
+        if conn.total_changes > before_delete:
+            changed += conn.total_changes - before_delete
+            cur.execute("DELETE FROM onchain_result_exchanges WHERE kind = ? AND result_id NOT IN (SELECT id FROM onchain_results WHERE kind = ?)", (kind, kind))
+    if changed:
+        cur.execute(
+            '''
+            INSERT INTO result_versions (kind, version, updated_at) VALUES (?, 1, ?)
+            ON CONFLICT(kind) DO UPDATE SET version = version + 1, updated_at = excluded.updated_at
+            ''',
+            (kind, now),
+        )
+    conn.commit()
+    PROFILER.count(f"rows_written.results.{kind}", changed)
+    return changed
 
 
 def send_telegram_message(msg: str) -> bool:
@@ -1214,11 +2619,13 @@ def send_telegram_message(msg: str) -> bool:
         )
         ok = resp.status_code == 200
         print(f"[TG] 전송 status={resp.status_code}", flush=True)
+        PROFILER.count("telegram.sent" if ok else "telegram.failures")
         if not ok:
             print(f"[TG] 응답={resp.text}", flush=True)
         return ok
     except Exception as e:
         print(f"[TG] 전송 오류: {e}", flush=True)
+        PROFILER.count("telegram.failures")
         return False
 
 
@@ -1395,13 +2802,13 @@ def get_recent_outgoing_transfers(
     wallet: str,
     chainid: str,
     days: int,
-) -> List[dict]:
+) -> List[OutgoingTransfer]:
     cutoff = utc_now_ts() - days * 86400
     cur = conn.cursor()
     rows = cur.execute(
         '''
         SELECT timestamp, tx_hash, from_addr, to_addr, token_symbol, token_name,
-               contract_address, value_raw, token_decimal
+               contract_address, value_raw, token_decimal, amount_scaled
         FROM transfers
         WHERE chainid = ?
           AND timestamp >= ?
@@ -1411,8 +2818,9 @@ def get_recent_outgoing_transfers(
         ''',
         (chainid, cutoff, normalize(wallet), normalize(wallet)),
     ).fetchall()
+    PROFILER.count("rows_read.get_recent_outgoing_transfers", len(rows))
 
-    out: List[dict] = []
+    out: List[OutgoingTransfer] = []
     for (
         timestamp,
         tx_hash,
@@ -1423,27 +2831,26 @@ def get_recent_outgoing_transfers(
         contract_address,
         value_raw,
         token_decimal,
+        amount_scaled,
     ) in rows:
         to_addr = normalize(to_addr)
         kind, label = classify_address(to_addr, chainid=chainid)
         out.append(
-            {
-                "timestamp": int(timestamp),
-                "time_utc": datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
-                "tx_hash": tx_hash,
-                "from_addr": normalize(from_addr),
-                "to_addr": to_addr,
-                "token_symbol": token_symbol or "-",
-                "token_name": token_name or "-",
-                "contract_address": normalize(contract_address or ""),
-                "value_raw": value_raw or "0",
-                "token_decimal": int(token_decimal or 0),
-                "amount_float": amount_as_float(value_raw or "0", int(token_decimal or 0)),
-                "amount": format_token_amount(value_raw or "0", int(token_decimal or 0)),
-                "target_kind": kind,
-                "target_label": label or "-",
-            }
-        )
+            OutgoingTransfer(
+                int(timestamp),
+                tx_hash,
+                normalize(from_addr),
+                to_addr,
+                token_symbol or "-",
+                token_name or "-",
+                normalize(contract_address or ""),
+                value_raw or "0",
+                int(token_decimal or 0),
+                float(amount_scaled or 0.0),
+                kind,
+                label or "-",
+            )
+        )
     return out
 
 
@@ -1496,6 +2903,7 @@ def select_flow_expansion_addresses(
     return selected
 
 
+@profiled("collect_for_flow_expansion")
 def collect_for_flow_expansion(
     conn: sqlite3.Connection,
     addresses: List[str],
@@ -1504,9 +2912,16 @@ def collect_for_flow_expansion(
     offset: int,
     max_pages: int,
     sleep_sec: float,
+    deadline: Optional[float] = None,
 ) -> int:
     total_saved = 0
     for idx, addr in enumerate(addresses, start=1):
+        if deadline is not None and time.monotonic() >= deadline:
+            print(f"[FLOW] deadline 도달: {idx - 1}/{len(addresses)}에서 확장 수집 중단")
+            break
+        if ETHERSCAN_ENDPOINT.breaker.is_open:
+            print(f"[FLOW] Etherscan 서킷 열림: {idx - 1}/{len(addresses)}에서 확장 수집 중단")
+            break
         print(f"[FLOW] ({idx}/{len(addresses)}) 확장 수집: {addr}")
         total_saved += collect_for_address(
             conn=conn,
@@ -1516,10 +2931,12 @@ def collect_for_flow_expansion(
             offset=offset,
             max_pages=max_pages,
             sleep_sec=sleep_sec,
+            deadline=deadline,
         )
     return total_saved
 
 
+@profiled("build_flow_paths")
 def build_flow_paths(
     conn: sqlite3.Connection,
     seeds: List[str],
@@ -1529,30 +2946,40 @@ def build_flow_paths(
     max_time_gap_hours: int = 24,
     min_amount_ratio: float = FLOW_MIN_AMOUNT_RATIO,
     max_next_edges: int = FLOW_MAX_NEXT_EDGES,
-) -> List[dict]:
+    deadline: Optional[float] = None,
+) -> List[FlowPath]:
     if max_hops < 2:
         return []
 
     cutoff = utc_now_ts() - days * 86400
     max_gap_sec = max_time_gap_hours * 3600
     visited_alert_keys: Set[str] = set()
-    results: List[dict] = []
-
-    def candidate_next_edges(current_wallet: str, prev_edge: dict) -> List[dict]:
-        rows = get_recent_outgoing_transfers(conn, current_wallet, chainid, days)
-        out: List[dict] = []
-        for row in rows:
-            if row["timestamp"] < prev_edge["timestamp"]:
+    results: List[FlowPath] = []
+    outgoing_cache: Dict[str, List[OutgoingTransfer]] = {}
+
+    def outgoing(wallet: str) -> List[OutgoingTransfer]:
+        # 같은 중간 지갑이 여러 경로에 나오므로 한 번 호출 안에서는 조회 결과를 재사용한다.
+        rows = outgoing_cache.get(wallet)
+        if rows is None:
+            rows = outgoing_cache[wallet] = get_recent_outgoing_transfers(conn, wallet, chainid, days)
+        return rows
+
+    def candidate_next_edges(current_wallet: str, prev_edge: OutgoingTransfer) -> List[OutgoingTransfer]:
+        prev_ts = prev_edge.timestamp
+        prev_contract = normalize(prev_edge.contract_address)
+        prev_symbol = normalize(prev_edge.token_symbol)
+        min_amt = prev_edge.amount_float * min_amount_ratio if prev_edge.amount_float > 0 else 0.0
+        out: List[OutgoingTransfer] = []
+        for row in outgoing(current_wallet):
+            if row.timestamp < prev_ts:
                 continue
-            if row["timestamp"] - prev_edge["timestamp"] > max_gap_sec:
+            if row.timestamp - prev_ts > max_gap_sec:
                 continue
-            if normalize(row["contract_address"]) != normalize(prev_edge["contract_address"]):
+            if normalize(row.contract_address) != prev_contract:
                 continue
-            if normalize(row["token_symbol"]) != normalize(prev_edge["token_symbol"]):
+            if normalize(row.token_symbol) != prev_symbol:
                 continue
-            prev_amt = float(prev_edge.get("amount_float") or 0.0)
-            curr_amt = float(row.get("amount_float") or 0.0)
-            if prev_amt > 0 and curr_amt < prev_amt * min_amount_ratio:
+            if row.amount_float < min_amt:
                 continue
             out.append(row)
             if len(out) >= max_next_edges:
@@ -1560,64 +2987,46 @@ def build_flow_paths(
         return out
 
     seeds_norm = [normalize(s) for s in seeds]
-    for seed in seeds_norm:
-        first_edges = get_recent_outgoing_transfers(conn, seed, chainid, days)
-        for edge1 in first_edges:
-            if edge1["timestamp"] < cutoff:
+    for idx, seed in enumerate(seeds_norm):
+        if deadline is not None and time.monotonic() >= deadline:
+            print(f"[FLOW] deadline 도달: 경로 추적 {idx}/{len(seeds_norm)}에서 중단")
+            break
+        for edge1 in outgoing(seed):
+            if edge1.timestamp < cutoff:
                 continue
-            if edge1["to_addr"] in IGNORE_ADDRESSES:
+            if edge1.to_addr in IGNORE_ADDRESSES:
                 continue
-
-            chain_edges = [dict(edge1, hop=1, hop_from=seed, hop_to=edge1["to_addr"])]
-            if edge1["target_kind"] == "exchange":
+            if edge1.target_kind == "exchange":
                 continue
 
-            frontier = [(edge1["to_addr"], chain_edges, edge1, 2)]
+            # (현재 지갑, 지나온 전송들, 각 전송의 보낸 주소, 직전 전송, 다음 hop 번호)
+            frontier = collections.deque([(edge1.to_addr, (edge1,), (seed,), edge1, 2)])
             while frontier:
-                current_wallet, path_edges, prev_edge, next_hop = frontier.pop(0)
+                current_wallet, edges, froms, prev_edge, next_hop = frontier.popleft()
                 if next_hop > max_hops:
                     continue
                 for nxt in candidate_next_edges(current_wallet, prev_edge):
-                    nxt_addr = normalize(nxt["to_addr"])
-                    if nxt_addr in {normalize(e["hop_from"]) for e in path_edges}:
+                    nxt_addr = normalize(nxt.to_addr)
+                    if nxt_addr in froms:
                         continue
-                    new_path = path_edges + [dict(nxt, hop=next_hop, hop_from=current_wallet, hop_to=nxt_addr)]
-                    if nxt["target_kind"] == "exchange":
+                    if nxt.target_kind == "exchange":
                         alert_key = make_alert_key(
                             "flow_exchange",
                             seed,
-                            new_path[0]["tx_hash"],
-                            nxt["tx_hash"],
-                            nxt["contract_address"],
+                            edges[0].tx_hash,
+                            nxt.tx_hash,
+                            nxt.contract_address,
                             nxt_addr,
                         )
                         if alert_key in visited_alert_keys:
                             continue
                         visited_alert_keys.add(alert_key)
-                        results.append(
-                            {
-                                "seed": seed,
-                                "start_time_utc": new_path[0]["time_utc"],
-                                "end_time_utc": new_path[-1]["time_utc"],
-                                "token_symbol": new_path[0]["token_symbol"],
-                                "token_name": new_path[0]["token_name"],
-                                "contract_address": new_path[0]["contract_address"],
-                                "start_amount": new_path[0]["amount"],
-                                "end_amount": new_path[-1]["amount"],
-                                "hop_count": len(new_path),
-                                "exchange": nxt["target_label"],
-                                "path": " -> ".join(shorten(e["hop_from"]) for e in new_path) + f" -> {shorten(new_path[-1]['hop_to'])}",
-                                "path_addresses": " -> ".join([e["hop_from"] for e in new_path] + [new_path[-1]["hop_to"]]),
-                                "first_tx_hash": new_path[0]["tx_hash"],
-                                "last_tx_hash": new_path[-1]["tx_hash"],
-                                "duration_min": max(0, int((new_path[-1]["timestamp"] - new_path[0]["timestamp"]) / 60)),
-                            }
-                        )
+                        results.append(FlowPath(seed, edges + (nxt,), froms + (current_wallet,), nxt.target_label))
                     else:
-                        if next_hop < max_hops and nxt["target_kind"] != "protocol":
-                            frontier.append((nxt_addr, new_path, nxt, next_hop + 1))
+                        if next_hop < max_hops and nxt.target_kind != "protocol":
+                            frontier.append((nxt_addr, edges + (nxt,), froms + (current_wallet,), nxt, next_hop + 1))
 
-    results.sort(key=lambda x: (x["end_time_utc"], x["hop_count"], x["exchange"]), reverse=True)
+    results.sort(key=lambda x: (x.end_ts, x.hop_count, x.exchange), reverse=True)
     return results
 
 
@@ -1646,20 +3055,15 @@ def send_flow_alerts(
 
     cutoff_ts = utc_now_ts() - max(0, int(max_age_hours)) * 3600 if max_age_hours > 0 else 0
 
-    filtered_rows: List[dict] = []
+    filtered_rows: List[Tuple[int, dict]] = []
     for row in flow_rows:
-        end_time_utc = row.get("end_time_utc") or row.get("start_time_utc") or ""
-        try:
-            end_ts = int(datetime.strptime(end_time_utc, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc).timestamp())
-        except Exception:
-            end_ts = 0
-        row["_end_ts"] = end_ts
+        end_ts = flow_row_end_ts(row)
         if cutoff_ts and end_ts and end_ts < cutoff_ts:
             continue
-        filtered_rows.append(row)
+        filtered_rows.append((end_ts, row))
 
-    dedup_map: Dict[Tuple[str, str, str, str], dict] = {}
-    for row in filtered_rows:
+    dedup_map: Dict[Tuple[str, str, str, str], Tuple[int, dict]] = {}
+    for end_ts, row in filtered_rows:
         dedup_key = (
             normalize(row.get("seed") or ""),
             normalize(row.get("token_symbol") or ""),
@@ -1667,14 +3071,17 @@ def send_flow_alerts(
             normalize(row.get("path_addresses") or row.get("path") or ""),
         )
         prev = dedup_map.get(dedup_key)
-        if prev is None or int(row.get("_end_ts") or 0) > int(prev.get("_end_ts") or 0):
-            dedup_map[dedup_key] = row
-
-    dedup_rows = sorted(
-        dedup_map.values(),
-        key=lambda x: (int(x.get("_end_ts") or 0), int(x.get("hop_count") or 0)),
-        reverse=True,
-    )
+        if prev is None or end_ts > prev[0]:
+            dedup_map[dedup_key] = (end_ts, row)
+
+    dedup_rows = [
+        row
+        for _, row in sorted(
+            dedup_map.values(),
+            key=lambda x: (x[0], int(x[1].get("hop_count") or 0)),
+            reverse=True,
+        )
+    ]
 
     final_rows = dedup_rows[:max(1, int(max_alerts_per_run))] if max_alerts_per_run > 0 else dedup_rows
 
@@ -1811,19 +3218,39 @@ def activate_hubs_from_candidates(
     return activated
 
 
-def get_active_hubs(conn: sqlite3.Connection, chainid: str, limit: int) -> List[dict]:
+def get_active_hubs(conn: sqlite3.Connection, chainid: str, limit: int, due_before: Optional[int] = None) -> List[dict]:
+    """활성 허브 목록. due_before를 주면 next_poll_at이 그 시각 이전인 허브만 가장 오래 밀린 것부터 limit개.
+
+    감시 대상 고르기는 due 필터 뒤에 limit을 걸어야 점수가 낮은 허브도 차례가 온다.
+    """
     cur = conn.cursor()
-    rows = cur.execute(
-        '''
-        SELECT address, source_seeds, shared_seed_count, score, target_kind, target_label,
-               first_seen_at, activated_at, expires_at, status, last_checked_at, last_outgoing_at, notes
-        FROM active_hubs
-        WHERE chainid = ? AND status = 'active'
-        ORDER BY score DESC, shared_seed_count DESC, activated_at DESC
-        LIMIT ?
-        ''',
-        (chainid, limit),
-    ).fetchall()
+    if due_before is None:
+        rows = cur.execute(
+            '''
+            SELECT address, source_seeds, shared_seed_count, score, target_kind, target_label,
+                   first_seen_at, activated_at, expires_at, status, last_checked_at, last_outgoing_at, notes,
+                   next_poll_at, poll_interval_sec
+            FROM active_hubs
+            WHERE chainid = ? AND status = 'active'
+            ORDER BY score DESC, shared_seed_count DESC, activated_at DESC
+            LIMIT ?
+            ''',
+            (chainid, limit),
+        ).fetchall()
+    else:
+        rows = cur.execute(
+            '''
+            SELECT address, source_seeds, shared_seed_count, score, target_kind, target_label,
+                   first_seen_at, activated_at, expires_at, status, last_checked_at, last_outgoing_at, notes,
+                   next_poll_at, poll_interval_sec
+            FROM active_hubs
+            WHERE chainid = ? AND status = 'active'
+              AND (next_poll_at IS NULL OR next_poll_at <= ?)
+            ORDER BY COALESCE(next_poll_at, activated_at) ASC, score DESC
+            LIMIT ?
+            ''',
+            (chainid, due_before, limit),
+        ).fetchall()
 
     out = []
     for r in rows:
@@ -1842,11 +3269,83 @@ def get_active_hubs(conn: sqlite3.Connection, chainid: str, limit: int) -> List[
                 "last_checked_at": int(r[10] or 0) if r[10] is not None else None,
                 "last_outgoing_at": int(r[11] or 0) if r[11] is not None else None,
                 "notes": r[12] or "",
+                "next_poll_at": int(r[13]) if r[13] is not None else None,
+                "poll_interval_sec": int(r[14]) if r[14] is not None else None,
             }
         )
     return out
 
 
+def active_hub_poll_priority(hub: dict, now: int, burst_window_sec: int, starve_step_sec: int = ACTIVE_HUB_POLL_MIN_SECONDS) -> Tuple[int, int, int, int]:
+    """(밀린 단계, burst 여부, 점수, 마지막 출금 시각). 클수록 먼저 감시한다.
+
+    밀린 단계 = (now - next_poll_at) // starve_step_sec. 예산에서 밀린 허브는 실행마다 단계가 올라가서
+    burst 허브가 매번 감시 시각이 되더라도 결국 앞으로 나온다.
+    """
+    last_outgoing_at = int(hub.get("last_outgoing_at") or 0)
+    bursty = 1 if last_outgoing_at and now - last_outgoing_at <= burst_window_sec else 0
+    due_at = int(hub.get("next_poll_at") or hub.get("activated_at") or now)
+    overdue_steps = max(0, now - due_at) // max(1, starve_step_sec)
+    return overdue_steps, bursty, int(hub.get("score") or 0), last_outgoing_at
+
+
+def select_due_active_hubs(
+    active_hubs: List[dict],
+    max_pages: int,
+    budget_pages: int,
+    burst_window_hours: int,
+    now: Optional[int] = None,
+    starve_step_sec: int = ACTIVE_HUB_POLL_MIN_SECONDS,
+) -> List[dict]:
+    """next_poll_at이 지난 허브만 골라 우선순위 순으로 페이지 예산 안에서 반환한다.
+
+    오래 밀린 허브가 먼저이고, 같은 단계 안에서는 최근 출금이 있었던(burst) 허브와 점수가 높은 허브가 먼저 예산을 쓴다.
+    """
+    now = now or utc_now_ts()
+    burst_window_sec = burst_window_hours * 3600
+    due = [h for h in active_hubs if not h.get("next_poll_at") or int(h["next_poll_at"]) <= now]
+    due.sort(key=lambda h: active_hub_poll_priority(h, now, burst_window_sec, starve_step_sec), reverse=True)
+    if budget_pages <= 0:
+        return due
+    return due[:max(1, budget_pages // max(1, max_pages))]
+
+
+def plan_next_active_hub_poll(
+    hub: dict,
+    newest_outgoing_at: Optional[int],
+    burst_window_hours: int,
+    min_interval_sec: int = ACTIVE_HUB_POLL_MIN_SECONDS,
+    max_interval_sec: int = ACTIVE_HUB_POLL_MAX_SECONDS,
+    now: Optional[int] = None,
+) -> Tuple[int, int]:
+    """다음 감시 시각을 계산한다. (poll_interval_sec, next_poll_at)
+
+    새 출금이 보였거나 burst 창 안에 있으면 최소 간격으로 되돌리고,
+    조용한 허브는 직전 간격의 2배씩 늘려 max_interval_sec 또는 만료 시각까지 미룬다.
+    점수가 활성화 기준의 2배 이상이면 간격을 절반으로 줄인다.
+    """
+    now = now or utc_now_ts()
+    prev_last_outgoing = int(hub.get("last_outgoing_at") or 0)
+    last_outgoing = max(prev_last_outgoing, int(newest_outgoing_at or 0))
+    prev_interval = int(hub.get("poll_interval_sec") or 0)
+
+    moved = last_outgoing > prev_last_outgoing
+    bursty = last_outgoing and now - last_outgoing <= burst_window_hours * 3600
+    if moved or bursty or prev_interval <= 0:
+        interval = min_interval_sec
+    else:
+        interval = min(prev_interval * 2, max_interval_sec)
+    if int(hub.get("score") or 0) >= ACTIVE_HUB_MIN_SCORE * 2:
+        interval = max(min_interval_sec, interval // 2)
+
+    next_poll_at = now + interval
+    expires_at = int(hub.get("expires_at") or 0)
+    if expires_at:
+        next_poll_at = min(next_poll_at, max(expires_at, now))
+    return interval, next_poll_at
+
+
+@profiled("collect_for_active_hubs")
 def collect_for_active_hubs(
     conn: sqlite3.Connection,
     active_hubs: List[dict],
@@ -1855,9 +3354,16 @@ def collect_for_active_hubs(
     offset: int,
     max_pages: int,
     sleep_sec: float,
+    deadline: Optional[float] = None,
 ) -> int:
     total_saved = 0
     for idx, hub in enumerate(active_hubs, start=1):
+        if deadline is not None and time.monotonic() >= deadline:
+            print(f"[HUB] deadline 도달: {idx - 1}/{len(active_hubs)}에서 활성 허브 수집 중단")
+            break
+        if ETHERSCAN_ENDPOINT.breaker.is_open:
+            print(f"[HUB] Etherscan 서킷 열림: {idx - 1}/{len(active_hubs)}에서 활성 허브 수집 중단")
+            break
         print(f"[HUB] ({idx}/{len(active_hubs)}) 활성 허브 수집: {hub['address']}")
         total_saved += collect_for_address(
             conn=conn,
@@ -1867,6 +3373,7 @@ def collect_for_active_hubs(
             offset=offset,
             max_pages=max_pages,
             sleep_sec=sleep_sec,
+            deadline=deadline,
         )
     return total_saved
 
@@ -1876,6 +3383,8 @@ def touch_active_hub_checked(
     chainid: str,
     address: str,
     last_outgoing_at: Optional[int] = None,
+    next_poll_at: Optional[int] = None,
+    poll_interval_sec: Optional[int] = None,
 ) -> None:
     cur = conn.cursor()
     cur.execute(
@@ -1885,14 +3394,17 @@ def touch_active_hub_checked(
             last_outgoing_at = CASE
                 WHEN ? IS NULL THEN last_outgoing_at
                 ELSE MAX(COALESCE(last_outgoing_at, 0), ?)
-            END
+            END,
+            next_poll_at = COALESCE(?, next_poll_at),
+            poll_interval_sec = COALESCE(?, poll_interval_sec)
         WHERE chainid = ? AND address = ?
         ''',
-        (utc_now_ts(), last_outgoing_at, last_outgoing_at, chainid, normalize(address)),
+        (utc_now_ts(), last_outgoing_at, last_outgoing_at, next_poll_at, poll_interval_sec, chainid, normalize(address)),
     )
     conn.commit()
 
 
+@profiled("scan_active_hub_outflows")
 def scan_active_hub_outflows(
     conn: sqlite3.Connection,
     active_hubs: List[dict],
@@ -1900,6 +3412,8 @@ def scan_active_hub_outflows(
     days: int,
     burst_window_hours: int,
     min_outgoing_count_for_b: int,
+    poll_min_seconds: int = ACTIVE_HUB_POLL_MIN_SECONDS,
+    poll_max_seconds: int = ACTIVE_HUB_POLL_MAX_SECONDS,
 ) -> List[dict]:
     burst_window_sec = burst_window_hours * 3600
     results: List[dict] = []
@@ -1907,30 +3421,36 @@ def scan_active_hub_outflows(
     for hub in active_hubs:
         address = normalize(hub["address"])
         rows = get_recent_outgoing_transfers(conn, address, chainid, days)
+        newest_ts = max((r.timestamp for r in rows), default=None)
+        poll_interval_sec, next_poll_at = plan_next_active_hub_poll(
+            hub,
+            newest_ts,
+            burst_window_hours,
+            min_interval_sec=poll_min_seconds,
+            max_interval_sec=poll_max_seconds,
+        )
+        touch_active_hub_checked(conn, chainid, address, newest_ts, next_poll_at=next_poll_at, poll_interval_sec=poll_interval_sec)
         if not rows:
-            touch_active_hub_checked(conn, chainid, address, None)
             continue
 
-        last_seen = hub.get("last_outgoing_at") or 0
-        fresh_rows = [r for r in rows if int(r["timestamp"]) > int(last_seen)]
-        newest_ts = max(int(r["timestamp"]) for r in rows)
-        touch_active_hub_checked(conn, chainid, address, newest_ts)
+        last_seen = int(hub.get("last_outgoing_at") or 0)
+        fresh_rows = [r for r in rows if r.timestamp > last_seen]
 
         if not fresh_rows:
             continue
 
-        exchange_rows = [r for r in fresh_rows if r["target_kind"] == "exchange"]
-        non_protocol_rows = [r for r in fresh_rows if r["target_kind"] not in {"protocol", "ignore"}]
+        exchange_rows = [r for r in fresh_rows if r.target_kind == "exchange"]
+        non_protocol_rows = [r for r in fresh_rows if r.target_kind not in {"protocol", "ignore"}]
         recent_burst_rows = [
             r for r in non_protocol_rows
-            if newest_ts - int(r["timestamp"]) <= burst_window_sec
+            if newest_ts - r.timestamp <= burst_window_sec
         ]
-        unique_targets = sorted({normalize(r["to_addr"]) for r in recent_burst_rows})
+        unique_targets = {r.to_addr for r in recent_burst_rows}
         token_counter = collections.Counter(
-            normalize(r["token_symbol"]) for r in recent_burst_rows if (r.get("token_symbol") or "-") != "-"
+            normalize(r.token_symbol) for r in recent_burst_rows if r.token_symbol != "-"
         )
         top_token = token_counter.most_common(1)[0][0].upper() if token_counter else "-"
-        total_amount = sum(float(r.get("amount_float") or 0.0) for r in recent_burst_rows)
+        total_amount = sum(r.amount_float for r in recent_burst_rows)
 
         if exchange_rows:
             for row in exchange_rows:
@@ -1941,15 +3461,15 @@ def scan_active_hub_outflows(
                         "shared_seed_count": hub["shared_seed_count"],
                         "score": hub["score"],
                         "source_seeds": hub["source_seeds"],
-                        "time_utc": row["time_utc"],
-                        "timestamp": row["timestamp"],
-                        "token_symbol": row["token_symbol"],
-                        "amount": row["amount"],
-                        "amount_float": row["amount_float"],
-                        "to_addr": row["to_addr"],
-                        "to_label": row["target_label"],
-                        "target_kind": row["target_kind"],
-                        "tx_hash": row["tx_hash"],
+                        "time_utc": row.time_utc,
+                        "timestamp": row.timestamp,
+                        "token_symbol": row.token_symbol,
+                        "amount": row.amount,
+                        "amount_float": row.amount_float,
+                        "to_addr": row.to_addr,
+                        "to_label": row.target_label,
+                        "target_kind": row.target_kind,
+                        "tx_hash": row.tx_hash,
                         "recent_outgoing_count": len(recent_burst_rows),
                         "unique_target_count": len(unique_targets),
                         "top_token": top_token,
@@ -2053,12 +3573,22 @@ def run_active_hub_fast_scan_loop(
     auto_exchange_enrich: bool,
     auto_exchange_enrich_limit: int,
     auto_exchange_cache_hours: int,
+    poll_budget_pages: int = ACTIVE_HUB_POLL_BUDGET_PAGES,
+    poll_min_seconds: int = ACTIVE_HUB_POLL_MIN_SECONDS,
+    poll_max_seconds: int = ACTIVE_HUB_POLL_MAX_SECONDS,
+    suppress_initial_backfill: bool = False,
+    event_log: Optional[CsvEventLog] = None,
+    on_iteration_done: Optional[Callable[[], None]] = None,
+    deadline: Optional[float] = None,
 ) -> None:
     if interval_minutes <= 0 or iterations <= 0:
         return
 
     print(f"\n[FAST] 활성 허브 빠른 감시 시작: interval={interval_minutes}분, iterations={iterations}")
     for idx in range(1, iterations + 1):
+        if deadline is not None and time.monotonic() >= deadline:
+            print(f"[FAST] deadline 도달: {idx - 1}/{iterations}회 후 중단", flush=True)
+            break
         print(f"\n[FAST] ({idx}/{iterations}) 활성 허브 빠른 감시")
         if maybe_reload_address_book(address_book_path, address_book_reload_seconds):
             seed_exchange_labels(conn)
@@ -2070,12 +3600,23 @@ def run_active_hub_fast_scan_loop(
         active_hub_rows = get_active_hubs(conn, chainid=chainid, limit=active_hub_max_track)
         export_csv(active_hub_csv, active_hub_rows)
 
+        due_hub_rows = select_due_active_hubs(
+            get_active_hubs(conn, chainid=chainid, limit=active_hub_max_track, due_before=utc_now_ts()),
+            max_pages=active_hub_scan_max_pages,
+            budget_pages=poll_budget_pages,
+            burst_window_hours=active_hub_burst_window_hours,
+            starve_step_sec=poll_min_seconds,
+        )
+
         if not active_hub_rows:
             print("[FAST] 활성 허브가 없습니다.")
+        elif not due_hub_rows:
+            print(f"[FAST] 감시 시각이 된 활성 허브 없음 (활성={len(active_hub_rows)})")
         else:
+            print(f"[FAST] 이번 감시 대상: {len(due_hub_rows)}/{len(active_hub_rows)} (예산 {poll_budget_pages}페이지)")
             expanded_saved = collect_for_active_hubs(
                 conn=conn,
-                active_hubs=active_hub_rows,
+                active_hubs=due_hub_rows,
                 chainid=chainid,
                 days=days,
                 offset=offset,
@@ -2093,128 +3634,192 @@ def run_active_hub_fast_scan_loop(
 
             active_hub_scan_rows = scan_active_hub_outflows(
                 conn=conn,
-                active_hubs=active_hub_rows,
+                active_hubs=due_hub_rows,
                 chainid=chainid,
                 days=days,
                 burst_window_hours=active_hub_burst_window_hours,
                 min_outgoing_count_for_b=active_hub_min_outgoing_count_for_b,
+                poll_min_seconds=poll_min_seconds,
+                poll_max_seconds=poll_max_seconds,
             )
+            RESULT_STREAM.emit("active_hub", active_hub_scan_rows, chainid)
             print_active_hub_scan(active_hub_scan_rows, top=min(10, len(active_hub_scan_rows) or 10))
             export_csv(active_hub_scan_csv, active_hub_scan_rows)
-            send_active_hub_alerts(conn, active_hub_scan_rows, suppress_initial_backfill=initial_bootstrap_mode)
+            if event_log is not None:
+                event_log.append(active_hub_scan_rows)
+            send_active_hub_alerts(conn, active_hub_scan_rows, suppress_initial_backfill=suppress_initial_backfill)
 
+        if on_iteration_done is not None:
+            on_iteration_done()
         if idx < iterations:
+            wait_sec = max(1, interval_minutes) * 60
+            if deadline is not None and time.monotonic() + wait_sec >= deadline:
+                print(f"[FAST] 다음 감시가 deadline을 넘어 {idx}/{iterations}회 후 중단", flush=True)
+                break
             print(f"[FAST] 다음 빠른 감시까지 {interval_minutes}분 대기")
-            time.sleep(max(1, interval_minutes) * 60)
+            time.sleep(wait_sec)
 
 
-def main() -> int:
-    parser = argparse.ArgumentParser(description="Etherscan V2 반복 지갑 탐지 MVP + light flow tracker + active hub watcher")
-    parser.add_argument("--seeds", required=True, help="시드 주소 txt 파일 경로")
-    parser.add_argument("--auto-seeds", default=AUTO_SEEDS_PATH_DEFAULT, help="자동 임시 시드 JSON 파일 경로")
-    parser.add_argument("--auto-seeds-max", type=int, default=AUTO_SEEDS_MAX_DEFAULT, help="자동 시드 최대 유지 개수")
-    parser.add_argument("--auto-seeds-ttl-hours", type=int, default=AUTO_SEEDS_TTL_HOURS_DEFAULT, help="자동 시드 TTL 시간")
-    parser.add_argument("--auto-seeds-recent-hours", type=int, default=AUTO_SEEDS_RECENT_HOURS_DEFAULT, help="자동 시드 후보 최근 등장 허용 시간")
-    parser.add_argument("--auto-seeds-min-shared", type=int, default=AUTO_SEEDS_MIN_SHARED_DEFAULT, help="자동 시드 등록 최소 shared")
-    parser.add_argument("--auto-seeds-min-score", type=int, default=AUTO_SEEDS_MIN_SCORE_DEFAULT, help="자동 시드 등록 최소 score")
-    parser.add_argument("--chainid", default="1", help="EVM chainid. Ethereum=1")
-    parser.add_argument("--days", type=int, default=30, help="최근 며칠 데이터 볼지")
-    parser.add_argument("--offset", type=int, default=100, help="페이지당 전송 수")
-    parser.add_argument("--max-pages", type=int, default=10, help="주소당 최대 페이지 수")
-    parser.add_argument("--sleep-sec", type=float, default=0.4, help="API 호출 간 대기")
-    parser.add_argument("--top", type=int, default=20, help="상위 몇 개 허브 후보/상세 출력할지")
-    parser.add_argument("--csv", default="hub_candidates.csv", help="결과 CSV 파일명")
-    parser.add_argument("--address-book", default=ADDRESS_BOOK_PATH_DEFAULT, help="거래소/라우터/ignore 주소록 JSON 파일 경로")
-    parser.add_argument("--address-book-reload-seconds", type=int, default=ADDRESS_BOOK_RELOAD_SECONDS_DEFAULT, help="주소록 파일 변경 재로딩 최소 간격(초)")
-    parser.add_argument("--auto-exchange-enrich", action="store_true", help="알 수 없는 주소를 Etherscan 라벨로 조회해 거래소 주소를 자동 축적")
-    parser.add_argument("--auto-exchange-enrich-limit", type=int, default=AUTO_EXCHANGE_ENRICH_LIMIT_DEFAULT, help="1회 분석당 자동 축적할 미확인 주소 최대 개수")
-    parser.add_argument("--auto-exchange-cache-hours", type=int, default=AUTO_EXCHANGE_ENRICH_CACHE_HOURS_DEFAULT, help="주소 메타데이터 캐시 유지 시간")
-    parser.add_argument("--bootstrap-exchange-labels", default=",".join(BOOTSTRAP_EXCHANGE_LABEL_SLUGS_DEFAULT), help="시작 시 exportaddresstags로 대량 반영할 라벨 slug 목록(콤마 구분)")
-    parser.add_argument("--bootstrap-exchange-on-start", action="store_true", help="시작 시 Etherscan 라벨 export로 거래소 주소를 대량 반영")
+# -----------------------------
+# run stages / daemon
+# -----------------------------
 
-    parser.add_argument("--enable-flow", action="store_true", help="seed -> hub -> ... -> exchange 흐름 추적 사용")
-    parser.add_argument("--flow-max-hops", type=int, default=3, help="최대 hop 수. 기본 3")
-    parser.add_argument("--flow-max-time-gap-hours", type=int, default=24, help="hop 간 최대 시간 간격(시간)")
-    parser.add_argument("--flow-expand-max-pages", type=int, default=3, help="flow 확장 주소당 최대 페이지 수")
-    parser.add_argument("--flow-max-track-addrs", type=int, default=FLOW_MAX_TRACK_ADDRS, help="확장 추적할 주소 최대 개수")
-    parser.add_argument("--flow-min-amount-ratio", type=float, default=FLOW_MIN_AMOUNT_RATIO, help="이전 hop 대비 최소 금액 비율")
-    parser.add_argument("--alerts-exchange-only", action="store_true", help="텔레그램은 거래소 도착 flow만 전송")
-    parser.add_argument("--flow-alert-max-age-hours", type=int, default=FLOW_ALERT_MAX_AGE_HOURS_DEFAULT, help="flow 텔레그램 알림 최대 허용 신선도(시간). 0이면 전체 허용")
-    parser.add_argument("--flow-max-alerts-per-run", type=int, default=FLOW_MAX_ALERTS_PER_RUN_DEFAULT, help="1회 실행당 flow 텔레그램 최대 전송 개수. 0 이하이면 전체 전송")
+@dataclass
+class OnchainRunState:
+    """한 번의 실행(또는 데몬 전체 수명) 동안 단계끼리 공유하는 상태."""
+
+    conn: sqlite3.Connection
+    args: argparse.Namespace
+    manual_seeds: List[str]
+    seeds: List[str] = field(default_factory=list)
+    auto_seed_list: List[str] = field(default_factory=list)
+    hub_rows: List[dict] = field(default_factory=list)
+    outflow_rows: List[dict] = field(default_factory=list)
+    flow_rows: List[dict] = field(default_factory=list)
+    active_hub_rows: List[dict] = field(default_factory=list)
+    active_hub_scan_rows: List[dict] = field(default_factory=list)
+    initial_bootstrap_mode: bool = False
+    inline_enrich: bool = True
+    seed_cursor: int = 0
+    deadline: Optional[float] = None  # time.monotonic() 기준. None이면 제한 없음
+    flow_event_log: Optional[CsvEventLog] = None
+    active_hub_event_log: Optional[CsvEventLog] = None
+
+    @property
+    def detail_csv(self) -> str:
+        return f"seed_outflows_{self.args.csv}"
+
+    @property
+    def flow_csv(self) -> str:
+        return f"flow_exchange_{self.args.csv}"
+
+    @property
+    def active_hub_csv(self) -> str:
+        return f"active_hubs_{self.args.csv}"
+
+    @property
+    def active_hub_scan_csv(self) -> str:
+        return f"active_hub_events_{self.args.csv}"
+
+    @property
+    def flow_event_log_csv(self) -> str:
+        return f"flow_event_log_{self.args.csv}"
+
+    @property
+    def active_hub_event_log_csv(self) -> str:
+        return f"active_hub_event_log_{self.args.csv}"
+
+    def open_event_logs(self) -> None:
+        if self.args.event_log_max_mb < 0:
+            return
+        max_bytes = int(self.args.event_log_max_mb * 1024 * 1024)
+        if self.args.enable_flow and self.flow_event_log is None:
+            self.flow_event_log = CsvEventLog(self.flow_event_log_csv, FLOW_EVENT_KEY_FIELDS, max_bytes, self.args.event_log_backups)
+        if self.args.enable_active_hubs and self.active_hub_event_log is None:
+            self.active_hub_event_log = CsvEventLog(self.active_hub_event_log_csv, ACTIVE_HUB_EVENT_KEY_FIELDS, max_bytes, self.args.event_log_backups)
+
+    @property
+    def profile_json(self) -> str:
+        return self.args.profile_json or f"run_profile_{os.path.splitext(self.args.csv)[0]}.json"
+
+    def write_profile(self) -> None:
+        ETHERSCAN_KEY_POOL.save_usage()
+        try:
+            PROFILER.write_json(self.profile_json)
+        except Exception as e:
+            print(f"[PROFILE] 저장 실패: {e}", flush=True)
 
-    parser.add_argument("--enable-active-hubs", action="store_true", help="활성 허브 감시 사용")
-    parser.add_argument("--active-hub-ttl-hours", type=int, default=ACTIVE_HUB_TTL_HOURS, help="활성 허브 감시 유지 시간")
-    parser.add_argument("--active-hub-min-shared", type=int, default=ACTIVE_HUB_MIN_SHARED, help="활성 허브 등록 최소 shared")
-    parser.add_argument("--active-hub-min-score", type=int, default=ACTIVE_HUB_MIN_SCORE, help="활성 허브 등록 최소 score")
-    parser.add_argument("--active-hub-max-track", type=int, default=ACTIVE_HUB_MAX_TRACK, help="활성 허브 최대 감시 수")
-    parser.add_argument("--active-hub-scan-max-pages", type=int, default=ACTIVE_HUB_SCAN_MAX_PAGES, help="활성 허브 주소당 최대 페이지 수")
-    parser.add_argument("--active-hub-burst-window-hours", type=int, default=ACTIVE_HUB_BURST_WINDOW_HOURS, help="B급 burst 판단 시간 창")
-    parser.add_argument("--active-hub-min-outgoing-count-for-b", type=int, default=ACTIVE_HUB_MIN_OUTGOING_COUNT_FOR_B, help="B급 판단 최소 출금 수")
-    parser.add_argument("--active-hub-fast-scan-minutes", type=int, default=0, help="메인 분석 후 활성 허브만 빠르게 다시 감시할 주기(분). 0이면 비활성화")
-    parser.add_argument("--active-hub-fast-iterations", type=int, default=0, help="메인 분석 후 활성 허브 빠른 감시 반복 횟수. 0이면 비활성화")
+    def run_stage(self, stage: Callable[["OnchainRunState"], object]) -> object:
+        """단계 하나를 실행하고 바로 프로파일을 덮어쓴다. 앱의 timeout으로 중간에 죽어도 끝난 단계까지는 남는다."""
+        try:
+            return stage(self)
+        finally:
+            self.write_profile()
 
-    args = parser.parse_args()
-    dbg("MAIN 시작: argparse 완료")
-    dbg(f"ARGS seeds={args.seeds} chainid={args.chainid} days={args.days} max_pages={args.max_pages} enable_flow={args.enable_flow} enable_active_hubs={args.enable_active_hubs}")
+    def deadline_passed(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
 
-    dbg("주소록 로드 시작")
-    load_address_book(args.address_book, create_if_missing=True)
-    dbg("주소록 로드 완료")
 
-    dbg("seed 파일 읽기 시작")
-    manual_seeds = read_seed_addresses(args.seeds)
-    manual_seed_set = set(manual_seeds)
-    auto_seed_list = get_active_auto_seeds(args.auto_seeds, manual_seed_set, args.auto_seeds_max)
-    seeds = list(dict.fromkeys(manual_seeds + auto_seed_list))
-    dbg(f"seed 파일 읽기 완료 manual={len(manual_seeds)} auto={len(auto_seed_list)} total={len(seeds)}")
+def refresh_run_seeds(state: OnchainRunState) -> List[str]:
+    manual_seed_set = set(state.manual_seeds)
+    state.auto_seed_list = get_active_auto_seeds(state.args.auto_seeds, manual_seed_set, state.args.auto_seeds_max)
+    state.seeds = list(dict.fromkeys(state.manual_seeds + state.auto_seed_list))
+    return state.seeds
 
-    dbg(f"SQLite 연결 시작 path={DB_PATH}")
-    conn = sqlite3.connect(DB_PATH)
-    dbg("DB 테이블 확인 시작")
-    ensure_db(conn)
-    dbg("DB 테이블 확인 완료")
-    seed_exchange_labels(conn)
-    initial_bootstrap_mode = is_initial_onchain_bootstrap(conn)
-    if initial_bootstrap_mode:
-        print("[BOOTSTRAP] 첫 실행 감지: 과거 거래소 유입 알림은 전송하지 않고 기준만 저장합니다.", flush=True)
 
-    bootstrap_label_slugs = [x.strip().lower() for x in str(args.bootstrap_exchange_labels or "").split(",") if x.strip()]
-    if args.bootstrap_exchange_on_start and bootstrap_label_slugs:
-        added = bootstrap_exchange_addresses_from_etherscan(conn=conn, chainid=args.chainid, label_slugs=bootstrap_label_slugs, address_book_path=args.address_book)
-        if added:
-            print(f"[ADDR][BOOTSTRAP] 추가된 거래소 주소 수: {added}", flush=True)
+def reload_address_book_for_run(state: OnchainRunState) -> None:
+    if maybe_reload_address_book(state.args.address_book, state.args.address_book_reload_seconds):
+        seed_exchange_labels(state.conn)
+
+
+def maybe_auto_enrich_for_run(state: OnchainRunState, log_prefix: str) -> int:
+    args = state.args
+    if not (state.inline_enrich and args.auto_exchange_enrich):
+        return 0
+    added = auto_enrich_exchange_addresses(conn=state.conn, chainid=args.chainid, days=args.days, address_book_path=args.address_book, max_addresses=args.auto_exchange_enrich_limit, cache_hours=args.auto_exchange_cache_hours, sleep_sec=args.sleep_sec)
+    if added:
+        print(f"{log_prefix} 추가된 거래소 주소 수: {added}", flush=True)
+    return added
+
+
+def run_exchange_label_bootstrap(state: OnchainRunState) -> int:
+    """--bootstrap-exchange-on-start: exportaddresstags로 거래소 주소를 대량 반영한다."""
+    args = state.args
+    label_slugs = [x.strip().lower() for x in str(args.bootstrap_exchange_labels or "").split(",") if x.strip()]
+    if not (args.bootstrap_exchange_on_start and label_slugs):
+        return 0
+    added = bootstrap_exchange_addresses_from_etherscan(conn=state.conn, chainid=args.chainid, label_slugs=label_slugs, address_book_path=args.address_book)
+    if added:
+        print(f"[ADDR][BOOTSTRAP] 추가된 거래소 주소 수: {added}", flush=True)
+    return added
 
-    print(f"[INFO] address_book={os.path.abspath(args.address_book)}")
-    print(f"[INFO] seed 수: {len(seeds)} (manual={len(manual_seeds)}, auto={len(auto_seed_list)})")
-    print(f"[INFO] chainid={args.chainid}, days={args.days}, offset={args.offset}, max_pages={args.max_pages}")
 
+@profiled("stage.seed_collection")
+def run_seed_collection_stage(state: OnchainRunState, writer: Optional[TransferWriter] = None) -> int:
+    """시드 주소를 수집한다. deadline에 걸리면 seed_cursor를 남기고 다음 주기에 이어서 수집한다."""
+    args = state.args
+    seeds = state.seeds
     total_saved = 0
-    for idx, seed in enumerate(seeds, start=1):
+    if state.seed_cursor >= len(seeds):
+        state.seed_cursor = 0
+
+    for idx in range(state.seed_cursor + 1, len(seeds) + 1):
+        if state.deadline_passed():
+            print(f"[INFO] 시드 수집 deadline 도달: {idx - 1}/{len(seeds)}에서 중단, 다음 주기에 이어서 수집", flush=True)
+            return total_saved
+        if ETHERSCAN_ENDPOINT.breaker.is_open:
+            print(f"[INFO] Etherscan 서킷 열림: {idx - 1}/{len(seeds)}에서 중단, 다음 주기에 이어서 수집", flush=True)
+            return total_saved
+        seed = seeds[idx - 1]
         print(f"[INFO] ({idx}/{len(seeds)}) 수집 중: {seed}", flush=True)
         dbg(f"SEED 수집 시작 idx={idx}/{len(seeds)} seed={seed}")
         saved = collect_for_seed(
-            conn=conn,
+            conn=state.conn,
             seed=seed,
             chainid=args.chainid,
             days=args.days,
             offset=args.offset,
             max_pages=args.max_pages,
             sleep_sec=args.sleep_sec,
+            deadline=state.deadline,
+            writer=writer,
         )
         total_saved += saved
-        print(f"       저장된 신규 전송: {saved}", flush=True)
+        state.seed_cursor = idx
+        print(f"       [{args.chainid}] 저장된 신규 전송: {saved}", flush=True)
         dbg(f"SEED 수집 완료 idx={idx}/{len(seeds)} seed={seed} saved={saved}")
 
+    state.seed_cursor = 0
     print(f"[INFO] 총 신규 저장 전송 수: {total_saved}", flush=True)
     dbg("전체 seed 수집 루프 완료")
+    return total_saved
 
-    if args.auto_exchange_enrich:
-        added = auto_enrich_exchange_addresses(conn=conn, chainid=args.chainid, days=args.days, address_book_path=args.address_book, max_addresses=args.auto_exchange_enrich_limit, cache_hours=args.auto_exchange_cache_hours, sleep_sec=args.sleep_sec)
-        if added:
-            print(f"[ADDR][AUTO] 이번 분석에서 자동 추가된 거래소 주소 수: {added}", flush=True)
 
-    if maybe_reload_address_book(args.address_book, args.address_book_reload_seconds):
-        seed_exchange_labels(conn)
+@profiled("stage.hub_scoring")
+def run_hub_scoring_stage(state: OnchainRunState) -> List[dict]:
+    args = state.args
+    conn = state.conn
+    reload_address_book_for_run(state)
 
     dbg("허브 점수 계산 시작")
     rows = build_hub_scores(
@@ -2222,7 +3827,9 @@ def main() -> int:
         chainid=args.chainid,
         days=args.days,
         min_shared_seed_count=2,
+        deadline=state.deadline,
     )
+    state.hub_rows = rows
 
     dbg(f"허브 점수 계산 완료 rows={len(rows)}")
     dbg(f"허브 CSV 저장 시작 path={args.csv}")
@@ -2235,7 +3842,7 @@ def main() -> int:
         chainid=args.chainid,
         days=max(args.days, 2),
         path=args.auto_seeds,
-        manual_seeds=manual_seed_set,
+        manual_seeds=set(state.manual_seeds),
         max_auto_seeds=args.auto_seeds_max,
         ttl_hours=args.auto_seeds_ttl_hours,
         recent_hours=args.auto_seeds_recent_hours,
@@ -2257,17 +3864,20 @@ def main() -> int:
     dbg("시드 출금 상세 계산 시작")
     outflow_rows = get_seed_outflow_details(
         conn=conn,
-        seeds=seeds,
+        seeds=state.seeds,
         chainid=args.chainid,
         days=args.days,
         candidate_rows=rows,
+        deadline=state.deadline,
     )
+    state.outflow_rows = outflow_rows
+    RESULT_STREAM.emit("outflow", outflow_rows, args.chainid)
+    store_result_rows(conn, args.chainid, "outflow", outflow_rows)
     dbg(f"시드 출금 상세 계산 완료 rows={len(outflow_rows)}")
     print_seed_outflow_details(outflow_rows, top=args.top)
 
-    detail_csv = f"seed_outflows_{args.csv}"
-    dbg(f"시드 출금 CSV 저장 시작 path={detail_csv}")
-    export_csv(detail_csv, outflow_rows)
+    dbg(f"시드 출금 CSV 저장 시작 path={state.detail_csv}")
+    export_csv(state.detail_csv, outflow_rows)
     dbg("시드 출금 CSV 저장 완료")
 
     alerts_exchange_only = args.alerts_exchange_only or FLOW_ALERT_EXCHANGE_ONLY_DEFAULT
@@ -2276,122 +3886,543 @@ def main() -> int:
         send_outflow_alerts(conn, outflow_rows)
     else:
         print("[INFO] exchange-only 알림 모드: 허브/일반 출금 텔레그램 알림 생략")
+    return rows
+
 
-    flow_rows: List[dict] = []
-    flow_csv = f"flow_exchange_{args.csv}"
+@profiled("stage.flow_tracking")
+def run_flow_stage(state: OnchainRunState) -> List[dict]:
+    args = state.args
+    conn = state.conn
+    state.flow_rows = []
     dbg(f"FLOW 분기 진입 여부 enable_flow={args.enable_flow}")
-    if args.enable_flow:
-        if maybe_reload_address_book(args.address_book, args.address_book_reload_seconds):
-            seed_exchange_labels(conn)
-        flow_track_addresses = select_flow_expansion_addresses(
-            seeds=seeds,
-            hub_rows=rows,
-            outflow_rows=outflow_rows,
-            max_track_addrs=args.flow_max_track_addrs,
+    if not args.enable_flow:
+        print("[FLOW] 비활성화. --enable-flow 옵션을 주면 seed -> hub -> exchange 추적을 수행합니다.")
+        return state.flow_rows
+
+    reload_address_book_for_run(state)
+    flow_track_addresses = select_flow_expansion_addresses(
+        seeds=state.seeds,
+        hub_rows=state.hub_rows,
+        outflow_rows=state.outflow_rows,
+        max_track_addrs=args.flow_max_track_addrs,
+    )
+    print(f"\n[FLOW] 확장 추적 주소 수: {len(flow_track_addresses)}")
+    if not flow_track_addresses:
+        export_csv(state.flow_csv, state.flow_rows)
+        print("[FLOW] 확장할 주소가 없습니다.")
+        return state.flow_rows
+
+    expanded_saved = collect_for_flow_expansion(
+        conn=conn,
+        addresses=flow_track_addresses,
+        chainid=args.chainid,
+        days=args.days,
+        offset=args.offset,
+        max_pages=args.flow_expand_max_pages,
+        sleep_sec=args.sleep_sec,
+        deadline=state.deadline,
+    )
+    print(f"[FLOW] 확장 수집 신규 저장 전송 수: {expanded_saved}")
+
+    maybe_auto_enrich_for_run(state, "[ADDR][AUTO][FLOW]")
+    reload_address_book_for_run(state)
+
+    state.flow_rows = build_flow_paths(
+        conn=conn,
+        seeds=state.seeds,
+        chainid=args.chainid,
+        days=args.days,
+        max_hops=args.flow_max_hops,
+        max_time_gap_hours=args.flow_max_time_gap_hours,
+        min_amount_ratio=args.flow_min_amount_ratio,
+        deadline=state.deadline,
+    )
+    RESULT_STREAM.emit("flow", state.flow_rows, args.chainid)
+    store_result_rows(conn, args.chainid, "flow", state.flow_rows)
+    print_flow_paths(state.flow_rows, top=args.top)
+    export_csv(state.flow_csv, state.flow_rows)
+    if state.flow_event_log is not None:
+        appended = state.flow_event_log.append(state.flow_rows)
+        if appended:
+            print(f"[FLOW] 이벤트 로그 신규 {appended}건 -> {state.flow_event_log.path}")
+    send_flow_alerts(conn, state.flow_rows, max_age_hours=args.flow_alert_max_age_hours, max_alerts_per_run=args.flow_max_alerts_per_run, suppress_initial_backfill=state.initial_bootstrap_mode)
+    return state.flow_rows
+
+
+@profiled("stage.active_hub_scan")
+def run_active_hub_stage(state: OnchainRunState) -> List[dict]:
+    args = state.args
+    conn = state.conn
+    state.active_hub_scan_rows = []
+    dbg(f"ACTIVE_HUB 분기 진입 여부 enable_active_hubs={args.enable_active_hubs}")
+    if not args.enable_active_hubs:
+        print("[HUB] 비활성화. --enable-active-hubs 옵션을 주면 허브를 기억하고 장기 감시합니다.")
+        return state.active_hub_scan_rows
+
+    reload_address_book_for_run(state)
+    expired = expire_old_active_hubs(conn, args.chainid)
+    if expired:
+        print(f"[HUB] 만료 처리 수: {expired}")
+
+    activated = activate_hubs_from_candidates(
+        conn=conn,
+        hub_rows=state.hub_rows,
+        chainid=args.chainid,
+        ttl_hours=args.active_hub_ttl_hours,
+        min_shared=args.active_hub_min_shared,
+        min_score=args.active_hub_min_score,
+    )
+    print(f"[HUB] 신규 활성 허브 수: {activated}")
+
+    state.active_hub_rows = get_active_hubs(
+        conn=conn,
+        chainid=args.chainid,
+        limit=args.active_hub_max_track,
+    )
+    print_active_hubs_summary(state.active_hub_rows, top=args.top)
+    export_csv(state.active_hub_csv, state.active_hub_rows)
+    due_hub_rows = select_due_active_hubs(
+        get_active_hubs(conn=conn, chainid=args.chainid, limit=args.active_hub_max_track, due_before=utc_now_ts()),
+        max_pages=args.active_hub_scan_max_pages,
+        budget_pages=args.active_hub_poll_budget_pages,
+        burst_window_hours=args.active_hub_burst_window_hours,
+        starve_step_sec=args.active_hub_poll_min_seconds,
+    )
+    print(f"[HUB] 이번 감시 대상: {len(due_hub_rows)}/{len(state.active_hub_rows)} (예산 {args.active_hub_poll_budget_pages}페이지)")
+
+    if not due_hub_rows:
+        export_csv(state.active_hub_scan_csv, state.active_hub_scan_rows)
+        print("[HUB] 활성 허브가 없거나 아직 감시 시각이 아닙니다.")
+        return state.active_hub_scan_rows
+
+    expanded_saved = collect_for_active_hubs(
+        conn=conn,
+        active_hubs=due_hub_rows,
+        chainid=args.chainid,
+        days=args.days,
+        offset=args.offset,
+        max_pages=args.active_hub_scan_max_pages,
+        sleep_sec=args.sleep_sec,
+        deadline=state.deadline,
+    )
+    print(f"[HUB] 활성 허브 수집 신규 저장 전송 수: {expanded_saved}")
+
+    maybe_auto_enrich_for_run(state, "[ADDR][AUTO][HUB]")
+    reload_address_book_for_run(state)
+
+    state.active_hub_scan_rows = scan_active_hub_outflows(
+        conn=conn,
+        active_hubs=due_hub_rows,
+        chainid=args.chainid,
+        days=args.days,
+        burst_window_hours=args.active_hub_burst_window_hours,
+        min_outgoing_count_for_b=args.active_hub_min_outgoing_count_for_b,
+        poll_min_seconds=args.active_hub_poll_min_seconds,
+        poll_max_seconds=args.active_hub_poll_max_seconds,
+    )
+    RESULT_STREAM.emit("active_hub", state.active_hub_scan_rows, args.chainid)
+    print_active_hub_scan(state.active_hub_scan_rows, top=args.top)
+    export_csv(state.active_hub_scan_csv, state.active_hub_scan_rows)
+    if state.active_hub_event_log is not None:
+        appended = state.active_hub_event_log.append(state.active_hub_scan_rows)
+        if appended:
+            print(f"[HUB] 이벤트 로그 신규 {appended}건 -> {state.active_hub_event_log.path}")
+    send_active_hub_alerts(conn, state.active_hub_scan_rows, suppress_initial_backfill=state.initial_bootstrap_mode)
+    return state.active_hub_scan_rows
+
+
+@profiled("stage.enrichment")
+def run_enrichment_stage(state: OnchainRunState) -> int:
+    args = state.args
+    if not args.auto_exchange_enrich:
+        return 0
+    added = auto_enrich_exchange_addresses(conn=state.conn, chainid=args.chainid, days=args.days, address_book_path=args.address_book, max_addresses=args.auto_exchange_enrich_limit, cache_hours=args.auto_exchange_cache_hours, sleep_sec=args.sleep_sec)
+    if added:
+        print(f"[ADDR][AUTO][DAEMON] 추가된 거래소 주소 수: {added}", flush=True)
+    reload_address_book_for_run(state)
+    return added
+
+
+@dataclass
+class ChainSpec:
+    chainid: str
+    seeds_path: str
+    address_book: str
+
+
+def parse_chain_specs(text: str, default_seeds: str, default_address_book: str) -> List[ChainSpec]:
+    """"1,56:seeds_bsc.txt:address_book_bsc.json" 형식. 시드/주소록을 생략하면 --seeds/--address-book을 쓴다."""
+    specs: List[ChainSpec] = []
+    for part in str(text or "").split(","):
+        fields = [x.strip() for x in part.split(":")]
+        if not fields[0]:
+            continue
+        specs.append(
+            ChainSpec(
+                chainid=fields[0],
+                seeds_path=fields[1] if len(fields) > 1 and fields[1] else default_seeds,
+                address_book=fields[2] if len(fields) > 2 and fields[2] else default_address_book,
+            )
         )
-        print(f"\n[FLOW] 확장 추적 주소 수: {len(flow_track_addresses)}")
-        if flow_track_addresses:
-            expanded_saved = collect_for_flow_expansion(
-                conn=conn,
-                addresses=flow_track_addresses,
-                chainid=args.chainid,
-                days=args.days,
-                offset=args.offset,
-                max_pages=args.flow_expand_max_pages,
-                sleep_sec=args.sleep_sec,
+    if len({spec.chainid for spec in specs}) != len(specs):
+        raise ValueError(f"--chains에 같은 chainid가 두 번 있습니다: {text}")
+    return specs
+
+
+def make_chain_args(args: argparse.Namespace, spec: ChainSpec, primary: bool) -> argparse.Namespace:
+    """체인 하나용 args. 첫 체인은 기존 파일명을 그대로 쓰고, 나머지는 chain<id>_ 접두어를 붙인다."""
+    chain_args = argparse.Namespace(**vars(args))
+    chain_args.chainid = spec.chainid
+    chain_args.seeds = spec.seeds_path
+    chain_args.address_book = spec.address_book
+    if not primary:
+        chain_args.csv = f"chain{spec.chainid}_{args.csv}"
+        base, ext = os.path.splitext(args.auto_seeds)
+        chain_args.auto_seeds = f"{base}_{spec.chainid}{ext}"
+    return chain_args
+
+
+def use_chain_address_book(state: OnchainRunState) -> None:
+    """주소록은 모듈 전역이라 체인 단계를 돌리기 전에 그 체인 주소록으로 바꿔 끼운다."""
+    if ADDRESS_BOOK_STATE.get("path") != os.path.abspath(state.args.address_book):
+        load_address_book(state.args.address_book, create_if_missing=True)
+    seed_exchange_labels(state.conn)
+
+
+def build_cross_chain_hub_ranking(states: List[OnchainRunState]) -> List[dict]:
+    """체인별 허브 후보를 주소 기준으로 합친다. 같은 EOA가 여러 체인에서 허브면 위로 올라온다."""
+    merged: Dict[str, dict] = {}
+    for state in states:
+        chainid = state.args.chainid
+        for row in state.hub_rows:
+            address = normalize(row.get("address") or "")
+            if not address:
+                continue
+            item = merged.setdefault(
+                address,
+                {"address": address, "chains": [], "chain_count": 0, "score_sum": 0, "max_score": 0, "shared_seed_count_sum": 0, "total_interactions_sum": 0, "labels": set(), "exchange_hits": set()},
             )
-            print(f"[FLOW] 확장 수집 신규 저장 전송 수: {expanded_saved}")
+            score = int(row.get("score") or 0)
+            item["chains"].append(f"{chainid}:{score}")
+            item["chain_count"] += 1
+            item["score_sum"] += score
+            item["max_score"] = max(item["max_score"], score)
+            item["shared_seed_count_sum"] += int(row.get("shared_seed_count") or 0)
+            item["total_interactions_sum"] += int(row.get("total_interactions") or 0)
+            if row.get("target_label") or row.get("label"):
+                item["labels"].add(row.get("target_label") or row.get("label"))
+            for hit in str(row.get("exchange_hits") or "").split(","):
+                if hit.strip():
+                    item["exchange_hits"].add(hit.strip())
+
+    rows = []
+    for item in merged.values():
+        item["chains"] = " ".join(item["chains"])
+        item["labels"] = ", ".join(sorted(item["labels"]))
+        item["exchange_hits"] = ", ".join(sorted(item["exchange_hits"]))
+        rows.append(item)
+    rows.sort(key=lambda x: (-x["chain_count"], -x["score_sum"], -x["shared_seed_count_sum"]))
+    return rows
+
+
+def run_multi_chain(conn: sqlite3.Connection, args: argparse.Namespace, specs: List[ChainSpec], deadline: Optional[float] = None) -> int:
+    """여러 체인을 한 프로세스에서 돌린다. deadline(time.monotonic() 기준)은 모든 체인 상태에 같이 건다.
+
+    시드 수집(API 호출이 대부분인 구간)은 체인별 스레드로 동시에 돌리되 rate limiter는 전역 하나를 같이 쓰고,
+    저장은 TransferWriter 하나로 모아 SQLite 쓰기가 겹치지 않게 한다. 허브/flow/활성 허브 단계는
+    모듈 전역 주소록을 체인별로 바꿔 끼워야 해서 체인 순서대로 돌린다.
+    첫 실행 기준 저장(bootstrap)은 모든 체인 분석이 끝난 뒤 main과 같이 한 번 표시한다.
+    """
+    initial_bootstrap_mode = is_initial_onchain_bootstrap(conn)
+    if initial_bootstrap_mode:
+        print("[BOOTSTRAP] 첫 실행 감지: 과거 거래소 유입 알림은 전송하지 않고 기준만 저장합니다.", flush=True)
 
-            if args.auto_exchange_enrich:
-                added = auto_enrich_exchange_addresses(conn=conn, chainid=args.chainid, days=args.days, address_book_path=args.address_book, max_addresses=args.auto_exchange_enrich_limit, cache_hours=args.auto_exchange_cache_hours, sleep_sec=args.sleep_sec)
-                if added:
-                    print(f"[ADDR][AUTO][FLOW] 추가된 거래소 주소 수: {added}", flush=True)
-            if maybe_reload_address_book(args.address_book, args.address_book_reload_seconds):
-                seed_exchange_labels(conn)
+    states: List[OnchainRunState] = []
+    for idx, spec in enumerate(specs):
+        chain_args = make_chain_args(args, spec, primary=idx == 0)
+        state = OnchainRunState(conn=conn, args=chain_args, manual_seeds=read_seed_addresses(spec.seeds_path))
+        refresh_run_seeds(state)
+        state.open_event_logs()
+        state.initial_bootstrap_mode = initial_bootstrap_mode
+        state.deadline = deadline
+        states.append(state)
+        print(f"[CHAIN] {spec.chainid}: seeds={len(state.seeds)} address_book={spec.address_book} csv={chain_args.csv}", flush=True)
+        if args.bootstrap_exchange_on_start:
+            use_chain_address_book(state)
+            run_exchange_label_bootstrap(state)
+
+    t0 = time.monotonic()
+    writer = TransferWriter(DB_PATH)
+    try:
+        with ThreadPoolExecutor(max_workers=len(states), thread_name_prefix="chain") as pool:
+            futures = {pool.submit(run_seed_collection_stage, state, writer): state for state in states}
+            for future in as_completed(futures):
+                chainid = futures[future].args.chainid
+                try:
+                    print(f"[CHAIN] {chainid} 시드 수집 완료: 신규 {future.result()}건", flush=True)
+                except Exception as e:
+                    print(f"[CHAIN] {chainid} 시드 수집 실패: {e}", flush=True)
+    finally:
+        writer.close()
+    print(f"[CHAIN] 전체 체인 시드 수집 elapsed={time.monotonic() - t0:.1f}s", flush=True)
+    states[0].write_profile()
+
+    for state in states:
+        print(f"\n[CHAIN] ===== chainid={state.args.chainid} 분석 =====", flush=True)
+        try:
+            use_chain_address_book(state)
+            maybe_auto_enrich_for_run(state, f"[ADDR][AUTO][CHAIN {state.args.chainid}]")
+            run_hub_scoring_stage(state)
+            run_flow_stage(state)
+            run_active_hub_stage(state)
+        except Exception as e:
+            print(f"[CHAIN] {state.args.chainid} 분석 실패: {e}", flush=True)
+        finally:
+            states[0].write_profile()
+
+    cross_rows = build_cross_chain_hub_ranking(states)
+    cross_csv = f"cross_chain_{args.csv}"
+    export_csv(cross_csv, cross_rows)
+    print("\n=== 체인 통합 허브 랭킹 ===", flush=True)
+    for row in cross_rows[: args.top]:
+        print(f"chains={row['chains']} | score_sum={row['score_sum']} | shared={row['shared_seed_count_sum']} | exchange={row['exchange_hits'] or '-'} | {row['address']}")
+    print(f"\n[INFO] 체인 통합 허브 CSV 저장: {cross_csv}")
+    for state in states:
+        print(f"[INFO] chainid={state.args.chainid} 허브 CSV: {state.args.csv}")
+    states[0].write_profile()
 
-            flow_rows = build_flow_paths(
-                conn=conn,
-                seeds=seeds,
-                chainid=args.chainid,
-                days=args.days,
-                max_hops=args.flow_max_hops,
-                max_time_gap_hours=args.flow_max_time_gap_hours,
-                min_amount_ratio=args.flow_min_amount_ratio,
-            )
-            print_flow_paths(flow_rows, top=args.top)
-            export_csv(flow_csv, flow_rows)
-            send_flow_alerts(conn, flow_rows, max_age_hours=args.flow_alert_max_age_hours, max_alerts_per_run=args.flow_max_alerts_per_run, suppress_initial_backfill=initial_bootstrap_mode)
-        else:
-            export_csv(flow_csv, flow_rows)
-            print("[FLOW] 확장할 주소가 없습니다.")
-    else:
-        print("[FLOW] 비활성화. --enable-flow 옵션을 주면 seed -> hub -> exchange 추적을 수행합니다.")
+    if initial_bootstrap_mode:
+        mark_initial_onchain_bootstrap_done(conn)
+        print("[BOOTSTRAP] 기준 저장 완료: 다음 실행부터 새 거래소 유입만 알림 전송", flush=True)
+    return 0
 
-    active_hub_rows: List[dict] = []
-    active_hub_scan_rows: List[dict] = []
-    active_hub_csv = f"active_hubs_{args.csv}"
-    active_hub_scan_csv = f"active_hub_events_{args.csv}"
-    dbg(f"ACTIVE_HUB 분기 진입 여부 enable_active_hubs={args.enable_active_hubs}")
-    if args.enable_active_hubs:
-        if maybe_reload_address_book(args.address_book, args.address_book_reload_seconds):
+
+@dataclass
+class DaemonJob:
+    name: str
+    func: Callable[[OnchainRunState], object]
+    interval_sec: int
+    deadline_sec: int
+    next_run_at: float = 0.0
+    runs: int = 0
+    failures: int = 0
+    last_elapsed: float = 0.0
+
+
+DAEMON_STOP = threading.Event()
+
+
+def run_daemon_job(state: OnchainRunState, job: DaemonJob) -> None:
+    """작업 하나를 실행한다. 스케줄러가 한 스레드라 작업은 겹치지 않고, 밀린 주기는 한 번으로 합친다.
+
+    state.deadline은 수집 루프, 허브 점수의 거래소 도착 확인, 시드 출금 상세, flow 경로 추적이 확인한다.
+    """
+    started = time.monotonic()
+    state.deadline = started + job.deadline_sec if job.deadline_sec > 0 else None
+    # 데몬은 프로세스가 계속 살아 있으므로 프로파일과 응답 메모는 작업 1회 단위로 끊는다.
+    PROFILER.reset()
+    ETHERSCAN_FLIGHTS.clear()
+    print(f"\n[DAEMON] {job.name} 시작 (run={job.runs + 1})", flush=True)
+    try:
+        job.func(state)
+    except Exception as e:
+        job.failures += 1
+        print(f"[DAEMON] {job.name} 오류: {e}", flush=True)
+    finally:
+        finished = time.monotonic()
+        job.runs += 1
+        job.last_elapsed = finished - started
+        job.next_run_at = max(started + job.interval_sec, finished)
+        state.deadline = None
+        state.write_profile()
+        print(f"[DAEMON] {job.name} 종료 elapsed={job.last_elapsed:.1f}s 다음 실행까지 {job.next_run_at - finished:.0f}초", flush=True)
+
+
+def run_seed_collection_job(state: OnchainRunState) -> int:
+    # 자동 시드는 허브 점수 작업이 갱신하므로 수집 전에 다시 읽는다.
+    refresh_run_seeds(state)
+    return run_seed_collection_stage(state)
+
+
+def build_daemon_jobs(args: argparse.Namespace) -> List[DaemonJob]:
+    deadline = args.daemon_job_deadline_seconds
+    jobs = [
+        DaemonJob("seed_collection", run_seed_collection_job, args.daemon_seed_interval, deadline),
+        DaemonJob("hub_scoring", run_hub_scoring_stage, args.daemon_hub_interval, deadline),
+        DaemonJob("flow_tracking", run_flow_stage, args.daemon_flow_interval, deadline),
+        DaemonJob("active_hub_scan", run_active_hub_stage, args.daemon_active_hub_interval, deadline),
+    ]
+    if args.auto_exchange_enrich:
+        jobs.append(DaemonJob("enrichment", run_enrichment_stage, args.daemon_enrich_interval, deadline))
+    return jobs
+
+
+def run_daemon(state: OnchainRunState, jobs: List[DaemonJob], max_idle_sec: float = 30.0) -> None:
+    """하나의 연결/캐시/rate limiter를 공유하며 작업별 주기로 계속 실행한다. SIGTERM/SIGINT로 종료."""
+    state.inline_enrich = False
+    print("[DAEMON] 시작: " + ", ".join(f"{j.name}={j.interval_sec}s" for j in jobs), flush=True)
+    while not DAEMON_STOP.is_set():
+        for job in jobs:
+            if DAEMON_STOP.is_set():
+                break
+            if job.next_run_at <= time.monotonic():
+                run_daemon_job(state, job)
+
+        if state.initial_bootstrap_mode and all(j.runs > 0 for j in jobs):
+            mark_initial_onchain_bootstrap_done(state.conn)
+            state.initial_bootstrap_mode = False
+            print("[BOOTSTRAP] 기준 저장 완료: 다음 주기부터 새 거래소 유입만 알림 전송", flush=True)
+
+        wait = min(j.next_run_at for j in jobs) - time.monotonic()
+        if wait > 0:
+            DAEMON_STOP.wait(min(wait, max_idle_sec))
+    print("[DAEMON] 종료 신호 수신: 스케줄러 정지", flush=True)
+
+
+def _request_daemon_stop(signum, frame) -> None:
+    DAEMON_STOP.set()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Etherscan V2 반복 지갑 탐지 MVP + light flow tracker + active hub watcher")
+    parser.add_argument("--seeds", required=True, help="시드 주소 txt 파일 경로")
+    parser.add_argument("--auto-seeds", default=AUTO_SEEDS_PATH_DEFAULT, help="자동 임시 시드 JSON 파일 경로")
+    parser.add_argument("--auto-seeds-max", type=int, default=AUTO_SEEDS_MAX_DEFAULT, help="자동 시드 최대 유지 개수")
+    parser.add_argument("--auto-seeds-ttl-hours", type=int, default=AUTO_SEEDS_TTL_HOURS_DEFAULT, help="자동 시드 TTL 시간")
+    parser.add_argument("--auto-seeds-recent-hours", type=int, default=AUTO_SEEDS_RECENT_HOURS_DEFAULT, help="자동 시드 후보 최근 등장 허용 시간")
+    parser.add_argument("--auto-seeds-min-shared", type=int, default=AUTO_SEEDS_MIN_SHARED_DEFAULT, help="자동 시드 등록 최소 shared")
+    parser.add_argument("--auto-seeds-min-score", type=int, default=AUTO_SEEDS_MIN_SCORE_DEFAULT, help="자동 시드 등록 최소 score")
+    parser.add_argument("--chainid", default="1", help="EVM chainid. Ethereum=1")
+    parser.add_argument("--chains", default="", help='멀티 체인 모드. "1,56:seeds_bsc.txt:address_book_bsc.json" 처럼 chainid[:시드파일[:주소록]] 목록. 주면 --chainid 무시')
+    parser.add_argument("--days", type=int, default=30, help="최근 며칠 데이터 볼지")
+    parser.add_argument("--offset", type=int, default=100, help="페이지당 전송 수")
+    parser.add_argument("--max-pages", type=int, default=10, help="주소당 최대 페이지 수")
+    parser.add_argument("--sleep-sec", type=float, default=0.4, help="API 호출 간 대기")
+    parser.add_argument("--top", type=int, default=20, help="상위 몇 개 허브 후보/상세 출력할지")
+    parser.add_argument("--csv", default="hub_candidates.csv", help="결과 CSV 파일명")
+    parser.add_argument("--address-book", default=ADDRESS_BOOK_PATH_DEFAULT, help="거래소/라우터/ignore 주소록 JSON 파일 경로")
+    parser.add_argument("--address-book-reload-seconds", type=int, default=ADDRESS_BOOK_RELOAD_SECONDS_DEFAULT, help="주소록 파일 변경 재로딩 최소 간격(초)")
+    parser.add_argument("--auto-exchange-enrich", action="store_true", help="알 수 없는 주소를 Etherscan 라벨로 조회해 거래소 주소를 자동 축적")
+    parser.add_argument("--auto-exchange-enrich-limit", type=int, default=AUTO_EXCHANGE_ENRICH_LIMIT_DEFAULT, help="1회 분석당 자동 축적할 미확인 주소 최대 개수")
+    parser.add_argument("--auto-exchange-cache-hours", type=int, default=AUTO_EXCHANGE_ENRICH_CACHE_HOURS_DEFAULT, help="주소 메타데이터 캐시 유지 시간")
+    parser.add_argument("--bootstrap-exchange-labels", default=",".join(BOOTSTRAP_EXCHANGE_LABEL_SLUGS_DEFAULT), help="시작 시 exportaddresstags로 대량 반영할 라벨 slug 목록(콤마 구분)")
+    parser.add_argument("--bootstrap-exchange-on-start", action="store_true", help="시작 시 Etherscan 라벨 export로 거래소 주소를 대량 반영")
+
+    parser.add_argument("--enable-flow", action="store_true", help="seed -> hub -> ... -> exchange 흐름 추적 사용")
+    parser.add_argument("--flow-max-hops", type=int, default=3, help="최대 hop 수. 기본 3")
+    parser.add_argument("--flow-max-time-gap-hours", type=int, default=24, help="hop 간 최대 시간 간격(시간)")
+    parser.add_argument("--flow-expand-max-pages", type=int, default=3, help="flow 확장 주소당 최대 페이지 수")
+    parser.add_argument("--flow-max-track-addrs", type=int, default=FLOW_MAX_TRACK_ADDRS, help="확장 추적할 주소 최대 개수")
+    parser.add_argument("--flow-min-amount-ratio", type=float, default=FLOW_MIN_AMOUNT_RATIO, help="이전 hop 대비 최소 금액 비율")
+    parser.add_argument("--alerts-exchange-only", action="store_true", help="텔레그램은 거래소 도착 flow만 전송")
+    parser.add_argument("--flow-alert-max-age-hours", type=int, default=FLOW_ALERT_MAX_AGE_HOURS_DEFAULT, help="flow 텔레그램 알림 최대 허용 신선도(시간). 0이면 전체 허용")
+    parser.add_argument("--flow-max-alerts-per-run", type=int, default=FLOW_MAX_ALERTS_PER_RUN_DEFAULT, help="1회 실행당 flow 텔레그램 최대 전송 개수. 0 이하이면 전체 전송")
+
+    parser.add_argument("--enable-active-hubs", action="store_true", help="활성 허브 감시 사용")
+    parser.add_argument("--active-hub-ttl-hours", type=int, default=ACTIVE_HUB_TTL_HOURS, help="활성 허브 감시 유지 시간")
+    parser.add_argument("--active-hub-min-shared", type=int, default=ACTIVE_HUB_MIN_SHARED, help="활성 허브 등록 최소 shared")
+    parser.add_argument("--active-hub-min-score", type=int, default=ACTIVE_HUB_MIN_SCORE, help="활성 허브 등록 최소 score")
+    parser.add_argument("--active-hub-max-track", type=int, default=ACTIVE_HUB_MAX_TRACK, help="활성 허브 최대 감시 수")
+    parser.add_argument("--active-hub-scan-max-pages", type=int, default=ACTIVE_HUB_SCAN_MAX_PAGES, help="활성 허브 주소당 최대 페이지 수")
+    parser.add_argument("--active-hub-burst-window-hours", type=int, default=ACTIVE_HUB_BURST_WINDOW_HOURS, help="B급 burst 판단 시간 창")
+    parser.add_argument("--active-hub-min-outgoing-count-for-b", type=int, default=ACTIVE_HUB_MIN_OUTGOING_COUNT_FOR_B, help="B급 판단 최소 출금 수")
+    parser.add_argument("--active-hub-poll-budget-pages", type=int, default=ACTIVE_HUB_POLL_BUDGET_PAGES, help="1회 감시당 활성 허브 수집 API 페이지 예산. 0 이하이면 제한 없음")
+    parser.add_argument("--active-hub-poll-min-seconds", type=int, default=ACTIVE_HUB_POLL_MIN_SECONDS, help="활발한 허브의 최소 재감시 간격(초)")
+    parser.add_argument("--active-hub-poll-max-seconds", type=int, default=ACTIVE_HUB_POLL_MAX_SECONDS, help="조용한 허브의 최대 재감시 간격(초)")
+    parser.add_argument("--active-hub-fast-scan-minutes", type=int, default=0, help="메인 분석 후 활성 허브만 빠르게 다시 감시할 주기(분). 0이면 비활성화")
+    parser.add_argument("--active-hub-fast-iterations", type=int, default=0, help="메인 분석 후 활성 허브 빠른 감시 반복 횟수. 0이면 비활성화")
+
+    parser.add_argument("--event-log-max-mb", type=float, default=EVENT_LOG_MAX_BYTES_DEFAULT / (1024 * 1024), help="flow/active hub 이벤트 로그 회전 크기(MB). 0이면 회전 안 함, 음수면 이벤트 로그 끔")
+    parser.add_argument("--event-log-backups", type=int, default=EVENT_LOG_BACKUPS_DEFAULT, help="회전된 이벤트 로그 보관 개수(.1 ~ .N)")
+    parser.add_argument("--response-memo-seconds", type=float, default=RESPONSE_MEMO_SECONDS_DEFAULT, help="같은 Etherscan 요청 응답을 재사용할 시간(초). 0이면 동시 요청 합치기만")
+    parser.add_argument("--result-fd", type=int, default=-1, help="flow/시드 출금 결과를 JSON 줄로 보낼 파이프 fd (app.py 전용)")
+    parser.add_argument("--profile-json", default="", help="단계별 소요 시간/API 호출 수 프로파일 JSON 경로. 비우면 run_profile_<csv이름>.json")
+    parser.add_argument("--daemon", action="store_true", help="1회 실행 후 종료하지 않고 작업별 주기로 계속 실행")
+    parser.add_argument("--daemon-seed-interval", type=int, default=DAEMON_SEED_INTERVAL_DEFAULT, help="데몬: 시드 수집 주기(초)")
+    parser.add_argument("--daemon-hub-interval", type=int, default=DAEMON_HUB_INTERVAL_DEFAULT, help="데몬: 허브 점수/출금 상세 주기(초)")
+    parser.add_argument("--daemon-flow-interval", type=int, default=DAEMON_FLOW_INTERVAL_DEFAULT, help="데몬: flow 추적 주기(초)")
+    parser.add_argument("--daemon-active-hub-interval", type=int, default=DAEMON_ACTIVE_HUB_INTERVAL_DEFAULT, help="데몬: 활성 허브 감시 주기(초)")
+    parser.add_argument("--daemon-enrich-interval", type=int, default=DAEMON_ENRICH_INTERVAL_DEFAULT, help="데몬: 거래소 주소 자동 축적 주기(초)")
+    parser.add_argument("--deadline-seconds", type=int, default=0, help="1회 실행: 이 시간(초)이 지나면 남은 수집/추적을 멈추고 그때까지의 결과를 저장한 뒤 종료. 0이면 제한 없음")
+    parser.add_argument("--daemon-job-deadline-seconds", type=int, default=DAEMON_JOB_DEADLINE_DEFAULT, help="데몬: 작업 1회 최대 실행 시간(초). 넘으면 남은 수집은 다음 주기로 넘김")
+
+    args = parser.parse_args()
+    # 1회 실행 deadline은 인자 해석 직후부터 센다. 부모(app)가 거는 타임아웃보다 짧게 줘야 강제 종료 전에 결과를 쓴다.
+    run_deadline = time.monotonic() + args.deadline_seconds if args.deadline_seconds > 0 else None
+    RESULT_STREAM.open(args.result_fd)
+    ETHERSCAN_FLIGHTS.ttl = max(0.0, args.response_memo_seconds)
+    dbg("MAIN 시작: argparse 완료")
+    dbg(f"ARGS seeds={args.seeds} chainid={args.chainid} days={args.days} max_pages={args.max_pages} enable_flow={args.enable_flow} enable_active_hubs={args.enable_active_hubs}")
+
+    dbg("주소록 로드 시작")
+    load_address_book(args.address_book, create_if_missing=True)
+    dbg("주소록 로드 완료")
+
+    dbg(f"SQLite 연결 시작 path={DB_PATH}")
+    conn = sqlite3.connect(DB_PATH)
+    dbg("DB 테이블 확인 시작")
+    ensure_db(conn)
+    dbg("DB 테이블 확인 완료")
+    seed_exchange_labels(conn)
+
+    if args.chains:
+        specs = parse_chain_specs(args.chains, args.seeds, args.address_book)
+        if args.daemon:
+            print("[CHAIN] --chains는 1회 실행 모드에서만 지원합니다. 체인별로 --daemon을 따로 띄우세요.", flush=True)
+            conn.close()
+            return 2
+        if len(specs) > 1 and args.active_hub_fast_scan_minutes > 0 and args.active_hub_fast_iterations > 0:
+            print("[CHAIN] --active-hub-fast-scan-*은 --chains 여러 체인과 같이 쓸 수 없습니다. 체인별로 따로 실행하세요.", flush=True)
+            conn.close()
+            return 2
+        if len(specs) > 1:
+            try:
+                return run_multi_chain(conn, args, specs, deadline=run_deadline)
+            finally:
+                conn.close()
+        args.chainid = specs[0].chainid
+        args.seeds = specs[0].seeds_path
+        if specs[0].address_book != args.address_book:
+            args.address_book = specs[0].address_book
+            load_address_book(args.address_book, create_if_missing=True)
             seed_exchange_labels(conn)
-        expired = expire_old_active_hubs(conn, args.chainid)
-        if expired:
-            print(f"[HUB] 만료 처리 수: {expired}")
 
-        activated = activate_hubs_from_candidates(
-            conn=conn,
-            hub_rows=rows,
-            chainid=args.chainid,
-            ttl_hours=args.active_hub_ttl_hours,
-            min_shared=args.active_hub_min_shared,
-            min_score=args.active_hub_min_score,
-        )
-        print(f"[HUB] 신규 활성 허브 수: {activated}")
+    dbg("seed 파일 읽기 시작")
+    state = OnchainRunState(conn=conn, args=args, manual_seeds=read_seed_addresses(args.seeds))
+    refresh_run_seeds(state)
+    state.open_event_logs()
+    dbg(f"seed 파일 읽기 완료 manual={len(state.manual_seeds)} auto={len(state.auto_seed_list)} total={len(state.seeds)}")
 
-        active_hub_rows = get_active_hubs(
-            conn=conn,
-            chainid=args.chainid,
-            limit=args.active_hub_max_track,
-        )
-        print_active_hubs_summary(active_hub_rows, top=args.top)
-        export_csv(active_hub_csv, active_hub_rows)
+    state.initial_bootstrap_mode = is_initial_onchain_bootstrap(conn)
+    if state.initial_bootstrap_mode:
+        print("[BOOTSTRAP] 첫 실행 감지: 과거 거래소 유입 알림은 전송하지 않고 기준만 저장합니다.", flush=True)
 
-        if active_hub_rows:
-            expanded_saved = collect_for_active_hubs(
-                conn=conn,
-                active_hubs=active_hub_rows,
-                chainid=args.chainid,
-                days=args.days,
-                offset=args.offset,
-                max_pages=args.active_hub_scan_max_pages,
-                sleep_sec=args.sleep_sec,
-            )
-            print(f"[HUB] 활성 허브 수집 신규 저장 전송 수: {expanded_saved}")
+    run_exchange_label_bootstrap(state)
 
-            if args.auto_exchange_enrich:
-                added = auto_enrich_exchange_addresses(conn=conn, chainid=args.chainid, days=args.days, address_book_path=args.address_book, max_addresses=args.auto_exchange_enrich_limit, cache_hours=args.auto_exchange_cache_hours, sleep_sec=args.sleep_sec)
-                if added:
-                    print(f"[ADDR][AUTO][HUB] 추가된 거래소 주소 수: {added}", flush=True)
-            if maybe_reload_address_book(args.address_book, args.address_book_reload_seconds):
-                seed_exchange_labels(conn)
+    print(f"[INFO] address_book={os.path.abspath(args.address_book)}")
+    print(f"[INFO] seed 수: {len(state.seeds)} (manual={len(state.manual_seeds)}, auto={len(state.auto_seed_list)})")
+    print(f"[INFO] chainid={args.chainid}, days={args.days}, offset={args.offset}, max_pages={args.max_pages}")
 
-            active_hub_scan_rows = scan_active_hub_outflows(
-                conn=conn,
-                active_hubs=active_hub_rows,
-                chainid=args.chainid,
-                days=args.days,
-                burst_window_hours=args.active_hub_burst_window_hours,
-                min_outgoing_count_for_b=args.active_hub_min_outgoing_count_for_b,
-            )
-            print_active_hub_scan(active_hub_scan_rows, top=args.top)
-            export_csv(active_hub_scan_csv, active_hub_scan_rows)
-            send_active_hub_alerts(conn, active_hub_scan_rows, suppress_initial_backfill=initial_bootstrap_mode)
-        else:
-            export_csv(active_hub_scan_csv, active_hub_scan_rows)
-            print("[HUB] 활성 허브가 없습니다.")
-    else:
-        print("[HUB] 비활성화. --enable-active-hubs 옵션을 주면 허브를 기억하고 장기 감시합니다.")
+    if args.daemon:
+        signal.signal(signal.SIGTERM, _request_daemon_stop)
+        signal.signal(signal.SIGINT, _request_daemon_stop)
+        try:
+            run_daemon(state, build_daemon_jobs(args))
+        finally:
+            conn.close()
+        return 0
+
+    state.deadline = run_deadline
+    state.run_stage(run_seed_collection_stage)
+
+    if args.auto_exchange_enrich and not state.deadline_passed():
+        added = auto_enrich_exchange_addresses(conn=conn, chainid=args.chainid, days=args.days, address_book_path=args.address_book, max_addresses=args.auto_exchange_enrich_limit, cache_hours=args.auto_exchange_cache_hours, sleep_sec=args.sleep_sec)
+        if added:
+            print(f"[ADDR][AUTO] 이번 분석에서 자동 추가된 거래소 주소 수: {added}", flush=True)
+
+    state.run_stage(run_hub_scoring_stage)
+    state.run_stage(run_flow_stage)
+    state.run_stage(run_active_hub_stage)
 
     if args.enable_active_hubs and args.active_hub_fast_scan_minutes > 0 and args.active_hub_fast_iterations > 0:
         run_active_hub_fast_scan_loop(
@@ -2408,25 +4439,38 @@ def main() -> int:
             sleep_sec=args.sleep_sec,
             interval_minutes=args.active_hub_fast_scan_minutes,
             iterations=args.active_hub_fast_iterations,
-            active_hub_csv=active_hub_csv,
-            active_hub_scan_csv=active_hub_scan_csv,
+            active_hub_csv=state.active_hub_csv,
+            active_hub_scan_csv=state.active_hub_scan_csv,
             auto_exchange_enrich=args.auto_exchange_enrich,
             auto_exchange_enrich_limit=args.auto_exchange_enrich_limit,
             auto_exchange_cache_hours=args.auto_exchange_cache_hours,
+            poll_budget_pages=args.active_hub_poll_budget_pages,
+            poll_min_seconds=args.active_hub_poll_min_seconds,
+            poll_max_seconds=args.active_hub_poll_max_seconds,
+            suppress_initial_backfill=state.initial_bootstrap_mode,
+            event_log=state.active_hub_event_log,
+            on_iteration_done=state.write_profile,
+            deadline=run_deadline,
         )
 
     print(f"\n[INFO] 결과 CSV 저장: {args.csv}")
-    print(f"[INFO] 시드 출금 상세 CSV 저장: {detail_csv}")
+    print(f"[INFO] 시드 출금 상세 CSV 저장: {state.detail_csv}")
     if args.enable_flow:
-        print(f"[INFO] flow 거래소 도착 CSV 저장: {flow_csv}")
+        print(f"[INFO] flow 거래소 도착 CSV 저장: {state.flow_csv}")
+        if state.flow_event_log is not None:
+            print(f"[INFO] flow 이벤트 로그: {state.flow_event_log_csv}")
     if args.enable_active_hubs:
-        print(f"[INFO] active hub 목록 CSV 저장: {active_hub_csv}")
-        print(f"[INFO] active hub 이벤트 CSV 저장: {active_hub_scan_csv}")
+        print(f"[INFO] active hub 목록 CSV 저장: {state.active_hub_csv}")
+        print(f"[INFO] active hub 이벤트 CSV 저장: {state.active_hub_scan_csv}")
+        if state.active_hub_event_log is not None:
+            print(f"[INFO] active hub 이벤트 로그: {state.active_hub_event_log_csv}")
     print(f"[INFO] address book JSON: {os.path.abspath(args.address_book)}")
     print(f"[INFO] auto seeds JSON: {os.path.abspath(args.auto_seeds)}")
     print(f"[INFO] SQLite DB 저장: {DB_PATH}")
+    state.write_profile()
+    print(f"[INFO] 실행 프로파일 JSON 저장: {state.profile_json}")
 
-    if initial_bootstrap_mode:
+    if state.initial_bootstrap_mode:
         mark_initial_onchain_bootstrap_done(conn)
         print("[BOOTSTRAP] 기준 저장 완료: 다음 실행부터 새 거래소 유입만 알림 전송", flush=True)
 
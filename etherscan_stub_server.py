@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""로컬 Etherscan 호환 stub 서버.
+
+API 키나 네트워크 없이 eth_repeat_wallet_mvp.py 전체 파이프라인을 돌리고,
+수집 처리량과 rate limit 대응을 재현 가능하게 측정하기 위한 용도다.
+
+지원 엔드포인트
+- /v2/api : account/tokentx, contract/getsourcecode, nametag/getaddresstag
+- /v1/api.ashx : nametag/exportaddresstags (CSV, ';' 구분)
+
+데이터셋
+- --fixture 로 기록된 JSON 파일을 쓰거나, 없으면 --synthetic-* 옵션으로 합성 데이터를 만든다.
+- --record-upstream 을 주면 fixture에 없는 요청을 실제 Etherscan으로 넘기고 응답을 기록해
+  종료 시 --save-fixture 경로에 저장한다.
+
+실행 예:
+    python etherscan_stub_server.py --port 8545 --latency-ms 80 --error-rate 0.02 --rate-limit-per-sec 5
+    ETHERSCAN_API_KEY=dummy ETHERSCAN_API_URL=http://127.0.0.1:8545/v2/api \\
+    ETHERSCAN_METADATA_API_URL=http://127.0.0.1:8545/v1/api.ashx \\
+    python eth_repeat_wallet_mvp.py --seeds seed_addresses.txt --days 30
+"""
+from __future__ import annotations
+
+import argparse
+import collections
+import csv
+import io
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+UPSTREAM_API_URL_DEFAULT = "https://api.etherscan.io/v2/api"
+UPSTREAM_METADATA_URL_DEFAULT = "https://api-metadata.etherscan.io/v1/api.ashx"
+
+SYNTHETIC_TOKENS = [
+    ("PEPE", "Pepe", "0x6982508145454ce325ddbe47a25d4ec3d2311933", 18),
+    ("USDT", "Tether USD", "0xdac17f958d2ee523a2206206994597c13d831ec7", 6),
+    ("WETH", "Wrapped Ether", "0xc02aaa39b223fe8d0a0e5c4f27ead9083c756cc2", 18),
+    ("LINK", "ChainLink Token", "0x514910771af9ca656af840dff83e8264ecf986ca", 18),
+    ("ARB", "Arbitrum", "0xb50721bcf8d664c30412cfbc6cf7a15145234ad1", 18),
+]
+
+RATE_LIMIT_RESULT = "Max calls per sec rate limit reached (5/sec)"
+
+
+def normalize(addr: str) -> str:
+    return str(addr or "").strip().lower()
+
+
+def synthetic_address(rng: random.Random) -> str:
+    return "0x" + "".join(rng.choice("0123456789abcdef") for _ in range(40))
+
+
+def build_synthetic_dataset(
+    seed_addresses: List[str],
+    transfers_per_address: int = 200,
+    hub_count: int = 5,
+    days: int = 30,
+    random_seed: int = 7,
+    now_ts: Optional[int] = None,
+) -> dict:
+    """시드들이 소수의 허브 주소를 공유하는 tokentx 데이터셋을 만든다."""
+    rng = random.Random(random_seed)
+    now_ts = now_ts or int(time.time())
+    hubs = [synthetic_address(rng) for _ in range(max(1, hub_count))]
+    tokentx: Dict[str, List[dict]] = collections.defaultdict(list)
+    block = 19_000_000
+
+    seeds = [normalize(x) for x in seed_addresses] or [synthetic_address(rng) for _ in range(5)]
+    for seed in seeds:
+        for _ in range(max(0, transfers_per_address)):
+            symbol, name, contract, decimals = rng.choice(SYNTHETIC_TOKENS)
+            ts = now_ts - rng.randint(0, days * 86400)
+            block += rng.randint(1, 3)
+            counterparty = rng.choice(hubs) if rng.random() < 0.35 else synthetic_address(rng)
+            outgoing = rng.random() < 0.5
+            item = {
+                "blockNumber": str(block),
+                "timeStamp": str(ts),
+                "hash": "0x" + "".join(rng.choice("0123456789abcdef") for _ in range(64)),
+                "from": seed if outgoing else counterparty,
+                "to": counterparty if outgoing else seed,
+                "value": str(rng.randint(1, 10_000) * 10 ** decimals // rng.randint(1, 100)),
+                "tokenName": name,
+                "tokenSymbol": symbol,
+                "tokenDecimal": str(decimals),
+                "contractAddress": contract,
+            }
+            tokentx[seed].append(item)
+            if counterparty in hubs:
+                tokentx[counterparty].append(dict(item))
+
+    return {"tokentx": dict(tokentx), "getsourcecode": {}, "getaddresstag": {}, "exportaddresstags": {}}
+
+
+def load_fixture(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        payload = json.load(f)
+    return {
+        "tokentx": {normalize(k): list(v) for k, v in dict(payload.get("tokentx", {})).items()},
+        "getsourcecode": {normalize(k): v for k, v in dict(payload.get("getsourcecode", {})).items()},
+        "getaddresstag": {normalize(k): v for k, v in dict(payload.get("getaddresstag", {})).items()},
+        "exportaddresstags": dict(payload.get("exportaddresstags", {})),
+    }
+
+
+def save_fixture(path: str, dataset: dict) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(dataset, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+class StubState:
+    """데이터셋과 장애 주입 설정, 요청 통계를 담는다. 핸들러 스레드끼리 공유한다."""
+
+    def __init__(
+        self,
+        dataset: dict,
+        latency_ms: float = 0.0,
+        latency_jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        notok_rate: float = 0.0,
+        rate_limit_per_sec: int = 0,
+        record_upstream: Optional[str] = None,
+        record_metadata_upstream: Optional[str] = None,
+        random_seed: int = 11,
+    ):
+        self.dataset = dataset
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.error_rate = error_rate
+        self.notok_rate = notok_rate
+        self.rate_limit_per_sec = rate_limit_per_sec
+        self.record_upstream = record_upstream
+        self.record_metadata_upstream = record_metadata_upstream
+        self.rng = random.Random(random_seed)
+        self.lock = threading.Lock()
+        self.calls_by_key: Dict[Tuple[str, int], int] = collections.Counter()
+        self.stats: Dict[str, int] = collections.Counter()
+
+    def is_rate_limited(self, apikey: str) -> bool:
+        if self.rate_limit_per_sec <= 0:
+            return False
+        second = int(time.time())
+        with self.lock:
+            key = (apikey or "-", second)
+            self.calls_by_key[key] += 1
+            if len(self.calls_by_key) > 4096:
+                for old_key in [k for k in self.calls_by_key if k[1] < second - 5]:
+                    del self.calls_by_key[old_key]
+            return self.calls_by_key[key] > self.rate_limit_per_sec
+
+    def roll(self, rate: float) -> bool:
+        if rate <= 0:
+            return False
+        with self.lock:
+            return self.rng.random() < rate
+
+    def sleep_latency(self) -> None:
+        if self.latency_ms <= 0 and self.latency_jitter_ms <= 0:
+            return
+        with self.lock:
+            jitter = self.rng.uniform(-self.latency_jitter_ms, self.latency_jitter_ms)
+        time.sleep(max(0.0, self.latency_ms + jitter) / 1000.0)
+
+    def count(self, name: str) -> None:
+        with self.lock:
+            self.stats[name] += 1
+
+
+def paginate_tokentx(items: List[dict], page: int, offset: int, sort: str, startblock: int, endblock: int) -> List[dict]:
+    selected = [x for x in items if startblock <= int(x.get("blockNumber") or 0) <= endblock]
+    selected.sort(key=lambda x: (int(x.get("timeStamp") or 0), int(x.get("blockNumber") or 0)), reverse=(sort != "asc"))
+    start = (max(page, 1) - 1) * max(offset, 1)
+    return selected[start:start + max(offset, 1)]
+
+
+def ok_payload(result) -> dict:
+    return {"status": "1", "message": "OK", "result": result}
+
+
+def notok_payload(result: str) -> dict:
+    return {"status": "0", "message": "NOTOK", "result": result}
+
+
+def fetch_upstream(url: str, params: Dict[str, str]) -> requests.Response:
+    resp = requests.get(url, params=params, timeout=30)
+    resp.raise_for_status()
+    return resp
+
+
+def handle_v2(state: StubState, params: Dict[str, str]) -> dict:
+    module = params.get("module", "")
+    action = params.get("action", "")
+    address = normalize(params.get("address", ""))
+    dataset = state.dataset
+
+    if module == "account" and action == "tokentx":
+        if address not in dataset["tokentx"] and state.record_upstream:
+            data = fetch_upstream(state.record_upstream, dict(params, page="1", offset="10000")).json()
+            with state.lock:
+                dataset["tokentx"][address] = list(data.get("result") or []) if str(data.get("status")) == "1" else []
+        items = dataset["tokentx"].get(address, [])
+        rows = paginate_tokentx(
+            items,
+            page=int(params.get("page") or 1),
+            offset=int(params.get("offset") or 100),
+            sort=params.get("sort") or "desc",
+            startblock=int(params.get("startblock") or 0),
+            endblock=int(params.get("endblock") or 99999999),
+        )
+        if not rows:
+            return {"status": "0", "message": "No transactions found", "result": []}
+        return ok_payload(rows)
+
+    if module == "contract" and action == "getsourcecode":
+        if address not in dataset["getsourcecode"] and state.record_upstream:
+            data = fetch_upstream(state.record_upstream, params).json()
+            result = data.get("result") or []
+            with state.lock:
+                dataset["getsourcecode"][address] = result[0] if isinstance(result, list) and result else {}
+        item = dataset["getsourcecode"].get(address) or {"SourceCode": "", "ABI": "Contract source code not verified", "ContractName": ""}
+        return ok_payload([item])
+
+    if module == "nametag" and action == "getaddresstag":
+        if address not in dataset["getaddresstag"] and state.record_upstream:
+            data = fetch_upstream(state.record_upstream, params).json()
+            result = data.get("result") or []
+            with state.lock:
+                dataset["getaddresstag"][address] = result[0] if isinstance(result, list) and result else None
+        item = dataset["getaddresstag"].get(address)
+        return ok_payload([item] if item else [])
+
+    return notok_payload(f"stub: unsupported module={module} action={action}")
+
+
+def handle_v1_export(state: StubState, params: Dict[str, str]) -> str:
+    label = str(params.get("label") or "").strip().lower()
+    exports = state.dataset["exportaddresstags"]
+    if label not in exports and state.record_metadata_upstream:
+        text = fetch_upstream(state.record_metadata_upstream, params).text
+        with state.lock:
+            exports[label] = text
+    value = exports.get(label, [])
+    if isinstance(value, str):
+        return value
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=["address", "nametag", "labels", "labels_slug"], delimiter=";")
+    writer.writeheader()
+    for row in value:
+        writer.writerow({k: row.get(k, "") for k in writer.fieldnames})
+    return buf.getvalue()
+
+
+def make_handler(state: StubState):
+    class EtherscanStubHandler(BaseHTTPRequestHandler):
+        def log_message(self, fmt, *args):
+            return
+
+        def send_body(self, status: int, body: bytes, content_type: str) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def send_json(self, payload: dict, status: int = 200) -> None:
+            self.send_body(status, json.dumps(payload).encode("utf-8"), "application/json")
+
+        def do_GET(self):
+            parsed = urlparse(self.path)
+            params = {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+            state.count("requests")
+            state.sleep_latency()
+
+            if parsed.path == "/stats":
+                with state.lock:
+                    self.send_json(dict(state.stats))
+                return
+            if state.is_rate_limited(params.get("apikey", "")):
+                state.count("rate_limited")
+                self.send_json(notok_payload(RATE_LIMIT_RESULT))
+                return
+            if state.roll(state.error_rate):
+                state.count("http_errors")
+                self.send_body(502, b"stub injected error", "text/plain")
+                return
+            if state.roll(state.notok_rate):
+                state.count("notok_errors")
+                self.send_json(notok_payload("stub injected NOTOK"))
+                return
+
+            try:
+                if parsed.path.endswith("/api.ashx"):
+                    state.count("exportaddresstags")
+                    self.send_body(200, handle_v1_export(state, params).encode("utf-8"), "text/csv; charset=utf-8")
+                else:
+                    state.count(f"{params.get('module', '-')}.{params.get('action', '-')}")
+                    self.send_json(handle_v2(state, params))
+            except Exception as e:
+                state.count("handler_errors")
+                self.send_json(notok_payload(f"stub error: {e}"), status=500)
+
+    return EtherscanStubHandler
+
+
+def start_stub_server(state: StubState, host: str = "127.0.0.1", port: int = 0) -> Tuple[ThreadingHTTPServer, threading.Thread]:
+    """백그라운드 스레드로 서버를 띄운다. port=0이면 빈 포트를 고른다(벤치마크용)."""
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, thread
+
+
+def stub_urls(server: ThreadingHTTPServer) -> Tuple[str, str]:
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}/v2/api", f"http://{host}:{port}/v1/api.ashx"
+
+
+def read_seed_file(path: str) -> List[str]:
+    seeds = []
+    with open(path, "r", encoding="utf-8") as f:
+        for raw_line in f:
+            line = raw_line.split("#", 1)[0].strip()
+            if line:
+                seeds.append(normalize(line))
+    return list(dict.fromkeys(seeds))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="오프라인 Etherscan 호환 stub 서버 (부하/재현 테스트용)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8545)
+    parser.add_argument("--fixture", default="", help="기록된 fixture JSON 경로. 없으면 합성 데이터 사용")
+    parser.add_argument("--save-fixture", default="", help="종료 시 현재 데이터셋(기록분 포함)을 저장할 경로")
+    parser.add_argument("--synthetic-seeds", default="", help="합성 데이터에 쓸 시드 txt 파일")
+    parser.add_argument("--synthetic-transfers", type=int, default=200, help="시드당 합성 전송 수")
+    parser.add_argument("--synthetic-hubs", type=int, default=5, help="시드가 공유하는 합성 허브 수")
+    parser.add_argument("--random-seed", type=int, default=7)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="응답 지연 평균(ms)")
+    parser.add_argument("--latency-jitter-ms", type=float, default=0.0, help="응답 지연 흔들림(±ms)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="HTTP 502 주입 비율")
+    parser.add_argument("--notok-rate", type=float, default=0.0, help="status=0 NOTOK 주입 비율")
+    parser.add_argument("--rate-limit-per-sec", type=int, default=0, help="apikey별 초당 허용 호출 수. 0이면 무제한")
+    parser.add_argument("--record-upstream", default="", help="fixture에 없는 요청을 넘길 실제 V2 API URL (기록 모드)")
+    parser.add_argument("--record-metadata-upstream", default="", help="기록 모드에서 exportaddresstags를 넘길 실제 V1 URL")
+    args = parser.parse_args()
+
+    if args.fixture and os.path.exists(args.fixture):
+        dataset = load_fixture(args.fixture)
+        print(f"[STUB] fixture 로드: {args.fixture} tokentx 주소={len(dataset['tokentx'])}", flush=True)
+    else:
+        seeds = read_seed_file(args.synthetic_seeds) if args.synthetic_seeds else []
+        dataset = build_synthetic_dataset(seeds, args.synthetic_transfers, args.synthetic_hubs, random_seed=args.random_seed)
+        print(f"[STUB] 합성 데이터 생성: tokentx 주소={len(dataset['tokentx'])}", flush=True)
+
+    state = StubState(
+        dataset,
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms,
+        error_rate=args.error_rate,
+        notok_rate=args.notok_rate,
+        rate_limit_per_sec=args.rate_limit_per_sec,
+        record_upstream=args.record_upstream or None,
+        record_metadata_upstream=args.record_metadata_upstream or None,
+        random_seed=args.random_seed,
+    )
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(state))
+    server.daemon_threads = True
+    api_url, metadata_url = stub_urls(server)
+    print(f"[STUB] listening: ETHERSCAN_API_URL={api_url} ETHERSCAN_METADATA_API_URL={metadata_url}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"[STUB] 종료 stats={dict(state.stats)}", flush=True)
+        if args.save_fixture:
+            save_fixture(args.save_fixture, state.dataset)
+            print(f"[STUB] fixture 저장: {args.save_fixture}", flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
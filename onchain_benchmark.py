@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""온체인 파이프라인 합성 데이터 생성기 + 단계별 벤치마크.
+
+실제 API 없이 repeat_wallets.db 형식의 DB를 원하는 크기(1만~5천만 행)로 채우고,
+build_hub_scores / get_seed_outflow_details / build_flow_paths /
+scan_active_hub_outflows / collect_unknown_addresses_for_enrichment 를 규모별로 잰다.
+
+합성 그래프 구성
+- 시드 N개가 소수의 공유 허브로 보낸다 (허브 점수 대상).
+- 허브에서 중간 지갑을 거쳐 address_book.json 거래소 지갑으로 들어가는 다단계 체인 (flow 추적 대상).
+- 라우터를 낀 멀티레그 스왑 (같은 tx_hash에 토큰 out/in).
+- 나머지는 임의 상대 주소와의 잡음 전송.
+
+실행 예:
+    python onchain_benchmark.py generate --db bench.db --rows 1000000
+    python onchain_benchmark.py run --scales 10000,100000,1000000 --results bench_results.jsonl
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import time
+from typing import Dict, Iterator, List, Tuple
+
+import eth_repeat_wallet_mvp as onchain
+
+BENCH_CHAINID = "1"
+BENCH_DAYS = 30
+BENCH_RESULTS_DEFAULT = "bench_results.jsonl"
+BENCH_INSERT_BATCH = 20000
+
+BENCH_TOKENS = [
+    ("PEPE", "Pepe", "0x6982508145454ce325ddbe47a25d4ec3d2311933", 18),
+    ("LINK", "ChainLink Token", "0x514910771af9ca656af840dff83e8264ecf986ca", 18),
+    ("ARB", "Arbitrum", "0xb50721bcf8d664c30412cfbc6cf7a15145234ad1", 18),
+    ("ONDO", "Ondo", "0xfaba6f8e4a5e8ab82f62fe7c39859fa577269be3", 18),
+]
+BENCH_QUOTE_TOKENS = [
+    ("USDT", "Tether USD", "0xdac17f958d2ee523a2206206994597c13d831ec7", 6),
+    ("WETH", "Wrapped Ether", "0xc02aaa39b223fe8d0a0e5c4f27ead9083c756cc2", 18),
+]
+
+INSERT_TRANSFER_SQL = '''
+    INSERT OR IGNORE INTO transfers
+    (chainid, wallet, block_number, timestamp, tx_hash, from_addr, to_addr,
+     token_symbol, token_name, contract_address, value_raw, token_decimal, amount_scaled)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+TransferRow = Tuple[str, str, int, int, str, str, str, str, str, str, str, int, float]
+
+
+def random_hex(rng: random.Random, length: int) -> str:
+    return "%0*x" % (length, rng.getrandbits(length * 4))
+
+
+def make_row(wallet: str, block: int, ts: int, tx_hash: str, from_addr: str, to_addr: str, token: tuple, units: float) -> TransferRow:
+    symbol, name, contract, decimals = token
+    value_raw = str(int(units * 10 ** decimals))
+    return (
+        BENCH_CHAINID, wallet, block, ts, tx_hash, from_addr, to_addr,
+        symbol, name, contract, value_raw, decimals, onchain.amount_as_float(value_raw, decimals),
+    )
+
+
+def iter_synthetic_transfers(
+    target_rows: int,
+    seed_count: int,
+    hub_count: int,
+    days: int = BENCH_DAYS,
+    random_seed: int = 7,
+    now_ts: int = 0,
+) -> Iterator[TransferRow]:
+    """target_rows 근처까지 합성 전송 행을 흘려보낸다. 메모리에는 주소 목록만 유지한다."""
+    rng = random.Random(random_seed)
+    now_ts = now_ts or onchain.utc_now_ts()
+    seeds = [f"0x{random_hex(rng, 40)}" for _ in range(max(1, seed_count))]
+    hubs = [f"0x{random_hex(rng, 40)}" for _ in range(max(1, hub_count))]
+    exchanges = sorted(onchain.EXCHANGE_WALLETS) or sorted(onchain.DEFAULT_EXCHANGE_WALLETS)
+    routers = sorted(onchain.ROUTER_OR_PROTOCOL_ADDRESSES) or sorted(onchain.DEFAULT_ROUTER_OR_PROTOCOL_ADDRESSES)
+    noise_pool = [f"0x{random_hex(rng, 40)}" for _ in range(max(1000, target_rows // 50))]
+
+    emitted = 0
+    block = 19_000_000
+    while emitted < target_rows:
+        seed = rng.choice(seeds)
+        ts = now_ts - rng.randint(0, days * 86400 - 3600 * 6)
+        block += 1
+        kind = rng.random()
+
+        if kind < 0.30:
+            # 시드 -> 공유 허브 -> 중간 지갑(0~2개) -> 거래소
+            token = rng.choice(BENCH_TOKENS)
+            units = rng.uniform(1_000, 5_000_000)
+            path = [seed, rng.choice(hubs)]
+            path += [f"0x{random_hex(rng, 40)}" for _ in range(rng.randint(0, 2))]
+            path.append(rng.choice(exchanges))
+            hop_ts = ts
+            for src, dst in zip(path, path[1:]):
+                tx_hash = f"0x{random_hex(rng, 64)}"
+                yield make_row(src, block, hop_ts, tx_hash, src, dst, token, units)
+                emitted += 1
+                if dst in hubs or emitted % 2 == 0:
+                    yield make_row(dst, block, hop_ts, tx_hash, src, dst, token, units)
+                    emitted += 1
+                hop_ts += rng.randint(60, 3 * 3600)
+                block += rng.randint(1, 20)
+                units *= rng.uniform(0.9, 0.999)
+        elif kind < 0.45:
+            # 라우터를 낀 스왑: 같은 tx_hash에 토큰 out + quote in
+            tx_hash = f"0x{random_hex(rng, 64)}"
+            router = rng.choice(routers)
+            yield make_row(seed, block, ts, tx_hash, seed, router, rng.choice(BENCH_TOKENS), rng.uniform(100, 1_000_000))
+            yield make_row(seed, block, ts, tx_hash, router, seed, rng.choice(BENCH_QUOTE_TOKENS), rng.uniform(10, 50_000))
+            emitted += 2
+        else:
+            counterparty = rng.choice(noise_pool)
+            token = rng.choice(BENCH_TOKENS + BENCH_QUOTE_TOKENS)
+            tx_hash = f"0x{random_hex(rng, 64)}"
+            if rng.random() < 0.5:
+                yield make_row(seed, block, ts, tx_hash, seed, counterparty, token, rng.uniform(1, 100_000))
+            else:
+                yield make_row(seed, block, ts, tx_hash, counterparty, seed, token, rng.uniform(1, 100_000))
+            emitted += 1
+
+
+def synthetic_seed_list(seed_count: int, random_seed: int = 7) -> List[str]:
+    """iter_synthetic_transfers와 같은 난수 순서로 시드 주소만 다시 만든다."""
+    rng = random.Random(random_seed)
+    return [f"0x{random_hex(rng, 40)}" for _ in range(max(1, seed_count))]
+
+
+def remove_db(path: str) -> None:
+    """DB 파일과 WAL 모드 sidecar(-wal/-shm)를 함께 지운다."""
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def generate_db(path: str, rows: int, seed_count: int, hub_count: int, random_seed: int = 7, overwrite: bool = False) -> int:
+    """path에 새 DB를 만들고 합성 전송을 배치 insert한다. 저장된 행 수를 돌려준다.
+
+    path가 이미 있으면 overwrite=True일 때만 지우고 다시 만든다. 남은 -wal/-shm도 같이 지운다.
+    """
+    if os.path.exists(path) and not overwrite:
+        raise FileExistsError(path)
+    remove_db(path)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    onchain.ensure_db(conn)
+    cur = conn.cursor()
+
+    saved = 0
+    batch: List[TransferRow] = []
+    t0 = time.perf_counter()
+    for row in iter_synthetic_transfers(rows, seed_count, hub_count, random_seed=random_seed):
+        batch.append(row)
+        if len(batch) >= BENCH_INSERT_BATCH:
+            cur.executemany(INSERT_TRANSFER_SQL, batch)
+            conn.commit()
+            saved += len(batch)
+            batch = []
+            if saved % (BENCH_INSERT_BATCH * 50) == 0:
+                print(f"[BENCH] 생성 중 rows={saved:,} elapsed={time.perf_counter() - t0:.1f}s", flush=True)
+    if batch:
+        cur.executemany(INSERT_TRANSFER_SQL, batch)
+        conn.commit()
+        saved += len(batch)
+    saved = int(cur.execute("SELECT COUNT(*) FROM transfers").fetchone()[0])
+    conn.close()
+    print(f"[BENCH] DB 생성 완료 path={path} rows={saved:,} elapsed={time.perf_counter() - t0:.1f}s", flush=True)
+    return saved
+
+
+def timed(stages: Dict[str, dict], name: str, func, *args, **kwargs):
+    t0 = time.perf_counter()
+    result = func(*args, **kwargs)
+    elapsed = time.perf_counter() - t0
+    stages[name] = {"seconds": round(elapsed, 4), "result_rows": onchain.safe_len(result)}
+    print(f"[BENCH]   {name:<42} {elapsed:>9.3f}s rows={onchain.safe_len(result)}", flush=True)
+    return result
+
+
+def benchmark_db(path: str, seeds: List[str], active_hub_max_track: int = 200) -> dict:
+    """DB 하나에 대해 온체인 분석 단계를 실행 순서대로 잰다."""
+    conn = sqlite3.connect(path)
+    onchain.ensure_db(conn)
+    onchain.PROFILER.reset()
+    stages: Dict[str, dict] = {}
+
+    hub_rows = timed(stages, "build_hub_scores", onchain.build_hub_scores, conn, BENCH_CHAINID, BENCH_DAYS, min_shared_seed_count=2)
+    timed(stages, "get_seed_outflow_details", onchain.get_seed_outflow_details, conn, seeds, BENCH_CHAINID, BENCH_DAYS, hub_rows)
+    timed(stages, "build_flow_paths", onchain.build_flow_paths, conn, seeds, BENCH_CHAINID, BENCH_DAYS, max_hops=4, max_time_gap_hours=24)
+
+    onchain.activate_hubs_from_candidates(conn, hub_rows, BENCH_CHAINID, ttl_hours=72, min_shared=2, min_score=0)
+    active_hubs = onchain.get_active_hubs(conn, BENCH_CHAINID, active_hub_max_track)
+    timed(
+        stages,
+        "scan_active_hub_outflows",
+        onchain.scan_active_hub_outflows,
+        conn,
+        active_hubs,
+        BENCH_CHAINID,
+        BENCH_DAYS,
+        burst_window_hours=6,
+        min_outgoing_count_for_b=3,
+    )
+    timed(stages, "collect_unknown_addresses_for_enrichment", onchain.collect_unknown_addresses_for_enrichment, conn, BENCH_CHAINID, BENCH_DAYS, 25)
+
+    counters = onchain.PROFILER.report().get("counters", {})
+    conn.close()
+    return {"stages": stages, "counters": {k: v for k, v in counters.items() if k.startswith("rows_read.")}}
+
+
+def append_results(path: str, record: dict) -> None:
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False, sort_keys=True) + "\n")
+
+
+def print_summary(records: List[dict]) -> None:
+    if not records:
+        return
+    stage_names = list(records[0]["stages"].keys())
+    print("\n=== 규모별 단계 소요(초) ===")
+    print(f"{'rows':>12} | " + " | ".join(f"{name[:18]:>18}" for name in stage_names))
+    for record in records:
+        cells = " | ".join(f"{record['stages'].get(name, {}).get('seconds', 0):>18.3f}" for name in stage_names)
+        print(f"{record['rows']:>12,} | {cells}")
+
+
+def parse_scales(text: str) -> List[int]:
+    return [int(x.replace("_", "")) for x in str(text).split(",") if x.strip()]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="온체인 합성 데이터 생성 및 단계별 벤치마크")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    gen = sub.add_parser("generate", help="합성 전송으로 DB 하나를 채운다")
+    gen.add_argument("--db", default="bench_repeat_wallets.db")
+    gen.add_argument("--rows", type=int, default=100_000)
+    gen.add_argument("--force", action="store_true", help="--db가 이미 있으면 지우고 다시 만든다")
+
+    run = sub.add_parser("run", help="규모별로 DB를 만들고 단계를 잰다")
+    run.add_argument("--scales", default="10000,100000,1000000", help="쉼표 구분 행 수 (최대 50000000 권장)")
+    run.add_argument("--db-dir", default="bench_dbs")
+    run.add_argument("--results", default=BENCH_RESULTS_DEFAULT, help="결과를 한 줄씩 append할 JSONL 경로")
+    run.add_argument("--keep-dbs", action="store_true", help="측정 후 생성한 DB를 지우지 않는다")
+    run.add_argument("--active-hub-max-track", type=int, default=200)
+
+    for p in (gen, run):
+        p.add_argument("--seeds", type=int, default=50, help="합성 시드 수")
+        p.add_argument("--hubs", type=int, default=20, help="시드가 공유하는 허브 수")
+        p.add_argument("--random-seed", type=int, default=7)
+        p.add_argument("--address-book", default=onchain.ADDRESS_BOOK_PATH_DEFAULT)
+    args = parser.parse_args()
+
+    onchain.DEBUG_ONCHAIN = False
+    onchain.CONTRACT_CHECK_ENABLED = False
+    onchain.load_address_book(args.address_book)
+
+    if args.command == "generate":
+        try:
+            generate_db(args.db, args.rows, args.seeds, args.hubs, random_seed=args.random_seed, overwrite=args.force)
+        except FileExistsError:
+            print(f"[BENCH] {args.db} 이미 있음 -> 덮어쓰려면 --force", flush=True)
+            return 2
+        return 0
+
+    os.makedirs(args.db_dir, exist_ok=True)
+    seeds = synthetic_seed_list(args.seeds, random_seed=args.random_seed)
+    records: List[dict] = []
+    for scale in parse_scales(args.scales):
+        db_path = os.path.join(args.db_dir, f"bench_{scale}.db")
+        print(f"\n[BENCH] 규모 rows={scale:,} seeds={args.seeds} hubs={args.hubs}", flush=True)
+        t0 = time.perf_counter()
+        # run은 db-dir 안의 bench_<규모>.db만 만들고 지우므로 이전 실행분은 덮어쓴다.
+        saved = generate_db(db_path, scale, args.seeds, args.hubs, random_seed=args.random_seed, overwrite=True)
+        generate_sec = time.perf_counter() - t0
+        measured = benchmark_db(db_path, seeds, active_hub_max_track=args.active_hub_max_track)
+        record = {
+            "measured_at": onchain.utc_now_ts(),
+            "rows": saved,
+            "target_rows": scale,
+            "seeds": args.seeds,
+            "hubs": args.hubs,
+            "generate_seconds": round(generate_sec, 3),
+            "db_bytes": os.path.getsize(db_path),
+            **measured,
+        }
+        append_results(args.results, record)
+        records.append(record)
+        if not args.keep_dbs:
+            remove_db(db_path)
+
+    print_summary(records)
+    print(f"\n[BENCH] 결과 저장: {args.results}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
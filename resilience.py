@@ -0,0 +1,359 @@
+"""외부 API 호출용 재시도 / 재시도 예산 / 서킷 브레이커 / 중복 요청 합치기.
+
+eth_repeat_wallet_mvp(Etherscan)와 app(MEXC)이 같이 쓴다. 호출부는 요청 한 번을 함수로 넘기고,
+그 함수는 실패를 세 갈래로 나눠 올린다.
+
+- RateLimitError: 한도 응답. 잠깐 기다렸다 다시 보내고, 서킷 실패로는 세지 않는다.
+- TransientError (또는 OSError 계열 네트워크 오류): 타임아웃, 연결 오류, 5xx.
+  지터 섞인 지수 백오프로 재시도하고 서킷 실패로 센다.
+- 그 밖의 예외: 요청 자체가 틀린 것으로 보고 재시도 없이 바로 올린다.
+
+연속 실패가 쌓여 서킷이 열리면 reset_timeout 동안은 네트워크에 나가지 않고 CircuitOpenError를 바로 던진다.
+그 뒤 한 번만 시험 호출을 보내서 성공하면 닫고, 실패하면 다시 연다.
+
+SingleFlight는 같은 요청 키로 동시에 들어온 호출을 하나로 합치고, 성공 응답을 짧게 기억해 둔다.
+"""
+from __future__ import annotations
+
+import random
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class TransientError(RuntimeError):
+    """다시 보내면 성공할 수 있는 실패 (타임아웃, 연결 오류, 5xx)."""
+
+
+class RateLimitError(RuntimeError):
+    """한도 응답. retry_after가 None이면 정책의 rate_limit_delay를 쓴다."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(RuntimeError):
+    """서킷이 열려 있어 호출하지 않았다."""
+
+
+def is_transient(e: BaseException) -> bool:
+    # requests의 ConnectionError/Timeout 등은 모두 IOError(OSError)를 상속한다.
+    return isinstance(e, (TransientError, OSError, TimeoutError))
+
+
+def parse_retry_after(value) -> Optional[float]:
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def check_http_status(resp, what: str) -> None:
+    """429는 RateLimitError, 408/5xx는 TransientError, 나머지 4xx는 RuntimeError로 올린다."""
+    code = int(getattr(resp, "status_code", 200) or 200)
+    if code < 400:
+        return
+    if code == 429:
+        headers = getattr(resp, "headers", None) or {}
+        raise RateLimitError(f"{what} HTTP 429", retry_after=parse_retry_after(headers.get("Retry-After")))
+    if code == 408 or code >= 500:
+        raise TransientError(f"{what} HTTP {code}")
+    raise RuntimeError(f"{what} HTTP {code}")
+
+
+@dataclass
+class RetryPolicy:
+    attempts: int = 3  # 첫 시도 포함, 일시 오류 기준
+    base_delay: float = 0.5
+    max_delay: float = 8.0
+    rate_limit_attempts: int = 4  # 첫 시도 포함, 한도 응답 기준
+    rate_limit_delay: float = 1.0
+
+    def backoff(self, retry_no: int) -> float:
+        """full jitter: 0 ~ min(max_delay, base * 2^(n-1)) 사이에서 고른다."""
+        cap = min(self.max_delay, self.base_delay * (2 ** max(0, retry_no - 1)))
+        return random.uniform(0.0, cap)
+
+
+class RetryBudget:
+    """호출마다 ratio만큼 쌓이고 재시도마다 1씩 쓰는 예산.
+
+    장애 중에 모든 호출이 attempts배로 불어나 부하를 키우지 않게, 재시도를 전체 호출의 일정 비율로 묶는다.
+    """
+
+    def __init__(self, ratio: float = 0.2, reserve: float = 10.0, max_tokens: float = 50.0):
+        self.ratio = ratio
+        self.max_tokens = max(max_tokens, reserve)
+        self.tokens = reserve
+        self.lock = threading.Lock()
+
+    def deposit(self) -> None:
+        with self.lock:
+            self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self.lock:
+            if self.tokens >= 1.0:
+                self.tokens -= 1.0
+                return True
+            return False
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.lock = threading.Lock()
+
+    def before_call(self) -> None:
+        with self.lock:
+            if self.state == self.OPEN:
+                remaining = self.opened_at + self.reset_timeout - time.monotonic()
+                if remaining > 0:
+                    raise CircuitOpenError(f"{self.name} 서킷 열림 ({remaining:.0f}s 뒤 재시험)")
+                self.state = self.HALF_OPEN
+                self.probe_in_flight = False
+            if self.state == self.HALF_OPEN:
+                if self.probe_in_flight:
+                    raise CircuitOpenError(f"{self.name} 서킷 재시험 중")
+                self.probe_in_flight = True
+
+    def on_success(self) -> None:
+        with self.lock:
+            if self.state != self.CLOSED:
+                print(f"[CIRCUIT] {self.name} 닫힘 (재시험 성공)", flush=True)
+            self.state = self.CLOSED
+            self.failures = 0
+            self.probe_in_flight = False
+
+    def on_neutral(self) -> None:
+        """한도/요청 오류: 엔드포인트는 살아 있으므로 실패로 세지 않고 시험 호출 자리만 푼다."""
+        with self.lock:
+            self.probe_in_flight = False
+
+    def on_failure(self) -> bool:
+        """실패를 세고, 이번 실패로 서킷이 열렸으면 True."""
+        with self.lock:
+            self.failures += 1
+            self.probe_in_flight = False
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.failure_threshold):
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                print(f"[CIRCUIT] {self.name} 열림 연속 실패={self.failures} -> {self.reset_timeout:.0f}s 동안 바로 실패", flush=True)
+                return True
+            return False
+
+    @property
+    def is_open(self) -> bool:
+        """열려 있고 아직 재시험 시각 전이면 True. 루프가 남은 작업을 건너뛸지 볼 때 쓴다."""
+        return self.state == self.OPEN and time.monotonic() < self.opened_at + self.reset_timeout
+
+
+class ResilientEndpoint:
+    """엔드포인트 하나의 재시도 정책 + 예산 + 서킷. 스레드 간 공유해도 안전하다.
+
+    on_event(endpoint_name, kind)로 rate_limited / retry / gave_up / circuit_open / short_circuit 을 알린다.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        policy: Optional[RetryPolicy] = None,
+        budget: Optional[RetryBudget] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        on_event: Optional[Callable[[str, str], None]] = None,
+    ):
+        self.name = name
+        self.policy = policy or RetryPolicy()
+        self.budget = budget or RetryBudget()
+        self.breaker = breaker or CircuitBreaker(name)
+        self.on_event = on_event
+
+    def emit(self, kind: str) -> None:
+        if self.on_event is not None:
+            try:
+                self.on_event(self.name, kind)
+            except Exception:
+                pass
+
+    def call(self, fn: Callable[[], T], deadline: Optional[float] = None) -> T:
+        """fn()을 정책대로 호출한다. deadline(monotonic)을 넘길 대기는 하지 않고 마지막 오류를 올린다."""
+        self.budget.deposit()
+        failures = 0
+        rate_hits = 0
+        while True:
+            try:
+                self.breaker.before_call()
+            except CircuitOpenError:
+                self.emit("short_circuit")
+                raise
+            try:
+                result = fn()
+            except RateLimitError as e:
+                last_error: BaseException = e
+                self.breaker.on_neutral()
+                rate_hits += 1
+                self.emit("rate_limited")
+                if rate_hits >= self.policy.rate_limit_attempts:
+                    self.emit("gave_up")
+                    raise
+                delay = e.retry_after if e.retry_after is not None else self.policy.rate_limit_delay * random.uniform(0.5, 1.5)
+            except CircuitOpenError:
+                self.breaker.on_neutral()
+                raise
+            except Exception as e:
+                if not is_transient(e):
+                    self.breaker.on_neutral()
+                    raise
+                last_error = e
+                failures += 1
+                if self.breaker.on_failure():
+                    self.emit("circuit_open")
+                if failures >= self.policy.attempts or self.breaker.is_open or not self.budget.withdraw():
+                    self.emit("gave_up")
+                    raise
+                delay = self.policy.backoff(failures)
+                self.emit("retry")
+            else:
+                self.breaker.on_success()
+                return result
+            if deadline is not None and time.monotonic() + delay >= deadline:
+                self.emit("gave_up")
+                raise last_error
+            if delay > 0:
+                time.sleep(delay)
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """같은 키로 동시에 들어온 호출은 하나만 실제로 보내고 나머지는 그 결과를 기다려 나눠 받는다.
+
+    ttl > 0이면 성공 결과를 ttl초 동안 기억해 뒤따르는 같은 요청도 네트워크 없이 돌려준다(최대 max_entries개, LRU).
+    weigh(result)를 주면 기억한 결과의 무게 합도 max_weight 아래로 묶는다(예: 응답 행 수).
+    만료된 결과는 새 결과를 넣을 때 치우므로, 키가 다시 오지 않아도 ttl이 지나면 놓아준다.
+    실패는 기억하지 않는다. 돌려주는 객체는 호출자끼리 공유하므로 읽기만 해야 한다.
+    on_event(kind)로 hit / miss / coalesced 를 알린다.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 0.0,
+        max_entries: int = 1024,
+        on_event: Optional[Callable[[str], None]] = None,
+        weigh: Optional[Callable[[object], int]] = None,
+        max_weight: int = 0,
+    ):
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self.on_event = on_event
+        self.weigh = weigh
+        self.max_weight = max(0, max_weight)
+        self.lock = threading.Lock()
+        self.flights: Dict[Hashable, _Flight] = {}
+        # key -> (만료 시각, 결과, 무게)
+        self.memo: "OrderedDict[Hashable, Tuple[float, object, int]]" = OrderedDict()
+        self.memo_weight = 0
+        self.next_expiry = float("inf")
+
+    def emit(self, kind: str) -> None:
+        if self.on_event is not None:
+            try:
+                self.on_event(kind)
+            except Exception:
+                pass
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        with self.lock:
+            cached = self.memo.get(key)
+            if cached is not None:
+                if cached[0] > time.monotonic():
+                    self.memo.move_to_end(key)
+                else:
+                    self._drop(key)
+                    cached = None
+            if cached is None:
+                flight = self.flights.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self.flights[key] = _Flight()
+        if cached is not None:
+            self.emit("hit")
+            return cached[1]  # type: ignore[return-value]
+        if not leader:
+            self.emit("coalesced")
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result  # type: ignore[return-value]
+
+        self.emit("miss")
+        try:
+            flight.result = fn()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self.lock:
+                self.flights.pop(key, None)
+                if flight.error is None and self.ttl > 0:
+                    self._store(key, flight.result)
+            flight.done.set()
+
+    def _drop(self, key: Hashable) -> None:
+        entry = self.memo.pop(key, None)
+        if entry is not None:
+            self.memo_weight -= entry[2]
+
+    def _purge_expired(self, now: float) -> None:
+        if now < self.next_expiry:
+            return
+        next_expiry = float("inf")
+        for key, entry in list(self.memo.items()):
+            if entry[0] <= now:
+                self._drop(key)
+            else:
+                next_expiry = min(next_expiry, entry[0])
+        self.next_expiry = next_expiry
+
+    def _store(self, key: Hashable, result: object) -> None:
+        now = time.monotonic()
+        self._purge_expired(now)
+        self._drop(key)
+        weight = max(0, int(self.weigh(result))) if self.weigh is not None else 0
+        if self.max_weight and weight > self.max_weight:
+            return
+        expires = now + self.ttl
+        self.memo[key] = (expires, result, weight)
+        self.memo_weight += weight
+        self.next_expiry = min(self.next_expiry, expires)
+        while len(self.memo) > self.max_entries or (self.max_weight and self.memo_weight > self.max_weight):
+            self._drop(next(iter(self.memo)))
+
+    def clear(self) -> None:
+        with self.lock:
+            self.memo.clear()
+            self.memo_weight = 0
+            self.next_expiry = float("inf")
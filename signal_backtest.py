@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""기록된 kline으로 시세 후보 파이프라인을 재생하는 백테스트/벤치마크.
+
+app.py의 evaluate_candidate / calculate_selection_score / is_pullback_confirmed /
+candidate_sort_key 를 그대로 import해서 쓴다. 복사본이 아니므로 상수(PULLBACK_*,
+DOWNTREND_*, RANGE_12C_* 등)를 바꾸면 바로 이 결과에 반영된다.
+
+5분봉이 마감될 때마다 실서비스와 같은 모양의 입력(5m 50개, 15m 20개, 1h 10개,
+마지막 행은 진행 중 봉)을 과거 데이터로 만들어 넣는다. 진행 중 봉은 이미 마감된
+5분봉만으로 합성하므로 미래 데이터가 섞이지 않는다.
+
+실행 예:
+    python signal_backtest.py record --symbols BTCUSDT,ETHUSDT --days 14
+    python signal_backtest.py run --history-dir kline_history --tp-pct 1.0 --sl-pct 0.8 --horizon 24
+"""
+from __future__ import annotations
+
+import argparse
+import bisect
+import csv
+import json
+import os
+import time
+from collections.abc import Sequence
+from typing import Dict, List, Optional, Tuple
+
+os.environ.setdefault("APP_DISABLE_BACKGROUND_LOOPS", "1")
+
+import requests
+
+import app
+from candle_archive import CandleArchive
+
+HISTORY_DIR_DEFAULT = "kline_history"
+INTERVAL_MS = {"5m": 5 * 60_000, "15m": 15 * 60_000, "60m": 60 * 60_000}
+MEXC_KLINE_URL = "https://api.mexc.com/api/v3/klines"
+MEXC_KLINE_PAGE_LIMIT = 1000
+
+WINDOW_5M = 50
+WINDOW_15M = 20
+WINDOW_1H = 10
+
+
+def history_path(history_dir: str, symbol: str, interval: str) -> str:
+    return os.path.join(history_dir, f"{symbol}_{interval}.json")
+
+
+def load_history(history_dir: str, symbol: str, interval: str) -> List[list]:
+    path = history_path(history_dir, symbol, interval)
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        rows = json.load(f)
+    dedup = {int(r[0]): r for r in rows if isinstance(r, list) and len(r) >= 6}
+    return [dedup[ts] for ts in sorted(dedup)]
+
+
+def save_history(history_dir: str, symbol: str, interval: str, rows: List[list]) -> None:
+    os.makedirs(history_dir, exist_ok=True)
+    path = history_path(history_dir, symbol, interval)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(rows, f)
+    os.replace(tmp_path, path)
+
+
+def list_history_symbols(history_dir: str) -> List[str]:
+    suffix = f"_{app.SIGNAL_INTERVAL_5M}.json"
+    if not os.path.isdir(history_dir):
+        return []
+    return sorted(name[: -len(suffix)] for name in os.listdir(history_dir) if name.endswith(suffix))
+
+
+def fetch_kline_range(symbol: str, interval: str, start_ms: int, end_ms: int) -> List[list]:
+    """MEXC klines를 startTime부터 1000개씩 넘겨 가며 받는다."""
+    out: List[list] = []
+    cursor = start_ms
+    step = INTERVAL_MS[interval]
+    while cursor < end_ms:
+        params = {"symbol": symbol, "interval": interval, "startTime": cursor, "endTime": end_ms, "limit": MEXC_KLINE_PAGE_LIMIT}
+        data = requests.get(MEXC_KLINE_URL, params=params, timeout=10).json()
+        if not isinstance(data, list) or not data:
+            break
+        out.extend(data)
+        next_cursor = int(data[-1][0]) + step
+        if next_cursor <= cursor:
+            break
+        cursor = next_cursor
+        time.sleep(0.1)
+    return out
+
+
+def record_history(history_dir: str, symbols: List[str], days: int) -> None:
+    end_ms = int(time.time() * 1000)
+    start_ms = end_ms - days * 86400 * 1000
+    for idx, symbol in enumerate(symbols, start=1):
+        for interval in (app.SIGNAL_INTERVAL_5M, app.TREND_INTERVAL_15M, app.ENV_INTERVAL_1H):
+            # 지표 워밍업에 필요한 1h/15m 과거분까지 같이 받는다.
+            warmup_ms = INTERVAL_MS[interval] * (WINDOW_1H + 2 if interval == app.ENV_INTERVAL_1H else WINDOW_15M + 2)
+            try:
+                rows = fetch_kline_range(symbol, interval, start_ms - warmup_ms, end_ms)
+            except Exception as e:
+                print(f"[BACKTEST] {symbol} {interval} 기록 실패: {e}", flush=True)
+                continue
+            merged = {int(r[0]): r for r in load_history(history_dir, symbol, interval)}
+            merged.update({int(r[0]): r for r in rows})
+            save_history(history_dir, symbol, interval, [merged[ts] for ts in sorted(merged)])
+        print(f"[BACKTEST] 기록 {idx}/{len(symbols)} {symbol}", flush=True)
+
+
+def partial_row(rows_5m: List[list], start_idx: int, end_idx: int, open_ts: int) -> list:
+    """[start_idx, end_idx) 구간의 마감 5분봉으로 진행 중 봉을 합성한다."""
+    chunk = rows_5m[start_idx:end_idx]
+    if not chunk:
+        last_close = rows_5m[end_idx - 1][4]
+        return [open_ts, last_close, last_close, last_close, last_close, "0"]
+    return [
+        open_ts,
+        chunk[0][1],
+        str(max(float(r[2]) for r in chunk)),
+        str(min(float(r[3]) for r in chunk)),
+        chunk[-1][4],
+        str(sum(float(r[5]) for r in chunk)),
+    ]
+
+
+class SymbolHistory:
+    """심볼 하나의 5m/15m/1h 기록과 시점별 입력 창을 만든다.
+
+    창은 인덱스로 자르므로, 기록이 끊긴 구간(수집이 멈췄던 시간 등)을 걸친 시점은 실서비스가 본 적 없는
+    이어 붙인 봉이 된다. 그런 시점은 gap_skips로 세고 재생하지 않는다.
+    """
+
+    def __init__(self, symbol: str, rows_5m: Sequence, rows_15m: Sequence, rows_1h: Sequence):
+        self.symbol = symbol
+        self.rows_5m = rows_5m
+        self.rows_15m = rows_15m
+        self.rows_1h = rows_1h
+        self.ts_5m = [int(r[0]) for r in rows_5m]
+        self.index_5m = {ts: i for i, ts in enumerate(self.ts_5m)}
+        self.ts_15m = [int(r[0]) for r in rows_15m]
+        self.ts_1h = [int(r[0]) for r in rows_1h]
+        self.gap_skips = 0
+
+    def higher_window(self, rows: Sequence, opens: List[int], interval: str, now_ms: int, limit: int, idx_5m: int) -> Optional[List[list]]:
+        step = INTERVAL_MS[interval]
+        step_5m = INTERVAL_MS[app.SIGNAL_INTERVAL_5M]
+        current_open = now_ms - now_ms % step
+        closed = bisect.bisect_right(opens, current_open - step)
+        if closed < limit - 1:
+            return None
+        first = closed - (limit - 1)
+        first_5m = self.index_5m.get(current_open)
+        start = first_5m if first_5m is not None else idx_5m + 1
+        # 마감봉 limit-1개가 빈틈 없이 바로 앞 봉까지 이어지고, 진행 중 봉을 만들 5분봉도 다 있어야 한다.
+        if (
+            opens[closed - 1] != current_open - step
+            or opens[closed - 1] - opens[first] != (limit - 2) * step
+            or idx_5m + 1 - start != (now_ms - current_open) // step_5m
+        ):
+            return None
+        window = rows[first:closed]
+        return window + [partial_row(self.rows_5m, start, idx_5m + 1, current_open)]
+
+    def inputs_at(self, idx_5m: int) -> Optional[Tuple[list, list, list]]:
+        """idx_5m 봉이 막 마감된 시점에 실서비스가 받았을 kline 세 묶음. 기록이 끊긴 창이면 None."""
+        if idx_5m < WINDOW_5M - 2:
+            return None
+        step_5m = INTERVAL_MS[app.SIGNAL_INTERVAL_5M]
+        first = idx_5m - (WINDOW_5M - 2)
+        if self.ts_5m[idx_5m] - self.ts_5m[first] != (WINDOW_5M - 2) * step_5m:
+            self.gap_skips += 1
+            return None
+        now_ms = self.ts_5m[idx_5m] + step_5m
+        data_15m = self.higher_window(self.rows_15m, self.ts_15m, app.TREND_INTERVAL_15M, now_ms, WINDOW_15M, idx_5m)
+        data_1h = self.higher_window(self.rows_1h, self.ts_1h, app.ENV_INTERVAL_1H, now_ms, WINDOW_1H, idx_5m)
+        if data_15m is None or data_1h is None:
+            # 워밍업 부족도 None이므로, 봉 수는 충분한데 None이면 끊긴 기록이다.
+            if bisect.bisect_right(self.ts_15m, now_ms) >= WINDOW_15M and bisect.bisect_right(self.ts_1h, now_ms) >= WINDOW_1H:
+                self.gap_skips += 1
+            return None
+        data_5m = self.rows_5m[first:idx_5m + 1] + [partial_row(self.rows_5m, idx_5m + 1, idx_5m + 1, now_ms)]
+        return data_5m, data_15m, data_1h
+
+    def outcome(self, idx_5m: int, horizon: int, tp_pct: float, sl_pct: float) -> dict:
+        """신호 봉 종가로 진입했다고 보고 이후 horizon개 5분봉의 결과를 잰다."""
+        entry = float(self.rows_5m[idx_5m][4])
+        future = self.rows_5m[idx_5m + 1:idx_5m + 1 + horizon]
+        result = {"entry": entry, "bars": len(future), "max_up_pct": 0.0, "max_down_pct": 0.0, "close_ret_pct": 0.0, "outcome": "open"}
+        if not future or entry <= 0:
+            return result
+        for row in future:
+            high_pct = (float(row[2]) - entry) / entry * 100.0
+            low_pct = (float(row[3]) - entry) / entry * 100.0
+            result["max_up_pct"] = max(result["max_up_pct"], high_pct)
+            result["max_down_pct"] = min(result["max_down_pct"], low_pct)
+            if result["outcome"] == "open":
+                # 같은 봉에서 둘 다 닿으면 보수적으로 손절 처리
+                if low_pct <= -sl_pct:
+                    result["outcome"] = "stop"
+                elif high_pct >= tp_pct:
+                    result["outcome"] = "target"
+        result["close_ret_pct"] = (float(future[-1][4]) - entry) / entry * 100.0
+        if result["outcome"] == "open" and len(future) >= horizon:
+            result["outcome"] = "timeout"
+        return result
+
+
+def load_histories(history_dir: str, symbols: List[str], archive: Optional[CandleArchive] = None) -> List[SymbolHistory]:
+    """history_dir JSON 또는 캔들 아카이브(archive가 주어지면)에서 심볼별 기록을 읽는다."""
+    out = []
+    for symbol in symbols:
+        if archive is not None:
+            # 아카이브는 mmap 위에서 필요한 창만 꺼내 읽는다.
+            rows_5m, rows_15m, rows_1h = (
+                archive.series(symbol, interval).lazy_rows()
+                for interval in (app.SIGNAL_INTERVAL_5M, app.TREND_INTERVAL_15M, app.ENV_INTERVAL_1H)
+            )
+        else:
+            rows_5m = load_history(history_dir, symbol, app.SIGNAL_INTERVAL_5M)
+            rows_15m = load_history(history_dir, symbol, app.TREND_INTERVAL_15M)
+            rows_1h = load_history(history_dir, symbol, app.ENV_INTERVAL_1H)
+        if len(rows_5m) < WINDOW_5M or len(rows_15m) < 6 or len(rows_1h) < 6:
+            print(f"[BACKTEST] {symbol} 기록 부족 -> 제외", flush=True)
+            continue
+        out.append(SymbolHistory(symbol, rows_5m, rows_15m, rows_1h))
+    return out
+
+
+def run_backtest(histories: List[SymbolHistory], horizon: int, tp_pct: float, sl_pct: float, relaxed: bool = False, screen: bool = True) -> dict:
+    """모든 5분 마감 시각을 시간순으로 돌며 scan_candidates + signal_loop 선별 규칙을 재현한다.
+
+    screen=True면 마감 시각마다 전 심볼을 CandleBlock으로 묶어 screen_candle_block으로 먼저 거른다.
+    이때 candidates/pullback_wait는 스크린을 통과한 심볼 기준이고, 최종 신호는 screen=False와 같다.
+    """
+    close_times = sorted({ts for h in histories for ts in h.ts_5m})
+    cooldown_until: Dict[str, float] = {}
+    signals: List[dict] = []
+    evaluated = 0
+    screened_out = 0
+    candidate_count = 0
+    pullback_wait = 0
+    cooldown_skips = 0
+    relaxed_symbols = {h.symbol for h in histories} if relaxed else set()
+
+    t0 = time.perf_counter()
+    for candle_ts in close_times:
+        passed: List[Tuple[dict, SymbolHistory, int]] = []
+        batch: List[Tuple[SymbolHistory, int, tuple]] = []
+        for history in histories:
+            idx = history.index_5m.get(candle_ts)
+            if idx is None:
+                continue
+            inputs = history.inputs_at(idx)
+            if inputs is None:
+                continue
+            batch.append((history, idx, inputs))
+        evaluated += len(batch)
+
+        if screen and batch:
+            survivors = app.screen_candle_block(
+                app.build_candle_block({history.symbol: inputs for history, _, inputs in batch}),
+                relaxed_symbols=relaxed_symbols,
+                require_pullback=True,
+            )
+            screened_out += len(batch) - len(survivors)
+            batch = [item for item in batch if item[0].symbol in survivors]
+
+        for history, idx, inputs in batch:
+            candidate = app.evaluate_candidate(history.symbol, *inputs, ticker_map={}, relaxed=relaxed)
+            if not candidate:
+                continue
+            candidate_count += 1
+            candidate["select_score"] = app.calculate_selection_score(candidate)
+            pullback_ok, pullback_reasons = app.is_pullback_confirmed(candidate)
+            candidate["pullback_ok"] = pullback_ok
+            candidate["pullback_reasons"] = pullback_reasons
+            if app.PULLBACK_CONFIRM_ENABLED and not pullback_ok:
+                pullback_wait += 1
+                continue
+            alert_at = candle_ts / 1000.0
+            if alert_at < cooldown_until.get(history.symbol, 0.0):
+                cooldown_skips += 1
+                continue
+            passed.append((candidate, history, idx))
+
+        passed.sort(key=lambda item: app.candidate_sort_key(item[0]), reverse=True)
+        for candidate, history, idx in passed[: app.CANDIDATE_MAX_PER_ALERT]:
+            cooldown_until[history.symbol] = candle_ts / 1000.0 + app.CANDIDATE_ALERT_COOLDOWN
+            signals.append({
+                "symbol": history.symbol,
+                "candle_ts": candle_ts,
+                "select_score": candidate["select_score"],
+                "score": candidate["score"],
+                "trend_direction": candidate["trend_direction"],
+                "env_direction_1h": candidate["env_direction_1h"],
+                **history.outcome(idx, horizon, tp_pct, sl_pct),
+            })
+    elapsed = time.perf_counter() - t0
+
+    closed = [s for s in signals if s["outcome"] in {"target", "stop", "timeout"}]
+    targets = sum(1 for s in closed if s["outcome"] == "target")
+    summary = {
+        "symbols": len(histories),
+        "close_times": len(close_times),
+        "evaluated": evaluated,
+        "gap_skips": sum(h.gap_skips for h in histories),
+        "elapsed_sec": round(elapsed, 3),
+        "evaluations_per_sec": round(evaluated / elapsed, 1) if elapsed > 0 else 0.0,
+        "screened_out": screened_out,
+        "candidates": candidate_count,
+        "pullback_wait": pullback_wait,
+        "cooldown_skips": cooldown_skips,
+        "signals": len(signals),
+        "closed_signals": len(closed),
+        "hit_rate": round(targets / len(closed), 4) if closed else 0.0,
+        "stop_rate": round(sum(1 for s in closed if s["outcome"] == "stop") / len(closed), 4) if closed else 0.0,
+        "avg_close_ret_pct": round(sum(s["close_ret_pct"] for s in closed) / len(closed), 4) if closed else 0.0,
+        "avg_max_up_pct": round(sum(s["max_up_pct"] for s in closed) / len(closed), 4) if closed else 0.0,
+        "horizon": horizon,
+        "tp_pct": tp_pct,
+        "sl_pct": sl_pct,
+        "relaxed": relaxed,
+    }
+    return {"summary": summary, "signals": signals}
+
+
+def export_signals_csv(path: str, rows: List[dict]) -> None:
+    if not rows:
+        return
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="기록된 kline으로 시세 후보 파이프라인 재생")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rec = sub.add_parser("record", help="MEXC에서 5m/15m/1h kline을 받아 저장한다")
+    rec.add_argument("--symbols", default="", help="쉼표 구분. 비우면 현재 감시 종목")
+    rec.add_argument("--days", type=int, default=7)
+    rec.add_argument("--history-dir", default=HISTORY_DIR_DEFAULT)
+
+    run = sub.add_parser("run", help="저장된 kline으로 후보 파이프라인을 재생한다")
+    run.add_argument("--symbols", default="", help="쉼표 구분. 비우면 history-dir 전체")
+    run.add_argument("--history-dir", default=HISTORY_DIR_DEFAULT)
+    run.add_argument("--archive-dir", default="", help="JSON 기록 대신 캔들 아카이브(app이 채운 것)에서 읽는다")
+    run.add_argument("--horizon", type=int, default=24, help="결과를 볼 5분봉 개수")
+    run.add_argument("--tp-pct", type=float, default=1.0)
+    run.add_argument("--sl-pct", type=float, default=0.8)
+    run.add_argument("--relaxed", action="store_true", help="온체인 집중 종목 완화 조건으로 재생")
+    run.add_argument("--no-screen", action="store_true", help="블록 스크리닝 없이 심볼마다 evaluate_candidate 실행")
+    run.add_argument("--signals-csv", default="backtest_signals.csv")
+    run.add_argument("--summary-json", default="backtest_summary.json")
+    args = parser.parse_args()
+
+    symbols = [x.strip().upper() for x in args.symbols.split(",") if x.strip()]
+    if args.command == "record":
+        record_history(args.history_dir, symbols or app.get_final_symbols(), args.days)
+        return 0
+
+    archive = CandleArchive(args.archive_dir) if args.archive_dir else None
+    if archive is not None:
+        histories = load_histories(args.history_dir, symbols or archive.symbols(app.SIGNAL_INTERVAL_5M), archive=archive)
+    else:
+        histories = load_histories(args.history_dir, symbols or list_history_symbols(args.history_dir))
+    if not histories:
+        print("[BACKTEST] 재생할 기록이 없습니다.", flush=True)
+        return 1
+    result = run_backtest(histories, args.horizon, args.tp_pct, args.sl_pct, relaxed=args.relaxed, screen=not args.no_screen)
+    export_signals_csv(args.signals_csv, result["signals"])
+    with open(args.summary_json, "w", encoding="utf-8") as f:
+        json.dump(result["summary"], f, ensure_ascii=False, indent=2)
+
+    summary = result["summary"]
+    print(
+        f"[BACKTEST] symbols={summary['symbols']} evaluated={summary['evaluated']:,} "
+        f"({summary['evaluations_per_sec']:,}/s) candidates={summary['candidates']} "
+        f"signals={summary['signals']} hit_rate={summary['hit_rate']:.2%} "
+        f"avg_ret={summary['avg_close_ret_pct']:.3f}%",
+        flush=True,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
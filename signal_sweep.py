@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""시세 후보 상수 파라미터 스윕.
+
+signal_backtest.run_backtest 를 파라미터 조합마다 ProcessPoolExecutor 워커에서 돌리고,
+적중률/알림량 기준으로 정렬한 표를 저장한다.
+
+캔들 기록은 한 번만 float64 바이너리 파일로 펼쳐 두고 워커들이 mmap으로 같이 읽는다.
+작업마다 캔들을 pickle해서 넘기지 않으므로 조합 수가 많아도 전달 비용이 늘지 않는다.
+
+실행 예:
+    python signal_sweep.py --grid "CANDIDATE_MIN_SCORE=5,6,7;COMPRESSION_RATIO_MAX=0.75,0.85,1.0"
+    python signal_sweep.py --random 200 --ranges "PULLBACK_SUPPORT_BAND=0.003:0.01;RELAXED_VOLUME_ALIVE_MIN=0.3:0.8"
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import itertools
+import json
+import mmap
+import os
+import random
+import tempfile
+import time
+from array import array
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+
+os.environ.setdefault("APP_DISABLE_BACKGROUND_LOOPS", "1")
+
+import app
+import signal_backtest
+from candle_archive import CandleArchive
+
+SWEEP_RESULTS_CSV_DEFAULT = "sweep_results.csv"
+ROW_WIDTH = 6  # ts, open, high, low, close, volume
+INTERVALS = (app.SIGNAL_INTERVAL_5M, app.TREND_INTERVAL_15M, app.ENV_INTERVAL_1H)
+
+_WORKER_HISTORIES: Optional[List[signal_backtest.SymbolHistory]] = None
+_WORKER_MMAP: Optional[mmap.mmap] = None
+_WORKER_VIEW: Optional[memoryview] = None
+
+
+def pack_histories(histories: List[signal_backtest.SymbolHistory], path: str) -> Dict[str, Dict[str, Tuple[int, int]]]:
+    """기록을 float64 행으로 펼쳐 path에 쓰고 {symbol: {interval: (시작 행, 행 수)}} 색인을 돌려준다."""
+    index: Dict[str, Dict[str, Tuple[int, int]]] = {}
+    cursor = 0
+    with open(path, "wb") as f:
+        for history in histories:
+            index[history.symbol] = {}
+            for interval, rows in zip(INTERVALS, (history.rows_5m, history.rows_15m, history.rows_1h)):
+                values = array("d")
+                for row in rows:
+                    values.extend((float(row[0]), float(row[1]), float(row[2]), float(row[3]), float(row[4]), float(row[5])))
+                values.tofile(f)
+                index[history.symbol][interval] = (cursor, len(rows))
+                cursor += len(rows)
+    return index
+
+
+class PackedRows(Sequence):
+    """mmap 위의 캔들 구간. 행은 인덱싱할 때만 [ts, o, h, l, c, v] 리스트로 꺼낸다.
+
+    슬라이스는 signal_backtest가 창을 이어 붙일 수 있게 리스트로 돌려준다.
+    """
+
+    __slots__ = ("view", "start", "count")
+
+    def __init__(self, view: memoryview, start: int, count: int):
+        self.view = view
+        self.start = start
+        self.count = count
+
+    def __len__(self) -> int:
+        return self.count
+
+    def row(self, i: int) -> list:
+        base = (self.start + i) * ROW_WIDTH
+        ts, o, h, l, c, v = self.view[base:base + ROW_WIDTH]
+        return [int(ts), o, h, l, c, v]
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self.row(i) for i in range(*key.indices(self.count))]
+        if key < 0:
+            key += self.count
+        if not 0 <= key < self.count:
+            raise IndexError(key)
+        return self.row(key)
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self.row(i)
+
+
+def init_worker(path: str, index: Dict[str, Dict[str, Tuple[int, int]]]) -> None:
+    """워커마다 한 번 mmap을 열고, 행은 펼치지 않은 채 PackedRows로 SymbolHistory를 만든다."""
+    global _WORKER_HISTORIES, _WORKER_MMAP, _WORKER_VIEW
+    with open(path, "rb") as f:
+        _WORKER_MMAP = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    _WORKER_VIEW = memoryview(_WORKER_MMAP).cast("d")
+    _WORKER_HISTORIES = [
+        signal_backtest.SymbolHistory(symbol, *(PackedRows(_WORKER_VIEW, *spans[interval]) for interval in INTERVALS))
+        for symbol, spans in index.items()
+    ]
+
+
+def run_param_set(params: Dict[str, float], horizon: int, tp_pct: float, sl_pct: float, relaxed: bool) -> dict:
+    # 워커는 여러 조합을 이어서 처리하므로, 이번 조합에서 바꾼 상수는 끝나면 되돌린다.
+    saved = {name: getattr(app, name) for name in params}
+    try:
+        for name, value in params.items():
+            setattr(app, name, value)
+        result = signal_backtest.run_backtest(_WORKER_HISTORIES or [], horizon, tp_pct, sl_pct, relaxed=relaxed)
+    finally:
+        for name, value in saved.items():
+            setattr(app, name, value)
+    summary = result["summary"]
+    replay_days = summary["close_times"] * 300 / 86400 if summary["close_times"] else 0.0
+    return {
+        **params,
+        "signals": summary["signals"],
+        "alerts_per_day": round(summary["signals"] / replay_days, 2) if replay_days > 0 else 0.0,
+        "hit_rate": summary["hit_rate"],
+        "stop_rate": summary["stop_rate"],
+        "avg_close_ret_pct": summary["avg_close_ret_pct"],
+        "avg_max_up_pct": summary["avg_max_up_pct"],
+        "candidates": summary["candidates"],
+        "elapsed_sec": summary["elapsed_sec"],
+    }
+
+
+def coerce_like(name: str, text: str):
+    current = getattr(app, name)
+    if isinstance(current, bool) or not isinstance(current, (int, float)):
+        raise ValueError(f"숫자 상수가 아닙니다: {name}")
+    return int(text) if isinstance(current, int) else float(text)
+
+
+def parse_grid(text: str) -> List[Dict[str, float]]:
+    axes: List[Tuple[str, List[float]]] = []
+    for part in str(text or "").split(";"):
+        if not part.strip():
+            continue
+        name, values = part.split("=", 1)
+        name = name.strip()
+        axes.append((name, [coerce_like(name, x.strip()) for x in values.split(",") if x.strip()]))
+    if not axes:
+        return [{}]
+    return [dict(zip([a[0] for a in axes], combo)) for combo in itertools.product(*[a[1] for a in axes])]
+
+
+def sample_random(text: str, count: int, rng: random.Random) -> List[Dict[str, float]]:
+    ranges: List[Tuple[str, float, float]] = []
+    for part in str(text or "").split(";"):
+        if not part.strip():
+            continue
+        name, bounds = part.split("=", 1)
+        lo, hi = bounds.split(":", 1)
+        ranges.append((name.strip(), float(lo), float(hi)))
+    out = []
+    for _ in range(count):
+        params = {}
+        for name, lo, hi in ranges:
+            if isinstance(getattr(app, name), int):
+                params[name] = rng.randint(int(lo), int(hi))
+            else:
+                params[name] = round(rng.uniform(lo, hi), 4)
+        out.append(params)
+    return out
+
+
+def rank_results(rows: List[dict], min_signals: int) -> List[dict]:
+    return sorted(
+        rows,
+        key=lambda r: (r["signals"] >= min_signals, r["hit_rate"], r["avg_close_ret_pct"], -r["alerts_per_day"]),
+        reverse=True,
+    )
+
+
+def export_results_csv(path: str, rows: List[dict]) -> None:
+    if not rows:
+        return
+    fieldnames: List[str] = []
+    for row in rows:
+        fieldnames.extend(k for k in row if k not in fieldnames)
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.DictWriter(f, fieldnames=["rank"] + fieldnames)
+        writer.writeheader()
+        for rank, row in enumerate(rows, start=1):
+            writer.writerow({"rank": rank, **row})
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="시세 후보 상수 파라미터 스윕 (프로세스 풀)")
+    parser.add_argument("--history-dir", default=signal_backtest.HISTORY_DIR_DEFAULT)
+    parser.add_argument("--archive-dir", default="", help="JSON 기록 대신 캔들 아카이브에서 읽는다")
+    parser.add_argument("--symbols", default="", help="쉼표 구분. 비우면 history-dir 전체")
+    parser.add_argument("--grid", default="", help='"NAME=v1,v2;NAME2=v1,v2" 형식의 격자')
+    parser.add_argument("--random", type=int, default=0, help="무작위 조합 개수 (--ranges 필요)")
+    parser.add_argument("--ranges", default="", help='"NAME=lo:hi;NAME2=lo:hi" 형식의 무작위 범위')
+    parser.add_argument("--random-seed", type=int, default=7)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--horizon", type=int, default=24)
+    parser.add_argument("--tp-pct", type=float, default=1.0)
+    parser.add_argument("--sl-pct", type=float, default=0.8)
+    parser.add_argument("--relaxed", action="store_true")
+    parser.add_argument("--min-signals", type=int, default=10, help="이보다 신호가 적은 조합은 순위 뒤로")
+    parser.add_argument("--results-csv", default=SWEEP_RESULTS_CSV_DEFAULT)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    param_sets = parse_grid(args.grid)
+    if args.random > 0:
+        random_sets = sample_random(args.ranges, args.random, random.Random(args.random_seed))
+        param_sets = [dict(base, **extra) for base in param_sets for extra in random_sets]
+
+    symbols = [x.strip().upper() for x in args.symbols.split(",") if x.strip()]
+    archive = CandleArchive(args.archive_dir) if args.archive_dir else None
+    if archive is not None:
+        histories = signal_backtest.load_histories(args.history_dir, symbols or archive.symbols(app.SIGNAL_INTERVAL_5M), archive=archive)
+    else:
+        histories = signal_backtest.load_histories(args.history_dir, symbols or signal_backtest.list_history_symbols(args.history_dir))
+    if not histories:
+        print("[SWEEP] 재생할 기록이 없습니다.", flush=True)
+        return 1
+
+    fd, packed_path = tempfile.mkstemp(prefix="sweep_candles_", suffix=".f64")
+    os.close(fd)
+    try:
+        index = pack_histories(histories, packed_path)
+        del histories
+        print(f"[SWEEP] 조합 {len(param_sets)}개 | 워커 {args.workers} | 캔들 파일 {os.path.getsize(packed_path):,} bytes", flush=True)
+
+        results: List[dict] = []
+        t0 = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=max(1, args.workers), initializer=init_worker, initargs=(packed_path, index)) as pool:
+            futures = {pool.submit(run_param_set, params, args.horizon, args.tp_pct, args.sl_pct, args.relaxed): params for params in param_sets}
+            for done, future in enumerate(as_completed(futures), start=1):
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    print(f"[SWEEP] 조합 실패 {futures[future]}: {e}", flush=True)
+                if done % max(1, len(futures) // 20) == 0:
+                    print(f"[SWEEP] 진행 {done}/{len(futures)} elapsed={time.perf_counter() - t0:.1f}s", flush=True)
+    finally:
+        os.remove(packed_path)
+
+    ranked = rank_results(results, args.min_signals)
+    export_results_csv(args.results_csv, ranked)
+    print(f"\n=== 상위 {args.top} 조합 (적중률 순) ===")
+    for rank, row in enumerate(ranked[: args.top], start=1):
+        params = {k: row[k] for k in row if k in param_sets[0]}
+        print(
+            f"{rank:>3}. hit={row['hit_rate']:.2%} stop={row['stop_rate']:.2%} signals={row['signals']} "
+            f"alerts/day={row['alerts_per_day']} ret={row['avg_close_ret_pct']:.3f}% | {json.dumps(params, ensure_ascii=False)}"
+        )
+    print(f"\n[SWEEP] 결과 저장: {args.results_csv}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# app을 import해도 백그라운드 루프나 캔들 아카이브가 뜨지 않게 한다.
+os.environ.setdefault("APP_DISABLE_BACKGROUND_LOOPS", "1")
+os.environ.setdefault("CANDLE_ARCHIVE_DIR", "")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
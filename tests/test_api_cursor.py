@@ -0,0 +1,43 @@
+"""/api/onchain 커서는 sqlite가 받는 스칼라만 통과시켜야 한다."""
+import base64
+import json
+import unittest
+from unittest import mock
+
+import app
+
+
+class Aborted(Exception):
+    pass
+
+
+def raw_cursor(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip("=")
+
+
+class ApiCursorTest(unittest.TestCase):
+    def setUp(self):
+        def abort(code):
+            raise Aborted(code)
+
+        patcher = mock.patch.object(app, "abort", abort)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_round_trip(self):
+        for value in (1700000000, 12.5, "0xabc", None):
+            with self.subTest(value=value):
+                self.assertEqual(app.decode_api_cursor(app.encode_api_cursor(value, 42)), (value, 42))
+
+    def test_rejects_non_scalar_sort_values(self):
+        for payload in ([[1], 5], [{}, 5], [True, 5], [1, [5]], [1], "x", {"a": 1}):
+            with self.subTest(payload=payload):
+                with self.assertRaises(Aborted) as ctx:
+                    app.decode_api_cursor(raw_cursor(payload))
+                self.assertEqual(ctx.exception.args, (400,))
+        with self.assertRaises(Aborted):
+            app.decode_api_cursor("!!not-base64!!")
+
+
+if __name__ == "__main__":
+    unittest.main()
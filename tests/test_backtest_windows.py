@@ -0,0 +1,94 @@
+"""백테스트 재생 창은 끊긴 기록을 이어 붙이지 않아야 하고, 아카이브 행은 복사 없이 읽어도 같아야 한다."""
+import random
+import tempfile
+import unittest
+
+import signal_backtest as sb
+from candle_archive import CandleArchive
+
+START_MS = 1_699_999_200_000  # 정시(1h 경계)
+
+
+def klines(rng: random.Random, count: int, step_ms: int) -> list:
+    rows = []
+    price = 100.0
+    for i in range(count):
+        o = price
+        c = o * (1 + rng.gauss(0.0, 0.002))
+        rows.append([START_MS + i * step_ms, o, max(o, c) * 1.001, min(o, c) * 0.999, c, rng.uniform(50, 150)])
+        price = c
+    return rows
+
+
+class ReplayWindowTest(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(7)
+        self.rows = (klines(rng, 720, 300_000), klines(rng, 240, 900_000), klines(rng, 60, 3_600_000))
+
+    def ready(self, history: sb.SymbolHistory) -> dict:
+        return {history.ts_5m[i]: history.inputs_at(i) is not None for i in range(len(history.ts_5m))}
+
+    def test_contiguous_history_has_no_gap_skips(self):
+        history = sb.SymbolHistory("AUSDT", *self.rows)
+        ready = self.ready(history)
+        self.assertTrue(any(ready.values()))
+        self.assertEqual(history.gap_skips, 0)
+        data_5m, data_15m, data_1h = history.inputs_at(len(history.ts_5m) - 1)
+        self.assertEqual((len(data_5m), len(data_15m), len(data_1h)), (sb.WINDOW_5M, sb.WINDOW_15M, sb.WINDOW_1H))
+
+    def test_windows_across_missing_bars_are_skipped(self):
+        full = self.ready(sb.SymbolHistory("AUSDT", *self.rows))
+        gap_start, gap_len = 400, 6
+        rows_5m = self.rows[0][:gap_start] + self.rows[0][gap_start + gap_len:]
+        history = sb.SymbolHistory("AUSDT", rows_5m, self.rows[1], self.rows[2])
+        ready = self.ready(history)
+        gap_ms = self.rows[0][gap_start][0]
+        gap_end_ms = self.rows[0][gap_start + gap_len][0]
+        span_ms = (sb.WINDOW_5M - 2) * 300_000
+        for ts, ok in ready.items():
+            with self.subTest(ts=ts):
+                if ts < gap_ms:
+                    self.assertEqual(ok, full[ts])
+                elif ts < gap_end_ms + span_ms:
+                    # 5분봉 창이 빠진 봉을 걸친다.
+                    self.assertFalse(ok)
+                elif ts >= gap_end_ms + span_ms + 3_600_000:
+                    # 진행 중 1h 봉까지 빈틈을 벗어나면 원래대로 돌아온다.
+                    self.assertEqual(ok, full[ts])
+        self.assertGreater(history.gap_skips, 0)
+
+    def test_missing_higher_interval_bar_is_skipped(self):
+        rows_15m = self.rows[1][:200] + self.rows[1][201:]
+        history = sb.SymbolHistory("AUSDT", self.rows[0], rows_15m, self.rows[2])
+        missing_ms = self.rows[1][200][0]
+        idx = history.index_5m[missing_ms + 900_000]
+        self.assertIsNone(history.inputs_at(idx))
+        self.assertEqual(history.gap_skips, 1)
+        later = history.index_5m[missing_ms + (sb.WINDOW_15M + 1) * 900_000]
+        self.assertIsNotNone(history.inputs_at(later))
+
+
+class CandleRowsTest(unittest.TestCase):
+    def test_lazy_rows_match_rows(self):
+        rows = klines(random.Random(3), 300, 300_000)
+        with tempfile.TemporaryDirectory() as root:
+            archive = CandleArchive(root)
+            archive.append_rows("AUSDT", "5m", rows)
+            series = archive.series("AUSDT", "5m")
+            copied = series.rows()
+            lazy = series.lazy_rows()
+            self.assertEqual(len(lazy), len(copied))
+            self.assertEqual(list(lazy), copied)
+            self.assertEqual(lazy[-1], copied[-1])
+            self.assertEqual(lazy[10:60], copied[10:60])
+            self.assertEqual(lazy[10:60] + [lazy[0]], copied[10:60] + [copied[0]])
+            with self.assertRaises(IndexError):
+                lazy[len(copied)]
+            part = series.lazy_rows(rows[100][0], rows[199][0])
+            self.assertEqual(list(part), series.rows(rows[100][0], rows[199][0]))
+            del lazy, part
+            archive.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+"""screen_candle_block은 evaluate_candidate가 받아들일 심볼을 절대 떨어뜨리면 안 된다."""
+import random
+import unittest
+from unittest import mock
+
+import app
+
+END_MS = 1_700_000_000_000
+
+
+def synthetic_klines(rng: random.Random, count: int, step_ms: int, vol: float, base: float = 100.0) -> list:
+    rows = []
+    price = base
+    start = END_MS - count * step_ms
+    for i in range(count):
+        o = price
+        c = o * (1 + rng.gauss(0.0, vol))
+        h = max(o, c) * (1 + abs(rng.gauss(0.0, vol / 2)))
+        l = min(o, c) * (1 - abs(rng.gauss(0.0, vol / 2)))
+        rows.append([start + i * step_ms, f"{o:.6f}", f"{h:.6f}", f"{l:.6f}", f"{c:.6f}", f"{rng.uniform(50, 150):.3f}"])
+        price = c
+    return rows
+
+
+def synthetic_universe(seed: int, symbols: int) -> dict:
+    rng = random.Random(seed)
+    universe = {}
+    for i in range(symbols):
+        vol = rng.choice((0.0008, 0.0015, 0.003, 0.006))
+        universe[f"S{i}USDT"] = (
+            synthetic_klines(rng, 40, 300_000, vol),
+            synthetic_klines(rng, 20, 900_000, vol * 2),
+            synthetic_klines(rng, 10, 3_600_000, vol * 3),
+        )
+    # 파싱 불가/길이 부족 심볼은 fallback으로 살아남아 기존 경로가 판정해야 한다.
+    universe["BROKENUSDT"] = ([["x"] * 6] * 40, universe["S0USDT"][1], universe["S0USDT"][2])
+    universe["SHORTUSDT"] = (universe["S1USDT"][0][:10], universe["S1USDT"][1], universe["S1USDT"][2])
+    return universe
+
+
+class ScreenCandleBlockTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.universe = synthetic_universe(seed=3, symbols=800)
+
+    def accepted(self, relaxed: bool, require_pullback: bool) -> set:
+        out = set()
+        for symbol, (data_5m, data_15m, data_1h) in self.universe.items():
+            candidate = app.evaluate_candidate(symbol, data_5m, data_15m, data_1h, ticker_map={}, relaxed=relaxed)
+            if not candidate:
+                continue
+            if require_pullback and app.PULLBACK_CONFIRM_ENABLED and not app.is_pullback_confirmed(candidate)[0]:
+                continue
+            out.add(symbol)
+        return out
+
+    def survivors(self, relaxed: bool, require_pullback: bool) -> set:
+        block = app.build_candle_block(self.universe)
+        return app.screen_candle_block(block, relaxed_symbols=set(self.universe) if relaxed else set(), require_pullback=require_pullback)
+
+    def assert_screen_keeps_accepted(self, relaxed: bool, require_pullback: bool) -> None:
+        accepted = self.accepted(relaxed, require_pullback)
+        self.assertTrue(accepted, "합성 데이터에서 통과 후보가 하나도 없으면 검사가 의미 없다")
+        self.assertEqual(set(), accepted - self.survivors(relaxed, require_pullback))
+
+    def test_candidates_survive_screen(self):
+        self.assert_screen_keeps_accepted(relaxed=False, require_pullback=False)
+
+    def test_relaxed_candidates_survive_screen(self):
+        self.assert_screen_keeps_accepted(relaxed=True, require_pullback=False)
+
+    def test_pullback_confirmed_candidates_survive_screen(self):
+        self.assert_screen_keeps_accepted(relaxed=False, require_pullback=True)
+        self.assert_screen_keeps_accepted(relaxed=True, require_pullback=True)
+
+    def test_fallback_symbols_always_survive(self):
+        survivors = self.survivors(relaxed=False, require_pullback=True)
+        self.assertIn("BROKENUSDT", survivors)
+        self.assertIn("SHORTUSDT", survivors)
+
+    def test_swept_constants_apply_to_both_paths(self):
+        # signal_sweep가 setattr로 바꾸는 상수를 두 경로가 같이 읽는지 본다.
+        with mock.patch.object(app, "MAX_LAST2_MOVE", 0.3), mock.patch.object(app, "CANDIDATE_MIN_SCORE", 8), mock.patch.object(app, "VOLUME_ALIVE_MIN", 0.6):
+            self.assert_screen_keeps_accepted(relaxed=False, require_pullback=False)
+
+
+if __name__ == "__main__":
+    unittest.main()
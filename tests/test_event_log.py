@@ -0,0 +1,115 @@
+"""CsvEventLog 회전과 path.seen 키 파일."""
+import csv
+import os
+import shutil
+import tempfile
+import unittest
+
+from eth_repeat_wallet_mvp import CsvEventLog
+
+KEY_FIELDS = ("seed", "tx_hash")
+
+
+def rows(start: int, count: int) -> list:
+    return [{"seed": f"0xSEED{i % 3}", "tx_hash": f"0x{i:064x}", "amount": str(i)} for i in range(start, start + count)]
+
+
+def read_rows(path: str) -> list:
+    with open(path, "r", newline="", encoding="utf-8-sig") as f:
+        return list(csv.DictReader(f))
+
+
+def make_stale(seen_path: str, log_path: str) -> None:
+    st = os.stat(log_path)
+    os.utime(seen_path, ns=(st.st_atime_ns, st.st_mtime_ns - 10_000_000_000))
+
+
+class CsvEventLogTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp(prefix="event_log_test_")
+        self.addCleanup(shutil.rmtree, self.dir, True)
+        self.path = os.path.join(self.dir, "flow_events.csv")
+
+    def test_appends_only_unseen_rows(self):
+        log = CsvEventLog(self.path, KEY_FIELDS, max_bytes=0)
+        self.assertEqual(log.append(rows(0, 5)), 5)
+        self.assertEqual(log.append(rows(3, 5)), 3)
+        written = read_rows(self.path)
+        self.assertEqual([r["amount"] for r in written], [str(i) for i in range(8)])
+        # 키는 대소문자를 무시한다.
+        upper = [dict(r, tx_hash=r["tx_hash"].upper()) for r in rows(0, 2)]
+        self.assertEqual(log.append(upper), 0)
+
+    def test_rotates_and_caps_backups(self):
+        log = CsvEventLog(self.path, KEY_FIELDS, max_bytes=300, backups=2)
+        for batch in range(6):
+            log.append(rows(batch * 4, 4))
+        self.assertTrue(os.path.exists(self.path))
+        self.assertTrue(os.path.exists(f"{self.path}.1"))
+        self.assertTrue(os.path.exists(f"{self.path}.2"))
+        self.assertFalse(os.path.exists(f"{self.path}.3"))
+        for path in (self.path, f"{self.path}.1", f"{self.path}.2"):
+            with open(path, "r", encoding="utf-8-sig") as f:
+                self.assertEqual(f.readline().strip(), "seed,tx_hash,amount")
+        # 가장 최근 행은 현재 파일에, 그 앞 행은 .1에 있다.
+        self.assertEqual(read_rows(self.path)[-1]["amount"], "23")
+        newest_backup = [int(r["amount"]) for r in read_rows(f"{self.path}.1")]
+        self.assertLess(max(newest_backup), int(read_rows(self.path)[0]["amount"]))
+
+    def test_zero_backups_drops_full_log(self):
+        log = CsvEventLog(self.path, KEY_FIELDS, max_bytes=100, backups=0)
+        log.append(rows(0, 4))
+        log.append(rows(4, 1))
+        self.assertFalse(os.path.exists(f"{self.path}.1"))
+        self.assertEqual([r["amount"] for r in read_rows(self.path)], ["4"])
+        # 지운 로그의 키도 기억하고 있어 다시 붙이지 않는다.
+        self.assertEqual(log.append(rows(0, 4)), 0)
+
+    def test_restart_loads_seen_file(self):
+        log = CsvEventLog(self.path, KEY_FIELDS, max_bytes=0)
+        log.append(rows(0, 6))
+        self.assertTrue(os.path.exists(log.seen_path))
+
+        # 키 파일이 최신이면 로그는 다시 읽지 않는다.
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("0xSEED9,0xnot-in-seen-file,0\n")
+        make_stale(self.path, log.seen_path)
+        reopened = CsvEventLog(self.path, KEY_FIELDS, max_bytes=0)
+        self.assertEqual(list(reopened.seen), list(log.seen))
+        self.assertEqual(reopened.append(rows(4, 4)), 2)
+
+    def test_stale_seen_file_rescans_logs_and_backups(self):
+        log = CsvEventLog(self.path, KEY_FIELDS, max_bytes=300, backups=3)
+        for batch in range(4):
+            log.append(rows(batch * 4, 4))
+        self.assertTrue(os.path.exists(f"{self.path}.1"))
+        # 키를 남기기 전에 죽은 경우: 키 파일이 없거나 로그보다 오래됐다.
+        os.remove(log.seen_path)
+        rescanned = CsvEventLog(self.path, KEY_FIELDS, max_bytes=300, backups=3)
+        self.assertEqual(set(rescanned.seen), set(log.seen))
+        self.assertTrue(os.path.exists(rescanned.seen_path))
+        self.assertEqual(rescanned.append(rows(0, 16)), 0)
+
+        with open(rescanned.seen_path, "w", encoding="utf-8") as f:
+            f.write("only|one\n")
+        make_stale(rescanned.seen_path, self.path)
+        again = CsvEventLog(self.path, KEY_FIELDS, max_bytes=300, backups=3)
+        self.assertEqual(set(again.seen), set(log.seen))
+
+    def test_seen_keys_are_bounded_and_compacted(self):
+        log = CsvEventLog(self.path, KEY_FIELDS, max_bytes=0, seen_max=5)
+        for batch in range(4):
+            log.append(rows(batch * 3, 3))
+        self.assertEqual(len(log.seen), 5)
+        self.assertEqual(list(log.seen), [log.row_key(r) for r in rows(7, 5)])
+        with open(log.seen_path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        self.assertLessEqual(len(lines), 2 * 5)
+        self.assertEqual(lines[-5:], list(log.seen))
+
+        reopened = CsvEventLog(self.path, KEY_FIELDS, max_bytes=0, seen_max=5)
+        self.assertEqual(list(reopened.seen), list(log.seen))
+
+
+if __name__ == "__main__":
+    unittest.main()
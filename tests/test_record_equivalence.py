@@ -0,0 +1,113 @@
+"""SlotRecord 결과 행이 dict 행 시절과 같은 값/필드 순서를 내는지 본다.
+
+data/record_equivalence.json은 SlotRecord로 바꾸기 전(dict 행) 구현에 같은 합성 DB를 넣어 뽑은 결과다.
+합성 DB는 onchain_benchmark 생성기로 now_ts와 주소록을 고정해 만들므로 실행 시각과 무관하다.
+"""
+import csv
+import io
+import json
+import os
+import sqlite3
+import unittest
+from unittest import mock
+
+import eth_repeat_wallet_mvp as onchain
+import onchain_benchmark as bench
+
+FIXTURE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "record_equivalence.json")
+
+
+def load_fixture() -> dict:
+    with open(FIXTURE_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def as_json_rows(rows) -> list:
+    return [json.loads(json.dumps(row, default=onchain.record_json_default, ensure_ascii=False)) for row in rows]
+
+
+class RecordEquivalenceTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.fixture = load_fixture()
+        now_ts = int(cls.fixture["now_ts"])
+        patches = [
+            mock.patch.object(onchain, "utc_now_ts", lambda: now_ts),
+            mock.patch.object(onchain, "touch_active_hub_checked", lambda *a, **k: None),
+            mock.patch.object(onchain, "EXCHANGE_WALLETS", onchain.EXCHANGE_WALLETS),
+            mock.patch.object(onchain, "ROUTER_OR_PROTOCOL_ADDRESSES", onchain.ROUTER_OR_PROTOCOL_ADDRESSES),
+            mock.patch.object(onchain, "IGNORE_ADDRESSES", onchain.IGNORE_ADDRESSES),
+        ]
+        for p in patches:
+            p.start()
+            cls.addClassCleanup(p.stop)
+        onchain.apply_address_book(cls.fixture["address_book"])
+
+        conn = sqlite3.connect(":memory:")
+        cls.addClassCleanup(conn.close)
+        onchain.ensure_db(conn)
+        transfers = bench.iter_synthetic_transfers(
+            int(cls.fixture["rows"]), int(cls.fixture["seeds"]), int(cls.fixture["hubs"]), now_ts=now_ts
+        )
+        conn.executemany(bench.INSERT_TRANSFER_SQL, list(transfers))
+        seeds = bench.synthetic_seed_list(int(cls.fixture["seeds"]))
+        addrs = [
+            r[0]
+            for r in conn.execute("SELECT to_addr, COUNT(*) c FROM transfers GROUP BY to_addr ORDER BY c DESC, to_addr LIMIT 10")
+        ]
+        hubs = [
+            {"address": a, "score": 50 - i, "shared_seed_count": 3, "total_interactions": 10 + i, "exchange_hits": "",
+             "label": "-", "source_seeds": "x", "token_symbols": "-", "target_kind": "unknown"}
+            for i, a in enumerate(addrs)
+        ]
+        active_hubs = [
+            {"address": h["address"], "shared_seed_count": 3, "score": h["score"], "source_seeds": "x", "last_outgoing_at": 0}
+            for h in hubs
+        ]
+        cls.results = {
+            "outflow": onchain.get_seed_outflow_details(conn, seeds, bench.BENCH_CHAINID, bench.BENCH_DAYS, hubs),
+            "flow": onchain.build_flow_paths(conn, seeds, bench.BENCH_CHAINID, bench.BENCH_DAYS, max_hops=4, max_time_gap_hours=24),
+            "active": onchain.scan_active_hub_outflows(
+                conn, active_hubs, bench.BENCH_CHAINID, bench.BENCH_DAYS, burst_window_hours=6, min_outgoing_count_for_b=3
+            ),
+        }
+
+    def expected_rows(self, kind: str) -> list:
+        section = self.fixture[kind]
+        return [dict(zip(section["fields"], values)) for values in section["rows"]]
+
+    def test_rows_match_dict_implementation(self):
+        for kind in ("outflow", "flow", "active"):
+            with self.subTest(kind=kind):
+                expected = self.expected_rows(kind)
+                self.assertTrue(expected)
+                actual = as_json_rows(self.results[kind])
+                self.assertEqual(len(actual), len(expected))
+                for i, (got, want) in enumerate(zip(actual, expected)):
+                    self.assertEqual(list(got), list(want), f"{kind}[{i}] 필드 순서")
+                    self.assertEqual(got, want, f"{kind}[{i}]")
+
+    def test_records_behave_like_dicts_for_csv(self):
+        for kind in ("outflow", "flow"):
+            with self.subTest(kind=kind):
+                records = self.results[kind]
+                expected = self.expected_rows(kind)
+                self.assertIsInstance(records[0], onchain.SlotRecord)
+                self.assertEqual(list(records[0].keys()), list(expected[0]))
+                self.assertEqual(records[0]["seed"], records[0].get("seed"))
+                self.assertIsNone(records[0].get("no_such_field"))
+                with self.assertRaises(KeyError):
+                    records[0]["no_such_field"]
+
+                def write(rows) -> str:
+                    buf = io.StringIO()
+                    writer = csv.DictWriter(buf, fieldnames=list(expected[0]), extrasaction="ignore")
+                    writer.writeheader()
+                    writer.writerows(rows)
+                    return buf.getvalue()
+
+                self.assertEqual(write(records), write(expected))
+
+
+if __name__ == "__main__":
+    unittest.main()
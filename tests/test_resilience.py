@@ -0,0 +1,220 @@
+"""resilience의 서킷 브레이커 / 재시도 엔드포인트 동작."""
+import unittest
+from unittest import mock
+
+import resilience
+from resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RateLimitError,
+    ResilientEndpoint,
+    RetryBudget,
+    RetryPolicy,
+    TransientError,
+    check_http_status,
+)
+
+
+class FakeClock:
+    """resilience.time 대신 끼우는 시계. sleep은 기다리지 않고 시각만 넘긴다."""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+        self.slept = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class ClockTestCase(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch.object(resilience, "time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class CheckHttpStatusTest(unittest.TestCase):
+    def test_maps_status_codes(self):
+        check_http_status(FakeResponse(200), "x")
+        with self.assertRaises(RateLimitError) as ctx:
+            check_http_status(FakeResponse(429, {"Retry-After": "3"}), "x")
+        self.assertEqual(ctx.exception.retry_after, 3.0)
+        with self.assertRaises(RateLimitError) as ctx:
+            check_http_status(FakeResponse(429, {"Retry-After": "soon"}), "x")
+        self.assertIsNone(ctx.exception.retry_after)
+        for code in (408, 500, 503):
+            with self.assertRaises(TransientError):
+                check_http_status(FakeResponse(code), "x")
+        with self.assertRaises(RuntimeError) as ctx:
+            check_http_status(FakeResponse(404), "x")
+        self.assertNotIsInstance(ctx.exception, (TransientError, RateLimitError))
+
+
+class CircuitBreakerTest(ClockTestCase):
+    def test_opens_after_threshold_and_short_circuits(self):
+        breaker = CircuitBreaker("t", failure_threshold=3, reset_timeout=30.0)
+        self.assertFalse(breaker.on_failure())
+        self.assertFalse(breaker.on_failure())
+        self.assertTrue(breaker.on_failure())
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertTrue(breaker.is_open)
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+
+    def test_success_resets_failure_count(self):
+        breaker = CircuitBreaker("t", failure_threshold=2)
+        breaker.on_failure()
+        breaker.on_success()
+        self.assertFalse(breaker.on_failure())
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_half_open_allows_one_probe(self):
+        breaker = CircuitBreaker("t", failure_threshold=1, reset_timeout=30.0)
+        breaker.on_failure()
+        self.clock.now += 30.0
+        self.assertFalse(breaker.is_open)
+        breaker.before_call()
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+        breaker.on_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        breaker.before_call()
+
+    def test_failed_probe_reopens(self):
+        breaker = CircuitBreaker("t", failure_threshold=5, reset_timeout=10.0)
+        for _ in range(5):
+            breaker.on_failure()
+        self.clock.now += 10.0
+        breaker.before_call()
+        self.assertTrue(breaker.on_failure())
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+
+    def test_neutral_result_frees_probe_without_counting(self):
+        breaker = CircuitBreaker("t", failure_threshold=1, reset_timeout=10.0)
+        breaker.on_failure()
+        self.clock.now += 10.0
+        breaker.before_call()
+        breaker.on_neutral()
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        breaker.before_call()
+
+
+class ResilientEndpointTest(ClockTestCase):
+    def make_endpoint(self, **policy):
+        self.events = []
+        params = dict(attempts=3, base_delay=0.5, max_delay=8.0, rate_limit_attempts=3, rate_limit_delay=1.0)
+        params.update(policy)
+        return ResilientEndpoint(
+            "ep",
+            policy=RetryPolicy(**params),
+            budget=RetryBudget(ratio=0.2, reserve=10.0),
+            breaker=CircuitBreaker("ep", failure_threshold=5, reset_timeout=30.0),
+            on_event=lambda name, kind: self.events.append(kind),
+        )
+
+    @staticmethod
+    def script(*outcomes):
+        """outcomes를 차례로 던지거나 돌려주는 fn과 호출 횟수 목록."""
+        calls = []
+
+        def fn():
+            outcome = outcomes[len(calls)]
+            calls.append(outcome)
+            if isinstance(outcome, BaseException):
+                raise outcome
+            return outcome
+
+        return fn, calls
+
+    def test_retries_transient_errors_then_succeeds(self):
+        endpoint = self.make_endpoint()
+        fn, calls = self.script(TransientError("5xx"), ConnectionError("reset"), "ok")
+        self.assertEqual(endpoint.call(fn), "ok")
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(self.events, ["retry", "retry"])
+        self.assertEqual(endpoint.breaker.failures, 0)
+        self.assertEqual(len(self.clock.slept), 2)
+        self.assertTrue(all(0.0 <= s <= 1.0 for s in self.clock.slept))
+
+    def test_gives_up_after_attempts(self):
+        endpoint = self.make_endpoint()
+        fn, calls = self.script(*[TransientError("down")] * 5)
+        with self.assertRaises(TransientError):
+            endpoint.call(fn)
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(self.events[-1], "gave_up")
+        self.assertEqual(endpoint.breaker.failures, 3)
+
+    def test_request_errors_are_not_retried(self):
+        endpoint = self.make_endpoint()
+        fn, calls = self.script(KeyError("bad"), "ok")
+        with self.assertRaises(KeyError):
+            endpoint.call(fn)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(endpoint.breaker.failures, 0)
+
+    def test_rate_limits_wait_and_do_not_trip_breaker(self):
+        endpoint = self.make_endpoint()
+        fn, calls = self.script(RateLimitError("429", retry_after=2.0), RateLimitError("429", retry_after=0.0), "ok")
+        self.assertEqual(endpoint.call(fn), "ok")
+        self.assertEqual(self.clock.slept, [2.0])
+        self.assertEqual(endpoint.breaker.failures, 0)
+        self.assertEqual(self.events, ["rate_limited", "rate_limited"])
+
+    def test_rate_limit_attempts_exhausted(self):
+        endpoint = self.make_endpoint()
+        fn, calls = self.script(*[RateLimitError("429", retry_after=0.0)] * 5)
+        with self.assertRaises(RateLimitError):
+            endpoint.call(fn)
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(self.events[-1], "gave_up")
+
+    def test_open_circuit_short_circuits_without_calling(self):
+        endpoint = self.make_endpoint(attempts=1)
+        for _ in range(5):
+            with self.assertRaises(TransientError):
+                endpoint.call(self.script(TransientError("down"))[0])
+        self.assertIn("circuit_open", self.events)
+        fn, calls = self.script("ok")
+        with self.assertRaises(CircuitOpenError):
+            endpoint.call(fn)
+        self.assertEqual(calls, [])
+        self.assertEqual(self.events[-1], "short_circuit")
+
+        self.clock.now += 30.0
+        self.assertEqual(endpoint.call(fn), "ok")
+        self.assertEqual(endpoint.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_deadline_stops_waiting(self):
+        endpoint = self.make_endpoint()
+        fn, calls = self.script(RateLimitError("429", retry_after=5.0), "ok")
+        with self.assertRaises(RateLimitError):
+            endpoint.call(fn, deadline=self.clock.now + 1.0)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(self.clock.slept, [])
+
+    def test_empty_budget_stops_retries(self):
+        endpoint = self.make_endpoint(attempts=10)
+        endpoint.budget = RetryBudget(ratio=0.0, reserve=1.0)
+        fn, calls = self.script(*[TransientError("down")] * 10)
+        with self.assertRaises(TransientError):
+            endpoint.call(fn)
+        self.assertEqual(len(calls), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
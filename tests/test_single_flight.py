@@ -0,0 +1,130 @@
+"""SingleFlight의 동시 호출 합치기와 짧은 응답 메모."""
+import gc
+import threading
+import unittest
+import weakref
+from unittest import mock
+
+import resilience
+from resilience import SingleFlight, TransientError
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+class SingleFlightTest(unittest.TestCase):
+    def test_concurrent_calls_share_one_request(self):
+        events = []
+        flights = SingleFlight(on_event=events.append)
+        release = threading.Event()
+        calls = []
+
+        def fn():
+            calls.append(1)
+            release.wait(5)
+            return {"n": len(calls)}
+
+        results = [None] * 8
+        threads = [threading.Thread(target=lambda i=i: results.__setitem__(i, flights.do("k", fn))) for i in range(8)]
+        for t in threads:
+            t.start()
+        while events.count("coalesced") + events.count("miss") < 8:
+            threading.Event().wait(0.001)
+        release.set()
+        for t in threads:
+            t.join(5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(events.count("miss"), 1)
+        self.assertTrue(all(r is results[0] for r in results))
+        self.assertEqual(flights.flights, {})
+
+    def test_errors_reach_followers_and_are_not_cached(self):
+        coalesced = threading.Event()
+        flights = SingleFlight(ttl=60.0, on_event=lambda kind: kind == "coalesced" and coalesced.set())
+        started = threading.Event()
+
+        def failing():
+            started.set()
+            coalesced.wait(5)
+            raise TransientError("down")
+
+        errors = []
+
+        def run(fn):
+            try:
+                flights.do("k", fn)
+            except TransientError as e:
+                errors.append(e)
+
+        leader = threading.Thread(target=run, args=(failing,))
+        leader.start()
+        started.wait(5)
+        follower = threading.Thread(target=run, args=(lambda: "never",))
+        follower.start()
+        leader.join(5)
+        follower.join(5)
+        self.assertEqual(len(errors), 2)
+        self.assertIs(errors[0], errors[1])
+        self.assertEqual(len(flights.memo), 0)
+        self.assertEqual(flights.do("k", lambda: "fresh"), "fresh")
+
+    def test_ttl_memo_and_lru_limit(self):
+        events = []
+        flights = SingleFlight(ttl=60.0, max_entries=2, on_event=events.append)
+        with mock.patch.object(resilience, "time", FakeClock()) as clock:
+            self.assertEqual(flights.do("a", lambda: 1), 1)
+            self.assertEqual(flights.do("a", lambda: 2), 1)
+            self.assertEqual(events, ["miss", "hit"])
+            flights.do("b", lambda: 1)
+            flights.do("a", lambda: 1)
+            flights.do("c", lambda: 1)
+            self.assertEqual(list(flights.memo), ["a", "c"])
+            clock.now += 61.0
+            self.assertEqual(flights.do("a", lambda: 3), 3)
+        flights.clear()
+        self.assertEqual(len(flights.memo), 0)
+
+    def test_expired_entries_are_released_on_insert(self):
+        class Page(list):
+            pass
+
+        flights = SingleFlight(ttl=60.0, max_entries=4096)
+        refs = []
+        with mock.patch.object(resilience, "time", FakeClock()) as clock:
+            for i in range(100):
+                page = Page(range(10))
+                refs.append(weakref.ref(page))
+                flights.do(("page", i), lambda page=page: page)
+                del page
+            self.assertEqual(len(flights.memo), 100)
+            clock.now += 61.0
+            # 같은 키가 다시 오지 않아도 다음 저장에서 만료분을 놓아준다.
+            flights.do("other", lambda: Page())
+        gc.collect()
+        self.assertEqual(list(flights.memo), ["other"])
+        self.assertTrue(all(ref() is None for ref in refs))
+
+    def test_weight_limit_evicts_least_recently_used(self):
+        flights = SingleFlight(ttl=60.0, max_entries=100, weigh=len, max_weight=10)
+        with mock.patch.object(resilience, "time", FakeClock()):
+            flights.do("a", lambda: [0] * 4)
+            flights.do("b", lambda: [0] * 4)
+            flights.do("a", lambda: [])
+            flights.do("c", lambda: [0] * 4)
+            self.assertEqual(list(flights.memo), ["a", "c"])
+            self.assertEqual(flights.memo_weight, 8)
+            # 혼자서 상한을 넘는 결과는 돌려주기만 하고 기억하지 않는다.
+            self.assertEqual(len(flights.do("big", lambda: [0] * 11)), 11)
+            self.assertNotIn("big", flights.memo)
+            self.assertEqual(flights.memo_weight, 8)
+        flights.clear()
+        self.assertEqual(flights.memo_weight, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,168 @@
+"""EtherscanStreamDecoder는 청크를 어떻게 나눠 받아도 json.loads와 같은 결과를 내야 한다."""
+import json
+import random
+import unittest
+
+from eth_repeat_wallet_mvp import EtherscanStreamDecoder, Transfer, TransferPageSink
+
+FUZZ_DOCS = 300
+
+
+def decode(data: bytes, chunk_sizes, item_fn=lambda item: item, sink=None) -> dict:
+    chunks = []
+    pos = 0
+    sizes = iter(chunk_sizes)
+    while pos < len(data):
+        size = next(sizes)
+        chunks.append(data[pos:pos + size])
+        pos += size
+    return EtherscanStreamDecoder(chunks).decode(item_fn, sink)
+
+
+def random_string(rng: random.Random) -> str:
+    alphabet = 'ab0x"\\/\n\t 한글€😀 '
+    return "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+
+
+def random_scalar(rng: random.Random):
+    kind = rng.randrange(7)
+    if kind == 0:
+        return rng.randint(-10**20, 10**20)
+    if kind == 1:
+        return rng.uniform(-1e6, 1e6)
+    if kind == 2:
+        return rng.choice((True, False, None))
+    if kind == 3:
+        return f"0x{rng.getrandbits(160):040x}"
+    if kind == 4:
+        return str(rng.randint(0, 10**30))
+    if kind == 5:
+        return rng.choice((0, -0.0, 1e-7, 12345678901234567890))
+    return random_string(rng)
+
+
+def random_value(rng: random.Random, depth: int = 0):
+    kind = rng.randrange(4) if depth < 3 else 0
+    if kind == 1:
+        return [random_value(rng, depth + 1) for _ in range(rng.randint(0, 4))]
+    if kind == 2:
+        return {random_string(rng) + str(i): random_value(rng, depth + 1) for i in range(rng.randint(0, 4))}
+    return random_scalar(rng)
+
+
+def random_transfer(rng: random.Random) -> dict:
+    row = {
+        "blockNumber": str(rng.randint(1, 20_000_000)),
+        "timeStamp": str(rng.randint(1_500_000_000, 1_800_000_000)),
+        "hash": f"0x{rng.getrandbits(256):064x}",
+        "from": f"0x{rng.getrandbits(160):040x}",
+        "to": f"0x{rng.getrandbits(160):040x}",
+        "value": str(rng.randint(0, 10**30)),
+        "tokenName": random_string(rng),
+        "tokenSymbol": random_string(rng),
+        "tokenDecimal": str(rng.randint(0, 18)),
+    }
+    if rng.random() < 0.3:
+        row["extra"] = random_value(rng)
+    return row
+
+
+def random_document(rng: random.Random) -> dict:
+    result_kind = rng.randrange(4)
+    if result_kind == 0:
+        result = [random_transfer(rng) for _ in range(rng.randint(0, 30))]
+    elif result_kind == 1:
+        result = [random_value(rng) for _ in range(rng.randint(0, 10))]
+    elif result_kind == 2:
+        result = "Max rate limit reached"
+    else:
+        result = random_value(rng)
+    doc = {"status": rng.choice(("0", "1")), "message": rng.choice(("OK", "NOTOK", "No transactions found")), "result": result}
+    if rng.random() < 0.5:
+        doc["note"] = random_value(rng)
+    items = list(doc.items())
+    rng.shuffle(items)
+    return dict(items)
+
+
+def render(rng: random.Random, doc: dict) -> bytes:
+    """공백/이스케이프 방식을 섞어 같은 문서를 여러 모양으로 직렬화한다."""
+    indent = rng.choice((None, None, 0, 2))
+    separators = rng.choice(((",", ":"), (", ", ": "), (" ,\r\n", " :\t")))
+    text = json.dumps(doc, ensure_ascii=rng.random() < 0.5, indent=indent, separators=separators)
+    return (" \n" * rng.randint(0, 2) + text + "\r\n" * rng.randint(0, 2)).encode("utf-8")
+
+
+class EtherscanStreamDecoderTest(unittest.TestCase):
+    def test_result_items_go_through_item_fn(self):
+        data = b'{"status":"1","message":"OK","result":[{"hash":"0xa","value":"1"},{"hash":"0xb","value":"22"}]}'
+        out = decode(data, iter(lambda: 7, None), lambda item: (item["hash"], int(item["value"])))
+        self.assertEqual(out, {"status": "1", "message": "OK", "result": [("0xa", 1), ("0xb", 22)]})
+
+    def test_non_array_result_is_kept(self):
+        data = b'{"status":"0","message":"NOTOK","result":"Max rate limit reached"}'
+        out = decode(data, iter(lambda: 3, None), lambda item: self.fail("item_fn 호출되면 안 됨"))
+        self.assertEqual(out, json.loads(data))
+        self.assertEqual(decode(b'{"result":[]}', [13], lambda item: 1), {"result": []})
+        self.assertEqual(decode(b" {} ", [4]), {})
+
+    def test_every_split_point(self):
+        doc = {"status": "1", "result": [{"value": 1234567890, "name": "한글😀", "esc": 'a"\\b'}, -12.5e3, [1, 2]], "tail": 10}
+        data = json.dumps(doc, ensure_ascii=False).encode("utf-8")
+        for cut in range(1, len(data)):
+            with self.subTest(cut=cut):
+                self.assertEqual(EtherscanStreamDecoder([data[:cut], data[cut:]]).decode(lambda x: x), doc)
+        self.assertEqual(decode(data, iter(lambda: 1, None)), doc)
+
+    def test_truncated_or_invalid_input_raises(self):
+        data = json.dumps({"status": "1", "result": [{"a": 1}, {"b": 2}]}).encode()
+        for cut in range(0, len(data) - 1):
+            with self.subTest(cut=cut):
+                with self.assertRaises(ValueError):
+                    EtherscanStreamDecoder([data[:cut]]).decode(lambda x: x)
+        with self.assertRaises(ValueError):
+            EtherscanStreamDecoder([b"<html>502 Bad Gateway</html>"]).decode(lambda x: x)
+        with self.assertRaises(ValueError):
+            EtherscanStreamDecoder([b'{"result":[1 2]}']).decode(lambda x: x)
+
+    def test_sink_gets_items_in_order_and_result_keeps_count(self):
+        doc = {"status": "1", "result": [{"n": i} for i in range(25)], "message": "OK"}
+        got = []
+        out = decode(json.dumps(doc).encode(), iter(lambda: 5, None), lambda item: item["n"], got.append)
+        self.assertEqual(got, list(range(25)))
+        self.assertEqual(out, {"status": "1", "result": 25, "message": "OK"})
+        error = EtherscanStreamDecoder([b'{"status":"0","result":"Max rate limit reached"}']).decode(lambda x: x, got.append)
+        self.assertEqual(error["result"], "Max rate limit reached")
+
+    def test_fuzz_matches_json_loads(self):
+        rng = random.Random(20240601)
+        for n in range(FUZZ_DOCS):
+            data = render(rng, random_document(rng))
+            expected = json.loads(data)
+            max_chunk = rng.choice((1, 2, 3, 7, 64, 4096))
+            sizes = iter(lambda: rng.randint(1, max_chunk), None)
+            with self.subTest(doc=n, max_chunk=max_chunk):
+                self.assertEqual(decode(data, sizes), expected)
+
+
+def make_transfer(ts: int) -> Transfer:
+    return Transfer("1", "0xw", 1, ts, f"0x{ts:x}", "0xa", "0xb", "T", "Token", "0xc", "1", 0, 1.0)
+
+
+class TransferPageSinkTest(unittest.TestCase):
+    def test_saves_recent_rows_in_batches(self):
+        batches = []
+        page_sink = TransferPageSink(lambda rows: batches.append(list(rows)) or len(rows), cutoff=100, batch_rows=3)
+        for ts in (200, 190, 180, 170, 160, 150, 140, 90, 80):
+            page_sink(make_transfer(ts))
+        self.assertEqual([len(b) for b in batches], [3, 3])
+        page_sink.flush()
+        self.assertEqual([len(b) for b in batches], [3, 3, 1])
+        self.assertTrue(all(t.timestamp >= 100 for b in batches for t in b))
+        self.assertEqual((page_sink.received, page_sink.recent, page_sink.saved, page_sink.oldest_ts), (9, 7, 7, 80))
+        page_sink.flush()
+        self.assertEqual(len(batches), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()